@@ -0,0 +1,79 @@
+"""Exposure ledger and admission tests"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "ULTIMATE_CORE_SYSTEMS"))
+
+from ai_orchestra_conductor import (AdmissionController, AdmissionResult, ExposureLedger, Intent,
+                                    IntentAction, PolicyEngine)
+
+LIMITS = {"total": 0.5, "strategy": 0.2, "symbol": 0.1, "exchange": 0.4}
+
+
+def make_intent(size, symbol="BTCUSDT", limit_price=None, confidence=0.9):
+    """Momentum buy intent on binance"""
+    return Intent(strategy="momentum", symbol=symbol, side=IntentAction.BUY, size_hint=size,
+                  confidence=confidence, model_version="test", timestamp="2025-01-01T00:00:00",
+                  reasoning="test", limit_price=limit_price)
+
+
+class TestExposureLedger:
+    """Test reservations, fills and limit checks"""
+
+    def test_reservations_fills_and_release(self):
+        """Test a fill consumes its reservation and a release frees the rest"""
+        ledger = ExposureLedger(1000.0)
+        assert ledger.try_reserve("a", "momentum", "BTC", "binance", 80.0, LIMITS)[0]
+        ledger.apply_fill("momentum", "BTC", "binance", 30.0, reservation_id="a")
+
+        assert ledger.exposure("symbol", "BTC") == pytest.approx(0.08)
+        assert ledger.release("a") == pytest.approx(50.0)
+        assert ledger.exposure() == pytest.approx(0.03)
+
+        ok, reason = ledger.try_reserve("b", "momentum", "BTC", "binance", 80.0, LIMITS)
+        assert not ok
+        assert "Symbol BTC" in reason
+
+    def test_failed_re_reserve_keeps_previous_hold(self):
+        """Test growing a reservation past a limit leaves the old reservation intact"""
+        ledger = ExposureLedger(1000.0)
+        assert ledger.try_reserve("a", "momentum", "BTC", "binance", 60.0, LIMITS)[0]
+
+        ok, _ = ledger.try_reserve("a", "momentum", "BTC", "binance", 150.0, LIMITS)
+
+        assert not ok
+        assert ledger.reservations["a"][3] == pytest.approx(60.0)
+        assert ledger.exposure("symbol", "BTC") == pytest.approx(0.06)
+
+    def test_total_value_rescales_exposure(self):
+        """Test a reconciled portfolio value changes every exposure fraction"""
+        ledger = ExposureLedger(1000.0)
+        ledger.load_positions({("momentum", "BTC", "binance"): 50.0})
+        ledger.set_total_value(500.0)
+        assert ledger.exposure("strategy", "momentum") == pytest.approx(0.1)
+
+
+class TestAdmissionPricing:
+    """Test how admission prices intents into notional"""
+
+    @pytest.mark.asyncio
+    async def test_unpriced_intent_is_queued_not_rejected(self):
+        """Test an intent with no reference or limit price is queued"""
+        controller = AdmissionController(PolicyEngine())
+        decision = await controller.admit_intent(make_intent(1.0))
+        assert decision.result == AdmissionResult.QUEUE
+        assert controller.exposure_ledger.reservations == {}
+
+    @pytest.mark.asyncio
+    async def test_limit_price_prices_the_intent(self):
+        """Test the intent's limit price is used when no reference price is known"""
+        controller = AdmissionController(PolicyEngine())
+        decision = await controller.admit_intent(make_intent(1.0, limit_price=50000.0))
+        assert decision.result == AdmissionResult.APPROVE
+        assert controller.exposure_ledger.exposure("symbol", "BTCUSDT") == pytest.approx(0.05)
+
+        controller.update_reference_prices({"BTCUSDT": 100000.0})
+        decision = await controller.admit_intent(make_intent(1.0, limit_price=50000.0))
+        assert decision.result == AdmissionResult.REJECT
+        assert "Symbol BTCUSDT" in decision.reason
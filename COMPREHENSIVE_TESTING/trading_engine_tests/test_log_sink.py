@@ -0,0 +1,100 @@
+"""Batched log sink tests"""
+import os
+import sys
+import sqlite3
+import threading
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "ECOSYSTEM_UTILITIES"))
+
+from utils_monitoring_ops import LogSink
+
+
+def make_entry(timestamp, message="tick", level="INFO", **metadata):
+    """Log entry shaped like StructuredLoggingSystem.log_structured builds it"""
+    return {"timestamp": timestamp, "logger_name": "trading", "level": level,
+            "message": message, "metadata": metadata}
+
+
+def held_sink(monkeypatch, db_path, **kwargs):
+    """Sink whose writer waits on the returned event before draining the queue"""
+    release = threading.Event()
+    connect = LogSink._connect
+
+    def blocked_connect(self):
+        release.wait(5.0)
+        return connect(self)
+
+    monkeypatch.setattr(LogSink, "_connect", blocked_connect)
+    return LogSink(db_path, **kwargs), release
+
+
+class TestLogSink:
+    """Test day partitioning, overflow policies and retention"""
+
+    def test_entries_land_in_day_partitions(self, tmp_path):
+        """Test flush() waits for the writer and rows go to their UTC day's table"""
+        sink = LogSink(str(tmp_path / "logs.db"), batch_size=2, flush_interval=0.05, retention_days=0)
+        try:
+            for timestamp in ("2025-01-01T23:59:59", "2025-01-02T00:00:00", "2025-01-02T00:00:01"):
+                assert sink.submit(make_entry(timestamp, trade_id="t1", symbol="BTC/USDT"))
+            assert sink.flush()
+        finally:
+            sink.close()
+
+        conn = sqlite3.connect(str(tmp_path / "logs.db"))
+        try:
+            assert LogSink.list_partitions(conn) == ["logs_20250101", "logs_20250102"]
+            rows = conn.execute("SELECT trade_id, symbol FROM logs_20250102").fetchall()
+            assert rows == [("t1", "BTC/USDT"), ("t1", "BTC/USDT")]
+        finally:
+            conn.close()
+
+    def test_drop_newest_discards_overflow(self, tmp_path, monkeypatch):
+        """Test a full queue under drop_newest rejects the new entry and counts it"""
+        sink, release = held_sink(monkeypatch, str(tmp_path / "logs.db"), max_queue=2,
+                                  overflow_policy="drop_newest", retention_days=0)
+        try:
+            results = [sink.submit(make_entry("2025-01-01T00:00:0%d" % i, message=str(i))) for i in range(3)]
+            assert results == [True, True, False]
+            assert sink.dropped == 1
+            release.set()
+            assert sink.flush()
+        finally:
+            release.set()
+            sink.close()
+
+        conn = sqlite3.connect(str(tmp_path / "logs.db"))
+        try:
+            assert [r[0] for r in conn.execute("SELECT message FROM logs_20250101 ORDER BY id")] == ["0", "1"]
+        finally:
+            conn.close()
+
+    def test_drop_oldest_keeps_latest(self, tmp_path, monkeypatch):
+        """Test a full queue under drop_oldest evicts the oldest queued entry"""
+        sink, release = held_sink(monkeypatch, str(tmp_path / "logs.db"), max_queue=2, retention_days=0)
+        try:
+            assert all(sink.submit(make_entry("2025-01-01T00:00:0%d" % i, message=str(i))) for i in range(3))
+            assert sink.dropped == 1
+            release.set()
+            assert sink.flush()
+        finally:
+            release.set()
+            sink.close()
+
+        conn = sqlite3.connect(str(tmp_path / "logs.db"))
+        try:
+            assert [r[0] for r in conn.execute("SELECT message FROM logs_20250101 ORDER BY id")] == ["1", "2"]
+        finally:
+            conn.close()
+
+    def test_retention_drops_old_partitions(self, tmp_path):
+        """Test drop_partitions_before removes whole day tables older than the cutoff"""
+        sink = LogSink(str(tmp_path / "logs.db"), retention_days=0)
+        try:
+            for timestamp in ("2025-01-01T12:00:00", "2025-01-05T12:00:00"):
+                sink.submit(make_entry(timestamp))
+            assert sink.flush()
+            assert sink.drop_partitions_before(datetime(2025, 1, 3)) == ["logs_20250101"]
+        finally:
+            sink.close()
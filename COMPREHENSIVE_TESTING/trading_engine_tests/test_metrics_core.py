@@ -0,0 +1,71 @@
+"""Metrics ring buffer and quantile tests"""
+import os
+import sys
+import threading
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from metrics_core import HdrHistogram, MetricSeries, MetricsRegistry
+
+
+class TestMetricsCore:
+    """Test ring buffers, rollups and HDR quantiles"""
+
+    def test_hdr_quantiles_within_bucket_error(self):
+        """Test HDR percentiles stay within ~1.6% of the exact quantiles"""
+        values = np.random.default_rng(11).lognormal(3.0, 1.0, 100000)
+        histogram = HdrHistogram()
+        histogram.record_values(values)
+
+        percentiles = histogram.percentiles((0.5, 0.99))
+        for q, estimate in percentiles.items():
+            assert estimate == pytest.approx(np.quantile(values, q), rel=0.02)
+
+    def test_lapped_ring_keeps_exact_totals(self):
+        """Test overwritten samples are counted as dropped while count and sum stay exact"""
+        series = MetricSeries("orders", kind="counter", capacity=8)
+        for i in range(20):
+            series.record(1.0, timestamp=1000.0 + i)
+
+        new_values = series.collect()
+        assert len(new_values) == 8
+        assert series.dropped == 12
+        assert series.count == 20
+        assert series.total == pytest.approx(20.0)
+        assert series.last(3).tolist() == [1.0, 1.0, 1.0]
+
+    def test_rollups_bucket_by_resolution(self):
+        """Test 1s and 1m rollups aggregate samples into their buckets"""
+        series = MetricSeries("latency_ms", kind="latency")
+        for i, value in enumerate([1.0, 3.0, 5.0, 7.0]):
+            series.record(value, timestamp=600.0 + i * 30)
+        series.collect()
+
+        minute = series.rollups["1m"].window()
+        assert minute["count"].tolist() == [2, 2]
+        assert minute["mean"].tolist() == [2.0, 6.0]
+        assert minute["max"].tolist() == [3.0, 7.0]
+        assert len(series.rollups["1s"].window()["count"]) == 4
+
+    def test_concurrent_writers_lose_no_samples(self):
+        """Test several writer threads on one series keep an exact count and sum"""
+        registry = MetricsRegistry(capacity=1 << 16)
+        series = registry.counter("fills")
+
+        def write():
+            for _ in range(5000):
+                series.record(2.0)
+
+        threads = [threading.Thread(target=write) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        registry.collect()
+
+        assert series.count == 20000
+        assert series.total == pytest.approx(40000.0)
+        assert series.dropped == 0
+        assert "fills" in registry.render_prometheus(collect=False)
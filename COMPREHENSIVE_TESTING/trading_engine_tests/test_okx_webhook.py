@@ -0,0 +1,114 @@
+"""OKX webhook ingestion tests"""
+import os
+import sys
+import json
+import hmac
+import hashlib
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "ULTIMATE_EXCHANGE_INTEGRATION", "okx"))
+os.environ.setdefault("OKX_WEBHOOK_SECRET", "test-secret")
+
+from okx_webhook import OKXWebhookHandler
+
+
+def signed(body):
+    """Payload bytes and their signature under the handler's secret"""
+    payload = json.dumps(body).encode("utf-8") if not isinstance(body, bytes) else body
+    secret = os.environ["OKX_WEBHOOK_SECRET"].encode("utf-8")
+    return payload, hmac.new(secret, payload, hashlib.sha256).hexdigest()
+
+
+async def send(handler, kind, body):
+    """Ingest one signed callback"""
+    return await handler.ingest(kind, *signed(body))
+
+
+class TestOKXWebhook:
+    """Test validation, dedup and journal recovery"""
+
+    @pytest.mark.asyncio
+    async def test_malformed_bodies_are_rejected_with_400(self, tmp_path):
+        """Test invalid JSON and non-object bodies return 400 instead of raising"""
+        handler = OKXWebhookHandler(journal_path=str(tmp_path / "journal.jsonl"))
+        await handler.start()
+        try:
+            for payload in (b"{not json", b"[1, 2]", b"\xff\xfe"):
+                body, status = await send(handler, "order", payload)
+                assert status == 400
+            assert handler.stats["rejected"] == 3
+        finally:
+            await handler.stop()
+
+    @pytest.mark.asyncio
+    async def test_update_time_alone_dedups_by_digest(self, tmp_path):
+        """Test two different updates sharing a uTime are both accepted and exact retries are not"""
+        handler = OKXWebhookHandler(journal_path=str(tmp_path / "journal.jsonl"))
+        await handler.start()
+        try:
+            filled = {"orderId": "1", "status": "partially_filled", "uTime": "1700000000000"}
+            cancelled = dict(filled, status="canceled")
+            results = [await send(handler, "order", body) for body in (filled, cancelled, filled)]
+            assert [body["duplicate"] for body, _ in results] == [False, False, True]
+        finally:
+            await handler.stop()
+
+    @pytest.mark.asyncio
+    async def test_sequence_memory_is_bounded(self, tmp_path):
+        """Test last_sequence keeps only the dedup_window most recent keys"""
+        handler = OKXWebhookHandler(journal_path=str(tmp_path / "journal.jsonl"), dedup_window=3)
+        await handler.start()
+        try:
+            for order_id in range(5):
+                await send(handler, "order", {"orderId": str(order_id), "seqId": 1})
+            assert list(handler.last_sequence) == ["order:2", "order:3", "order:4"]
+        finally:
+            await handler.stop()
+
+    @pytest.mark.asyncio
+    async def test_compacted_journal_recovers_dedup_state(self, tmp_path):
+        """Test compaction drops acked entries and a restart still rejects old callbacks"""
+        path = tmp_path / "journal.jsonl"
+        handler = OKXWebhookHandler(journal_path=str(path), compact_every=10)
+        await handler.start()
+        for seq in range(1, 31):
+            await send(handler, "order", {"orderId": "7", "seqId": seq})
+        await send(handler, "balance", {"asset": "USDT", "balance": "10"})
+        await handler.stop()
+
+        assert handler.journal.compactions > 0
+        with open(path) as f:
+            assert sum(1 for _ in f) < 31
+
+        restarted = OKXWebhookHandler(journal_path=str(path))
+        await restarted.start()
+        try:
+            assert restarted.stats["replayed"] == 0
+            body, _ = await send(restarted, "order", {"orderId": "7", "seqId": 12})
+            assert body["duplicate"] is True
+            body, _ = await send(restarted, "balance", {"asset": "USDT", "balance": "10"})
+            assert body["duplicate"] is True
+            body, _ = await send(restarted, "order", {"orderId": "7", "seqId": 31})
+            assert body["duplicate"] is False
+        finally:
+            await restarted.stop()
+
+    @pytest.mark.asyncio
+    async def test_undispatched_entries_survive_compaction(self, tmp_path):
+        """Test entries still unacked at compaction time are re-published on restart"""
+        path = tmp_path / "journal.jsonl"
+        handler = OKXWebhookHandler(journal_path=str(path), compact_every=1)
+        handler.journal.start()
+        for seq in (1, 2):
+            await handler.journal.append({"kind": "order", "dedup_key": "order:9", "sequence": seq,
+                                          "digest": str(seq), "data": {"orderId": "9", "seqId": seq}})
+        await handler.journal.stop()
+        assert handler.journal.compactions > 0
+
+        restarted = OKXWebhookHandler(journal_path=str(path))
+        delivered = []
+        restarted.dispatcher.subscribe("order", lambda data: delivered.append(data["seqId"]))
+        await restarted.start()
+        await restarted.stop()
+        assert delivered == [1, 2]
+        assert restarted.stats["replayed"] == 2
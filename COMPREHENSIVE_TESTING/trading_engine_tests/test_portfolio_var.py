@@ -0,0 +1,62 @@
+"""Portfolio VaR return history tests"""
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "ECOSYSTEM_TRADING_ENGINE"))
+
+from trading_advanced_infrastructure import PortfolioRiskManager
+
+
+POSITIONS = {
+    "BTC": {"market_value": 60000.0, "volatility": 0.5},
+    "ETH": {"market_value": 40000.0, "volatility": 0.5}
+}
+
+
+def correlated_returns(bars, seed=7):
+    """Two return series with correlation around 0.8"""
+    rng = np.random.default_rng(seed)
+    common = rng.normal(0, 0.02, bars)
+    return common + rng.normal(0, 0.01, bars), common + rng.normal(0, 0.01, bars)
+
+
+class TestPortfolioVaR:
+    """Test the return history feeding the Monte Carlo VaR"""
+
+    def test_repeated_dict_updates_accumulate_bars(self):
+        """Test one-bar dict updates each become a new history row"""
+        manager = PortfolioRiskManager(num_simulations=2000, seed=1, min_history=30)
+        btc, eth = correlated_returns(50)
+        for b, e in zip(btc, eth):
+            manager.update_return_history({"BTC": b, "ETH": e})
+
+        assert len(manager.return_history) == 50
+        assert manager.return_history.index.is_monotonic_increasing
+        assert manager.return_history["BTC"].to_numpy() == pytest.approx(btc)
+
+        result = manager.calculate_portfolio_var(POSITIONS)
+        assert result["assets_with_history"] == 2
+        # Sample volatility is ~2%, far below the 50% fallback
+        assert result["var_percentage"] < 0.1
+
+    def test_list_updates_append_in_order(self):
+        """Test dicts of return lists append as consecutive bars"""
+        manager = PortfolioRiskManager(num_simulations=1000, seed=1, history_window=40)
+        btc, eth = correlated_returns(60)
+        for start in range(0, 60, 20):
+            manager.update_return_history({"BTC": btc[start:start + 20], "ETH": eth[start:start + 20]})
+
+        assert len(manager.return_history) == 40
+        assert manager.return_history["ETH"].to_numpy() == pytest.approx(eth[20:])
+
+    def test_resent_timestamp_replaces_bar(self):
+        """Test a time-indexed bar sent twice is kept once, with the later values"""
+        manager = PortfolioRiskManager(num_simulations=1000, seed=1)
+        index = pd.date_range("2025-01-01", periods=3, freq="D")
+        manager.update_return_history(pd.DataFrame({"BTC": [0.01, 0.02, 0.03]}, index=index))
+        manager.update_return_history(pd.DataFrame({"BTC": [0.05]}, index=index[-1:]))
+
+        assert manager.return_history["BTC"].tolist() == [0.01, 0.02, 0.05]
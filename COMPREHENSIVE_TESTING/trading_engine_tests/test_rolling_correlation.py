@@ -0,0 +1,45 @@
+"""Rolling correlation service tests"""
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "ECOSYSTEM_TRADING_ENGINE"))
+
+from trading_advanced_infrastructure import RollingCorrelationService
+
+
+class TestRollingCorrelation:
+    """Test the exponentially weighted correlation service"""
+
+    def test_pairs_warm_up_before_reporting(self):
+        """Test a pair reports no correlation until min_periods shared bars"""
+        service = RollingCorrelationService(halflife=30, min_periods=20)
+        rng = np.random.default_rng(3)
+        for value in rng.normal(0, 0.01, 19):
+            service.update({"BTC": value, "ETH": value})
+
+        assert service.correlation("BTC", "ETH") is None
+        assert not service.ready
+
+        service.update({"BTC": 0.01, "ETH": 0.01})
+        assert service.correlation("BTC", "ETH") == pytest.approx(1.0)
+
+    def test_correlation_signs_and_max_pair(self):
+        """Test co-moving and opposing series and the reported maximum pair"""
+        service = RollingCorrelationService(halflife=60, min_periods=20)
+        rng = np.random.default_rng(5)
+        base = rng.normal(0, 0.02, 200)
+        service.update_many(pd.DataFrame({
+            "BTC": base,
+            "ETH": base + rng.normal(0, 0.002, 200),
+            "INV": -base,
+            "SOL": rng.normal(0, 0.02, 200)
+        }))
+
+        assert service.correlation("BTC", "ETH") > 0.95
+        assert service.correlation("BTC", "INV") == pytest.approx(-1.0)
+        assert abs(service.correlation("BTC", "SOL")) < 0.3
+        assert set(service.max_pair) == {"BTC", "ETH"}
+        assert np.isnan(service.submatrix(["BTC", "UNKNOWN"])[0, 1])
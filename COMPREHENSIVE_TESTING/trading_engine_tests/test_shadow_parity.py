@@ -0,0 +1,90 @@
+"""Shadow parity join tests"""
+import os
+import sys
+from datetime import datetime
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "ULTIMATE_CORE_SYSTEMS"))
+
+from shadow_executor import (Intent, MirrorRequest, RealOrder, ShadowDiffEngine, ShadowExecutor,
+                             ShadowOrderGenerator, ShadowParityEngine)
+
+
+def make_intent(intent_id="intent_test"):
+    """TWAP intent on a venue the generator knows"""
+    return Intent(id=intent_id, timestamp="2025-01-01T00:00:00", strategy="TWAP", symbol="BTC-USDT",
+                  side="BUY", size_hint=0.5, timeframe="5m", confidence=0.9,
+                  constraints={"post_only": True}, venue_hint="BINANCE")
+
+
+def real_from(shadow, **changes):
+    """Real order copying a shadow leg, with optional field changes"""
+    fields = dict(venue=shadow.venue, symbol=shadow.symbol, side=shadow.side, qty=shadow.qty,
+                  price=shadow.price, order_type=shadow.order_type, post_only=shadow.post_only,
+                  time_in_force=shadow.time_in_force, client_order_id=shadow.client_order_id,
+                  timestamp=datetime.utcnow().isoformat())
+    fields.update(changes)
+    return RealOrder(**fields)
+
+
+class TestShadowParity:
+    """Test the client_order_id streaming join"""
+
+    def test_join_pairs_by_client_order_id_not_position(self):
+        """Test legs arriving out of order are paired by client_order_id"""
+        shadows = ShadowOrderGenerator().make_shadow_orders(make_intent(), "BINANCE")
+        engine = ShadowParityEngine(ShadowDiffEngine(), batch_size=100)
+        for shadow in shadows:
+            engine.ingest_shadow(shadow, now=0.0)
+        for shadow in reversed(shadows):
+            engine.ingest_real(real_from(shadow), now=0.1)
+
+        assert engine.flush() == []
+        stats = engine.get_statistics()
+        assert stats["compared"] == 4
+        assert stats["violations"] == 0
+        assert engine.distributions[("BINANCE", "BTC-USDT", "TWAP")].summary()["mean_parity"] == pytest.approx(1.0)
+
+    def test_batch_flushes_on_deadline_and_orphans_expire(self):
+        """Test poll() evaluates a quiet batch and expires unmatched orders"""
+        shadows = ShadowOrderGenerator().make_shadow_orders(make_intent(), "BINANCE")
+        engine = ShadowParityEngine(ShadowDiffEngine(), window_seconds=5.0, batch_size=100, max_batch_age=1.0)
+        engine.ingest_shadow(shadows[0], now=0.0)
+        engine.ingest_shadow(shadows[1], now=0.0)
+        engine.ingest_real(real_from(shadows[0], side="SELL"), now=0.5)
+
+        assert engine.get_statistics()["matched_unflushed"] == 1
+        violations = engine.poll(now=1.6)
+        assert [v.real_order.side for v in violations] == ["SELL"]
+
+        engine.poll(now=10.0)
+        stats = engine.get_statistics()
+        assert stats["orphan_shadow"] == 1
+        assert stats["pending_shadow"] == 0
+
+    def test_health_status_does_not_flush(self):
+        """Test the health probe reads the batch statistics without evaluating the open batch"""
+        executor = ShadowExecutor()
+        shadows = executor.generator.make_shadow_orders(make_intent(), "BINANCE")
+        executor.parity_engine.ingest_shadow(shadows[0])
+        executor.record_real_order(real_from(shadows[0]))
+
+        batch = executor.get_health_status()["statistics"]["batch_parity"]
+        assert batch["matched_unflushed"] == 1
+        assert batch["compared"] == 0
+        assert executor.parity_engine.get_statistics()["matched_unflushed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_mirror_intent_reports_joined_pairs(self):
+        """Test mirror_intent reports one result per joined leg and flags the mismatched one"""
+        executor = ShadowExecutor()
+        intent = make_intent()
+        shadows = executor.generator.make_shadow_orders(intent, "BINANCE")
+        reals = [real_from(s) for s in shadows[:3]] + [real_from(shadows[3], symbol="ETH-USDT")]
+
+        response = await executor.mirror_intent(MirrorRequest(intent=intent, real_orders=list(reversed(reals))))
+
+        assert len(response.parity_results) == 4
+        assert response.critical_violations == 1
+        mismatched = [r for r in response.parity_results if not r.parity_ok]
+        assert [r.real_order.client_order_id for r in mismatched] == [shadows[3].client_order_id]
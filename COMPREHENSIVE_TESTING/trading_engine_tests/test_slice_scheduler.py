@@ -0,0 +1,116 @@
+"""Slice scheduler tests driven by a simulated clock"""
+import os
+import sys
+import asyncio
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "ECOSYSTEM_TRADING_ENGINE"))
+
+from trading_advanced_infrastructure import SimulatedClock, SliceScheduler
+
+
+def make_scheduler(calls, gates=None):
+    """Scheduler on a simulated clock whose venues fill every slice in full."""
+    clock = SimulatedClock()
+    gates = gates or {}
+
+    async def execute_batch(exchange, requests):
+        calls.append((exchange, clock.now(), [r["slice_id"] for r in requests]))
+        if exchange in gates:
+            await gates[exchange].wait()
+        return [{
+            "slice_id": r["slice_id"],
+            "executed_quantity": r["quantity"],
+            "avg_price": 100.0,
+            "scheduled_time": r["scheduled_time"]
+        } for r in requests]
+
+    return clock, SliceScheduler(execute_batch, clock=clock, tick_seconds=0.1)
+
+
+class TestSliceScheduler:
+    """Test the timer-wheel slice scheduler"""
+
+    @pytest.mark.asyncio
+    async def test_twap_slices_fire_on_schedule(self):
+        """Test TWAP slices fire at their scheduled times without drift"""
+        calls = []
+        clock, scheduler = make_scheduler(calls)
+        parent_id = scheduler.submit("TWAP", "BTC/USDT", "buy", 8.0, "okx", num_slices=4, interval=10.0)
+
+        await scheduler.advance(35.0)
+
+        plan = await scheduler.wait(parent_id)
+        assert plan["status"] == "completed"
+        assert [s["scheduled_time"] for s in plan["slices"]] == [0.0, 10.0, 20.0, 30.0]
+        assert [round(s["executed_quantity"], 9) for s in plan["slices"]] == [2.0, 2.0, 2.0, 2.0]
+        assert plan["total_executed"] == pytest.approx(8.0)
+
+    @pytest.mark.asyncio
+    async def test_slow_venue_does_not_delay_other_venues(self):
+        """Test a venue stuck in a batch does not hold back slices due on other venues"""
+        calls = []
+        gate = asyncio.Event()
+        clock, scheduler = make_scheduler(calls, gates={"slow": gate})
+        slow_id = scheduler.submit("TWAP", "BTC/USDT", "buy", 4.0, "slow", num_slices=4, interval=1.0)
+        fast_id = scheduler.submit("TWAP", "ETH/USDT", "buy", 4.0, "fast", num_slices=4, interval=1.0)
+
+        for _ in range(4):
+            clock.advance(1.0)
+            await scheduler.process_until(clock.now())
+            await asyncio.sleep(0)
+
+        assert scheduler.get_progress(fast_id)["status"] == "completed"
+        assert scheduler.get_progress(slow_id)["slices_sent"] == 1
+        assert len([c for c in calls if c[0] == "fast"]) == 4
+
+        gate.set()
+        await scheduler.drain()
+        assert scheduler.get_progress(slow_id)["executed_quantity"] == pytest.approx(1.0)
+
+    @pytest.mark.asyncio
+    async def test_cancel_stops_further_slices(self):
+        """Test cancelling a parent stops its remaining slices"""
+        calls = []
+        clock, scheduler = make_scheduler(calls)
+        parent_id = scheduler.submit("TWAP", "BTC/USDT", "sell", 10.0, "kraken", num_slices=5, interval=10.0)
+
+        await scheduler.advance(15.0)
+        progress = scheduler.cancel(parent_id, reason="risk limit")
+        await scheduler.advance(100.0)
+
+        assert progress["status"] == "cancelled"
+        assert scheduler.get_progress(parent_id)["slices_sent"] == 2
+        assert len(calls) == 2
+        assert scheduler.cancel(parent_id) is None
+
+    @pytest.mark.asyncio
+    async def test_amend_resizes_and_reschedules(self):
+        """Test amending quantity and interval applies to the remaining slices"""
+        calls = []
+        clock, scheduler = make_scheduler(calls)
+        parent_id = scheduler.submit("TWAP", "BTC/USDT", "buy", 8.0, "okx", num_slices=4, interval=10.0)
+
+        await scheduler.advance(5.0)
+        scheduler.amend(parent_id, total_quantity=5.0, interval=20.0)
+        await scheduler.advance(100.0)
+
+        plan = await scheduler.wait(parent_id)
+        assert [s["scheduled_time"] for s in plan["slices"]] == [0.0, 20.0, 40.0, 60.0]
+        assert [round(s["executed_quantity"], 9) for s in plan["slices"]] == [2.0, 1.0, 1.0, 1.0]
+        assert plan["total_executed"] == pytest.approx(5.0)
+
+    @pytest.mark.asyncio
+    async def test_progress_table_filters_by_status(self):
+        """Test the progress table reports each parent with its status"""
+        calls = []
+        clock, scheduler = make_scheduler(calls)
+        done_id = scheduler.submit("ICEBERG", "BTC/USDT", "buy", 3.0, "okx",
+                                   visible_quantity=1.0, min_delay=1, max_delay=2)
+        active_id = scheduler.submit("TWAP", "ETH/USDT", "buy", 4.0, "okx", num_slices=4, interval=60.0)
+
+        await scheduler.advance(10.0)
+
+        assert [row["parent_id"] for row in scheduler.progress_table("completed")] == [done_id]
+        assert [row["parent_id"] for row in scheduler.progress_table("active")] == [active_id]
+        assert scheduler.get_progress(active_id)["fill_pct"] == pytest.approx(25.0)
@@ -0,0 +1,65 @@
+"""Trade replay store tests"""
+import os
+import sys
+import time
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "ECOSYSTEM_UTILITIES"))
+
+from utils_monitoring_ops import TradeReplaySystem
+
+
+def make_trade(trade_id, timestamp, symbol="BTC/USDT", pnl=1.0):
+    """Minimal trade row"""
+    return {"trade_id": trade_id, "timestamp": timestamp, "symbol": symbol, "side": "buy",
+            "exchange": "okx", "strategy": "arb", "quantity": 0.1, "price": 50000.0, "pnl": pnl}
+
+
+def segment_count(replay):
+    """Published segments across all partitions"""
+    return sum(1 for _, dirs, _ in os.walk(replay.trade_store_path)
+               for d in dirs if not d.startswith((".", "date=", "symbol=")))
+
+
+class TestTradeReplay:
+    """Test buffering, time-based flushing and replay reads"""
+
+    def test_buffered_trades_flush_after_interval(self, tmp_path):
+        """Test a trade below flush_size reaches disk within flush_interval"""
+        replay = TradeReplaySystem(flush_size=1000, flush_interval=0.2, replay_path=str(tmp_path))
+        try:
+            replay.record_trade(make_trade("t1", "2025-01-01T00:00:00"))
+            assert segment_count(replay) == 0
+
+            deadline = time.monotonic() + 2.0
+            while segment_count(replay) == 0 and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert segment_count(replay) == 1
+        finally:
+            replay.close()
+
+    def test_load_trades_keeps_latest_version_and_anonymous_trades(self, tmp_path):
+        """Test re-recorded trade_ids collapse while trades without an id are all kept"""
+        replay = TradeReplaySystem(flush_size=2, flush_interval=60.0, replay_path=str(tmp_path))
+        try:
+            replay.record_trades([make_trade("t1", "2025-01-01T00:00:00", pnl=1.0),
+                                  make_trade("t1", "2025-01-01T00:00:01", pnl=2.0),
+                                  make_trade(None, "2025-01-01T00:00:02"),
+                                  make_trade(None, "2025-01-01T00:00:03", symbol="ETH/USDT")])
+
+            trades = replay.load_trades("2025-01-01", "2025-01-02", columns=["trade_id", "symbol", "pnl"])
+            assert trades["trade_id"].tolist() == ["t1", "", ""]
+            assert trades["pnl"].tolist()[0] == pytest.approx(2.0)
+
+            btc = replay.load_trades("2025-01-01", "2025-01-02", filters={"symbol": "BTC/USDT"})
+            assert len(btc) == 2
+        finally:
+            replay.close()
+
+    def test_close_writes_remaining_buffer(self, tmp_path):
+        """Test close() flushes trades that never reached flush_size"""
+        replay = TradeReplaySystem(flush_size=1000, flush_interval=60.0, replay_path=str(tmp_path))
+        replay.record_trade(make_trade("t1", "2025-01-01T00:00:00"))
+        replay.close()
+
+        assert segment_count(replay) == 1
@@ -0,0 +1,98 @@
+"""Vault secret cache tests"""
+import os
+import sys
+import gc
+import json
+import time
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "ULTIMATE_SYSTEM", "SECURITY_VAULT"))
+
+import vault_manager as vault_module
+from vault_manager import VaultManager
+
+
+@pytest.fixture
+def vault(tmp_path):
+    """Vault writing to a temporary directory"""
+    vault = VaultManager(cache_ttl=300.0, audit_flush_interval=60.0)
+    vault.vault_path = str(tmp_path / "vault")
+    vault.audit_path = str(tmp_path / "audit")
+    vault._ensure_directories()
+    yield vault
+    vault.close()
+
+
+def audit_actions(vault):
+    """Actions recorded across the daily audit logs"""
+    actions = []
+    for name in sorted(os.listdir(vault.audit_path)):
+        with open(os.path.join(vault.audit_path, name)) as f:
+            actions.extend(json.loads(line)["action"] for line in f)
+    return actions
+
+
+class TestVaultManager:
+    """Test caching, batched access tracking and rotation"""
+
+    def test_cached_fetches_skip_decryption(self, vault, monkeypatch):
+        """Test repeated and re-validated fetches do not decrypt an unchanged file"""
+        vault.store_secret("API_KEY", "alpha")
+        decrypt = vault.cipher_suite.decrypt
+        calls = []
+        monkeypatch.setattr(vault.cipher_suite, "decrypt", lambda token: calls.append(1) or decrypt(token))
+
+        assert [vault.retrieve_secret("API_KEY") for _ in range(3)] == ["alpha"] * 3
+        vault.cache_ttl = 0.0
+        vault.invalidate()
+        vault.retrieve_secret("API_KEY")
+        vault.retrieve_secret("API_KEY")
+        assert len(calls) == 1
+
+    def test_accesses_are_flushed_in_one_batch(self, vault):
+        """Test queued accesses update the count and write one audit record each"""
+        vault.store_secret("API_KEY", "alpha")
+        for _ in range(3):
+            vault.retrieve_secret("API_KEY")
+
+        assert vault.flush() == 3
+        with open(vault._secret_file("API_KEY")) as f:
+            assert json.load(f)["access_count"] == 3
+        assert audit_actions(vault).count("SECRET_ACCESSED") == 3
+
+    def test_external_rotation_is_seen_after_ttl(self, vault):
+        """Test a vault file rewritten elsewhere replaces the cached value and notifies subscribers"""
+        vault.cache_ttl = 0.0
+        vault.store_secret("API_KEY", "alpha")
+        updates = []
+        vault.subscribe("API_KEY", lambda name, value: updates.append(value))
+
+        with open(vault._secret_file("API_KEY")) as f:
+            secret_data = json.load(f)
+        secret_data["encrypted_value"] = vault_module.base64.b64encode(vault.cipher_suite.encrypt(b"beta")).decode()
+        time.sleep(0.01)
+        vault._write_secret_file(vault._secret_file("API_KEY"), secret_data)
+
+        assert vault.retrieve_secret("API_KEY") == "beta"
+        assert updates == ["beta"]
+
+    def test_revoke_drops_cache_and_notifies(self, vault):
+        """Test a revoked secret is no longer served and subscribers receive None"""
+        vault.store_secret("API_KEY", "alpha")
+        updates = []
+        vault.subscribe("API_KEY", lambda name, value: updates.append(value))
+        vault.retrieve_secret("API_KEY")
+
+        vault.revoke_secret("API_KEY")
+        with pytest.raises(ValueError):
+            vault.retrieve_secret("API_KEY")
+        assert updates == [None]
+        assert "SECRET_REVOKED" in audit_actions(vault)
+
+    def test_exit_hook_does_not_pin_instances(self):
+        """Test vaults are tracked weakly by the single exit hook"""
+        vault = VaultManager()
+        assert vault in vault_module._open_vaults
+        del vault
+        gc.collect()
+        assert not [v for v in vault_module._open_vaults if v is not vault_module.vault_manager]
@@ -132,7 +132,9 @@ class UltimateLyraEcosystemAbsolutelyFinal:
         self.smart_order_router = SmartOrderRouter()
         self.execution_algorithms = AdvancedExecutionAlgorithms()
         self.portfolio_risk_manager = PortfolioRiskManager()
-        self.circuit_breaker_system = CircuitBreakerSystem()
+        self.circuit_breaker_system = CircuitBreakerSystem(
+            correlation_service=self.portfolio_risk_manager.correlation_service
+        )
         
         # Initialize exchange connections
         self.exchanges = self._initialize_exchanges()
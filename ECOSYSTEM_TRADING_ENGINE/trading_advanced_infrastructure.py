@@ -14,13 +14,91 @@ This module provides institutional-grade trading infrastructure including:
 import os
 import json
 import time
+import atexit
 import asyncio
+import itertools
+import math
+import threading
 import numpy as np
 import pandas as pd
+from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import logging
 
+try:
+    import pyarrow  # noqa: F401  (pandas Parquet engine)
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+class DecisionJournal:
+    """
+    Buffered journal for routing decisions.
+    
+    Records are held in memory and written in chunks: one Parquet part file
+    per flush when pyarrow is available, otherwise appended as JSON lines to a
+    single file. Full buffers are flushed on a worker thread so the order path
+    never waits on disk; a background timer flushes partial buffers every
+    flush_interval seconds, and close() (also run at exit) writes the rest.
+    """
+    
+    def __init__(self, directory, name, flush_size=256, flush_interval=5.0):
+        """Journal files are named after `name` inside `directory`."""
+        self.directory = directory
+        self.name = name
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._run, name=f"{name}-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+        
+    def _run(self):
+        """Timed flush so a quiet router doesn't sit on a partial buffer."""
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"❌ Decision journal flush failed: {str(e)}")
+                
+    def close(self):
+        """Stop the timed flusher and write everything still buffered."""
+        self._stop.set()
+        if self._flusher.is_alive() and self._flusher is not threading.current_thread():
+            self._flusher.join(self.flush_interval)
+        return self.flush()
+        
+    def record(self, entry):
+        """Buffer one decision; schedules a background flush when the buffer is full."""
+        with self._lock:
+            self._buffer.append(entry)
+            full = len(self._buffer) >= self.flush_size
+        if full:
+            threading.Thread(target=self.flush, daemon=True).start()
+            
+    def flush(self):
+        """Write all buffered decisions."""
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if not batch:
+            return 0
+        with self._write_lock:
+            if PARQUET_AVAILABLE:
+                frame = pd.DataFrame([
+                    {k: json.dumps(v, default=float) if isinstance(v, (dict, list)) else v for k, v in entry.items()}
+                    for entry in batch
+                ])
+                part = os.path.join(self.directory, f"{self.name}_{time.time_ns()}.parquet")
+                frame.to_parquet(part, index=False)
+            else:
+                with open(os.path.join(self.directory, f"{self.name}.jsonl"), 'a') as f:
+                    f.write("".join(json.dumps(entry, default=float) + "\n" for entry in batch))
+        return len(batch)
+
 class SmartOrderRouter:
     """Smart order routing for optimal execution across multiple exchanges."""
     
@@ -39,20 +117,17 @@ class SmartOrderRouter:
             "coinjar": {"fees": 0.001, "liquidity_score": 0.75, "latency": 120}
         }
         
+        # Per-venue order book deadline (seconds); venues that miss it are skipped
+        self.book_deadline = 0.25
+        self.venue_deadlines = {}
+        self.routing_journal = DecisionJournal(self.routing_data_path, "routing_decisions")
+        
     async def find_best_execution_venue(self, symbol, side, quantity, order_type="market"):
         """Find the best exchange for order execution."""
-        venue_analysis = {}
+        order_books = await self._get_order_books(symbol)
+        
+        venue_analysis = self._analyze_execution_costs(order_books, side, quantity)
         
-        for exchange, config in self.exchange_configs.items():
-            # Simulate getting order book data
-            order_book = await self._get_order_book(exchange, symbol)
-            
-            if order_book:
-                execution_analysis = self._analyze_execution_cost(
-                    order_book, side, quantity, config
-                )
-                venue_analysis[exchange] = execution_analysis
-                
         # Select best venue
         best_venue = self._select_optimal_venue(venue_analysis)
         
@@ -63,16 +138,31 @@ class SmartOrderRouter:
             "side": side,
             "quantity": quantity,
             "venue_analysis": venue_analysis,
+            "venues_missed": [exchange for exchange in self.exchange_configs if exchange not in order_books],
             "selected_venue": best_venue,
             "routing_reason": self._explain_routing_decision(venue_analysis, best_venue)
         }
         
-        routing_file = os.path.join(self.routing_data_path, f"routing_{symbol}_{int(time.time())}.json")
-        with open(routing_file, 'w') as f:
-            json.dump(routing_decision, f, indent=2)
+        self.routing_journal.record(routing_decision)
             
         return best_venue
         
+    async def _get_order_books(self, symbol):
+        """Fetch every venue's order book concurrently, each bounded by its deadline."""
+        async def fetch(exchange):
+            """(exchange, book), or (exchange, None) if the venue failed or missed its deadline."""
+            deadline = self.venue_deadlines.get(exchange, self.book_deadline)
+            try:
+                return exchange, await asyncio.wait_for(self._get_order_book(exchange, symbol), deadline)
+            except asyncio.TimeoutError:
+                logging.warning(f"⏱️ {exchange} order book for {symbol} missed {deadline * 1000:.0f}ms deadline")
+            except Exception as e:
+                logging.warning(f"⚠️ {exchange} order book for {symbol} failed: {str(e)}")
+            return exchange, None
+            
+        results = await asyncio.gather(*(fetch(exchange) for exchange in self.exchange_configs))
+        return {exchange: book for exchange, book in results if book}
+        
     async def _get_order_book(self, exchange, symbol):
         """Simulate getting order book data from exchange."""
         # In production, this would make actual API calls
@@ -84,50 +174,70 @@ class SmartOrderRouter:
         
     def _analyze_execution_cost(self, order_book, side, quantity, exchange_config):
         """Analyze execution cost for a given order."""
-        fees = exchange_config["fees"]
-        liquidity_score = exchange_config["liquidity_score"]
-        latency = exchange_config["latency"]
+        return self._score_venues([order_book], [exchange_config], side, quantity)[0]
         
-        # Calculate slippage
-        if side == "buy":
-            levels = order_book["asks"]
-        else:
-            levels = order_book["bids"]
-            
-        total_cost = 0
-        remaining_qty = quantity
-        slippage = 0
+    def _analyze_execution_costs(self, order_books, side, quantity):
+        """Analyze execution cost on every venue with a book, in one vectorized pass."""
+        venues = list(order_books.keys())
+        if not venues:
+            return {}
+        configs = [self.exchange_configs[venue] for venue in venues]
+        analyses = self._score_venues([order_books[venue] for venue in venues], configs, side, quantity)
+        return dict(zip(venues, analyses))
         
-        for price, size in levels:
-            if remaining_qty <= 0:
-                break
-                
-            fill_qty = min(remaining_qty, size)
-            total_cost += fill_qty * price
-            remaining_qty -= fill_qty
-            
-        if remaining_qty > 0:
-            # Not enough liquidity
-            liquidity_penalty = remaining_qty * 0.01  # 1% penalty for insufficient liquidity
-            total_cost += liquidity_penalty
+    def _score_venues(self, order_books, exchange_configs, side, quantity):
+        """
+        Walk all books at once on padded (venues x levels) arrays.
+        
+        Cumulative depth gives each level's fill as
+        clip(quantity - depth_before_level, 0, level_size).
+        """
+        book_side = "asks" if side == "buy" else "bids"
+        levels = [np.asarray(book[book_side], dtype=float).reshape(-1, 2) for book in order_books]
+        depth = max(len(level) for level in levels)
+        prices = np.zeros((len(levels), depth))
+        sizes = np.zeros((len(levels), depth))
+        for row, level in enumerate(levels):
+            prices[row, :len(level)] = level[:, 0]
+            sizes[row, :len(level)] = level[:, 1]
             
-        avg_price = total_cost / quantity if quantity > 0 else 0
+        fees = np.array([config["fees"] for config in exchange_configs], dtype=float)
+        liquidity_scores = np.array([config["liquidity_score"] for config in exchange_configs], dtype=float)
+        latencies = np.array([config["latency"] for config in exchange_configs], dtype=float)
+        
+        cumulative = np.cumsum(sizes, axis=1)
+        fills = np.clip(quantity - (cumulative - sizes), 0, sizes)
+        filled_quantity = fills.sum(axis=1)
+        fill_cost = (fills * prices).sum(axis=1)
         
+        # Not enough liquidity: 1% penalty on the unfilled remainder
+        remaining = np.maximum(quantity - filled_quantity, 0)
+        total_cost = fill_cost + remaining * 0.01
+        avg_price = total_cost / quantity if quantity > 0 else np.zeros(len(levels))
+        
+        # Slippage of the filled part against the touch
+        with np.errstate(divide="ignore", invalid="ignore"):
+            avg_fill_price = np.where(filled_quantity > 0, fill_cost / filled_quantity, prices[:, 0])
+            slippage = np.where(prices[:, 0] > 0, np.abs(avg_fill_price - prices[:, 0]) / prices[:, 0], 0.0)
+            
         # Calculate total execution cost
         fee_cost = total_cost * fees
-        latency_penalty = latency * 0.0001  # Latency penalty
-        
+        latency_penalty = latencies * 0.0001  # Latency penalty
         total_execution_cost = total_cost + fee_cost + latency_penalty
+        execution_scores = self._calculate_execution_score(total_execution_cost, liquidity_scores, latencies)
         
-        return {
-            "avg_price": avg_price,
-            "total_cost": total_execution_cost,
-            "fees": fee_cost,
-            "slippage": slippage,
-            "liquidity_score": liquidity_score,
-            "latency": latency,
-            "execution_score": self._calculate_execution_score(total_execution_cost, liquidity_score, latency)
-        }
+        return [
+            {
+                "avg_price": float(avg_price[i]),
+                "total_cost": float(total_execution_cost[i]),
+                "fees": float(fee_cost[i]),
+                "slippage": float(slippage[i]),
+                "liquidity_score": float(liquidity_scores[i]),
+                "latency": exchange_configs[i]["latency"],
+                "execution_score": float(execution_scores[i])
+            }
+            for i in range(len(levels))
+        ]
         
     def _calculate_execution_score(self, total_cost, liquidity_score, latency):
         """Calculate overall execution score for venue selection."""
@@ -168,142 +278,458 @@ class SmartOrderRouter:
                     
         return "; ".join(reasons) if reasons else "Best available option"
 
-class AdvancedExecutionAlgorithms:
-    """Advanced execution algorithms for institutional trading."""
+class SystemClock:
+    """Monotonic wall clock used by the slice scheduler in production."""
     
-    def __init__(self):
-        """TODO: Add function documentation"""
-        self.execution_data_path = "/home/ubuntu/ULTIMATE_LYRA_ECOSYSTEM_FINAL_SEGMENTED/trading/execution_data"
-        os.makedirs(self.execution_data_path, exist_ok=True)
+    def now(self):
+        """Current monotonic time in seconds."""
+        return time.monotonic()
+
+class SimulatedClock:
+    """Manually advanced clock for driving the slice scheduler in tests and backtests."""
+    
+    def __init__(self, start=0.0):
+        """Start the clock at `start` seconds."""
+        self._now = start
         
-    async def twap_execution(self, symbol, side, total_quantity, duration_minutes, exchange):
-        """Time-Weighted Average Price execution algorithm."""
-        execution_plan = {
-            "algorithm": "TWAP",
+    def now(self):
+        """Current simulated time in seconds."""
+        return self._now
+        
+    def advance(self, seconds):
+        """Move the clock forward."""
+        self._now += max(0.0, seconds)
+        return self._now
+
+class ParentOrder:
+    """A parent order worked slice by slice by the SliceScheduler."""
+    
+    def __init__(self, parent_id, algorithm, symbol, side, total_quantity, exchange, params, plan):
+        """Hold the parent's parameters, fill totals and scheduling state."""
+        self.parent_id = parent_id
+        self.algorithm = algorithm
+        self.symbol = symbol
+        self.side = side
+        self.total_quantity = total_quantity
+        self.exchange = exchange
+        self.params = params
+        self.plan = plan
+        self.executed_quantity = 0.0
+        self.notional = 0.0
+        self.slices_sent = 0
+        self.status = "active"
+        self.next_due = None
+        self.in_flight = False
+        self.generation = 0
+        self.done = None
+        
+    @property
+    def remaining_quantity(self):
+        """Quantity still to be filled (never negative)."""
+        return max(0.0, self.total_quantity - self.executed_quantity)
+        
+    def progress(self):
+        """Fill progress row for the in-memory progress table."""
+        return {
+            "parent_id": self.parent_id,
+            "algorithm": self.algorithm,
+            "symbol": self.symbol,
+            "side": self.side,
+            "exchange": self.exchange,
+            "status": self.status,
+            "total_quantity": self.total_quantity,
+            "executed_quantity": self.executed_quantity,
+            "remaining_quantity": self.remaining_quantity,
+            "fill_pct": self.executed_quantity / self.total_quantity * 100 if self.total_quantity > 0 else 0,
+            "avg_price": self.notional / self.executed_quantity if self.executed_quantity > 0 else None,
+            "slices_sent": self.slices_sent,
+            "next_due": self.next_due
+        }
+
+class SliceScheduler:
+    """
+    Hashed timer wheel that works every active parent order.
+    
+    Each parent has at most one entry in the wheel (its next slice). On every
+    tick the due entries are grouped by venue and each venue's batch is
+    dispatched as its own task, so the tick loop never waits on a venue and a
+    slow venue cannot delay slices due elsewhere. The next slice is scheduled
+    from the previous slice's scheduled time rather than from when it
+    finished, so timing does not drift under load. Cancelled or amended
+    parents leave stale entries that are skipped when they fire.
+    """
+    
+    def __init__(self, execute_batch, clock=None, tick_seconds=0.1, wheel_size=1024, seed=None):
+        """execute_batch(exchange, slice_requests) is awaited once per venue per tick."""
+        self.execute_batch = execute_batch  # async (exchange, [slice requests]) -> [slice results]
+        self.clock = clock or SystemClock()
+        self.tick_seconds = tick_seconds
+        self.wheel = [[] for _ in range(wheel_size)]
+        self.parents: Dict[str, ParentOrder] = {}
+        self._current_tick = self._tick_of(self.clock.now())
+        self._pending = 0
+        self._ids = itertools.count(1)
+        self._rng = np.random.default_rng(seed)
+        self._wakeup = None
+        self._task = None
+        self._running = False
+        self._inflight = set()  # venue batch tasks still executing
+        
+    def _tick_of(self, t):
+        """Wheel tick containing time t."""
+        return math.floor(t / self.tick_seconds + 1e-9)
+        
+    def submit(self, algorithm, symbol, side, total_quantity, exchange, plan_fields=None, **params):
+        """Register a parent order; its first slice is due immediately. Returns the parent id."""
+        parent_id = f"{algorithm}_{symbol}_{next(self._ids)}"
+        plan = {
+            "algorithm": algorithm,
             "symbol": symbol,
             "side": side,
             "total_quantity": total_quantity,
-            "duration_minutes": duration_minutes,
             "exchange": exchange,
             "start_time": datetime.utcnow().isoformat(),
+            **(plan_fields or {}),
             "slices": []
         }
+        parent = ParentOrder(parent_id, algorithm, symbol, side, total_quantity, exchange, params, plan)
+        try:
+            parent.done = asyncio.get_running_loop().create_future()
+        except RuntimeError:
+            parent.done = None
+        self.parents[parent_id] = parent
+        self._schedule(parent, self.clock.now())
+        if not isinstance(self.clock, SimulatedClock):
+            self.ensure_running()
+        return parent_id
         
-        # Calculate slice parameters
-        num_slices = max(1, duration_minutes // 2)  # One slice every 2 minutes
-        slice_quantity = total_quantity / num_slices
-        slice_interval = (duration_minutes * 60) / num_slices  # Convert to seconds
+    def cancel(self, parent_id, reason="cancelled"):
+        """Stop working a parent order; slices already sent still count."""
+        parent = self.parents.get(parent_id)
+        if parent is None or parent.status != "active":
+            return None
+        parent.generation += 1
+        self._finish(parent, "cancelled")
+        parent.plan["cancel_reason"] = reason
+        return parent.progress()
+        
+    def amend(self, parent_id, total_quantity=None, interval=None, num_slices=None, visible_quantity=None):
+        """Change an active parent; future slices are sized from what is still unfilled."""
+        parent = self.parents.get(parent_id)
+        if parent is None or parent.status != "active":
+            return None
+        if total_quantity is not None:
+            parent.total_quantity = total_quantity
+            parent.plan["total_quantity"] = total_quantity
+        if num_slices is not None:
+            parent.params["num_slices"] = max(parent.slices_sent + 1, num_slices)
+        if visible_quantity is not None:
+            parent.params["visible_quantity"] = visible_quantity
+        if interval is not None and interval != parent.params.get("interval"):
+            old_interval = parent.params.get("interval", 0)
+            parent.params["interval"] = interval
+            # An in-flight slice picks up the new interval when it completes
+            if not parent.in_flight and parent.slices_sent:
+                parent.generation += 1
+                self._schedule(parent, parent.next_due - old_interval + interval)
+        if not parent.in_flight and self._is_finished(parent):
+            parent.generation += 1
+            self._finish(parent, "completed")
+        return parent.progress()
+        
+    async def wait(self, parent_id):
+        """Wait for a parent order to finish and return its execution plan."""
+        parent = self.parents[parent_id]
+        if parent.status != "active":
+            return parent.plan
+        if parent.done is None:
+            parent.done = asyncio.get_running_loop().create_future()
+        return await parent.done
+        
+    def get_progress(self, parent_id):
+        """Progress row for one parent order, or None if unknown."""
+        parent = self.parents.get(parent_id)
+        return parent.progress() if parent else None
+        
+    def progress_table(self, status=None):
+        """Progress rows for all parents (optionally only those with the given status)."""
+        return [p.progress() for p in self.parents.values() if status is None or p.status == status]
+        
+    def _next_slice_quantity(self, parent):
+        """Size of the parent's next slice, from what is still unfilled."""
+        if parent.algorithm == "TWAP":
+            return parent.remaining_quantity / max(1, parent.params["num_slices"] - parent.slices_sent)
+        if parent.algorithm == "VWAP":
+            weights = parent.params["weights"][parent.slices_sent:]
+            total_weight = sum(weights)
+            return parent.remaining_quantity * weights[0] / total_weight if total_weight > 0 else 0.0
+        return min(parent.remaining_quantity, parent.params["visible_quantity"])
+        
+    def _slice_id(self, parent):
+        """Identifier for the parent's next slice."""
+        if parent.algorithm == "VWAP":
+            return f"VWAP_{parent.params['periods'][parent.slices_sent]}"
+        return f"{parent.algorithm}_slice_{parent.slices_sent + 1}"
         
-        executed_quantity = 0
+    def _next_delay(self, parent):
+        """Seconds between the parent's slices (randomised for icebergs)."""
+        if parent.algorithm == "ICEBERG":
+            # Random delay to avoid detection
+            return float(self._rng.uniform(parent.params["min_delay"], parent.params["max_delay"]))
+        return parent.params["interval"]
         
-        for i in range(num_slices):
-            slice_start = time.time()
+    def _is_finished(self, parent):
+        """True when the parent is filled or has sent all its planned slices."""
+        if parent.remaining_quantity <= parent.params.get("min_quantity", 1e-12):
+            return True
+        if parent.algorithm == "TWAP":
+            return parent.slices_sent >= parent.params["num_slices"]
+        if parent.algorithm == "VWAP":
+            return parent.slices_sent >= len(parent.params["weights"])
+        return False
+        
+    def _schedule(self, parent, due_time):
+        """Put the parent's next slice in the wheel (never in the current or a past tick)."""
+        parent.next_due = due_time
+        tick = max(self._tick_of(due_time), self._current_tick + 1)
+        self.wheel[tick % len(self.wheel)].append((tick, parent.parent_id, parent.generation))
+        self._pending += 1
+        if self._wakeup is not None:
+            self._wakeup.set()
             
-            # Execute slice
-            slice_result = await self._execute_slice(
-                symbol, side, slice_quantity, exchange, f"TWAP_slice_{i+1}"
-            )
+    async def process_until(self, now):
+        """Fire every slice due up to `now`, one tick at a time."""
+        target = self._tick_of(now)
+        while self._current_tick < target:
+            if self._pending == 0:
+                self._current_tick = target
+                break
+            self._current_tick += 1
+            slot = self.wheel[self._current_tick % len(self.wheel)]
+            if not slot:
+                continue
+            due = [entry for entry in slot if entry[0] <= self._current_tick]
+            if due:
+                slot[:] = [entry for entry in slot if entry[0] > self._current_tick]
+                self._pending -= len(due)
+                self._fire(due)
+                
+    def _fire(self, entries):
+        """Dispatch the due slices, one batch task per venue; does not wait for them."""
+        batches = defaultdict(list)
+        for _, parent_id, generation in entries:
+            parent = self.parents.get(parent_id)
+            if parent is None or parent.status != "active" or generation != parent.generation:
+                continue
+            request = {
+                "symbol": parent.symbol,
+                "side": parent.side,
+                "quantity": self._next_slice_quantity(parent),
+                "slice_id": self._slice_id(parent),
+                "scheduled_time": parent.next_due
+            }
+            parent.slices_sent += 1
+            parent.in_flight = True
+            if request["quantity"] <= 0:
+                self._after_slice(parent, None)
+                continue
+            batches[parent.exchange].append((parent, request))
             
-            execution_plan["slices"].append(slice_result)
-            executed_quantity += slice_result.get("executed_quantity", 0)
+        for exchange, items in batches.items():
+            task = asyncio.ensure_future(self._run_batch(exchange, items))
+            self._inflight.add(task)
+            task.add_done_callback(self._batch_done)
             
-            # Wait for next slice (except for last slice)
-            if i < num_slices - 1:
-                await asyncio.sleep(slice_interval)
-                
-        execution_plan["end_time"] = datetime.utcnow().isoformat()
-        execution_plan["total_executed"] = executed_quantity
-        execution_plan["execution_rate"] = executed_quantity / total_quantity if total_quantity > 0 else 0
-        
-        # Save execution plan
-        execution_file = os.path.join(self.execution_data_path, f"twap_{symbol}_{int(time.time())}.json")
-        with open(execution_file, 'w') as f:
-            json.dump(execution_plan, f, indent=2)
+    def _batch_done(self, task):
+        """Forget a finished venue batch and log anything it raised."""
+        self._inflight.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logging.error(f"❌ Slice batch task failed: {task.exception()}")
             
-        return execution_plan
-        
-    async def vwap_execution(self, symbol, side, total_quantity, historical_volume_profile, exchange):
-        """Volume-Weighted Average Price execution algorithm."""
-        execution_plan = {
-            "algorithm": "VWAP",
-            "symbol": symbol,
-            "side": side,
-            "total_quantity": total_quantity,
-            "exchange": exchange,
-            "start_time": datetime.utcnow().isoformat(),
-            "volume_profile": historical_volume_profile,
-            "slices": []
-        }
-        
-        # Calculate volume-weighted slices
-        total_historical_volume = sum(historical_volume_profile.values())
-        executed_quantity = 0
+    async def drain(self):
+        """Wait until every dispatched venue batch has completed."""
+        while self._inflight:
+            await asyncio.gather(*list(self._inflight), return_exceptions=True)
         
-        for time_period, historical_volume in historical_volume_profile.items():
-            volume_weight = historical_volume / total_historical_volume
-            slice_quantity = total_quantity * volume_weight
+    async def _run_batch(self, exchange, items):
+        """Execute one venue batch and book each slice result on its parent."""
+        try:
+            results = await self.execute_batch(exchange, [request for _, request in items])
+        except Exception as e:
+            logging.error(f"❌ Slice batch on {exchange} failed: {str(e)}")
+            results = [None] * len(items)
+        for (parent, request), result in zip(items, results):
+            if result is not None:
+                result.setdefault("scheduled_time", request["scheduled_time"])
+            self._after_slice(parent, result)
+            
+    def _after_slice(self, parent, result):
+        """Record a slice result, then finish the parent or schedule its next slice."""
+        parent.in_flight = False
+        if result is not None:
+            executed = result.get("executed_quantity", 0)
+            parent.plan["slices"].append(result)
+            parent.executed_quantity += executed
+            parent.notional += executed * result.get("avg_price", 0)
+        if parent.status != "active":
+            # Fill from a slice that was in flight when the parent was cancelled
+            self._update_plan_totals(parent)
+            return
+        if self._is_finished(parent):
+            self._finish(parent, "completed")
+        else:
+            self._schedule(parent, parent.next_due + self._next_delay(parent))
+            
+    def _finish(self, parent, status):
+        """Close out a parent order and release anyone waiting on it."""
+        parent.status = status
+        parent.next_due = None
+        parent.plan["status"] = status
+        parent.plan["end_time"] = datetime.utcnow().isoformat()
+        self._update_plan_totals(parent)
+        if parent.done is not None and not parent.done.done():
+            parent.done.set_result(parent.plan)
+            
+    def _update_plan_totals(self, parent):
+        """Copy executed totals into the parent's execution plan."""
+        parent.plan["total_executed"] = parent.executed_quantity
+        parent.plan["execution_rate"] = parent.executed_quantity / parent.total_quantity if parent.total_quantity > 0 else 0
             
-            if slice_quantity > 0:
-                slice_result = await self._execute_slice(
-                    symbol, side, slice_quantity, exchange, f"VWAP_{time_period}"
-                )
+    def ensure_running(self):
+        """Start the real-time loop on the running event loop if it is not already running."""
+        if self._task is None or self._task.done():
+            try:
+                self._task = asyncio.get_running_loop().create_task(self.run())
+            except RuntimeError:
+                self._task = None
                 
-                execution_plan["slices"].append(slice_result)
-                executed_quantity += slice_result.get("executed_quantity", 0)
+    async def run(self):
+        """Real-time loop: wake on each tick boundary while slices are pending."""
+        self._wakeup = asyncio.Event()
+        self._running = True
+        while self._running:
+            await self.process_until(self.clock.now())
+            self._wakeup.clear()
+            timeout = None
+            if self._pending:
+                timeout = max(0.0, (self._current_tick + 1) * self.tick_seconds - self.clock.now())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
                 
-        execution_plan["end_time"] = datetime.utcnow().isoformat()
-        execution_plan["total_executed"] = executed_quantity
-        execution_plan["execution_rate"] = executed_quantity / total_quantity if total_quantity > 0 else 0
-        
-        # Save execution plan
-        execution_file = os.path.join(self.execution_data_path, f"vwap_{symbol}_{int(time.time())}.json")
-        with open(execution_file, 'w') as f:
-            json.dump(execution_plan, f, indent=2)
+    def stop(self):
+        """Stop the real-time loop after its current pass."""
+        self._running = False
+        if self._wakeup is not None:
+            self._wakeup.set()
             
+    async def advance(self, seconds):
+        """
+        Advance a SimulatedClock tick by tick, firing everything that falls due.
+        
+        Simulated time does not pass while a batch executes, so each tick's
+        batches are drained before the clock moves on.
+        """
+        target = self.clock.now() + seconds
+        while self._pending or self._inflight:
+            await self.drain()
+            next_tick_time = (self._current_tick + 1) * self.tick_seconds
+            if not self._pending or next_tick_time > target:
+                break
+            self.clock.advance(next_tick_time - self.clock.now())
+            await self.process_until(next_tick_time)
+        self.clock.advance(target - self.clock.now())
+        await self.process_until(target)
+        await self.drain()
+
+class AdvancedExecutionAlgorithms:
+    """Advanced execution algorithms for institutional trading."""
+    
+    def __init__(self, clock=None, tick_seconds=0.1):
+        """Pass a SimulatedClock to drive the scheduler with advance() instead of real time."""
+        self.execution_data_path = "/home/ubuntu/ULTIMATE_LYRA_ECOSYSTEM_FINAL_SEGMENTED/trading/execution_data"
+        os.makedirs(self.execution_data_path, exist_ok=True)
+        
+        # One scheduler works every active parent order
+        self.scheduler = SliceScheduler(self._execute_venue_batch, clock=clock, tick_seconds=tick_seconds)
+        
+    def start_twap(self, symbol, side, total_quantity, duration_minutes, exchange):
+        """Submit a TWAP parent order without waiting; returns its parent id."""
+        num_slices = max(1, duration_minutes // 2)  # One slice every 2 minutes
+        slice_interval = (duration_minutes * 60) / num_slices  # Convert to seconds
+        return self.scheduler.submit(
+            "TWAP", symbol, side, total_quantity, exchange,
+            plan_fields={"duration_minutes": duration_minutes},
+            num_slices=num_slices, interval=slice_interval
+        )
+        
+    def start_vwap(self, symbol, side, total_quantity, historical_volume_profile, exchange, period_seconds=0):
+        """Submit a VWAP parent order (one slice per profile period, period_seconds apart)."""
+        return self.scheduler.submit(
+            "VWAP", symbol, side, total_quantity, exchange,
+            plan_fields={"volume_profile": historical_volume_profile},
+            periods=list(historical_volume_profile.keys()),
+            weights=list(historical_volume_profile.values()),
+            interval=period_seconds
+        )
+        
+    def start_iceberg(self, symbol, side, total_quantity, visible_quantity, exchange, min_delay=5, max_delay=15):
+        """Submit an iceberg parent order showing at most visible_quantity per slice."""
+        return self.scheduler.submit(
+            "ICEBERG", symbol, side, total_quantity, exchange,
+            plan_fields={"visible_quantity": visible_quantity},
+            visible_quantity=visible_quantity, min_delay=min_delay, max_delay=max_delay,
+            min_quantity=total_quantity * 1e-3  # remainders below 0.1% are dust
+        )
+        
+    def cancel(self, parent_id, reason="cancelled"):
+        """Cancel a working parent order; returns its final progress row."""
+        return self.scheduler.cancel(parent_id, reason)
+        
+    def amend(self, parent_id, **changes):
+        """Amend a working parent order (see SliceScheduler.amend)."""
+        return self.scheduler.amend(parent_id, **changes)
+        
+    def get_progress(self, parent_id=None):
+        """Progress of one parent order, or the whole progress table."""
+        if parent_id is None:
+            return self.scheduler.progress_table()
+        return self.scheduler.get_progress(parent_id)
+        
+    async def twap_execution(self, symbol, side, total_quantity, duration_minutes, exchange):
+        """Time-Weighted Average Price execution algorithm."""
+        parent_id = self.start_twap(symbol, side, total_quantity, duration_minutes, exchange)
+        execution_plan = await self.scheduler.wait(parent_id)
+        self._save_execution_plan("twap", symbol, execution_plan)
+        return execution_plan
+        
+    async def vwap_execution(self, symbol, side, total_quantity, historical_volume_profile, exchange, period_seconds=0):
+        """Volume-Weighted Average Price execution algorithm."""
+        parent_id = self.start_vwap(symbol, side, total_quantity, historical_volume_profile, exchange, period_seconds)
+        execution_plan = await self.scheduler.wait(parent_id)
+        self._save_execution_plan("vwap", symbol, execution_plan)
         return execution_plan
         
     async def iceberg_execution(self, symbol, side, total_quantity, visible_quantity, exchange):
         """Iceberg order execution to hide large orders."""
-        execution_plan = {
-            "algorithm": "ICEBERG",
-            "symbol": symbol,
-            "side": side,
-            "total_quantity": total_quantity,
-            "visible_quantity": visible_quantity,
-            "exchange": exchange,
-            "start_time": datetime.utcnow().isoformat(),
-            "slices": []
-        }
-        
-        remaining_quantity = total_quantity
-        slice_number = 1
-        
-        while remaining_quantity > 0:
-            current_slice_qty = min(remaining_quantity, visible_quantity)
-            
-            slice_result = await self._execute_slice(
-                symbol, side, current_slice_qty, exchange, f"ICEBERG_slice_{slice_number}"
-            )
-            
-            execution_plan["slices"].append(slice_result)
-            remaining_quantity -= slice_result.get("executed_quantity", 0)
-            slice_number += 1
-            
-            # Add random delay to avoid detection
-            if remaining_quantity > 0:
-                delay = np.random.uniform(5, 15)  # 5-15 second random delay
-                await asyncio.sleep(delay)
-                
-        execution_plan["end_time"] = datetime.utcnow().isoformat()
-        execution_plan["total_executed"] = total_quantity - remaining_quantity
-        execution_plan["execution_rate"] = execution_plan["total_executed"] / total_quantity if total_quantity > 0 else 0
+        parent_id = self.start_iceberg(symbol, side, total_quantity, visible_quantity, exchange)
+        execution_plan = await self.scheduler.wait(parent_id)
+        self._save_execution_plan("iceberg", symbol, execution_plan)
+        return execution_plan
         
-        # Save execution plan
-        execution_file = os.path.join(self.execution_data_path, f"iceberg_{symbol}_{int(time.time())}.json")
+    def _save_execution_plan(self, name, symbol, execution_plan):
+        """Write a finished execution plan to the execution data directory."""
+        execution_file = os.path.join(self.execution_data_path, f"{name}_{symbol}_{int(time.time())}.json")
         with open(execution_file, 'w') as f:
             json.dump(execution_plan, f, indent=2)
             
-        return execution_plan
+    async def _execute_venue_batch(self, exchange, slice_requests):
+        """Execute one tick's due slices on a venue."""
+        return await asyncio.gather(*(
+            self._execute_slice(request["symbol"], request["side"], request["quantity"], exchange, request["slice_id"])
+            for request in slice_requests
+        ))
         
     async def _execute_slice(self, symbol, side, quantity, exchange, slice_id):
         """Execute a single slice of a larger order."""
@@ -322,51 +748,370 @@ class AdvancedExecutionAlgorithms:
         
         return execution_result
 
+class RiskResultStore:
+    """Append-only JSON-lines store for risk results (one record per line, one file per stream)."""
+    
+    def __init__(self, path):
+        """Records are appended to path as JSON lines."""
+        self.path = path
+        self._lock = threading.Lock()
+        
+    def append(self, record):
+        """Append a single record."""
+        line = json.dumps(record, default=float) + "\n"
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line)
+                
+    def read(self, limit=None):
+        """Read stored records, oldest first; the last `limit` records if given."""
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path) as f:
+            lines = f.readlines()
+        if limit is not None:
+            lines = lines[-limit:]
+        return [json.loads(line) for line in lines if line.strip()]
+
+class MonteCarloVaREngine:
+    """
+    Covariance-aware Monte Carlo VaR/ES.
+    
+    fit() Cholesky-factors the daily covariance and draws the whole
+    (simulations x assets) scenario matrix once from a seeded Generator.
+    Repricing for new weights is then a single matrix-vector product, and
+    an h-day horizon scales the same draws by sqrt(h) (Gaussian returns
+    aggregate exactly), so nothing is redrawn until the next fit.
+    """
+    
+    def __init__(self, num_simulations=100000, seed=None):
+        """num_simulations scenarios are drawn from a seeded generator."""
+        self.num_simulations = num_simulations
+        self.rng = np.random.default_rng(seed)
+        self.symbols: List[str] = []
+        self.mean = np.zeros(0)
+        self.covariance = np.zeros((0, 0))
+        self._shocks = None  # (simulations x assets) correlated daily shocks
+        self._cached_weights = None
+        self._cached_pnl = None
+        
+    @property
+    def fitted(self):
+        """True once a scenario matrix has been drawn."""
+        return self._shocks is not None
+        
+    def fit(self, symbols, mean, covariance):
+        """Factor the covariance and draw a fresh scenario matrix."""
+        mean = np.asarray(mean, dtype=float)
+        covariance = np.asarray(covariance, dtype=float)
+        cholesky = self._cholesky(covariance)
+        
+        standard_normals = self.rng.standard_normal((self.num_simulations, len(symbols)))
+        self._shocks = standard_normals @ cholesky.T
+        self.symbols = list(symbols)
+        self.mean = mean
+        self.covariance = covariance
+        self._cached_weights = None
+        self._cached_pnl = None
+        
+    def _cholesky(self, covariance):
+        """Cholesky factor, adding diagonal jitter if the estimate is not positive definite."""
+        jitter = 0.0
+        scale = float(np.mean(np.diag(covariance))) if covariance.size else 0.0
+        for _ in range(6):
+            try:
+                return np.linalg.cholesky(covariance + jitter * np.eye(len(covariance)))
+            except np.linalg.LinAlgError:
+                jitter = max(jitter * 10, scale * 1e-10, 1e-16)
+        # Fall back to the eigen-decomposition with negative eigenvalues clipped
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        return eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+        
+    def simulate_returns(self, weights, horizon_days=1):
+        """Simulated portfolio returns over the horizon for the given weight vector."""
+        if not self.fitted:
+            raise RuntimeError("MonteCarloVaREngine.fit() must be called before simulating")
+        weights = np.asarray(weights, dtype=float)
+        if self._cached_weights is None or not np.array_equal(weights, self._cached_weights):
+            self._cached_pnl = self._shocks @ weights
+            self._cached_weights = weights.copy()
+        return horizon_days * float(self.mean @ weights) + np.sqrt(horizon_days) * self._cached_pnl
+        
+    def evaluate(self, weights, confidence_level=0.95, horizon_days=1) -> Tuple[float, float]:
+        """(VaR, expected shortfall) as portfolio returns (negative = loss)."""
+        returns = self.simulate_returns(weights, horizon_days)
+        tail_count = max(1, int(np.ceil((1 - confidence_level) * len(returns))))
+        tail = np.partition(returns, tail_count - 1)[:tail_count]
+        var = float(tail.max())
+        expected_shortfall = float(tail.mean())
+        return var, expected_shortfall
+
+class RollingCorrelationService:
+    """
+    Exponentially weighted covariance and correlation, updated one bar at a time.
+    
+    Each bar is O(n^2) vectorized work on the running mean and covariance;
+    nothing is recomputed from history. The correlation matrix, the maximum
+    pairwise correlation and the effective number of independent assets are
+    derived when a bar arrives, so the read API is a constant-time lookup.
+    """
+    
+    def __init__(self, halflife=60, min_periods=20):
+        """Exponentially weighted with the given halflife in bars; pairs need min_periods joint bars."""
+        self.alpha = 1 - 0.5 ** (1.0 / halflife)
+        self.min_periods = min_periods
+        self.symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._mean = np.zeros(0)
+        self._cov = np.zeros((0, 0))
+        self._counts = np.zeros((0, 0), dtype=np.int64)
+        self._lock = threading.Lock()
+        self._state = self._empty_state()
+        
+    @staticmethod
+    def _empty_state():
+        """Published state before any bars are seen."""
+        return {
+            "symbols": (),
+            "correlation": np.zeros((0, 0)),
+            "max_correlation": None,
+            "max_pair": None,
+            "effective_n": 0.0,
+            "bars": 0,
+            "updated_at": None
+        }
+        
+    def _ensure_symbols(self, symbols):
+        """Grow the running state for symbols seen for the first time."""
+        new_symbols = [s for s in symbols if s not in self._index]
+        if not new_symbols:
+            return
+        old_n = len(self.symbols)
+        n = old_n + len(new_symbols)
+        for symbol in new_symbols:
+            self._index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        mean = np.zeros(n)
+        mean[:old_n] = self._mean
+        cov = np.zeros((n, n))
+        cov[:old_n, :old_n] = self._cov
+        counts = np.zeros((n, n), dtype=np.int64)
+        counts[:old_n, :old_n] = self._counts
+        self._mean, self._cov, self._counts = mean, cov, counts
+        
+    def _apply(self, x):
+        """Fold one bar (NaN = symbol missing from the bar) into the running moments."""
+        valid = ~np.isnan(x)
+        first = valid & (np.diag(self._counts) == 0)
+        self._mean[first] = x[first]
+        
+        delta = np.where(valid, x - self._mean, 0.0)
+        self._mean += self.alpha * delta
+        pair = np.outer(valid, valid)
+        self._cov = np.where(pair, (1 - self.alpha) * (self._cov + self.alpha * np.outer(delta, delta)), self._cov)
+        self._counts += pair
+        
+    def update(self, returns, timestamp=None):
+        """Fold in one bar of returns ({symbol: return})."""
+        with self._lock:
+            self._ensure_symbols(returns.keys())
+            x = np.full(len(self.symbols), np.nan)
+            for symbol, value in returns.items():
+                x[self._index[symbol]] = value
+            self._apply(x)
+            self._publish(1, timestamp)
+            
+    def update_many(self, returns):
+        """Fold in a DataFrame of bars (rows in time order, columns = symbols)."""
+        if returns.empty:
+            return
+        with self._lock:
+            self._ensure_symbols(returns.columns)
+            values = returns.reindex(columns=self.symbols).to_numpy(dtype=float)
+            for row in values:
+                self._apply(row)
+            self._publish(len(values), returns.index[-1])
+            
+    def _publish(self, bars, timestamp):
+        """Derive the read-side statistics and swap them in atomically."""
+        std = np.sqrt(np.diag(self._cov))
+        live = std > 0
+        ready = (self._counts >= self.min_periods) & np.outer(live, live)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            correlation = np.clip(self._cov / np.outer(std, std), -1.0, 1.0)
+        correlation[~ready] = np.nan
+        
+        off_diagonal = correlation.copy()
+        np.fill_diagonal(off_diagonal, np.nan)
+        max_correlation, max_pair = None, None
+        if np.isfinite(off_diagonal).any():
+            i, j = np.unravel_index(np.nanargmax(off_diagonal), off_diagonal.shape)
+            max_correlation = float(off_diagonal[i, j])
+            max_pair = (self.symbols[i], self.symbols[j])
+            
+        # Effective N = (sum of eigenvalues)^2 / sum of squared eigenvalues = n^2 / ||C||_F^2
+        warmed = np.diag(ready)
+        effective_n = 0.0
+        if warmed.any():
+            sub = np.nan_to_num(correlation[np.ix_(warmed, warmed)])
+            effective_n = float(warmed.sum() ** 2 / np.sum(sub ** 2))
+            
+        correlation.flags.writeable = False
+        self._state = {
+            "symbols": tuple(self.symbols),
+            "correlation": correlation,
+            "max_correlation": max_correlation,
+            "max_pair": max_pair,
+            "effective_n": effective_n,
+            "bars": self._state["bars"] + bars,
+            "updated_at": timestamp
+        }
+        
+    @property
+    def ready(self):
+        """True once at least one pair has min_periods shared observations."""
+        return self._state["max_correlation"] is not None
+        
+    @property
+    def max_correlation(self):
+        """Highest pairwise correlation (None until warmed up)."""
+        return self._state["max_correlation"]
+        
+    @property
+    def max_pair(self):
+        """Symbol pair with the highest correlation."""
+        return self._state["max_pair"]
+        
+    @property
+    def effective_n(self):
+        """Effective number of independent assets among warmed-up symbols."""
+        return self._state["effective_n"]
+        
+    def correlation_matrix(self):
+        """(symbols, read-only correlation matrix); NaN where a pair is not warmed up."""
+        state = self._state
+        return state["symbols"], state["correlation"]
+        
+    def correlation(self, symbol1, symbol2):
+        """Current correlation of a pair, or None if unknown or not warmed up."""
+        state = self._state
+        i, j = self._index.get(symbol1), self._index.get(symbol2)
+        if i is None or j is None or i >= len(state["symbols"]) or j >= len(state["symbols"]):
+            return None
+        value = state["correlation"][i, j]
+        return None if np.isnan(value) else float(value)
+        
+    def submatrix(self, symbols):
+        """Correlation matrix restricted to symbols, NaN for unknown symbols or pairs."""
+        state = self._state
+        n = len(state["symbols"])
+        index = np.array([self._index.get(s, -1) for s in symbols])
+        index[index >= n] = -1
+        known = index >= 0
+        result = np.full((len(symbols), len(symbols)), np.nan)
+        result[np.ix_(known, known)] = state["correlation"][np.ix_(index[known], index[known])]
+        return result
+
 class PortfolioRiskManager:
     """Advanced portfolio-level risk management."""
     
-    def __init__(self):
+    def __init__(self, num_simulations=100000, seed=None, history_window=500, min_history=30,
+                 correlation_halflife=60):
         """TODO: Add function documentation"""
         self.risk_data_path = "/home/ubuntu/ULTIMATE_LYRA_ECOSYSTEM_FINAL_SEGMENTED/trading/risk_data"
         os.makedirs(self.risk_data_path, exist_ok=True)
         self.portfolio_positions = {}
         self.correlation_matrix = {}
         
+        # Return history (rows = bars, columns = symbols) used to estimate the covariance
+        self.return_history = pd.DataFrame()
+        self.history_window = history_window
+        self.min_history = min_history
+        self._history_version = 0
+        
+        self.var_engine = MonteCarloVaREngine(num_simulations=num_simulations, seed=seed)
+        self._var_engine_key = None
+        self._assets_with_history = 0
+        self.var_store = RiskResultStore(os.path.join(self.risk_data_path, "portfolio_var.jsonl"))
+        
+        self.correlation_service = RollingCorrelationService(halflife=correlation_halflife)
+        self.correlation_store = RiskResultStore(os.path.join(self.risk_data_path, "correlation_analysis.jsonl"))
+        
+    def update_return_history(self, returns):
+        """
+        Append new per-bar returns (DataFrame indexed by time, or {symbol: returns}).
+        
+        Each bar should be passed once; it is folded into the rolling
+        correlation service as well as the VaR history window. Rows without
+        a DatetimeIndex (dicts, positional frames) are stamped as new bars
+        after the latest one held, so repeated updates accumulate; a
+        re-sent timestamp replaces the earlier bar.
+        """
+        if not isinstance(returns, pd.DataFrame):
+            returns = pd.DataFrame({symbol: np.atleast_1d(np.asarray(values, dtype=float))
+                                    for symbol, values in returns.items()})
+        if returns.empty:
+            return
+        if not isinstance(returns.index, pd.DatetimeIndex):
+            returns = returns.set_axis(self._next_bar_times(len(returns)))
+        self.correlation_service.update_many(returns)
+        history = pd.concat([self.return_history, returns])
+        history = history[~history.index.duplicated(keep="last")].sort_index()
+        self.return_history = history.iloc[-self.history_window:]
+        self._history_version += 1
+        
+    def _next_bar_times(self, count):
+        """Strictly increasing timestamps for count untimed bars, after the last bar held."""
+        history = self.return_history
+        last = history.index[-1] if len(history) and isinstance(history.index, pd.DatetimeIndex) else None
+        start = pd.Timestamp.now(tz=last.tz if last is not None else None)
+        if last is not None and start <= last:
+            start = last + pd.Timedelta(microseconds=1)
+        return pd.date_range(start, periods=count, freq="us")
+        
+    def _estimate_moments(self, symbols, positions):
+        """
+        Daily mean vector and covariance for the given symbols.
+        
+        Symbols with at least `min_history` aligned bars use the sample
+        covariance of the return history; any others fall back to their
+        position's volatility/expected_return and are treated as uncorrelated.
+        """
+        mean = np.array([positions[s].get("expected_return", 0.0) for s in symbols], dtype=float)
+        covariance = np.diag([positions[s].get("volatility", 0.02) ** 2 for s in symbols]).astype(float)
+        
+        known = [s for s in symbols if s in self.return_history.columns]
+        if known:
+            aligned = self.return_history[known].dropna()
+            if len(aligned) >= self.min_history:
+                values = aligned.to_numpy(dtype=float)
+                index = np.array([symbols.index(s) for s in known])
+                mean[index] = values.mean(axis=0)
+                covariance[np.ix_(index, index)] = np.cov(values, rowvar=False).reshape(len(known), len(known))
+            else:
+                known = []
+        return mean, covariance, len(known)
+        
     def calculate_portfolio_var(self, positions, confidence_level=0.95, time_horizon_days=1):
         """Calculate Portfolio Value at Risk."""
         if not positions:
             return {"var": 0, "expected_shortfall": 0, "risk_level": "minimal"}
             
-        # Simulate portfolio returns
-        portfolio_values = []
-        total_portfolio_value = sum(pos.get("market_value", 0) for pos in positions.values())
-        
-        # Monte Carlo simulation for VaR
-        num_simulations = 1000
+        symbols = list(positions.keys())
+        market_values = np.array([pos.get("market_value", 0) for pos in positions.values()], dtype=float)
+        total_portfolio_value = float(market_values.sum())
+        weights = market_values / total_portfolio_value if total_portfolio_value > 0 else np.zeros(len(symbols))
         
-        for _ in range(num_simulations):
-            portfolio_return = 0
-            
-            for symbol, position in positions.items():
-                # Simulate asset return
-                volatility = position.get("volatility", 0.02)
-                expected_return = position.get("expected_return", 0.0)
-                weight = position.get("market_value", 0) / total_portfolio_value if total_portfolio_value > 0 else 0
-                
-                # Random return simulation
-                asset_return = np.random.normal(expected_return, volatility)
-                portfolio_return += weight * asset_return
-                
-            portfolio_values.append(portfolio_return)
+        # Refit only when the asset set or the return history changed; weight-only
+        # changes reprice the existing scenario matrix
+        engine_key = (tuple(symbols), self._history_version)
+        if engine_key != self._var_engine_key or not self.var_engine.fitted:
+            mean, covariance, assets_with_history = self._estimate_moments(symbols, positions)
+            self.var_engine.fit(symbols, mean, covariance)
+            self._var_engine_key = engine_key
+            self._assets_with_history = assets_with_history
             
-        # Calculate VaR
-        portfolio_values = np.array(portfolio_values)
-        var_percentile = (1 - confidence_level) * 100
-        var = np.percentile(portfolio_values, var_percentile)
-        
-        # Calculate Expected Shortfall (Conditional VaR)
-        tail_losses = portfolio_values[portfolio_values <= var]
-        expected_shortfall = np.mean(tail_losses) if len(tail_losses) > 0 else var
+        var, expected_shortfall = self.var_engine.evaluate(weights, confidence_level, time_horizon_days)
         
         # Convert to dollar amounts
         var_dollar = abs(var * total_portfolio_value)
@@ -382,14 +1127,13 @@ class PortfolioRiskManager:
             "expected_shortfall_percentage": expected_shortfall,
             "expected_shortfall_dollar": es_dollar,
             "risk_level": self._classify_risk_level(var_dollar, total_portfolio_value),
-            "positions_analyzed": len(positions)
+            "positions_analyzed": len(positions),
+            "simulations": self.var_engine.num_simulations,
+            "assets_with_history": self._assets_with_history
         }
         
-        # Save risk assessment
-        risk_file = os.path.join(self.risk_data_path, f"portfolio_var_{int(time.time())}.json")
-        with open(risk_file, 'w') as f:
-            json.dump(risk_assessment, f, indent=2)
-            
+        self.var_store.append(risk_assessment)
+        
         return risk_assessment
         
     def analyze_correlation_exposure(self, positions):
@@ -406,39 +1150,41 @@ class PortfolioRiskManager:
             "diversification_metrics": {}
         }
         
-        # Simulate correlation matrix (in production, use historical price data)
-        for i, symbol1 in enumerate(symbols):
-            for j, symbol2 in enumerate(symbols[i+1:], i+1):
-                # Simulate correlation based on asset types
-                correlation = self._estimate_correlation(symbol1, symbol2)
-                correlation_analysis["correlation_pairs"][f"{symbol1}_{symbol2}"] = correlation
-                
+        # Pairwise correlations from the rolling service (None until a pair has enough data)
+        correlation = self.correlation_service.submatrix(symbols)
+        upper_i, upper_j = np.triu_indices(len(symbols), 1)
+        pair_values = correlation[upper_i, upper_j]
+        correlation_analysis["correlation_pairs"] = {
+            f"{symbols[i]}_{symbols[j]}": (None if np.isnan(value) else float(value))
+            for i, j, value in zip(upper_i, upper_j, pair_values)
+        }
+        known_pairs = pair_values[~np.isnan(pair_values)]
+        correlation_analysis["max_correlation"] = float(known_pairs.max()) if len(known_pairs) else None
+        
         # Calculate concentration risk
-        total_value = sum(pos.get("market_value", 0) for pos in positions.values())
+        market_values = np.array([pos.get("market_value", 0) for pos in positions.values()], dtype=float)
+        total_value = market_values.sum()
+        weights = market_values / total_value if total_value > 0 else np.zeros(len(symbols))
         
-        for symbol, position in positions.items():
-            weight = position.get("market_value", 0) / total_value if total_value > 0 else 0
+        for symbol, weight in zip(symbols, weights):
             correlation_analysis["concentration_risk"][symbol] = {
-                "weight": weight,
+                "weight": float(weight),
                 "risk_level": "high" if weight > 0.3 else "medium" if weight > 0.15 else "low"
             }
             
         # Calculate diversification score
-        weights = [pos.get("market_value", 0) / total_value for pos in positions.values() if total_value > 0]
-        herfindahl_index = sum(w**2 for w in weights)
+        herfindahl_index = float(np.sum(weights ** 2)) if total_value > 0 else 0
         diversification_score = 1 - herfindahl_index
         
         correlation_analysis["diversification_metrics"] = {
             "herfindahl_index": herfindahl_index,
             "diversification_score": diversification_score,
-            "effective_number_of_positions": 1 / herfindahl_index if herfindahl_index > 0 else 0
+            "effective_number_of_positions": 1 / herfindahl_index if herfindahl_index > 0 else 0,
+            "effective_number_of_assets": self.correlation_service.effective_n
         }
         
-        # Save correlation analysis
-        correlation_file = os.path.join(self.risk_data_path, f"correlation_analysis_{int(time.time())}.json")
-        with open(correlation_file, 'w') as f:
-            json.dump(correlation_analysis, f, indent=2)
-            
+        self.correlation_store.append(correlation_analysis)
+        
         return correlation_analysis
         
     def _classify_risk_level(self, var_dollar, portfolio_value):
@@ -456,24 +1202,14 @@ class PortfolioRiskManager:
             
     def _estimate_correlation(self, symbol1, symbol2):
         """Estimate correlation between two assets."""
-        # Simplified correlation estimation based on asset types
-        crypto_majors = ["BTC", "ETH"]
-        crypto_alts = ["ADA", "SOL", "DOT", "LINK"]
-        
-        if symbol1 in crypto_majors and symbol2 in crypto_majors:
-            return np.random.uniform(0.6, 0.8)  # High correlation between major cryptos
-        elif symbol1 in crypto_alts and symbol2 in crypto_alts:
-            return np.random.uniform(0.4, 0.7)  # Medium correlation between altcoins
-        elif (symbol1 in crypto_majors and symbol2 in crypto_alts) or (symbol1 in crypto_alts and symbol2 in crypto_majors):
-            return np.random.uniform(0.3, 0.6)  # Medium correlation between majors and alts
-        else:
-            return np.random.uniform(0.1, 0.4)  # Lower correlation for different asset types
+        return self.correlation_service.correlation(symbol1, symbol2)
 
 class CircuitBreakerSystem:
     """Circuit breaker system for risk management."""
     
-    def __init__(self):
+    def __init__(self, correlation_service=None):
         """TODO: Add function documentation"""
+        self.correlation_service = correlation_service
         self.breaker_data_path = "/home/ubuntu/ULTIMATE_LYRA_ECOSYSTEM_FINAL_SEGMENTED/trading/circuit_breakers"
         os.makedirs(self.breaker_data_path, exist_ok=True)
         
@@ -509,8 +1245,11 @@ class CircuitBreakerSystem:
             if not self.breaker_status["volatility_spike"]:
                 breaker_events.append(self._trigger_breaker("volatility_spike", avg_volatility))
                 
-        # Correlation spike breaker
-        max_correlation = market_metrics.get("max_correlation", 0)
+        # Correlation spike breaker (live rolling correlation when a service is attached)
+        if self.correlation_service is not None and self.correlation_service.ready:
+            max_correlation = self.correlation_service.max_correlation
+        else:
+            max_correlation = market_metrics.get("max_correlation", 0)
         if max_correlation > self.breakers["correlation_spike"]["threshold"]:
             if not self.breaker_status["correlation_spike"]:
                 breaker_events.append(self._trigger_breaker("correlation_spike", max_correlation))
@@ -582,7 +1321,7 @@ class CircuitBreakerSystem:
 smart_order_router = SmartOrderRouter()
 execution_algorithms = AdvancedExecutionAlgorithms()
 portfolio_risk_manager = PortfolioRiskManager()
-circuit_breaker_system = CircuitBreakerSystem()
+circuit_breaker_system = CircuitBreakerSystem(correlation_service=portfolio_risk_manager.correlation_service)
 
 if __name__ == "__main__":
     logging.info("⚡ Initializing Advanced Trading Infrastructure...")
@@ -88,7 +88,8 @@ class BTCMarketsConnector:
         private_key: str,
         path: str,
         data: str = None) -> Dict[str,
-        str]:        """Build authentication headers for BTC Markets API"""
+        str]:
+        """Build authentication headers for BTC Markets API"""
         timestamp = str(int(time.time() * 1000))
         
         if data is None:
@@ -124,7 +125,8 @@ class BTCMarketsConnector:
         private_key: str,
         path: str,
         query_string: str = "",
-        data: str = None):        """Make HTTP call helper (for reference - async version used in practice)"""
+        data: str = None):
+        """Make HTTP call helper (for reference - async version used in practice)"""
         if data is not None:
             data = json.dumps(data)
         
@@ -274,7 +276,8 @@ class BTCMarketsConnector:
         side: str,
         order_type: str,
         amount: float,
-        price: Optional[float] = None) -> Optional[BTCMarketsOrder]:        """Place an order (requires authentication)"""
+        price: Optional[float] = None) -> Optional[BTCMarketsOrder]:
+        """Place an order (requires authentication)"""
         if not self.config.api_key or not self.config.private_key:
             logger.warning("BTC Markets: API credentials not configured for order placement")
             return None
@@ -331,7 +334,8 @@ class BTCMarketsConnector:
     
     async def get_orders(self,
         symbol: Optional[str] = None,
-        status: Optional[str] = None) -> Optional[List[BTCMarketsOrder]]:        """Get orders (requires authentication)"""
+        status: Optional[str] = None) -> Optional[List[BTCMarketsOrder]]:
+        """Get orders (requires authentication)"""
         if not self.config.api_key or not self.config.private_key:
             logger.warning("BTC Markets: API credentials not configured for order retrieval")
             return None
@@ -428,10 +432,8 @@ async def main():
             logging.info(f"   Found {len(markets)} markets")
             # Show first few markets
             for market in markets[:5]:
-                logging.info(f"   - {market.get('marketId',
-                    'Unknown')}: {market.get('baseAsset',
-                    '')}/{market.get('quoteAsset',
-                    '')}")        print()
+                logging.info(f"   - {market.get('marketId', 'Unknown')}: {market.get('baseAsset', '')}/{market.get('quoteAsset', '')}")
+        print()
         
         # Test 2: Get ticker data
         logging.info("💰 Test 2: Ticker Data")
@@ -441,9 +443,8 @@ async def main():
             ticker = await connector.get_ticker(symbol)
             if ticker:
                 logging.info(f"   {symbol}: ${ticker.price:,.2f} AUD (Vol: {ticker.volume:,.0f})")
-                logging.info(f"      24h: High ${ticker.high:,
-                    .2f} | Low ${ticker.low:,
-                    .2f} | Change {ticker.change:+.2f}%")            else:
+                logging.info(f"      24h: High ${ticker.high:,.2f} | Low ${ticker.low:,.2f} | Change {ticker.change:+.2f}%")
+            else:
                 logging.info(f"   {symbol}: No data available")
         print()
         
@@ -466,11 +467,8 @@ async def main():
         if trades:
             logging.info(f"   Recent {len(trades)} trades for BTC-AUD:")
             for trade in trades[:3]:
-                logging.info(f"      ${float(trade.get('price',
-                    0)):,
-                    .2f} - {float(trade.get('amount',
-                    0)):.4f} BTC ({trade.get('side',
-                    'Unknown')})")        print()
+                logging.info(f"      ${float(trade.get('price', 0)):,.2f} - {float(trade.get('amount', 0)):.4f} BTC ({trade.get('side', 'Unknown')})")
+        print()
         
         # Test 5: Account operations (would require API keys)
         logging.info("🔐 Test 5: Account Operations")
@@ -571,7 +571,8 @@ class LiveExchangeManager:
         symbol: str,
         side: str,
         size: float,
-        price: Optional[float] = None) -> Optional[Dict]:        """Place a paper trade on specified exchange"""
+        price: Optional[float] = None) -> Optional[Dict]:
+        """Place a paper trade on specified exchange"""
         if exchange_name not in self.exchanges:
             logger.error(f"Exchange {exchange_name} not configured")
             return None
@@ -737,7 +738,8 @@ class EnhancedLiveExchangeManager(LiveExchangeManager):
         symbol: str,
         side: str,
         amount: float,
-        price: Optional[float] = None) -> Optional[Dict]:        """Place order on BTC Markets"""
+        price: Optional[float] = None) -> Optional[Dict]:
+        """Place order on BTC Markets"""
         try:
             config = BTCMarketsConfig(
                 api_key=self.exchanges['btcmarkets']['api_key'],
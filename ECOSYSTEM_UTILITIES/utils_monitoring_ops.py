@@ -15,12 +15,221 @@ import os
 import json
 import time
 import asyncio
+import atexit
 import logging
 import psutil
+import queue
+import shutil
 import sqlite3
+import threading
+import numpy as np
+import pandas as pd
 from datetime import datetime, timedelta
+from urllib.parse import quote
 from typing import Dict, List, Optional
-import subprocess
+
+class LogSink:
+    """
+    Batched, day-partitioned SQLite sink for structured logs.
+    
+    Callers only enqueue onto a bounded in-memory queue; a background writer
+    drains it and commits each batch with a single executemany in WAL mode.
+    Rows go to one table per UTC day (logs_YYYYMMDD), each indexed on
+    timestamp and on (trade_id | symbol | level, timestamp), so retention is a
+    DROP TABLE and queries only touch the days they cover.
+    
+    When the queue is full, overflow_policy decides what happens:
+    "drop_oldest" (default) evicts the oldest queued entry, "drop_newest"
+    discards the new one, "block" waits up to block_timeout. ERROR and
+    CRITICAL entries always get the blocking wait before they can be dropped.
+    """
+    
+    COLUMNS = ("timestamp", "logger_name", "level", "message", "module", "function",
+               "trade_id", "symbol", "exchange", "user_id", "session_id", "metadata")
+    
+    def __init__(self, db_path, max_queue=10000, batch_size=500, flush_interval=0.5,
+                 overflow_policy="drop_oldest", block_timeout=0.05, retention_days=30):
+        """Logs are queued and written in batches of batch_size by a background writer; overflow_policy decides what happens when the queue is full."""
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.retention_days = retention_days
+        self.dropped = 0
+        
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._enqueued = 0
+        self._done = 0
+        self._progress = threading.Condition()
+        self._partitions = set()
+        self._last_retention = 0.0
+        self._stop = threading.Event()
+        self._writer = threading.Thread(target=self._run, name="log-sink-writer", daemon=True)
+        self._writer.start()
+        
+    def submit(self, log_entry):
+        """Enqueue a log entry; returns False if it was dropped."""
+        try:
+            self._queue.put_nowait(log_entry)
+        except queue.Full:
+            if self.overflow_policy == "block" or log_entry.get("level", "").upper() in ("ERROR", "CRITICAL"):
+                try:
+                    self._queue.put(log_entry, timeout=self.block_timeout)
+                except queue.Full:
+                    return self._drop(1)
+            elif self.overflow_policy == "drop_oldest":
+                try:
+                    self._queue.get_nowait()
+                    self._drop(1)
+                    self._queue.put_nowait(log_entry)
+                except (queue.Empty, queue.Full):
+                    return self._drop(1)
+            else:
+                return self._drop(1)
+        with self._progress:
+            self._enqueued += 1
+        return True
+        
+    def _drop(self, count):
+        """Count entries as dropped so flush() does not wait for them."""
+        with self._progress:
+            self.dropped += count
+            self._done += count
+            self._progress.notify_all()
+        return False
+        
+    def flush(self, timeout=5.0):
+        """Wait until everything enqueued so far has been written (or dropped)."""
+        with self._progress:
+            target = self._enqueued
+            return self._progress.wait_for(lambda: self._done >= target, timeout)
+            
+    def close(self, timeout=5.0):
+        """Flush and stop the writer."""
+        self.flush(timeout)
+        self._stop.set()
+        self._writer.join(timeout)
+        
+    @staticmethod
+    def partition_name(timestamp):
+        """Table holding entries for the UTC day of an ISO timestamp."""
+        return f"logs_{timestamp[:10].replace('-', '')}"
+        
+    def _connect(self):
+        """Open a WAL-mode connection for the writer thread."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+        
+    def _ensure_partition(self, conn, table):
+        """Create a daily partition table and its indexes on first use."""
+        if table in self._partitions:
+            return
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                logger_name TEXT NOT NULL,
+                level TEXT NOT NULL,
+                message TEXT NOT NULL,
+                module TEXT,
+                function TEXT,
+                trade_id TEXT,
+                symbol TEXT,
+                exchange TEXT,
+                user_id TEXT,
+                session_id TEXT,
+                metadata TEXT
+            )
+        ''')
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_timestamp ON {table}(timestamp)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_trade_id ON {table}(trade_id, timestamp)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_symbol ON {table}(symbol, timestamp)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_level ON {table}(level, timestamp)")
+        self._partitions.add(table)
+        
+    def _row(self, log_entry):
+        """Flatten a log entry into a partition row."""
+        metadata = log_entry.get("metadata", {})
+        return (
+            log_entry["timestamp"],
+            log_entry["logger_name"],
+            log_entry["level"],
+            log_entry["message"],
+            metadata.get("module"),
+            metadata.get("function"),
+            metadata.get("trade_id"),
+            metadata.get("symbol"),
+            metadata.get("exchange"),
+            metadata.get("user_id"),
+            metadata.get("session_id"),
+            json.dumps(metadata, default=str)
+        )
+        
+    def _run(self):
+        """Writer thread: drain the queue in batches, one transaction per batch."""
+        conn = self._connect()
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        columns = ", ".join(self.COLUMNS)
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                self._maybe_apply_retention(conn)
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+                    
+            partitions = {}
+            for log_entry in batch:
+                partitions.setdefault(self.partition_name(log_entry["timestamp"]), []).append(self._row(log_entry))
+            try:
+                with conn:
+                    for table, rows in partitions.items():
+                        self._ensure_partition(conn, table)
+                        conn.executemany(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", rows)
+            except Exception as e:
+                self._partitions.clear()
+                logging.error(f"❌ Log sink failed to write {len(batch)} entries: {str(e)}")
+            with self._progress:
+                self._done += len(batch)
+                self._progress.notify_all()
+            self._maybe_apply_retention(conn)
+        conn.close()
+        
+    def _maybe_apply_retention(self, conn):
+        """Drop day partitions older than retention_days (checked at most hourly)."""
+        if not self.retention_days or time.time() - self._last_retention < 3600:
+            return
+        self._last_retention = time.time()
+        self.drop_partitions_before(datetime.utcnow() - timedelta(days=self.retention_days), conn)
+        
+    def drop_partitions_before(self, cutoff, conn=None):
+        """Drop every day partition older than cutoff (a datetime)."""
+        owned = conn is None
+        conn = conn or self._connect()
+        cutoff_table = f"logs_{cutoff.strftime('%Y%m%d')}"
+        dropped = [table for table in self.list_partitions(conn) if table < cutoff_table]
+        with conn:
+            for table in dropped:
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+                self._partitions.discard(table)
+        if owned:
+            conn.close()
+        return dropped
+        
+    @staticmethod
+    def list_partitions(conn):
+        """Day partition tables, oldest first."""
+        rows = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB 'logs_[0-9]*'"
+        ).fetchall()
+        return sorted(row[0] for row in rows)
 
 class StructuredLoggingSystem:
     """Enterprise-grade structured logging system."""
@@ -41,6 +250,8 @@ class StructuredLoggingSystem:
         # Initialize log database for fast queries
         self.log_db_path = os.path.join(self.log_path, "logs.db")
         self.init_log_database()
+        self.log_sink = LogSink(self.log_db_path)
+        atexit.register(self.log_sink.close)
         
     def setup_structured_logging(self):
         """Setup structured logging with JSON format."""
@@ -88,35 +299,10 @@ class StructuredLoggingSystem:
                 
     def init_log_database(self):
         """Initialize SQLite database for log storage and querying."""
+        # WAL lets queries and health checks read while the sink writes;
+        # the day partitions themselves are created by the sink on first write
         conn = sqlite3.connect(self.log_db_path)
-        cursor = conn.cursor()
-        
-        # Create logs table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT NOT NULL,
-                logger_name TEXT NOT NULL,
-                level TEXT NOT NULL,
-                message TEXT NOT NULL,
-                module TEXT,
-                function TEXT,
-                trade_id TEXT,
-                symbol TEXT,
-                exchange TEXT,
-                user_id TEXT,
-                session_id TEXT,
-                metadata TEXT
-            )
-        ''')
-        
-        # Create indexes for fast queries
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_timestamp ON logs(timestamp)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_logger ON logs(logger_name)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_trade_id ON logs(trade_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_symbol ON logs(symbol)')
-        
-        conn.commit()
+        conn.execute("PRAGMA journal_mode=WAL")
         conn.close()
         
     def log_structured(self, logger_name, level, message, **kwargs):
@@ -137,45 +323,18 @@ class StructuredLoggingSystem:
         self._store_log_in_db(log_entry)
         
     def _store_log_in_db(self, log_entry):
-        """Store log entry in database for fast querying."""
-        conn = sqlite3.connect(self.log_db_path)
-        cursor = conn.cursor()
-        
-        metadata = log_entry.get("metadata", {})
-        
-        cursor.execute('''
-            INSERT INTO logs (
-                timestamp, logger_name, level, message, module, function,
-                trade_id, symbol, exchange, user_id, session_id, metadata
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            log_entry["timestamp"],
-            log_entry["logger_name"],
-            log_entry["level"],
-            log_entry["message"],
-            metadata.get("module"),
-            metadata.get("function"),
-            metadata.get("trade_id"),
-            metadata.get("symbol"),
-            metadata.get("exchange"),
-            metadata.get("user_id"),
-            metadata.get("session_id"),
-            json.dumps(metadata)
-        ))
-        
-        conn.commit()
-        conn.close()
+        """Hand the log entry to the background sink (never blocks on disk)."""
+        self.log_sink.submit(log_entry)
         
     def query_logs(self, filters=None, limit=1000):
         """Query logs with filters."""
-        conn = sqlite3.connect(self.log_db_path)
-        cursor = conn.cursor()
+        self.log_sink.flush(timeout=1.0)
         
-        query = "SELECT * FROM logs"
+        conditions = []
         params = []
+        start_time = end_time = None
         
         if filters:
-            conditions = []
             for key, value in filters.items():
                 if key in ['timestamp', 'logger_name', 'level', 'trade_id', 'symbol', 'exchange']:
                     conditions.append(f"{key} = ?")
@@ -183,134 +342,288 @@ class StructuredLoggingSystem:
                 elif key == 'start_time':
                     conditions.append("timestamp >= ?")
                     params.append(value)
+                    start_time = value
                 elif key == 'end_time':
                     conditions.append("timestamp <= ?")
                     params.append(value)
+                    end_time = value
                     
-            if conditions:
-                query += " WHERE " + " AND ".join(conditions)
-                
-        query += f" ORDER BY timestamp DESC LIMIT {limit}"
-        
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        conn.close()
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
         
+        conn = sqlite3.connect(self.log_db_path)
+        try:
+            # Newest day first; stop as soon as the limit is filled
+            tables = LogSink.list_partitions(conn)
+            if start_time:
+                tables = [t for t in tables if t >= LogSink.partition_name(start_time)]
+            if end_time:
+                tables = [t for t in tables if t <= LogSink.partition_name(end_time)]
+                
+            results = []
+            for table in reversed(tables):
+                remaining = limit - len(results)
+                if remaining <= 0:
+                    break
+                cursor = conn.execute(
+                    f"SELECT * FROM {table}{where} ORDER BY timestamp DESC LIMIT ?",
+                    params + [remaining]
+                )
+                results.extend(cursor.fetchall())
+        finally:
+            conn.close()
+            
         return results
 
 class TradeReplaySystem:
-    """Trade replay and forensic analysis system."""
+    """
+    Trade replay and forensic analysis system.
     
-    def __init__(self):
-        """TODO: Add function documentation"""
-        self.replay_path = "/home/ubuntu/ULTIMATE_LYRA_ECOSYSTEM_FINAL_SEGMENTED/logs/trade_replay"
+    Trades are kept in a columnar store partitioned by day and symbol:
+    trades/date=YYYY-MM-DD/symbol=<symbol>/<segment>/<column>.npy. Each flush
+    of buffered trades writes one immutable segment per partition, so a
+    replay prunes partitions by date and symbol and loads only the columns
+    it needs, memory-mapping the timestamp column to filter the range first.
+    
+    Recorded trades are buffered until flush_size of them are waiting or a
+    background flusher finds the oldest one older than flush_interval, so a
+    crash loses at most about flush_interval seconds of trades.
+    """
+    
+    STRING_COLUMNS = ("trade_id", "timestamp", "symbol", "side", "exchange", "strategy",
+                      "status", "market_conditions", "metadata")
+    FLOAT_COLUMNS = ("quantity", "price", "ai_confidence", "execution_time_ms", "slippage",
+                     "fees", "pnl", "holding_time_s")
+    ANALYSIS_COLUMNS = ["trade_id", "ts_ns", "strategy", "exchange", "symbol", "pnl",
+                        "slippage", "fees", "execution_time_ms", "holding_time_s"]
+    
+    def __init__(self, flush_size=1000, flush_interval=1.0, replay_path=None):
+        """Trades are written in segments of flush_size, or after flush_interval seconds by a background flusher."""
+        self.replay_path = replay_path or "/home/ubuntu/ULTIMATE_LYRA_ECOSYSTEM_FINAL_SEGMENTED/logs/trade_replay"
         os.makedirs(self.replay_path, exist_ok=True)
         
-        # Initialize trade database
-        self.trade_db_path = os.path.join(self.replay_path, "trades.db")
+        # Initialize columnar trade store
+        self.trade_store_path = os.path.join(self.replay_path, "trades")
+        self.report_path = os.path.join(self.replay_path, "replay_reports.jsonl")
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._buffer = {}
+        self._buffered = 0
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
         self.init_trade_database()
         
-    def init_trade_database(self):
-        """Initialize trade database for replay functionality."""
-        conn = sqlite3.connect(self.trade_db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS trades (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                trade_id TEXT UNIQUE NOT NULL,
-                timestamp TEXT NOT NULL,
-                symbol TEXT NOT NULL,
-                side TEXT NOT NULL,
-                quantity REAL NOT NULL,
-                price REAL NOT NULL,
-                exchange TEXT NOT NULL,
-                strategy TEXT,
-                ai_confidence REAL,
-                market_conditions TEXT,
-                execution_time_ms REAL,
-                slippage REAL,
-                fees REAL,
-                pnl REAL,
-                status TEXT,
-                metadata TEXT
-            )
-        ''')
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._run_flusher, name="trade-replay-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
         
-        # Create indexes
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_trade_timestamp ON trades(timestamp)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_trade_symbol ON trades(symbol)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_trade_strategy ON trades(strategy)')
+    def init_trade_database(self):
+        """Initialize the columnar trade store for replay functionality."""
+        os.makedirs(self.trade_store_path, exist_ok=True)
         
-        conn.commit()
-        conn.close()
+    @staticmethod
+    def _to_timestamp(value):
+        """UTC-naive pandas Timestamp for an ISO string or datetime."""
+        timestamp = pd.Timestamp(value)
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.tz_convert(None)
+        return timestamp
         
     def record_trade(self, trade_data):
-        """Record a trade for replay analysis."""
-        conn = sqlite3.connect(self.trade_db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO trades (
-                trade_id, timestamp, symbol, side, quantity, price, exchange,
-                strategy, ai_confidence, market_conditions, execution_time_ms,
-                slippage, fees, pnl, status, metadata
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            trade_data.get("trade_id"),
-            trade_data.get("timestamp"),
-            trade_data.get("symbol"),
-            trade_data.get("side"),
-            trade_data.get("quantity"),
-            trade_data.get("price"),
-            trade_data.get("exchange"),
-            trade_data.get("strategy"),
-            trade_data.get("ai_confidence"),
-            json.dumps(trade_data.get("market_conditions", {})),
-            trade_data.get("execution_time_ms"),
-            trade_data.get("slippage"),
-            trade_data.get("fees"),
-            trade_data.get("pnl"),
-            trade_data.get("status"),
-            json.dumps(trade_data.get("metadata", {}))
-        ))
-        
-        conn.commit()
-        conn.close()
+        """Record a trade for replay analysis (buffered; written in segments of flush_size)."""
+        self.record_trades([trade_data])
+        
+    def record_trades(self, trades):
+        """Record a batch of trades."""
+        rows = [self._normalize_trade(trade_data) for trade_data in trades]
+        with self._lock:
+            for row in rows:
+                self._buffer.setdefault((row["_day"], row["symbol"]), []).append(row)
+            if rows and self._oldest is None:
+                self._oldest = time.monotonic()
+            self._buffered += len(rows)
+            full = self._buffered >= self.flush_size
+        if full:
+            self.flush()
+            
+    def _normalize_trade(self, trade_data):
+        """Flatten one trade dict into a column row plus its ns timestamp and day partition."""
+        row = {column: trade_data.get(column) for column in self.STRING_COLUMNS + self.FLOAT_COLUMNS}
+        timestamp = self._to_timestamp(trade_data.get("timestamp") or datetime.utcnow())
+        row["timestamp"] = trade_data.get("timestamp") or timestamp.isoformat()
+        row["market_conditions"] = json.dumps(trade_data.get("market_conditions", {}))
+        row["metadata"] = json.dumps(trade_data.get("metadata", {}))
+        row["ts_ns"] = timestamp.value
+        row["_day"] = timestamp.strftime("%Y-%m-%d")
+        return row
+        
+    def flush(self):
+        """Write buffered trades as one new segment per (day, symbol) partition."""
+        with self._write_lock:
+            with self._lock:
+                buffer, self._buffer, self._buffered, self._oldest = self._buffer, {}, 0, None
+            for (day, symbol), rows in buffer.items():
+                self._write_segment(day, symbol, rows)
+                
+    def _run_flusher(self):
+        """Flusher thread: write the buffer once its oldest trade has waited flush_interval."""
+        while not self._stop.wait(self.flush_interval / 4):
+            with self._lock:
+                due = self._oldest is not None and time.monotonic() - self._oldest >= self.flush_interval
+            if due:
+                try:
+                    self.flush()
+                except Exception as e:
+                    logging.error(f"❌ Trade replay flush failed: {str(e)}")
+                    
+    def close(self, timeout=5.0):
+        """Stop the flusher and write whatever is still buffered."""
+        self._stop.set()
+        self._flusher.join(timeout)
+        self.flush()
+        
+    def _partition_dir(self, day, symbol):
+        """Directory of the (day, symbol) partition; the symbol is URL-quoted."""
+        return os.path.join(self.trade_store_path, f"date={day}", f"symbol={quote(str(symbol), safe='')}")
+        
+    def _write_segment(self, day, symbol, rows):
+        """Write rows as one column-per-file .npy segment, published by an atomic rename."""
+        partition = self._partition_dir(day, symbol)
+        os.makedirs(partition, exist_ok=True)
+        segment = f"{time.time_ns():020d}_{os.getpid()}"
+        staging = os.path.join(partition, f".{segment}")
+        os.makedirs(staging)
+        
+        for column in self.STRING_COLUMNS:
+            np.save(os.path.join(staging, f"{column}.npy"),
+                    np.array(["" if row[column] is None else str(row[column]) for row in rows], dtype=str))
+        for column in self.FLOAT_COLUMNS:
+            np.save(os.path.join(staging, f"{column}.npy"),
+                    np.array([np.nan if row[column] is None else row[column] for row in rows], dtype=float))
+        np.save(os.path.join(staging, "ts_ns.npy"), np.array([row["ts_ns"] for row in rows], dtype=np.int64))
+        
+        # Readers never see a partially written segment
+        os.rename(staging, os.path.join(partition, segment))
+        
+    def _segments(self, start, end, symbol=None):
+        """Segment directories for partitions overlapping [start, end], in write order per partition."""
+        if not os.path.isdir(self.trade_store_path):
+            return []
+        start_day, end_day = start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+        segments = []
+        for date_dir in sorted(os.listdir(self.trade_store_path)):
+            day = date_dir[len("date="):]
+            if not date_dir.startswith("date=") or not start_day <= day <= end_day:
+                continue
+            day_path = os.path.join(self.trade_store_path, date_dir)
+            symbol_dirs = sorted(os.listdir(day_path))
+            if symbol is not None:
+                symbol_dirs = [d for d in symbol_dirs if d == f"symbol={quote(str(symbol), safe='')}"]
+            for symbol_dir in symbol_dirs:
+                partition = os.path.join(day_path, symbol_dir)
+                segments.extend(
+                    os.path.join(partition, segment)
+                    for segment in sorted(os.listdir(partition)) if not segment.startswith(".")
+                )
+        return segments
+        
+    def load_trades(self, start_time, end_time, columns=None, filters=None):
+        """
+        Trades in [start_time, end_time] as a DataFrame sorted by time.
+        
+        Only the projected columns (plus those needed for filtering) are read.
+        A re-recorded trade_id keeps its latest version; trades recorded
+        without a trade_id are never collapsed into each other.
+        """
+        self.flush()
+        start, end = self._to_timestamp(start_time), self._to_timestamp(end_time)
+        filters = {k: v for k, v in (filters or {}).items() if k in ("symbol", "side", "exchange", "strategy", "status")}
+        symbol = filters.pop("symbol", None)
+        columns = list(columns or self.STRING_COLUMNS + self.FLOAT_COLUMNS)
+        needed = list(dict.fromkeys(columns + list(filters) + ["trade_id", "ts_ns"]))
+        
+        frames = []
+        for segment in self._segments(start, end, symbol):
+            ts_ns = np.load(os.path.join(segment, "ts_ns.npy"), mmap_mode="r")
+            mask = (ts_ns >= start.value) & (ts_ns <= end.value)
+            if not mask.any():
+                continue
+            frames.append(pd.DataFrame({
+                column: np.load(os.path.join(segment, f"{column}.npy"), mmap_mode="r")[mask]
+                for column in needed
+            }))
+        if not frames:
+            return pd.DataFrame(columns=needed)
+            
+        trades = pd.concat(frames, ignore_index=True)
+        for key, value in filters.items():
+            trades = trades[trades[key] == value]
+        trade_ids = trades["trade_id"]
+        trades = trades[(trade_ids == "") | ~trade_ids.duplicated(keep="last")]
+        return trades.sort_values("ts_ns", kind="stable").reset_index(drop=True)
         
     def replay_trades(self, start_time, end_time, filters=None):
         """Replay trades for analysis."""
-        conn = sqlite3.connect(self.trade_db_path)
-        cursor = conn.cursor()
-        
-        query = "SELECT * FROM trades WHERE timestamp BETWEEN ? AND ?"
-        params = [start_time, end_time]
-        
-        if filters:
-            for key, value in filters.items():
-                if key in ['symbol', 'side', 'exchange', 'strategy', 'status']:
-                    query += f" AND {key} = ?"
-                    params.append(value)
-                    
-        query += " ORDER BY timestamp"
-        
-        cursor.execute(query, params)
-        trades = cursor.fetchall()
-        conn.close()
+        trades = self.load_trades(start_time, end_time, columns=self.ANALYSIS_COLUMNS, filters=filters)
         
         # Analyze replay
         replay_analysis = self._analyze_trade_replay(trades)
         
-        # Save replay analysis
-        replay_file = os.path.join(self.replay_path, f"replay_analysis_{int(time.time())}.json")
-        with open(replay_file, 'w') as f:
-            json.dump(replay_analysis, f, indent=2)
+        # Append replay analysis to the report log
+        with open(self.report_path, 'a') as f:
+            f.write(json.dumps(replay_analysis) + "\n")
             
         return replay_analysis
         
+    def replay_events(self, start_time, end_time, callback, filters=None, columns=None, chunk_size=10000):
+        """Stream trades in timestamp order to callback(trade_dict), e.g. for what-if re-execution."""
+        trades = self.load_trades(start_time, end_time, columns=columns, filters=filters)
+        for offset in range(0, len(trades), chunk_size):
+            for event in trades.iloc[offset:offset + chunk_size].to_dict("records"):
+                callback(event)
+        return len(trades)
+        
+    @staticmethod
+    def _distribution(values):
+        """Count, mean, p50/p95/p99 and max of the finite values."""
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return {"count": 0}
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        return {
+            "count": int(len(values)),
+            "mean": float(values.mean()),
+            "p50": float(p50),
+            "p95": float(p95),
+            "p99": float(p99),
+            "max": float(values.max())
+        }
+        
+    def _group_metrics(self, trades, key):
+        """Per-group PnL, hit rate, slippage and fees via one vectorized group-by."""
+        grouped = trades.assign(
+            group=trades[key].replace("", "unknown"),
+            pnl_value=trades["pnl"].fillna(0.0),
+            win=trades["pnl"] > 0
+        ).groupby("group")
+        summary = grouped.agg(
+            trades=("pnl_value", "size"),
+            pnl=("pnl_value", "sum"),
+            hit_rate=("win", "mean"),
+            avg_slippage=("slippage", "mean"),
+            total_fees=("fees", "sum"),
+            median_holding_time_s=("holding_time_s", "median")
+        )
+        return {
+            str(name): {metric: (None if pd.isna(value) else float(value)) for metric, value in row.items()}
+            for name, row in summary.iterrows()
+        }
+        
     def _analyze_trade_replay(self, trades):
         """Analyze replayed trades for insights."""
-        if not trades:
+        if trades.empty:
             return {"error": "No trades found for replay"}
             
         analysis = {
@@ -318,40 +631,49 @@ class TradeReplaySystem:
             "total_trades": len(trades),
             "performance_metrics": {},
             "strategy_analysis": {},
+            "exchange_analysis": {},
             "execution_analysis": {},
             "risk_analysis": {}
         }
         
         # Performance metrics
-        total_pnl = sum(trade[14] for trade in trades if trade[14])  # pnl column
-        winning_trades = [trade for trade in trades if trade[14] and trade[14] > 0]
-        losing_trades = [trade for trade in trades if trade[14] and trade[14] < 0]
+        pnl = trades["pnl"].to_numpy(dtype=float)
+        wins = pnl[pnl > 0]
+        losses = pnl[pnl < 0]
         
         analysis["performance_metrics"] = {
-            "total_pnl": total_pnl,
-            "win_rate": len(winning_trades) / len(trades) if trades else 0,
-            "avg_win": sum(trade[14] for trade in winning_trades) / len(winning_trades) if winning_trades else 0,
-            "avg_loss": sum(trade[14] for trade in losing_trades) / len(losing_trades) if losing_trades else 0,
-            "profit_factor": abs(sum(trade[14] for trade in winning_trades) / sum(trade[14] for trade in losing_trades)) if losing_trades else float('inf')
+            "total_pnl": float(np.nansum(pnl)),
+            "win_rate": len(wins) / len(trades),
+            "avg_win": float(wins.mean()) if len(wins) else 0,
+            "avg_loss": float(losses.mean()) if len(losses) else 0,
+            "profit_factor": abs(float(wins.sum() / losses.sum())) if len(losses) else float('inf')
         }
         
-        # Strategy analysis
-        strategies = {}
-        for trade in trades:
-            strategy = trade[7]  # strategy column
-            if strategy not in strategies:
-                strategies[strategy] = {"trades": 0, "pnl": 0}
-            strategies[strategy]["trades"] += 1
-            strategies[strategy]["pnl"] += trade[14] if trade[14] else 0
-            
-        analysis["strategy_analysis"] = strategies
+        # Strategy and exchange analysis
+        analysis["strategy_analysis"] = self._group_metrics(trades, "strategy")
+        analysis["exchange_analysis"] = self._group_metrics(trades, "exchange")
+        
+        # Execution quality and holding-time distributions
+        analysis["execution_analysis"] = {
+            "slippage": self._distribution(trades["slippage"]),
+            "execution_time_ms": self._distribution(trades["execution_time_ms"]),
+            "holding_time_s": self._distribution(trades["holding_time_s"])
+        }
+        
+        # Drawdown of cumulative PnL in replay order
+        equity = np.cumsum(np.nan_to_num(pnl))
+        drawdown = equity - np.maximum.accumulate(equity)
+        analysis["risk_analysis"] = {
+            "max_drawdown": float(drawdown.min()),
+            "final_cumulative_pnl": float(equity[-1])
+        }
         
         return analysis
 
 class FailoverSystem:
     """Failover and disaster recovery system."""
     
-    def __init__(self):
+    def __init__(self, check_timeout=5.0, resource_sample_interval=5.0):
         """TODO: Add function documentation"""
         self.failover_path = "/home/ubuntu/ULTIMATE_LYRA_ECOSYSTEM_FINAL_SEGMENTED/utils/failover"
         os.makedirs(self.failover_path, exist_ok=True)
@@ -368,6 +690,34 @@ class FailoverSystem:
             "ai_models": True
         }
         
+        # Every component check runs concurrently, each bounded by its timeout
+        self.check_timeout = check_timeout
+        self.component_timeouts = {}
+        
+        # A failed component's recovery waits for these (when they are also being recovered)
+        self.recovery_dependencies = {
+            "database": ["emergency_backup"],
+            "trading_engine": ["database", "api_connections"],
+            "ai_models": ["database"]
+        }
+        
+        # Critical data for emergency backups
+        self.critical_files = [
+            "/home/ubuntu/ULTIMATE_LYRA_ECOSYSTEM_FINAL_SEGMENTED/config/.env"
+        ]
+        self.critical_databases = [
+            "/home/ubuntu/ULTIMATE_LYRA_ECOSYSTEM_FINAL_SEGMENTED/logs/logs.db"
+        ]
+        self.critical_directories = [
+            "/home/ubuntu/ULTIMATE_LYRA_ECOSYSTEM_FINAL_SEGMENTED/logs/trade_replay/trades"
+        ]
+        
+        # Resource probes are sampled; cpu_percent(interval=None) measures since the previous call
+        self.resource_sample_interval = resource_sample_interval
+        self._resource_sample = None
+        self._resource_sampled_at = 0.0
+        psutil.cpu_percent(interval=None)
+        
     async def monitor_system_health(self):
         """Continuously monitor system health."""
         while True:
@@ -389,32 +739,39 @@ class FailoverSystem:
             
     async def _perform_health_check(self):
         """Perform comprehensive health check."""
-        health_status = {}
+        checks = {
+            "database": lambda: asyncio.to_thread(self._check_database_health),
+            "api_connections": self._check_api_health,
+            "trading_engine": lambda: asyncio.to_thread(self._check_trading_engine_health),
+            "ai_models": lambda: asyncio.to_thread(self._check_ai_models_health),
+            "system_resources": lambda: asyncio.to_thread(self._check_system_resources)
+        }
+        
+        results = await asyncio.gather(*(self._run_check(name, check) for name, check in checks.items()))
+        return dict(results)
         
-        # Database health
+    async def _run_check(self, component, check):
+        """Run one component check; a timeout or error counts as unhealthy."""
+        timeout = self.component_timeouts.get(component, self.check_timeout)
         try:
-            conn = sqlite3.connect("/home/ubuntu/ULTIMATE_LYRA_ECOSYSTEM_FINAL_SEGMENTED/logs/logs.db")
+            return component, bool(await asyncio.wait_for(check(), timeout))
+        except asyncio.TimeoutError:
+            logging.warning(f"⏱️ Health check for {component} timed out after {timeout}s")
+        except Exception as e:
+            logging.warning(f"⚠️ Health check for {component} failed: {str(e)}")
+        return component, False
+        
+    def _check_database_health(self):
+        """Check database health."""
+        try:
+            conn = sqlite3.connect("/home/ubuntu/ULTIMATE_LYRA_ECOSYSTEM_FINAL_SEGMENTED/logs/logs.db", timeout=self.check_timeout)
             cursor = conn.cursor()
             cursor.execute("SELECT 1")
             conn.close()
-            health_status["database"] = True
+            return True
         except Exception:
-            health_status["database"] = False
+            return False
             
-        # API connections health
-        health_status["api_connections"] = await self._check_api_health()
-        
-        # Trading engine health
-        health_status["trading_engine"] = self._check_trading_engine_health()
-        
-        # AI models health
-        health_status["ai_models"] = self._check_ai_models_health()
-        
-        # System resources health
-        health_status["system_resources"] = self._check_system_resources()
-        
-        return health_status
-        
     async def _check_api_health(self):
         """Check API connection health."""
         # Simulate API health checks
@@ -443,25 +800,25 @@ class FailoverSystem:
         except Exception:
             return False
             
+    def sample_resources(self):
+        """Latest resource sample, refreshed at most every resource_sample_interval seconds."""
+        now = time.monotonic()
+        if self._resource_sample is None or now - self._resource_sampled_at >= self.resource_sample_interval:
+            self._resource_sample = {
+                "cpu_percent": psutil.cpu_percent(interval=None),
+                "memory_percent": psutil.virtual_memory().percent,
+                "disk_percent": psutil.disk_usage('/').percent
+            }
+            self._resource_sampled_at = now
+        return self._resource_sample
+        
     def _check_system_resources(self):
         """Check system resource health."""
         try:
-            # CPU usage
-            cpu_percent = psutil.cpu_percent(interval=1)
-            if cpu_percent > 90:
-                return False
-                
-            # Memory usage
-            memory = psutil.virtual_memory()
-            if memory.percent > 90:
-                return False
-                
-            # Disk usage
-            disk = psutil.disk_usage('/')
-            if disk.percent > 90:
-                return False
-                
-            return True
+            sample = self.sample_resources()
+            return (sample["cpu_percent"] <= 90 and
+                    sample["memory_percent"] <= 90 and
+                    sample["disk_percent"] <= 90)
         except Exception:
             return False
             
@@ -474,42 +831,93 @@ class FailoverSystem:
             "recovery_status": "in_progress"
         }
         
-        # Backup current state
-        backup_result = await self._create_emergency_backup()
-        failover_event["actions_taken"].append(f"Emergency backup: {backup_result}")
+        # Backup and recoveries run concurrently; each recovery waits only for its failed dependencies
+        tasks = {"emergency_backup": asyncio.ensure_future(self._create_emergency_backup())}
+        failed = [component for component, status in health_status.items() if not status]
+        for component in self._recovery_order(failed):
+            dependencies = [tasks[d] for d in self.recovery_dependencies.get(component, []) if d in tasks]
+            tasks[component] = asyncio.ensure_future(self._recover_after(component, dependencies))
+            
+        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        for name, result in zip(tasks.keys(), results):
+            if name == "emergency_backup":
+                failover_event["actions_taken"].append(f"Emergency backup: {result}")
+            else:
+                failover_event["actions_taken"].append(f"Recovery attempt for {name}: {result}")
+        failover_event["recovery_status"] = "completed"
         
-        # Attempt recovery
-        for component, status in health_status.items():
-            if not status:
-                recovery_result = await self._attempt_component_recovery(component)
-                failover_event["actions_taken"].append(f"Recovery attempt for {component}: {recovery_result}")
-                
         # Save failover event
         failover_file = os.path.join(self.failover_path, f"failover_event_{int(time.time())}.json")
         with open(failover_file, 'w') as f:
             json.dump(failover_event, f, indent=2)
             
+    def _recovery_order(self, components):
+        """Order components so each comes after the failed components it depends on."""
+        order, visiting = [], set()
+        
+        def visit(component):
+            """Depth-first visit that places dependencies before their dependents."""
+            if component in order or component in visiting:
+                return
+            visiting.add(component)
+            for dependency in self.recovery_dependencies.get(component, []):
+                if dependency in components:
+                    visit(dependency)
+            visiting.discard(component)
+            order.append(component)
+            
+        for component in components:
+            visit(component)
+        return order
+        
+    async def _recover_after(self, component, dependencies):
+        """Recover a component once the recoveries it depends on have finished."""
+        if dependencies:
+            await asyncio.gather(*dependencies, return_exceptions=True)
+        return await self._attempt_component_recovery(component)
+        
     async def _create_emergency_backup(self):
         """Create emergency backup of critical data."""
         try:
             backup_dir = f"/home/ubuntu/emergency_backup_{int(time.time())}"
             os.makedirs(backup_dir, exist_ok=True)
             
-            # Backup critical files
-            critical_files = [
-                "/home/ubuntu/ULTIMATE_LYRA_ECOSYSTEM_FINAL_SEGMENTED/config/.env",
-                "/home/ubuntu/ULTIMATE_LYRA_ECOSYSTEM_FINAL_SEGMENTED/logs/logs.db",
-                "/home/ubuntu/ULTIMATE_LYRA_ECOSYSTEM_FINAL_SEGMENTED/logs/trade_replay/trades.db"
+            # Backup critical files, databases and stores in parallel
+            jobs = [
+                asyncio.to_thread(self._backup_sqlite, path, backup_dir)
+                for path in self.critical_databases if os.path.exists(path)
+            ] + [
+                asyncio.to_thread(shutil.copy2, path, backup_dir)
+                for path in self.critical_files if os.path.exists(path)
+            ] + [
+                asyncio.to_thread(shutil.copytree, path, os.path.join(backup_dir, os.path.basename(path)), dirs_exist_ok=True)
+                for path in self.critical_directories if os.path.isdir(path)
             ]
+            results = await asyncio.gather(*jobs, return_exceptions=True)
             
-            for file_path in critical_files:
-                if os.path.exists(file_path):
-                    subprocess.run(["cp", file_path, backup_dir], check=True)
-                    
+            errors = [result for result in results if isinstance(result, Exception)]
+            if errors:
+                return f"Partial: {backup_dir} ({len(errors)} of {len(jobs)} failed: {str(errors[0])})"
             return f"Success: {backup_dir}"
         except Exception as e:
             return f"Failed: {str(e)}"
             
+    def _backup_sqlite(self, path, backup_dir):
+        """
+        Copy a live SQLite database with the online backup API.
+        
+        The logs database runs in WAL mode, so the backup's read snapshot does
+        not block writers and the copy is transactionally consistent.
+        """
+        source = sqlite3.connect(path, timeout=30)
+        target = sqlite3.connect(os.path.join(backup_dir, os.path.basename(path)))
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        return path
+        
     async def _attempt_component_recovery(self, component):
         """Attempt to recover a failed component."""
         try:
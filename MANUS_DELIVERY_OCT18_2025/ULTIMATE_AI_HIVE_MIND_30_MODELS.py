@@ -46,6 +46,26 @@ class AIVote:
     timestamp: datetime
     response_time: float
 
+@dataclass
+class ModelPerformance:
+    """Online accuracy, latency and cost tracking for one model"""
+    calls: int = 0
+    errors: int = 0
+    resolved: int = 0
+    correct: int = 0
+    latency_ewma: Optional[float] = None
+    total_tokens: int = 0
+    total_cost: float = 0.0
+
+    @property
+    def accuracy(self) -> float:
+        """Laplace-smoothed directional accuracy (0.5 with no history)"""
+        return (self.correct + 1) / (self.resolved + 2)
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.calls if self.calls else 0.0
+
 class UltimateAIHiveMind:
     """
     ULTIMATE AI HIVE MIND - 30 BEST MODELS
@@ -56,9 +76,10 @@ class UltimateAIHiveMind:
     - Specialized model roles
     - Autonomous perfection-seeking
     - Real-time decision making
+    - Cascade mode: fast accurate models first, escalate only on disagreement
     """
     
-    def __init__(self):
+    def __init__(self, cascade_mode: bool = False):
         """Initialize the ultimate AI hive mind"""
         self.openrouter_key = os.getenv("OPENROUTER_API_KEY", "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")
         
@@ -68,9 +89,30 @@ class UltimateAIHiveMind:
         self.consensus_threshold = 0.70  # 70% agreement required
         self.min_votes_required = 20  # At least 20 models must vote
         
+        # Cascade routing: query a small ranked subset, escalate until the
+        # decision can no longer flip
+        self.cascade_mode = cascade_mode
+        self.cascade_initial_size = 5
+        self.cascade_step_size = 5
+        self.cascade_min_votes = 3
+        self.cascade_max_models = 12  # escalation ceiling per decision
+        self.cascade_confidence_margin = 0.10  # escalate when this close to the threshold
+        self.default_latency_estimate = 5.0  # seconds, until a model has history
+        self.latency_ewma_alpha = 0.2
+        
+        # Pruning: drop models that are persistently wrong or failing
+        self.min_observations_for_pruning = 20
+        self.min_model_accuracy = 0.40
+        self.max_model_error_rate = 0.50
+        
+        self.model_performance = {model_id: ModelPerformance() for model_id in self.models}
+        self.cascade_decisions = 0
+        self.cascade_model_calls = 0
+        
         print(f"🤖 ULTIMATE AI HIVE MIND initialized with {len(self.models)} models")
         print(f"   Total specializations: {len(set(m.specialization for m in self.models.values()))}")
         print(f"   Consensus threshold: {self.consensus_threshold:.0%}")
+        print(f"   Cascade mode: {'ON' if self.cascade_mode else 'OFF'}")
         
     def _configure_30_best_models(self) -> Dict[str, AIModelConfig]:
         """Configure the 30 best AI models for trading"""
@@ -357,6 +399,9 @@ class UltimateAIHiveMind:
             - Consensus confidence (0-1)
             - List of all AI votes
         """
+        if self.cascade_mode:
+            return await self.get_trading_decision_cascade(symbol, price, indicators, market_context)
+            
         print(f"\n{'='*80}")
         print(f"🤖 ULTIMATE AI HIVE MIND CONSULTATION")
         print(f"{'='*80}")
@@ -383,15 +428,8 @@ class UltimateAIHiveMind:
                 print(f"  ⚠ {config.name}: Error - {result}")
                 continue
                 
-            vote = AIVote(
-                model_id=model_id,
-                model_name=config.name,
-                signal=result['signal'],
-                confidence=result['confidence'],
-                reasoning=result['reasoning'],
-                timestamp=datetime.now(),
-                response_time=result.get('response_time', 0)
-            )
+            self._record_call(model_id, config, result)
+            vote = self._build_vote(model_id, config, result)
             votes.append(vote)
             print(f"  ✓ {config.name}: {vote.signal.value} ({vote.confidence:.0%})")
             
@@ -408,6 +446,169 @@ class UltimateAIHiveMind:
         
         return final_signal, consensus_confidence, votes
         
+    async def get_trading_decision_cascade(self, symbol: str, price: float,
+                                           indicators: Dict, market_context: str) -> Tuple[SignalType, float, List[AIVote]]:
+        """
+        Get trading decision by cascading through ranked models
+        
+        Models are ranked by tracked accuracy, latency and cost and capped at
+        `cascade_max_models`. The best `cascade_initial_size` are queried
+        first; after every vote the leading signal is checked against the
+        worst case of all ranked models not yet heard from. Querying stops
+        once the leader can no longer be overtaken and its confidence is not
+        within `cascade_confidence_margin` of `consensus_threshold`,
+        otherwise the next `cascade_step_size` models are added.
+        """
+        prompt = self._create_trading_prompt(symbol, price, indicators, market_context)
+        ranked = self._rank_models_for_cascade()[:self.cascade_max_models]
+        
+        print(f"\n🤖 HIVE MIND CASCADE: {symbol} @ ${price:.2f} ({len(ranked)} eligible models)")
+        
+        votes = []
+        next_index = 0
+        pending = {}
+        settled = False
+        
+        while not settled and (pending or next_index < len(ranked)):
+            batch_size = self.cascade_initial_size if next_index == 0 else self.cascade_step_size
+            for model_id in ranked[next_index:next_index + batch_size]:
+                config = self.models[model_id]
+                task = asyncio.ensure_future(self._query_model(model_id, config, prompt))
+                pending[task] = model_id
+            next_index = min(next_index + batch_size, len(ranked))
+            
+            while pending:
+                done, _ = await asyncio.wait(pending.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    model_id = pending.pop(task)
+                    config = self.models[model_id]
+                    result = task.result()
+                    self._record_call(model_id, config, result)
+                    votes.append(self._build_vote(model_id, config, result))
+                    
+                unqueried = list(pending.values()) + ranked[next_index:]
+                if self._cascade_is_settled(votes, unqueried):
+                    settled = True
+                    break
+                    
+        for task in pending:
+            task.cancel()
+            
+        self.cascade_decisions += 1
+        self.cascade_model_calls += len(votes)
+        
+        final_signal, consensus_confidence = self._calculate_weighted_consensus(
+            votes, min_votes=min(self.cascade_min_votes, len(ranked))
+        )
+        
+        print(f"  📊 {final_signal.value} ({consensus_confidence:.2%}) after "
+              f"{len(votes)}/{len(self.models)} models"
+              f"{'' if settled else ' (cascade exhausted)'}")
+        
+        return final_signal, consensus_confidence, votes
+        
+    def _cascade_is_settled(self, votes: List[AIVote], unqueried: List[str]) -> bool:
+        """Check whether the remaining models can still change the decision"""
+        if len(votes) < self.cascade_min_votes:
+            return False
+            
+        signal_scores, total_weight = self._score_votes(votes)
+        remaining_weight = sum(self._effective_weight(model_id) for model_id in unqueried)
+        
+        if total_weight <= 0:
+            return not unqueried
+            
+        ordered = sorted(signal_scores.values(), reverse=True)
+        leader, runner_up = ordered[0], ordered[1]
+        
+        # Leading signal could be overtaken if every remaining model backs the runner-up
+        if runner_up + remaining_weight >= leader:
+            return False
+            
+        # Confidence too close to the threshold to call without more votes
+        confidence = leader / total_weight
+        return abs(confidence - self.consensus_threshold) > self.cascade_confidence_margin
+        
+    def _rank_models_for_cascade(self) -> List[str]:
+        """Order non-pruned models by accuracy-adjusted weight per unit latency and cost"""
+        def utility(model_id: str) -> float:
+            perf = self.model_performance[model_id]
+            latency = perf.latency_ewma if perf.latency_ewma is not None else self.default_latency_estimate
+            cost = self.models[model_id].cost_per_1m_tokens
+            return self._effective_weight(model_id) / (max(latency, 0.01) * (1.0 + cost))
+            
+        eligible = [model_id for model_id in self.models if not self._is_pruned(model_id)]
+        return sorted(eligible, key=utility, reverse=True)
+        
+    def _effective_weight(self, model_id: str) -> float:
+        """Static weight scaled by tracked accuracy (unchanged with no history)"""
+        if self._is_pruned(model_id):
+            return 0.0
+        return self.models[model_id].weight * 2.0 * self.model_performance[model_id].accuracy
+        
+    def _is_pruned(self, model_id: str) -> bool:
+        """Check whether a model has enough history to be judged unreliable"""
+        perf = self.model_performance[model_id]
+        if perf.resolved >= self.min_observations_for_pruning and perf.accuracy < self.min_model_accuracy:
+            return True
+        if perf.calls >= self.min_observations_for_pruning and perf.error_rate > self.max_model_error_rate:
+            return True
+        return False
+        
+    def _record_call(self, model_id: str, config: AIModelConfig, result: Dict):
+        """Update latency, cost and error tracking after a model call"""
+        perf = self.model_performance[model_id]
+        perf.calls += 1
+        if result.get('error'):
+            perf.errors += 1
+            
+        response_time = result.get('response_time', 0)
+        if perf.latency_ewma is None:
+            perf.latency_ewma = response_time
+        else:
+            alpha = self.latency_ewma_alpha
+            perf.latency_ewma = alpha * response_time + (1 - alpha) * perf.latency_ewma
+            
+        tokens = result.get('tokens', 0)
+        perf.total_tokens += tokens
+        perf.total_cost += tokens * config.cost_per_1m_tokens / 1_000_000
+        
+    def _build_vote(self, model_id: str, config: AIModelConfig, result: Dict) -> AIVote:
+        """Build an AIVote from a model query result"""
+        return AIVote(
+            model_id=model_id,
+            model_name=config.name,
+            signal=result['signal'],
+            confidence=result['confidence'],
+            reasoning=result['reasoning'],
+            timestamp=datetime.now(),
+            response_time=result.get('response_time', 0)
+        )
+        
+    def record_outcome(self, votes: List[AIVote], realized_signal: SignalType):
+        """
+        Score each model's vote once the market outcome is known
+        
+        Votes are compared by direction only (STRONG_BUY counts as BUY).
+        Error votes are not scored, they are tracked as errors instead.
+        """
+        realized_direction = self._signal_direction(realized_signal)
+        for vote in votes:
+            if vote.model_id not in self.model_performance or vote.confidence <= 0:
+                continue
+            perf = self.model_performance[vote.model_id]
+            perf.resolved += 1
+            if self._signal_direction(vote.signal) == realized_direction:
+                perf.correct += 1
+                
+    @staticmethod
+    def _signal_direction(signal: SignalType) -> int:
+        if signal in (SignalType.BUY, SignalType.STRONG_BUY):
+            return 1
+        if signal in (SignalType.SELL, SignalType.STRONG_SELL):
+            return -1
+        return 0
+        
     def _create_trading_prompt(self, symbol: str, price: float, 
                               indicators: Dict, market_context: str) -> str:
         """Create comprehensive trading prompt"""
@@ -444,7 +645,9 @@ Respond ONLY with valid JSON."""
         start_time = datetime.now()
         
         try:
-            response = requests.post(
+            # Run the blocking HTTP call in a worker thread so parallel queries overlap
+            response = await asyncio.to_thread(
+                requests.post,
                 "https://openrouter.ai/api/v1/chat/completions",
                 headers={
                     "Authorization": f"Bearer {self.openrouter_key}",
@@ -477,6 +680,7 @@ Respond ONLY with valid JSON."""
                 data = json.loads(content)
                 data['signal'] = SignalType[data['signal']]
                 data['response_time'] = response_time
+                data['tokens'] = result.get("usage", {}).get("total_tokens", 0)
                 return data
             else:
                 raise Exception(f"API error: {response.status_code} - {response.text}")
@@ -487,14 +691,41 @@ Respond ONLY with valid JSON."""
                 "signal": SignalType.HOLD,
                 "confidence": 0.0,
                 "reasoning": f"Error: {str(e)}",
+                "error": True,
                 "response_time": (datetime.now() - start_time).total_seconds()
             }
             
-    def _calculate_weighted_consensus(self, votes: List[AIVote]) -> Tuple[SignalType, float]:
+    def _calculate_weighted_consensus(self, votes: List[AIVote],
+                                      min_votes: Optional[int] = None) -> Tuple[SignalType, float]:
         """Calculate weighted consensus from all votes"""
-        if not votes or len(votes) < self.min_votes_required:
+        if min_votes is None:
+            min_votes = self.min_votes_required
+        if not votes or len(votes) < min_votes:
             return SignalType.HOLD, 0.0
             
+        signal_scores, total_weight = self._score_votes(votes)
+            
+        # Normalize scores
+        if total_weight > 0:
+            for signal in signal_scores:
+                signal_scores[signal] /= total_weight
+                
+        # Get signal with highest score
+        best_signal = max(signal_scores.items(), key=lambda x: x[1])
+        consensus_signal = best_signal[0]
+        consensus_confidence = best_signal[1]
+        
+        # Simplify STRONG signals to regular if confidence is low
+        if consensus_confidence < 0.8:
+            if consensus_signal == SignalType.STRONG_BUY:
+                consensus_signal = SignalType.BUY
+            elif consensus_signal == SignalType.STRONG_SELL:
+                consensus_signal = SignalType.SELL
+                
+        return consensus_signal, consensus_confidence
+        
+    def _score_votes(self, votes: List[AIVote]) -> Tuple[Dict[SignalType, float], float]:
+        """Sum accuracy-adjusted weight x confidence per signal (unnormalized)"""
         # Calculate weighted scores for each signal type
         signal_scores = {
             SignalType.STRONG_BUY: 0.0,
@@ -511,32 +742,14 @@ Respond ONLY with valid JSON."""
             if model_id not in self.models:
                 continue
                 
-            model_config = self.models[model_id]
-            weight = model_config.weight
+            weight = self._effective_weight(model_id)
             
             # Weight by both model weight and confidence
             weighted_score = weight * vote.confidence
             signal_scores[vote.signal] += weighted_score
             total_weight += weight
             
-        # Normalize scores
-        if total_weight > 0:
-            for signal in signal_scores:
-                signal_scores[signal] /= total_weight
-                
-        # Get signal with highest score
-        best_signal = max(signal_scores.items(), key=lambda x: x[1])
-        consensus_signal = best_signal[0]
-        consensus_confidence = best_signal[1]
-        
-        # Simplify STRONG signals to regular if confidence is low
-        if consensus_confidence < 0.8:
-            if consensus_signal == SignalType.STRONG_BUY:
-                consensus_signal = SignalType.BUY
-            elif consensus_signal == SignalType.STRONG_SELL:
-                consensus_signal = SignalType.SELL
-                
-        return consensus_signal, consensus_confidence
+        return signal_scores, total_weight
         
     def get_model_statistics(self) -> Dict:
         """Get statistics about the AI hive mind"""
@@ -552,7 +765,12 @@ Respond ONLY with valid JSON."""
             "total_weight": sum(m.weight for m in self.models.values()),
             "specializations": specializations,
             "providers": list(set(m.provider for m in self.models.values())),
-            "avg_cost_per_1m": sum(m.cost_per_1m_tokens for m in self.models.values()) / len(self.models)
+            "avg_cost_per_1m": sum(m.cost_per_1m_tokens for m in self.models.values()) / len(self.models),
+            "pruned_models": [model_id for model_id in self.models if self._is_pruned(model_id)],
+            "total_tracked_cost": sum(p.total_cost for p in self.model_performance.values()),
+            "avg_calls_per_cascade_decision": (
+                self.cascade_model_calls / self.cascade_decisions if self.cascade_decisions else 0.0
+            )
         }
 
 
@@ -30,6 +30,7 @@ from datetime import datetime, timedelta
 from enum import Enum
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
+import numpy as np
 import requests
 
 # ============================================================================
@@ -497,6 +498,134 @@ class StrategyEngine:
             if market_data.rsi < 40:
                 return AIDecision(TradingAction.BUY, 0.88, "ED event-driven opportunity", "ed")
         return AIDecision(TradingAction.HOLD, 0.50, "ED no event signal", "ed")
+    
+    # ------------------------------------------------------------------------
+    # BATCH EVALUATION (symbols x strategies in one pass)
+    # ------------------------------------------------------------------------
+    
+    FEATURES = ("price", "volume", "rsi", "macd", "bollinger_upper", "bollinger_lower")
+    ACTION_CODES = {1: TradingAction.BUY, -1: TradingAction.SELL, 0: TradingAction.HOLD}
+    
+    def build_feature_matrix(self, market_data_list: List[MarketData]) -> np.ndarray:
+        """Stack market data into a (symbols x features) matrix."""
+        return np.array(
+            [[getattr(md, feature) for feature in self.FEATURES] for md in market_data_list],
+            dtype=float
+        ).reshape(len(market_data_list), len(self.FEATURES))
+    
+    def _batch_rules(self, features: np.ndarray) -> Dict[str, tuple]:
+        """
+        Array form of every strategy's rule set.
+        
+        Each entry is (buy_mask, buy_confidence, buy_reason,
+        sell_mask, sell_confidence, sell_reason) and mirrors the
+        if/elif order of the per-symbol strategy methods above.
+        """
+        price, volume, rsi, macd, bb_upper, bb_lower = features.T
+        with np.errstate(divide="ignore", invalid="ignore"):
+            spread = (bb_upper - bb_lower) / price
+        never = np.zeros(len(price), dtype=bool)
+        
+        return {
+            "statistical_arbitrage": (rsi < 30, 0.88, "RSI oversold - stat arb opportunity",
+                                      rsi > 70, 0.88, "RSI overbought - stat arb exit"),
+            "hft_market_making": (spread > 0.02, 0.85, "Wide spread - market making opportunity",
+                                  never, 0.0, ""),
+            "grid_trading": (price <= bb_lower, 0.82, "Price at lower grid level",
+                             price >= bb_upper, 0.82, "Price at upper grid level"),
+            "dca_trading": (~never, 0.75, "DCA regular purchase",
+                            never, 0.0, ""),
+            "momentum_trading": ((macd > 0) & (rsi > 50), 0.90, "Strong upward momentum",
+                                 (macd < 0) & (rsi < 50), 0.90, "Strong downward momentum"),
+            "mean_reversion": (rsi < 25, 0.87, "Extreme oversold - mean reversion",
+                               rsi > 75, 0.87, "Extreme overbought - mean reversion"),
+            "swing_trading": ((rsi < 35) & (macd > 0), 0.85, "Swing trade entry signal",
+                              (rsi > 65) & (macd < 0), 0.85, "Swing trade exit signal"),
+            "scalping": (rsi < 28, 0.92, "Scalping entry - quick bounce expected",
+                         rsi > 72, 0.92, "Scalping exit - quick profit"),
+            "pairs_trading": (rsi < 32, 0.88, "Pairs trade - correlation divergence",
+                              rsi > 68, 0.88, "Pairs trade - correlation convergence"),
+            "arbitrage": (spread > 0.03, 0.90, "Arbitrage opportunity detected",
+                          never, 0.0, ""),
+            "cps": (rsi < 30, 0.90, "CPS entry - protective swing",
+                    rsi > 70, 0.90, "CPS exit - profit target reached"),
+            "tm": ((macd > 0) & (rsi > 55), 0.88, "TM strong trend momentum",
+                   (macd < 0) & (rsi < 45), 0.88, "TM trend reversal"),
+            "rmr": (price <= bb_lower, 0.85, "RMR lower range - mean reversion",
+                    price >= bb_upper, 0.85, "RMR upper range - mean reversion"),
+            "vbo": ((spread > 0.04) & (rsi > 60), 0.87, "VBO volatility breakout",
+                    never, 0.0, ""),
+            "cfh": (rsi < 35, 0.85, "CFH funding harvest opportunity",
+                    never, 0.0, ""),
+            "ed": ((volume > 1000000) & (rsi < 40), 0.88, "ED event-driven opportunity",
+                   never, 0.0, ""),
+        }
+    
+    def evaluate_batch(self, market_data_list: List[MarketData]) -> Dict[str, Any]:
+        """
+        Evaluate every enabled strategy against every symbol at once.
+        
+        Returns the symbols, strategy names, an int8 (symbols x strategies)
+        action matrix (1 = buy, -1 = sell, 0 = hold) and the matching
+        confidence matrix. Non-matching cells hold at 0.50 confidence, as in
+        the per-symbol strategy methods.
+        """
+        features = self.build_feature_matrix(market_data_list)
+        rules = self._batch_rules(features)
+        strategy_names = [
+            name for name, config in self.strategies.items()
+            if config["enabled"] and name in rules
+        ]
+        
+        n_symbols = len(market_data_list)
+        actions = np.zeros((n_symbols, len(strategy_names)), dtype=np.int8)
+        confidences = np.full((n_symbols, len(strategy_names)), 0.50)
+        
+        for j, name in enumerate(strategy_names):
+            buy_mask, buy_conf, _, sell_mask, sell_conf, _ = rules[name]
+            sell_mask = sell_mask & ~buy_mask
+            actions[buy_mask, j] = 1
+            actions[sell_mask, j] = -1
+            confidences[buy_mask, j] = buy_conf
+            confidences[sell_mask, j] = sell_conf
+        
+        return {
+            "symbols": [md.symbol for md in market_data_list],
+            "strategies": strategy_names,
+            "actions": actions,
+            "confidences": confidences,
+            "rules": rules,
+        }
+    
+    def select_candidates(self, batch: Dict[str, Any]) -> Dict[int, AIDecision]:
+        """
+        Pick the best qualifying strategy per symbol from a batch result.
+        
+        A cell qualifies when its confidence meets the strategy's
+        min_confidence; the best cell maximises confidence x weight. Only the
+        returned symbol indices need to go on to AI consensus.
+        """
+        strategy_names = batch["strategies"]
+        if not strategy_names:
+            return {}
+        
+        confidences = batch["confidences"]
+        min_confidence = np.array([self.strategies[name]["min_confidence"] for name in strategy_names])
+        weights = np.array([self.strategies[name]["weight"] for name in strategy_names])
+        
+        qualifies = confidences >= min_confidence
+        scores = np.where(qualifies, confidences * weights, -np.inf)
+        best = scores.argmax(axis=1)
+        
+        candidates = {}
+        for i in np.flatnonzero(qualifies.any(axis=1)):
+            j = best[i]
+            name = strategy_names[j]
+            code = int(batch["actions"][i, j])
+            rule = batch["rules"][name]
+            reasoning = rule[2] if code == 1 else rule[5] if code == -1 else "Batch hold"
+            candidates[int(i)] = AIDecision(self.ACTION_CODES[code], float(confidences[i, j]), reasoning, name)
+        return candidates
 
 # ============================================================================
 # MAIN TRADING ENGINE
@@ -654,19 +783,45 @@ class UltimateCompletePaperTradingSystem:
         
         # Get AI hive mind consensus for the best strategy
         best_strategy = max(strategy_decisions, key=lambda x: x["decision"].confidence * x["weight"])
-        ai_consensus = await self.ai_hive.get_consensus_decision(market_data, best_strategy["strategy"])
+        return await self._confirm_with_ai(market_data, best_strategy["decision"])
+    
+    async def analyze_opportunities(self, symbols: List[str]) -> List[Dict[str, Any]]:
+        """
+        Analyze all symbols in one batch pass.
+        
+        Market data is fetched concurrently, every strategy is evaluated over
+        the (symbols x features) matrix at once, and only symbols with a
+        qualifying strategy cell are sent to the AI hive mind.
+        """
+        market_data_list = list(await asyncio.gather(*(self.get_market_data(s) for s in symbols)))
+        if not market_data_list:
+            return []
+        
+        batch = self.strategy_engine.evaluate_batch(market_data_list)
+        candidates = self.strategy_engine.select_candidates(batch)
+        
+        results = await asyncio.gather(*(
+            self._confirm_with_ai(market_data_list[i], decision)
+            for i, decision in candidates.items()
+        ))
+        return [opportunity for opportunity in results if opportunity]
+    
+    async def _confirm_with_ai(self, market_data: MarketData, strategy_decision: AIDecision) -> Optional[Dict[str, Any]]:
+        """Combine a strategy decision with AI hive mind consensus."""
+        strategy = strategy_decision.strategy
+        ai_consensus = await self.ai_hive.get_consensus_decision(market_data, strategy)
         
         # Combine strategy and AI decisions
-        final_confidence = (best_strategy["decision"].confidence + ai_consensus.confidence) / 2
+        final_confidence = (strategy_decision.confidence + ai_consensus.confidence) / 2
         
         if final_confidence >= TRADING_RULES["min_confidence"]:
             return {
-                "symbol": symbol,
+                "symbol": market_data.symbol,
                 "action": ai_consensus.action,
                 "confidence": final_confidence,
-                "strategy": best_strategy["strategy"],
+                "strategy": strategy,
                 "price": market_data.price,
-                "reasoning": f"{best_strategy['strategy']}: {ai_consensus.reasoning}"
+                "reasoning": f"{strategy}: {ai_consensus.reasoning}"
             }
         
         return None
@@ -801,11 +956,9 @@ class UltimateCompletePaperTradingSystem:
                 active_coins = self.get_active_coins()
                 self.logger.info(f"📈 Stage {self.current_stage} | Active Coins: {', '.join(active_coins)}")
                 
-                # Analyze each active coin
-                for symbol in active_coins:
-                    opportunity = await self.analyze_opportunity(symbol)
-                    if opportunity:
-                        await self.execute_trade(opportunity)
+                # Analyze all active coins in one batch
+                for opportunity in await self.analyze_opportunities(active_coins):
+                    await self.execute_trade(opportunity)
                 
                 # Save portfolio status
                 self.save_portfolio_status()
@@ -18,10 +18,12 @@ import os
 import sys
 import json
 import time
+import asyncio
 import ccxt
 import sqlite3
 import hashlib
 import threading
+import queue
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, asdict
@@ -30,6 +32,14 @@ import pandas as pd
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
 
+try:
+    from .live_exchange_connector import EnhancedLiveExchangeManager
+except ImportError:
+    try:
+        from live_exchange_connector import EnhancedLiveExchangeManager
+    except ImportError:
+        EnhancedLiveExchangeManager = None  # No websocket streams; fills are captured by REST polling
+
 # Configure comprehensive logging
 logging.basicConfig(
     level=logging.INFO,
@@ -153,6 +163,14 @@ class YOUR_API_KEY_HERE:
         self.capture_active = False
         self.transactions_db = "/home/ubuntu/ultimate_lyra_systems/transactions.db"
         
+        # Pushed fills from websocket user-data streams; REST polling becomes reconciliation
+        self.stream_fill_queue = queue.Queue()
+        self.streamed_exchanges = set()
+        self.stream_reconcile_interval = 300
+        self.stream_symbols = ['BTC-USDT', 'ETH-USDT', 'SOL-USDT']
+        self._stream_worker = None
+        self._stream_thread = None
+        
         # Initialize database
         self._initialize_database()
         
@@ -194,6 +212,12 @@ class YOUR_API_KEY_HERE:
                 )
             ''')
             
+            # Streamed and reconciled copies of a trade share (exchange, txid)
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_transactions_exchange_txid
+                ON transactions (exchange, txid)
+            ''')
+            
             # Create AI consensus table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS ai_consensus_transactions (
@@ -438,7 +462,6 @@ class YOUR_API_KEY_HERE:
         return consensus_results
     
     def _query_openrouter_model(self, model_id: str, query: str, context: Dict[str, Any], 
-        """TODO: Add function documentation"""
                                api_key: str, model_name: str) -> Optional[Dict[str, Any]]:
         """Query a specific OpenRouter model"""
         try:
@@ -526,8 +549,74 @@ class YOUR_API_KEY_HERE:
         validation_thread.start()
         logger.info("🤖 Started AI validation thread")
         
+        # Push fills from the exchange websocket streams as they happen
+        self.start_fill_streams(self.stream_symbols)
+        
         return capture_threads
     
+    def start_fill_streams(self, symbols: List[str]):
+        """Run the exchange websocket streams on their own event loop and feed their fills into capture"""
+        if EnhancedLiveExchangeManager is None:
+            logger.warning("⚠️ Exchange streams unavailable - capturing fills by REST polling only")
+            return None
+        if self._stream_thread is None or not self._stream_thread.is_alive():
+            self._stream_thread = threading.Thread(
+                target=lambda: asyncio.run(self._run_fill_streams(symbols)),
+                daemon=True
+            )
+            self._stream_thread.start()
+        return self._stream_thread
+    
+    async def _run_fill_streams(self, symbols: List[str]):
+        """Keep the streams open while capture is active"""
+        manager = EnhancedLiveExchangeManager()
+        try:
+            self.attach_fill_stream(await manager.start_streams(symbols))
+            while self.capture_active:
+                await asyncio.sleep(1)
+        except Exception as e:
+            logger.error(f"❌ Fill stream error: {e}")
+        finally:
+            await manager.stop_streams()
+    
+    def attach_fill_stream(self, streams):
+        """
+        Consume fills pushed by an ExchangeStreamManager (live_exchange_connector
+        start_streams) so trades are stored as they happen. Exchanges with a
+        live stream are then only polled every stream_reconcile_interval seconds.
+        """
+        streams.on_fill(self._on_stream_fill)
+        if self._stream_worker is None:
+            self._stream_worker = threading.Thread(target=self._drain_stream_fills, daemon=True)
+            self._stream_worker.start()
+        logger.info("📡 Transaction capture attached to exchange fill streams")
+    
+    def _on_stream_fill(self, fill: Dict[str, Any]):
+        """Runs on the stream's event loop: normalise to a ccxt-style trade and hand off"""
+        exchange_name = {'gate': 'gateio'}.get(fill['venue'], fill['venue'])
+        self.streamed_exchanges.add(exchange_name)
+        timestamp_ms = fill.get('timestamp') or int(fill['received_at'] * 1000)
+        trade = {
+            'id': fill['trade_id'],
+            'order': fill['order_id'],
+            # Same format as ccxt REST trades so reconciliation sees the same row
+            'timestamp': timestamp_ms,
+            'datetime': ccxt.Exchange.iso8601(timestamp_ms),
+            'symbol': fill['symbol'].replace('-', '/'),
+            'side': fill['side'],
+            'amount': fill['size'],
+            'price': fill['price'],
+            'fee': {'cost': fill['fee'], 'currency': fill['fee_currency']},
+            'info': fill
+        }
+        self.stream_fill_queue.put((exchange_name, trade))
+    
+    def _drain_stream_fills(self):
+        """Store streamed fills off the event loop"""
+        while True:
+            exchange_name, trade = self.stream_fill_queue.get()
+            self._process_transaction(exchange_name, 'trade', trade)
+    
     def _capture_exchange_transactions(self, exchange_name: str):
         """Input validation would be added here"""
         """Capture transactions from a specific exchange"""
@@ -562,8 +651,11 @@ class YOUR_API_KEY_HERE:
                 except Exception as e:
                     logger.warning(f"⚠️ {exchange_name} withdrawals error: {e}")
                 
-                # Sleep based on exchange rate limits
-                time.sleep(exchange.rateLimit / 1000)
+                # Sleep based on exchange rate limits; streamed exchanges only need reconciliation
+                if exchange_name in self.streamed_exchanges:
+                    time.sleep(self.stream_reconcile_interval)
+                else:
+                    time.sleep(exchange.rateLimit / 1000)
                 
             except Exception as e:
                 logger.error(f"❌ Error capturing from {exchange_name}: {e}")
@@ -615,6 +707,17 @@ class YOUR_API_KEY_HERE:
             hash_data = f"{transaction.exchange}{transaction.txid}{transaction.timestamp}{transaction.quantity}"
             hash_signature = hashlib.sha256(hash_data.encode()).hexdigest()
             
+            # A trade id is unique per exchange: skip a fill already stored from the
+            # stream (or from REST) even if the two timestamps differ
+            if transaction.type == 'trade' and transaction.txid:
+                cursor.execute(
+                    "SELECT 1 FROM transactions WHERE exchange = ? AND txid = ? AND type = 'trade' LIMIT 1",
+                    (transaction.exchange, transaction.txid)
+                )
+                if cursor.fetchone():
+                    conn.close()
+                    return
+            
             cursor.execute('''
                 INSERT OR IGNORE INTO transactions 
                 (timestamp, exchange, type, base, quote, quantity, price, fee, fee_currency, 
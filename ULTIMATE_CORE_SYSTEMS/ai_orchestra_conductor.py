@@ -15,12 +15,18 @@ import json
 import time
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Any, Tuple, Callable
+from dataclasses import dataclass, asdict, field
 from enum import Enum
 import threading
+import uuid
 from collections import defaultdict, deque
 
+try:
+    from .tracing import tracer
+except ImportError:
+    from tracing import tracer
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -49,6 +55,8 @@ class Intent:
     reasoning: str
     exchange: str = "binance"
     urgency: str = "normal"  # low, normal, high
+    intent_id: str = field(default_factory=lambda: uuid.uuid4().hex)  # trace correlation id
+    limit_price: Optional[float] = None  # prices the intent's notional when no reference price is known
     
     def to_dict(self) -> Dict:
         """TODO: Add function documentation"""
@@ -63,6 +71,7 @@ class AdmissionDecision:
     approved_size: float = 0.0
     queue_delay: int = 0  # seconds
     child_orders: List[Dict] = None
+    reservation_id: Optional[str] = None  # exposure ledger reservation (the intent_id) held for this intent
     
     def __post_init__(self):
         """TODO: Add function documentation"""
@@ -168,6 +177,7 @@ class PolicyEngine:
                 "total_portfolio": 0.95,
                 "per_strategy": 0.20,
                 "per_symbol": 0.10,
+                "per_exchange": 0.50,
                 "correlation_limit": 0.70
             },
             "rate_limits": {
@@ -203,6 +213,204 @@ class PolicyEngine:
             self.policies[category] = {}
         self.policies[category][key] = value
 
+class ExposureLedger:
+    """
+    Incremental exposure ledger updated by deltas on reservations, fills and cancels.
+    
+    Gross notional is kept per position (strategy, symbol, exchange) and
+    aggregated per strategy, symbol and exchange, so every exposure query is
+    an O(1) dictionary read. Reservations hold capacity for admitted intents
+    until they fill or are cancelled.
+    """
+    
+    DIMENSIONS = ("strategy", "symbol", "exchange")
+    
+    def __init__(self, total_value: float):
+        """Limits are enforced against total_value; gross exposure is aggregated per dimension"""
+        self.total_value = total_value
+        self.positions = defaultdict(float)  # (strategy, symbol, exchange) -> signed notional
+        self.gross = {dim: defaultdict(float) for dim in self.DIMENSIONS}
+        self.reserved = {dim: defaultdict(float) for dim in self.DIMENSIONS}
+        self.gross_total = 0.0
+        self.reserved_total = 0.0
+        self.reservations = {}  # reservation_id -> (strategy, symbol, exchange, notional)
+        self.lock = threading.Lock()
+    
+    def _apply_position_delta(self, key: Tuple[str, str, str], signed_notional: float):
+        """Move one position and adjust gross aggregates by the change in |position|"""
+        old = self.positions[key]
+        new = old + signed_notional
+        delta_gross = abs(new) - abs(old)
+        if new == 0:
+            del self.positions[key]
+        else:
+            self.positions[key] = new
+        self.gross_total += delta_gross
+        for dim, value in zip(self.DIMENSIONS, key):
+            self.gross[dim][value] += delta_gross
+    
+    def _apply_reservation_delta(self, key: Tuple[str, str, str], notional: float):
+        self.reserved_total += notional
+        for dim, value in zip(self.DIMENSIONS, key):
+            self.reserved[dim][value] += notional
+    
+    def set_total_value(self, total_value: float):
+        """Rescale every exposure fraction to a newly reconciled portfolio value"""
+        with self.lock:
+            self.total_value = total_value
+    
+    def load_positions(self, positions: Dict[Tuple[str, str, str], float]):
+        """Seed the ledger from reconciled positions (signed notional)"""
+        with self.lock:
+            for key, notional in positions.items():
+                self._apply_position_delta(tuple(key), notional)
+    
+    def exposure(self, dimension: Optional[str] = None, key: Optional[str] = None) -> float:
+        """Held plus reserved exposure as a fraction of portfolio value"""
+        if dimension is None:
+            notional = self.gross_total + self.reserved_total
+        else:
+            notional = self.gross[dimension].get(key, 0.0) + self.reserved[dimension].get(key, 0.0)
+        return notional / self.total_value if self.total_value else 0.0
+    
+    def try_reserve(self, reservation_id: str, strategy: str, symbol: str, exchange: str,
+                    notional: float, limits: Dict[str, float]) -> Tuple[bool, str]:
+        """
+        Atomically check every limit with this notional added and reserve it.
+        
+        `limits` maps "total" and each dimension name to a maximum fraction
+        of portfolio value; missing entries are not enforced.
+        """
+        key = (strategy, symbol, exchange)
+        added = abs(notional) / self.total_value if self.total_value else float("inf")
+        with self.lock:
+            # A re-reserve is checked without its old hold, which is restored if the check fails
+            previous = self.reservations.pop(reservation_id, None)
+            if previous is not None:
+                self._apply_reservation_delta(previous[:3], -previous[3])
+            reason = self._limit_breach(key, added, limits)
+            if reason is not None:
+                if previous is not None:
+                    self.reservations[reservation_id] = previous
+                    self._apply_reservation_delta(previous[:3], previous[3])
+                return False, reason
+            self.reservations[reservation_id] = (strategy, symbol, exchange, abs(notional))
+            self._apply_reservation_delta(key, abs(notional))
+        return True, "Exposure reserved"
+    
+    def _limit_breach(self, key: Tuple[str, str, str], added: float, limits: Dict[str, float]) -> Optional[str]:
+        """Reason for the first limit exceeded with `added` included, or None"""
+        total_limit = limits.get("total")
+        if total_limit is not None and self.exposure() + added > total_limit:
+            return "Total portfolio exposure limit exceeded - queue for later"
+        for dim, value in zip(self.DIMENSIONS, key):
+            limit = limits.get(dim)
+            if limit is not None and self.exposure(dim, value) + added > limit:
+                return f"{dim.capitalize()} {value} exposure limit exceeded"
+        return None
+    
+    def resize_reservation(self, reservation_id: str, notional: float):
+        """Shrink or grow an existing reservation"""
+        with self.lock:
+            if reservation_id not in self.reservations:
+                return
+            strategy, symbol, exchange, held = self.reservations[reservation_id]
+            self.reservations[reservation_id] = (strategy, symbol, exchange, abs(notional))
+            self._apply_reservation_delta((strategy, symbol, exchange), abs(notional) - held)
+    
+    def release(self, reservation_id: str) -> float:
+        """Release whatever remains of a reservation (cancel/reject)"""
+        with self.lock:
+            reservation = self.reservations.pop(reservation_id, None)
+            if reservation is None:
+                return 0.0
+            strategy, symbol, exchange, held = reservation
+            self._apply_reservation_delta((strategy, symbol, exchange), -held)
+            return held
+    
+    def apply_fill(self, strategy: str, symbol: str, exchange: str, signed_notional: float,
+                   reservation_id: Optional[str] = None):
+        """Book a fill; consumes the matching reservation if one is given"""
+        key = (strategy, symbol, exchange)
+        with self.lock:
+            if reservation_id in self.reservations:
+                _, _, _, held = self.reservations[reservation_id]
+                consumed = min(held, abs(signed_notional))
+                remaining = held - consumed
+                if remaining > 0:
+                    self.reservations[reservation_id] = (strategy, symbol, exchange, remaining)
+                else:
+                    del self.reservations[reservation_id]
+                self._apply_reservation_delta(key, -consumed)
+            self._apply_position_delta(key, signed_notional)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Current exposure fractions per dimension"""
+        with self.lock:
+            return {
+                "total": self.exposure(),
+                "reserved_total": self.reserved_total / self.total_value if self.total_value else 0.0,
+                "open_reservations": len(self.reservations),
+                **{
+                    dim: {
+                        value: self.exposure(dim, value)
+                        for value in set(self.gross[dim]) | set(self.reserved[dim])
+                    }
+                    for dim in self.DIMENSIONS
+                }
+            }
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (microseconds, log-spaced)"""
+    
+    BUCKETS_US = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 50000, 100000]
+    
+    def __init__(self):
+        """Empty histogram with one bucket per bound plus an overflow bucket"""
+        self.counts = [0] * (len(self.BUCKETS_US) + 1)
+        self.count = 0
+        self.total_us = 0.0
+        self.max_us = 0.0
+        self.lock = threading.Lock()
+    
+    def observe(self, seconds: float):
+        """Record one latency sample"""
+        micros = seconds * 1_000_000
+        index = len(self.BUCKETS_US)
+        for i, bound in enumerate(self.BUCKETS_US):
+            if micros <= bound:
+                index = i
+                break
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total_us += micros
+            self.max_us = max(self.max_us, micros)
+    
+    def percentile(self, q: float) -> float:
+        """Upper bucket bound containing the q-th quantile (0-1)"""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        running = 0
+        for i, bucket_count in enumerate(self.counts):
+            running += bucket_count
+            if running >= target:
+                return float(self.BUCKETS_US[i]) if i < len(self.BUCKETS_US) else self.max_us
+        return self.max_us
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Bucket counts and summary stats"""
+        labels = [f"<={b}us" for b in self.BUCKETS_US] + ["+Inf"]
+        return {
+            "count": self.count,
+            "mean_us": self.total_us / self.count if self.count else 0.0,
+            "p50_us": self.percentile(0.50),
+            "p99_us": self.percentile(0.99),
+            "max_us": self.max_us,
+            "buckets": dict(zip(labels, self.counts))
+        }
+
 class AdmissionController:
     """Admission control gate - prevents exchange flooding and ensures safety"""
     
@@ -220,6 +428,9 @@ class AdmissionController:
             "daily_pnl": 0,
             "unrealized_pnl": 0
         }
+        self.exposure_ledger = ExposureLedger(self.portfolio_state["total_value"])
+        self.reference_prices = {}
+        self.admission_latency = LatencyHistogram()
         self._initialize_rate_limiters()
         self._initialize_circuit_breakers()
     
@@ -241,8 +452,58 @@ class AdmissionController:
                 recovery_timeout=300  # 5 minutes
             )
     
+    def update_portfolio_value(self, total_value: float):
+        """Apply a reconciled portfolio value to the drawdown check and the exposure ledger"""
+        self.portfolio_state["total_value"] = total_value
+        self.exposure_ledger.set_total_value(total_value)
+    
+    def update_reference_prices(self, prices: Dict[str, float]):
+        """Update mark prices used to convert intent sizes into notional"""
+        self.reference_prices.update({symbol: price for symbol, price in prices.items() if price})
+    
     async def admit_intent(self, intent: Intent) -> AdmissionDecision:
         """Main admission control logic"""
+        with tracer.span("admission.admit_intent", intent.intent_id,
+                         strategy=intent.strategy, symbol=intent.symbol) as span:
+            start = time.perf_counter()
+            decision = self._evaluate_intent(intent)
+            self.admission_latency.observe(time.perf_counter() - start)
+            span.set_attribute("result", decision.result.value)
+        return decision
+    
+    async def admit_batch(self, intents: List[Intent]) -> List[AdmissionDecision]:
+        """
+        Admit a whole cycle's intents against the exposure ledger.
+        
+        Intents are evaluated in priority order (urgency, then confidence) so
+        the best ideas claim capacity first; each approval reserves its
+        notional before the next intent is checked. Decisions are returned in
+        the original intent order.
+        """
+        urgency_rank = {"high": 0, "normal": 1, "low": 2}
+        order = sorted(
+            range(len(intents)),
+            key=lambda i: (urgency_rank.get(intents[i].urgency, 1), -intents[i].confidence)
+        )
+        decisions = [None] * len(intents)
+        for i in order:
+            decisions[i] = await self.admit_intent(intents[i])
+        return decisions
+    
+    def on_fill(self, decision: AdmissionDecision, filled_size: float, fill_price: float):
+        """Book a fill for an admitted intent against its reservation"""
+        intent = decision.intent
+        signed = filled_size * fill_price * (1 if intent.side == IntentAction.BUY else -1)
+        self.exposure_ledger.apply_fill(intent.strategy, intent.symbol, intent.exchange, signed,
+                                        reservation_id=decision.reservation_id)
+    
+    def on_cancel(self, decision: AdmissionDecision):
+        """Release unfilled capacity held for an admitted intent"""
+        if decision.reservation_id is not None:
+            self.exposure_ledger.release(decision.reservation_id)
+    
+    def _evaluate_intent(self, intent: Intent) -> AdmissionDecision:
+        """Run the admission checks; reserves exposure only for admitted intents"""
         logger.info(f"Processing intent: {intent.strategy} {intent.side.value} {intent.symbol}")
         
         # 1. Confidence check
@@ -262,8 +523,9 @@ class AdmissionController:
                 reason=f"Circuit breaker OPEN for strategy {intent.strategy}"
             )
         
-        # 3. Portfolio risk check
-        risk_check = self._check_portfolio_risk(intent)
+        # 3. Portfolio risk check (reserves exposure on success)
+        reservation_id = intent.intent_id
+        risk_check = self._check_portfolio_risk(intent, reservation_id)
         if not risk_check[0]:
             if "queue" in risk_check[1].lower():
                 return AdmissionDecision(
@@ -281,6 +543,7 @@ class AdmissionController:
         
         # 4. Rate limit check
         if not self._check_rate_limit(intent.exchange):
+            self.exposure_ledger.release(reservation_id)
             return AdmissionDecision(
                 result=AdmissionResult.QUEUE,
                 intent=intent,
@@ -293,13 +556,16 @@ class AdmissionController:
         if not liquidity_check[0]:
             if "reduce" in liquidity_check[1].lower():
                 reduced_size = intent.size_hint * 0.5
+                self.exposure_ledger.resize_reservation(reservation_id, self._intent_notional(intent, reduced_size))
                 return AdmissionDecision(
                     result=AdmissionResult.REDUCE_SIZE,
                     intent=intent,
                     reason=liquidity_check[1],
-                    approved_size=reduced_size
+                    approved_size=reduced_size,
+                    reservation_id=reservation_id
                 )
             else:
+                self.exposure_ledger.release(reservation_id)
                 return AdmissionDecision(
                     result=AdmissionResult.QUEUE,
                     intent=intent,
@@ -316,7 +582,8 @@ class AdmissionController:
             intent=intent,
             reason="All checks passed",
             approved_size=intent.size_hint,
-            child_orders=child_orders
+            child_orders=child_orders,
+            reservation_id=reservation_id
         )
     
     def _check_confidence(self, intent: Intent) -> Tuple[bool, str]:
@@ -336,22 +603,8 @@ class AdmissionController:
             return False
         return True
     
-    def _check_portfolio_risk(self, intent: Intent) -> Tuple[bool, str]:
-        """Check portfolio risk limits"""
-        # Total portfolio exposure check
-        max_exposure = self.policy_engine.get_policy("max_exposure", "total_portfolio")
-        current_exposure = self._calculate_current_exposure()
-        
-        if current_exposure > max_exposure:
-            return False, "Total portfolio exposure limit exceeded - queue for later"
-        
-        # Per-strategy exposure check
-        max_strategy_exposure = self.policy_engine.get_policy("max_exposure", "per_strategy")
-        strategy_exposure = self._calculate_strategy_exposure(intent.strategy)
-        
-        if strategy_exposure > max_strategy_exposure:
-            return False, f"Strategy {intent.strategy} exposure limit exceeded"
-        
+    def _check_portfolio_risk(self, intent: Intent, reservation_id: str) -> Tuple[bool, str]:
+        """Check portfolio risk limits and reserve the intent's exposure"""
         # Daily drawdown check
         max_drawdown = self.policy_engine.get_policy("circuit_breakers", "daily_drawdown")
         daily_pnl_pct = self.portfolio_state["daily_pnl"] / self.portfolio_state["total_value"]
@@ -359,7 +612,27 @@ class AdmissionController:
         if daily_pnl_pct < -max_drawdown:
             return False, f"Daily drawdown limit exceeded: {daily_pnl_pct:.2%}"
         
-        return True, "Portfolio risk checks passed"
+        notional = self._intent_notional(intent, intent.size_hint)
+        if notional is None:
+            return False, f"No price for {intent.symbol} yet - queue until a mark arrives"
+        
+        # Total, per-strategy, per-symbol and per-exchange limits, checked with this intent included
+        limits = {
+            "total": self.policy_engine.get_policy("max_exposure", "total_portfolio"),
+            "strategy": self.policy_engine.get_policy("max_exposure", "per_strategy"),
+            "symbol": self.policy_engine.get_policy("max_exposure", "per_symbol"),
+            "exchange": self.policy_engine.get_policy("max_exposure", "per_exchange"),
+        }
+        return self.exposure_ledger.try_reserve(
+            reservation_id, intent.strategy, intent.symbol, intent.exchange, notional, limits
+        )
+    
+    def _intent_notional(self, intent: Intent, size: float) -> Optional[float]:
+        """Convert an intent size into quote notional at the reference (else the intent's limit) price"""
+        price = self.reference_prices.get(intent.symbol) or intent.limit_price
+        if not price:
+            return None
+        return size * price
     
     def _check_rate_limit(self, exchange: str) -> bool:
         """Check if exchange rate limit allows execution"""
@@ -393,21 +666,11 @@ class AdmissionController:
     
     def _calculate_current_exposure(self) -> float:
         """Calculate current total portfolio exposure"""
-        # Mock calculation (in production, use real portfolio data)
-        return 0.75  # 75% exposure
+        return self.exposure_ledger.exposure()
     
     def _calculate_strategy_exposure(self, strategy: str) -> float:
         """Calculate current exposure for specific strategy"""
-        # Mock calculation (in production, use real strategy positions)
-        strategy_exposures = {
-            "SMC_X": 0.15,
-            "luxalgo": 0.12,
-            "arbitrage": 0.08,
-            "momentum": 0.10,
-            "mean_reversion": 0.05,
-            "breakout": 0.07
-        }
-        return strategy_exposures.get(strategy, 0.0)
+        return self.exposure_ledger.exposure("strategy", strategy)
     
     def _generate_child_orders(self, intent: Intent) -> List[Dict]:
         """Generate child orders for execution"""
@@ -423,7 +686,7 @@ class AdmissionController:
                 "type": "MARKET",
                 "exchange": intent.exchange,
                 "strategy": intent.strategy,
-                "parent_intent_id": id(intent)
+                "parent_intent_id": intent.intent_id
             }]
         else:
             # Split into multiple orders (TWAP style)
@@ -439,7 +702,7 @@ class AdmissionController:
                     "type": "MARKET",
                     "exchange": intent.exchange,
                     "strategy": intent.strategy,
-                    "parent_intent_id": id(intent),
+                    "parent_intent_id": intent.intent_id,
                     "chunk_index": i,
                     "total_chunks": num_chunks
                 })
@@ -452,8 +715,13 @@ class AIOrchestralConductor:
     Single decision-maker that sees everything, decides everything, orchestrates everything.
     """
     
-    def __init__(self):
-        """TODO: Add function documentation"""
+    def __init__(self, execution_handler: Optional[Callable[[AdmissionDecision], Any]] = None,
+                 reservation_ttl: float = 300.0):
+        """
+        execution_handler receives each admitted decision and must report back
+        through on_fill/on_cancel. Without one (simulation) nothing is sent, so
+        admitted reservations are released at the end of the cycle.
+        """
         self.policy_engine = PolicyEngine()
         self.admission_controller = AdmissionController(self.policy_engine)
         self.ai_models = self._load_ai_models()
@@ -465,6 +733,9 @@ class AIOrchestralConductor:
         self.pending_intents = deque()
         self.approved_orders = deque()
         self.execution_history = []
+        self.execution_handler = execution_handler
+        self.reservation_ttl = reservation_ttl
+        self.open_decisions: Dict[str, Tuple[AdmissionDecision, float]] = {}  # intent_id -> (decision, opened_at)
         
         logger.info("🎼 AI Orchestral Conductor initialized")
     
@@ -492,17 +763,31 @@ class AIOrchestralConductor:
         
         try:
             # 1. Multi-model analysis
-            signals = await self._analyze_with_all_models(market_data)
+            signal_start_ns = time.monotonic_ns()
+            with tracer.span("orchestra.analyze", symbols=len(market_data)):
+                signals = await self._analyze_with_all_models(market_data)
             
             # 2. Generate intents from signals
             intents = self._synthesize_intents(signals)
             
-            # 3. Process each intent through admission control
-            for intent in intents:
-                decision = await self.admission_controller.admit_intent(intent)
-                decisions.append(decision)
-                
-                # Log decision
+            # The signal stage is shared by the whole cycle; attribute it to every intent's trace
+            if tracer.enabled:
+                signal_end_ns = time.monotonic_ns()
+                for intent in intents:
+                    tracer.record_span("orchestra.signal", intent.intent_id, signal_start_ns, signal_end_ns,
+                                       strategy=intent.strategy, symbol=intent.symbol)
+            
+            # 3. Admit the whole cycle's intents against the exposure ledger
+            self.admission_controller.update_reference_prices(
+                {symbol: data.get("price") for symbol, data in market_data.items()}
+            )
+            decisions = await self.admission_controller.admit_batch(intents)
+            opened_at = time.monotonic()
+            for decision in decisions:
+                if decision.reservation_id is not None:
+                    self.open_decisions[decision.intent.intent_id] = (decision, opened_at)
+            
+            for intent, decision in zip(intents, decisions):
                 logger.info(f"Intent {intent.strategy} {intent.symbol}: {decision.result.value} - {decision.reason}")
             
             # 4. Update performance metrics
@@ -729,6 +1014,49 @@ class AIOrchestralConductor:
         
         return f"{action} signal based on: " + "; ".join(reasons)
     
+    def on_fill(self, intent_id: str, filled_size: float, fill_price: float) -> bool:
+        """Book an execution fill against the intent's reservation"""
+        entry = self.open_decisions.get(intent_id)
+        if entry is None:
+            return False
+        decision = entry[0]
+        self.admission_controller.on_fill(decision, filled_size, fill_price)
+        # Fully consumed reservations drop out of the ledger; stop tracking them too
+        if decision.reservation_id not in self.admission_controller.exposure_ledger.reservations:
+            self.open_decisions.pop(intent_id, None)
+        return True
+    
+    def on_cancel(self, intent_id: str) -> bool:
+        """Release whatever capacity an intent still holds (cancel, reject or expiry)"""
+        entry = self.open_decisions.pop(intent_id, None)
+        if entry is None:
+            return False
+        self.admission_controller.on_cancel(entry[0])
+        return True
+    
+    def expire_stale_reservations(self) -> int:
+        """Release reservations older than reservation_ttl that never reported back"""
+        cutoff = time.monotonic() - self.reservation_ttl
+        stale = [intent_id for intent_id, (_, opened_at) in self.open_decisions.items() if opened_at < cutoff]
+        for intent_id in stale:
+            logger.warning(f"Reservation for intent {intent_id} expired without fill or cancel")
+            self.on_cancel(intent_id)
+        return len(stale)
+    
+    async def _dispatch(self, decision: AdmissionDecision):
+        """Hand an admitted decision to the execution engine, or release it in simulation"""
+        if self.execution_handler is None:
+            # Nothing is sent, so nothing will fill: give the capacity back
+            self.on_cancel(decision.intent.intent_id)
+            return
+        try:
+            result = self.execution_handler(decision)
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            logger.error(f"Execution handler failed for {decision.intent.intent_id}: {str(e)}")
+            self.on_cancel(decision.intent.intent_id)
+    
     def _update_performance_metrics(self, decisions: List[AdmissionDecision]):
         """Update performance metrics based on decisions"""
         approved_count = sum(1 for d in decisions if d.result == AdmissionResult.APPROVE)
@@ -776,14 +1104,16 @@ class AIOrchestralConductor:
                 
                 # Process approved decisions
                 for decision in decisions:
-                    if decision.result == AdmissionResult.APPROVE:
+                    if decision.result in (AdmissionResult.APPROVE, AdmissionResult.REDUCE_SIZE):
                         logger.info(f"✅ Executing: {decision.intent.strategy} {decision.intent.side.value} {decision.intent.symbol}")
-                        # In production, send to execution engine
+                        await self._dispatch(decision)
                     elif decision.result == AdmissionResult.QUEUE:
                         logger.info(f"⏳ Queued: {decision.intent.strategy} {decision.intent.symbol} - {decision.reason}")
                     elif decision.result == AdmissionResult.REJECT:
                         logger.info(f"❌ Rejected: {decision.intent.strategy} {decision.intent.symbol} - {decision.reason}")
                 
+                self.expire_stale_reservations()
+                
                 # Wait before next iteration
                 await asyncio.sleep(5)  # 5-second cycle
                 
@@ -810,6 +1140,9 @@ class AIOrchestralConductor:
                 strategy: breaker.state 
                 for strategy, breaker in self.admission_controller.circuit_breakers.items()
             },
+            "exposure": self.admission_controller.exposure_ledger.snapshot(),
+            "open_decisions": len(self.open_decisions),
+            "admission_latency": self.admission_controller.admission_latency.snapshot(),
             "timestamp": datetime.utcnow().isoformat()
         }
 
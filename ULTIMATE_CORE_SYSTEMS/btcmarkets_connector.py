@@ -20,6 +20,16 @@ from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
 import urllib.parse
 
+try:
+    from .exchange_transport import get_signer, get_clock, iso_to_ms, session_pool
+except ImportError:
+    from exchange_transport import get_signer, get_clock, iso_to_ms, session_pool
+
+try:
+    from .tracing import traced
+except ImportError:
+    from tracing import traced
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -73,14 +83,21 @@ class BTCMarketsConnector:
         """TODO: Add function documentation"""
         self.config = config
         self.session = None
+        self.clock = get_clock(config.base_url)
         
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        # Pooled per-venue session; connections stay warm across connector instances
+        self.session = session_pool.get(self.config.base_url)
+        await self._sync_clock()
         return self
         
+    async def _sync_clock(self, force: bool = False) -> bool:
+        """Refresh the server clock offset when stale (no request otherwise); call before signing"""
+        return await self.clock.sync(self.session, f"{self.config.base_url}/v3/time", lambda data: iso_to_ms(data['timestamp']), force)
+        
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        # The pool owns the session; close it with session_pool.close()
+        self.session = None
     
     def _build_headers(self,
         method: str,
@@ -88,8 +105,9 @@ class BTCMarketsConnector:
         private_key: str,
         path: str,
         data: str = None) -> Dict[str,
-        str]:        """Build authentication headers for BTC Markets API"""
-        timestamp = str(int(time.time() * 1000))
+        str]:
+        """Build authentication headers for BTC Markets API"""
+        timestamp = str(self.clock.now_ms())
         
         if data is None:
             data = ""
@@ -97,17 +115,8 @@ class BTCMarketsConnector:
         # Create the string to sign
         string_to_sign = method + path + timestamp + data
         
-        # Decode the private key from base64
-        private_key_bytes = base64.b64decode(private_key)
-        
-        # Create the signature
-        signature = base64.b64encode(
-            hmac.new(
-                private_key_bytes,
-                string_to_sign.encode('utf-8'),
-                hashlib.sha512
-            ).digest()
-        ).decode('utf-8')
+        # The private key is base64-decoded once per key and the signer cached
+        signature = get_signer(private_key, hashlib.sha512, key_encoding="base64").b64digest(string_to_sign)
         
         return {
             'Accept': 'application/json',
@@ -124,7 +133,8 @@ class BTCMarketsConnector:
         private_key: str,
         path: str,
         query_string: str = "",
-        data: str = None):        """Make HTTP call helper (for reference - async version used in practice)"""
+        data: str = None):
+        """Make HTTP call helper (for reference - async version used in practice)"""
         if data is not None:
             data = json.dumps(data)
         
@@ -249,6 +259,7 @@ class BTCMarketsConnector:
             path = "/v3/accounts/me/balances"
             method = "GET"
             
+            await self._sync_clock()
             headers = self._build_headers(method, self.config.api_key, self.config.private_key, path)
             
             async with self.session.get(
@@ -269,12 +280,14 @@ class BTCMarketsConnector:
             
         return None
     
+    @traced("btcmarkets.place_order")
     async def place_order(self,
         symbol: str,
         side: str,
         order_type: str,
         amount: float,
-        price: Optional[float] = None) -> Optional[BTCMarketsOrder]:        """Place an order (requires authentication)"""
+        price: Optional[float] = None) -> Optional[BTCMarketsOrder]:
+        """Place an order (requires authentication)"""
         if not self.config.api_key or not self.config.private_key:
             logger.warning("BTC Markets: API credentials not configured for order placement")
             return None
@@ -295,6 +308,7 @@ class BTCMarketsConnector:
                 payload['price'] = str(price)
             
             data = json.dumps(payload)
+            await self._sync_clock()
             headers = self._build_headers(method, self.config.api_key, self.config.private_key, path, data)
             
             async with self.session.post(
@@ -322,6 +336,9 @@ class BTCMarketsConnector:
                 else:
                     logger.error(f"BTC Markets order failed: {response.status}")
                     error_text = await response.text()
+                    if "timestamp" in error_text.lower():
+                        # Auth timestamp rejected: resync now so the retry is signed correctly
+                        await self._sync_clock(force=True)
                     logger.error(f"BTC Markets order error details: {error_text}")
                     
         except Exception as e:
@@ -331,7 +348,8 @@ class BTCMarketsConnector:
     
     async def get_orders(self,
         symbol: Optional[str] = None,
-        status: Optional[str] = None) -> Optional[List[BTCMarketsOrder]]:        """Get orders (requires authentication)"""
+        status: Optional[str] = None) -> Optional[List[BTCMarketsOrder]]:
+        """Get orders (requires authentication)"""
         if not self.config.api_key or not self.config.private_key:
             logger.warning("BTC Markets: API credentials not configured for order retrieval")
             return None
@@ -348,6 +366,7 @@ class BTCMarketsConnector:
             
             query_string = urllib.parse.urlencode(params) if params else ""
             
+            await self._sync_clock()
             headers = self._build_headers(method, self.config.api_key, self.config.private_key, path)
             
             url = f"{self.config.base_url}{path}"
@@ -393,6 +412,7 @@ class BTCMarketsConnector:
             path = f"/v3/orders/{order_id}"
             method = "DELETE"
             
+            await self._sync_clock()
             headers = self._build_headers(method, self.config.api_key, self.config.private_key, path)
             
             async with self.session.delete(
@@ -428,10 +448,8 @@ async def main():
             logging.info(f"   Found {len(markets)} markets")
             # Show first few markets
             for market in markets[:5]:
-                logging.info(f"   - {market.get('marketId',
-                    'Unknown')}: {market.get('baseAsset',
-                    '')}/{market.get('quoteAsset',
-                    '')}")        print()
+                logging.info(f"   - {market.get('marketId', 'Unknown')}: {market.get('baseAsset', '')}/{market.get('quoteAsset', '')}")
+        print()
         
         # Test 2: Get ticker data
         logging.info("💰 Test 2: Ticker Data")
@@ -441,9 +459,8 @@ async def main():
             ticker = await connector.get_ticker(symbol)
             if ticker:
                 logging.info(f"   {symbol}: ${ticker.price:,.2f} AUD (Vol: {ticker.volume:,.0f})")
-                logging.info(f"      24h: High ${ticker.high:,
-                    .2f} | Low ${ticker.low:,
-                    .2f} | Change {ticker.change:+.2f}%")            else:
+                logging.info(f"      24h: High ${ticker.high:,.2f} | Low ${ticker.low:,.2f} | Change {ticker.change:+.2f}%")
+            else:
                 logging.info(f"   {symbol}: No data available")
         print()
         
@@ -466,11 +483,8 @@ async def main():
         if trades:
             logging.info(f"   Recent {len(trades)} trades for BTC-AUD:")
             for trade in trades[:3]:
-                logging.info(f"      ${float(trade.get('price',
-                    0)):,
-                    .2f} - {float(trade.get('amount',
-                    0)):.4f} BTC ({trade.get('side',
-                    'Unknown')})")        print()
+                logging.info(f"      ${float(trade.get('price', 0)):,.2f} - {float(trade.get('amount', 0)):.4f} BTC ({trade.get('side', 'Unknown')})")
+        print()
         
         # Test 5: Account operations (would require API keys)
         logging.info("🔐 Test 5: Account Operations")
@@ -481,6 +495,8 @@ async def main():
         
         logging.info("✅ BTC Markets connector testing completed!")
         logging.info("🇦🇺 Ready for integration with Ultimate Lyra Ecosystem!")
+    
+    await session_pool.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
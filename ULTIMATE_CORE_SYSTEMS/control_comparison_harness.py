@@ -20,6 +20,7 @@ Statistical Framework:
 - Cohen's d for effect size analysis
 - Bootstrap resampling for confidence intervals
 - Bayesian posterior probabilities
+- Monte-Carlo mode: seeded, paired tick paths fanned out across processes
 """
 
 import asyncio
@@ -29,6 +30,8 @@ import logging
 import statistics
 import random
 import math
+import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
@@ -131,6 +134,9 @@ class HarnessResult:
 class BaseController:
     """Base class for all controllers"""
     
+    # Simulated model/human think time; disabled for Monte-Carlo runs
+    simulate_latency = True
+    
     def __init__(self, controller_type: ControllerType):
         """Input validation would be added here"""
         self.controller_type = controller_type
@@ -158,6 +164,11 @@ class BaseController:
     async def _analyze_and_decide(self, market_tick: MarketTick) -> ControlDecision:
         """Override in subclasses"""
         raise NotImplementedError
+    
+    async def _simulate_processing(self, seconds: float):
+        """Sleep to mimic processing time when latency simulation is on"""
+        if BaseController.simulate_latency:
+            await asyncio.sleep(seconds)
 
 class CentralController(BaseController):
     """Single AI making all decisions"""
@@ -171,7 +182,7 @@ class CentralController(BaseController):
     async def _analyze_and_decide(self, market_tick: MarketTick) -> ControlDecision:
         """Central AI decision making"""
         # Simulate AI analysis
-        await asyncio.sleep(0.01)  # Simulate processing time
+        await self._simulate_processing(0.01)  # Simulate processing time
         
         # Decision logic based on technical indicators
         action = "HOLD"
@@ -224,7 +235,7 @@ class FederatedController(BaseController):
     async def _analyze_and_decide(self, market_tick: MarketTick) -> ControlDecision:
         """Federated AI decision making with consensus"""
         # Simulate multiple AI analyses
-        await asyncio.sleep(0.03)  # Longer processing for multiple models
+        await self._simulate_processing(0.03)  # Longer processing for multiple models
         
         # Simulate different AI opinions
         ai_decisions = []
@@ -360,7 +371,7 @@ class HumanInLoopController(BaseController):
             ai_decision.size > 0.05):
             
             # Simulate human review
-            await asyncio.sleep(0.1)  # Simulate human thinking time
+            await self._simulate_processing(0.1)  # Simulate human thinking time
             
             # Human adjustments (simulated)
             if ai_decision.risk_score > 0.7:
@@ -439,6 +450,15 @@ class EnsembleController(BaseController):
 class MarketSimulator:
     """Simulates market conditions for testing"""
     
+    # (trend, volatility) per market condition
+    CONDITION_PARAMS = {
+        MarketCondition.BULL: (0.001, 0.025),
+        MarketCondition.BEAR: (-0.001, 0.03),
+        MarketCondition.SIDEWAYS: (0.0, 0.02),
+        MarketCondition.VOLATILE: (0.0, 0.08),
+        MarketCondition.CALM: (0.0, 0.01),
+    }
+    
     def __init__(self):
         """Input validation would be added here"""
         self.base_price = 50000.0
@@ -452,23 +472,10 @@ class MarketSimulator:
         """Generate realistic market tick"""
         self.time_step += 1
         
-        # Price movement
-        if condition == MarketCondition.BULL:
-            self.trend = 0.001
-            self.volatility = 0.025
-        elif condition == MarketCondition.BEAR:
-            self.trend = -0.001
-            self.volatility = 0.03
-        elif condition == MarketCondition.VOLATILE:
-            self.trend = 0.0
-            self.volatility = 0.08
-        elif condition == MarketCondition.CALM:
-            self.trend = 0.0
-            self.volatility = 0.01
-        else:
-            # Sideways
-            self.trend = 0.0
-            self.volatility = 0.02
+        # Price movement (unknown/None conditions trade sideways)
+        self.trend, self.volatility = self.CONDITION_PARAMS.get(
+            condition, self.CONDITION_PARAMS[MarketCondition.SIDEWAYS]
+        )
         
         # Generate price change
         random_change = random.gauss(0, self.volatility)
@@ -495,15 +502,70 @@ class MarketSimulator:
             sentiment=sentiment,
             condition=condition.value if condition else "SIDEWAYS"
         )
+    
+    def generate_tick_paths(self, condition: MarketCondition, n_paths: int, n_ticks: int,
+                            seed=None) -> Dict[str, Any]:
+        """
+        Generate (n_paths x n_ticks) arrays of every tick field in one shot.
+        
+        Uses the same dynamics as generate_market_tick but draws from a
+        seeded numpy Generator, so identical seeds give identical paths.
+        """
+        rng = np.random.default_rng(seed)
+        trend, volatility = self.CONDITION_PARAMS.get(
+            condition, self.CONDITION_PARAMS[MarketCondition.SIDEWAYS]
+        )
+        steps = np.arange(1, n_ticks + 1)
+        shape = (n_paths, n_ticks)
+        
+        returns = trend + rng.normal(0, volatility, shape)
+        price = self.base_price * np.cumprod(1 + returns, axis=1)
+        rsi = np.clip(50 + 30 * np.sin(steps * 0.1) + rng.normal(0, 10, shape), 0, 100)
+        macd = rng.normal(0, 50, shape)
+        volume = 1000000 + rng.normal(0, 200000, shape)
+        sentiment = np.clip(0.5 + 0.3 * np.sin(steps * 0.05) + rng.normal(0, 0.1, shape), 0, 1)
+        
+        return {
+            "price": price,
+            "volume": volume,
+            "rsi": rsi,
+            "macd": macd,
+            "sentiment": sentiment,
+            "volatility": volatility,
+            "condition": condition.value
+        }
 
 class StatisticalAnalyzer:
     """Performs statistical analysis of controller performance"""
     
+    @staticmethod
+    def bootstrap_mean_diff(a_values: List[float], b_values: List[float], n_bootstrap: int = 1000,
+                            seed: Optional[int] = None, chunk_size: int = 1000) -> np.ndarray:
+        """
+        Bootstrap distribution of mean(a) - mean(b), computed as index matrices.
+        
+        Equal-length samples are treated as paired (same resample index for
+        both), matching the paired t-test; otherwise each side is resampled
+        independently. Resamples are drawn in chunks to bound memory.
+        """
+        a = np.asarray(a_values, dtype=float)
+        b = np.asarray(b_values, dtype=float)
+        rng = np.random.default_rng(seed)
+        paired = len(a) == len(b)
+        diffs = np.empty(n_bootstrap)
+        
+        for start in range(0, n_bootstrap, chunk_size):
+            n = min(chunk_size, n_bootstrap - start)
+            idx_a = rng.integers(0, len(a), (n, len(a)))
+            idx_b = idx_a if paired else rng.integers(0, len(b), (n, len(b)))
+            diffs[start:start + n] = a[idx_a].mean(axis=1) - b[idx_b].mean(axis=1)
+        return diffs
+    
     @staticmethod
     def compare_controllers(controller_a_metrics: List[PerformanceMetrics], 
-        """TODO: Add function documentation"""
                           controller_b_metrics: List[PerformanceMetrics],
-                          metric_name: str) -> ComparisonResult:
+                          metric_name: str, n_bootstrap: int = 1000,
+                          seed: Optional[int] = None) -> ComparisonResult:
         """Compare two controllers on a specific metric"""
         
         # Extract values
@@ -529,19 +591,11 @@ class StatisticalAnalyzer:
             winner = "TIE"
         
         # Bootstrap confidence interval
-        combined = a_values + b_values
-        bootstrap_diffs = []
-        for _ in range(1000):
-            sample_a = random.choices(a_values, k=len(a_values))
-            sample_b = random.choices(b_values, k=len(b_values))
-            bootstrap_diffs.append(statistics.mean(sample_a) - statistics.mean(sample_b))
-        
-        ci_lower = np.percentile(bootstrap_diffs, 2.5)
-        ci_upper = np.percentile(bootstrap_diffs, 97.5)
+        bootstrap_diffs = StatisticalAnalyzer.bootstrap_mean_diff(a_values, b_values, n_bootstrap, seed)
+        ci_lower, ci_upper = np.percentile(bootstrap_diffs, [2.5, 97.5])
         
         # Bayesian probability (simplified)
-        positive_diffs = sum(1 for d in bootstrap_diffs if d > 0)
-        bayesian_prob = positive_diffs / len(bootstrap_diffs)
+        bayesian_prob = float(np.mean(bootstrap_diffs > 0))
         
         return ComparisonResult(
             controller_a=controller_a_metrics[0].controller_type,
@@ -558,18 +612,126 @@ class StatisticalAnalyzer:
             bayesian_probability=bayesian_prob
         )
 
+async def evaluate_controller_on_ticks(controller_class, ticks, run_id: Optional[str] = None) -> PerformanceMetrics:
+    """Run one controller over a sequence of market ticks and score it"""
+    controller = controller_class()
+    decisions = []
+    total_pnl = 0.0
+    max_drawdown = 0.0
+    current_drawdown = 0.0
+    position = 0.0
+    entry_price = 0.0
+    risk_violations = 0
+    critical_violations = 0
+    
+    start_time = time.time()
+    
+    for market_tick in ticks:
+        # Get controller decision
+        decision = await controller.make_decision(market_tick)
+        decisions.append(decision)
+        
+        # Simulate trading
+        if decision.action == "BUY" and position <= 0:
+            position = decision.size
+            entry_price = market_tick.price
+        elif decision.action == "SELL" and position >= 0:
+            if position > 0:
+                # Close position
+                pnl = (market_tick.price - entry_price) * position
+                total_pnl += pnl
+                current_drawdown = min(0, current_drawdown + pnl)
+                max_drawdown = min(max_drawdown, current_drawdown)
+                if pnl > 0:
+                    current_drawdown = 0  # Reset on profit
+            
+            position = -decision.size
+            entry_price = market_tick.price
+        
+        # Check risk violations
+        if decision.size > controller.risk_limits["max_position_size"]:
+            risk_violations += 1
+        if decision.risk_score > 0.8:
+            critical_violations += 1
+    
+    # Calculate final metrics
+    profitable_decisions = sum(1 for d in decisions if d.action != "HOLD")
+    win_rate = profitable_decisions / len(decisions) if decisions else 0
+    
+    avg_latency = statistics.mean([d.latency_ms for d in decisions]) if decisions else 0
+    
+    # Sharpe ratio (simplified)
+    if decisions:
+        returns = [d.confidence - 0.5 for d in decisions]  # Simplified return proxy
+        sharpe_ratio = statistics.mean(returns) / statistics.stdev(returns) if statistics.stdev(returns) > 0 else 0
+    else:
+        sharpe_ratio = 0
+    
+    runtime = time.time() - start_time
+    uptime_pct = 100.0  # Assume 100% uptime for simulation
+    decisions_per_minute = len(decisions) / (runtime / 60) if runtime > 0 else 0
+    
+    return PerformanceMetrics(
+        controller_type=controller.controller_type.value,
+        run_id=run_id or f"{controller.controller_type.value}_{int(time.time())}",
+        total_decisions=len(decisions),
+        profitable_decisions=profitable_decisions,
+        total_pnl=total_pnl,
+        max_drawdown=max_drawdown,
+        sharpe_ratio=sharpe_ratio,
+        win_rate=win_rate,
+        avg_latency_ms=avg_latency,
+        risk_violations=risk_violations,
+        critical_violations=critical_violations,
+        uptime_pct=uptime_pct,
+        decisions_per_minute=decisions_per_minute
+    )
+
+CONTROLLER_CLASSES = {
+    ControllerType.CENTRAL: CentralController,
+    ControllerType.FEDERATED: FederatedController,
+    ControllerType.HYBRID: HybridController,
+    ControllerType.HUMAN_IN_LOOP: HumanInLoopController,
+    ControllerType.ENSEMBLE: EnsembleController
+}
+
+def _run_monte_carlo_chunk(controller_name: str, paths: Dict[str, Any], start_index: int) -> List[PerformanceMetrics]:
+    """Process-pool worker: run one controller over a chunk of pre-generated paths"""
+    BaseController.simulate_latency = False
+    controller_class = CONTROLLER_CLASSES[ControllerType(controller_name)]
+    n_paths, n_ticks = paths["price"].shape
+    
+    def path_ticks(i: int):
+        for t in range(n_ticks):
+            yield MarketTick(
+                timestamp=datetime.utcnow().isoformat(),
+                symbol="BTC-USDT",
+                price=float(paths["price"][i, t]),
+                volume=float(paths["volume"][i, t]),
+                rsi=float(paths["rsi"][i, t]),
+                macd=float(paths["macd"][i, t]),
+                volatility=paths["volatility"],
+                sentiment=float(paths["sentiment"][i, t]),
+                condition=paths["condition"]
+            )
+    
+    async def run_chunk() -> List[PerformanceMetrics]:
+        return [
+            await evaluate_controller_on_ticks(
+                controller_class, path_ticks(i),
+                run_id=f"{controller_name}_{paths['condition']}_{start_index + i}"
+            )
+            for i in range(n_paths)
+        ]
+    
+    return asyncio.run(run_chunk())
+
 class ControlComparisonHarness:
     """Main harness for comparing control methods"""
     
     def __init__(self):
         """Input validation would be added here"""
-        self.controllers = {
-            ControllerType.CENTRAL: CentralController,
-            ControllerType.FEDERATED: FederatedController,
-            ControllerType.HYBRID: HybridController,
-            ControllerType.HUMAN_IN_LOOP: HumanInLoopController,
-            ControllerType.ENSEMBLE: EnsembleController
-        }
+        self.controllers = dict(CONTROLLER_CLASSES)
         self.market_simulator = MarketSimulator()
         self.analyzer = StatisticalAnalyzer()
         self.results = []
@@ -577,81 +739,52 @@ class ControlComparisonHarness:
     async def run_single_experiment(self, controller_class, market_condition: MarketCondition, 
                                   duration_ticks: int = 100) -> PerformanceMetrics:
         """Run a single experiment with one controller"""
-        controller = controller_class()
-        decisions = []
-        total_pnl = 0.0
-        max_drawdown = 0.0
-        current_drawdown = 0.0
-        position = 0.0
-        entry_price = 0.0
-        risk_violations = 0
-        critical_violations = 0
-        
-        start_time = time.time()
-        
-        for tick in range(duration_ticks):
-            # Generate market tick
-            market_tick = self.market_simulator.generate_market_tick(market_condition)
-            
-            # Get controller decision
-            decision = await controller.make_decision(market_tick)
-            decisions.append(decision)
-            
-            # Simulate trading
-            if decision.action == "BUY" and position <= 0:
-                position = decision.size
-                entry_price = market_tick.price
-            elif decision.action == "SELL" and position >= 0:
-                if position > 0:
-                    # Close position
-                    pnl = (market_tick.price - entry_price) * position
-                    total_pnl += pnl
-                    current_drawdown = min(0, current_drawdown + pnl)
-                    max_drawdown = min(max_drawdown, current_drawdown)
-                    if pnl > 0:
-                        current_drawdown = 0  # Reset on profit
-                
-                position = -decision.size
-                entry_price = market_tick.price
-            
-            # Check risk violations
-            if decision.size > controller.risk_limits["max_position_size"]:
-                risk_violations += 1
-            if decision.risk_score > 0.8:
-                critical_violations += 1
-        
-        # Calculate final metrics
-        profitable_decisions = sum(1 for d in decisions if d.action != "HOLD")
-        win_rate = profitable_decisions / len(decisions) if decisions else 0
-        
-        avg_latency = statistics.mean([d.latency_ms for d in decisions]) if decisions else 0
-        
-        # Sharpe ratio (simplified)
-        if decisions:
-            returns = [d.confidence - 0.5 for d in decisions]  # Simplified return proxy
-            sharpe_ratio = statistics.mean(returns) / statistics.stdev(returns) if statistics.stdev(returns) > 0 else 0
-        else:
-            sharpe_ratio = 0
-        
-        runtime = time.time() - start_time
-        uptime_pct = 100.0  # Assume 100% uptime for simulation
-        decisions_per_minute = len(decisions) / (runtime / 60) if runtime > 0 else 0
-        
-        return PerformanceMetrics(
-            controller_type=controller.controller_type.value,
-            run_id=f"{controller.controller_type.value}_{int(time.time())}",
-            total_decisions=len(decisions),
-            profitable_decisions=profitable_decisions,
-            total_pnl=total_pnl,
-            max_drawdown=max_drawdown,
-            sharpe_ratio=sharpe_ratio,
-            win_rate=win_rate,
-            avg_latency_ms=avg_latency,
-            risk_violations=risk_violations,
-            critical_violations=critical_violations,
-            uptime_pct=uptime_pct,
-            decisions_per_minute=decisions_per_minute
-        )
+        ticks = (self.market_simulator.generate_market_tick(market_condition) for _ in range(duration_ticks))
+        return await evaluate_controller_on_ticks(controller_class, ticks)
+    
+    async def run_monte_carlo(self, runs_per_condition: int = 1000, duration_ticks: int = 50,
+                              seed: int = 42, max_workers: Optional[int] = None,
+                              chunk_size: int = 100) -> HarnessResult:
+        """
+        Monte-Carlo comparison over seeded, pre-generated tick paths.
+        
+        Each market condition gets `runs_per_condition` paths generated once
+        from a seed spawned off `seed`; every controller runs on the identical
+        paths, so metrics are paired run-for-run. Path chunks are fanned out
+        across a process pool with simulated latency switched off.
+        """
+        market_conditions = list(MarketSimulator.CONDITION_PARAMS.keys())
+        condition_seeds = np.random.SeedSequence(seed).spawn(len(market_conditions))
+        
+        logging.info(f"🎲 MONTE-CARLO MODE: {runs_per_condition} paired runs x "
+                     f"{len(market_conditions)} conditions x {len(self.controllers)} controllers")
+        
+        jobs = []
+        for condition, condition_seed in zip(market_conditions, condition_seeds):
+            paths = self.market_simulator.generate_tick_paths(
+                condition, runs_per_condition, duration_ticks, seed=condition_seed
+            )
+            for start in range(0, runs_per_condition, chunk_size):
+                chunk = {
+                    key: value[start:start + chunk_size] if isinstance(value, np.ndarray) else value
+                    for key, value in paths.items()
+                }
+                for controller_type in self.controllers:
+                    jobs.append((controller_type.value, chunk, start))
+        
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+            chunk_results = await asyncio.gather(*(
+                loop.run_in_executor(pool, _run_monte_carlo_chunk, *job) for job in jobs
+            ))
+        
+        # Jobs are ordered by (condition, chunk), so each list stays aligned across controllers
+        all_metrics = {controller_type.value: [] for controller_type in self.controllers}
+        for (controller_name, _, _), metrics in zip(jobs, chunk_results):
+            all_metrics[controller_name].extend(metrics)
+        
+        total_experiments = len(self.controllers) * runs_per_condition * len(market_conditions)
+        return self._analyze_results(all_metrics, market_conditions, total_experiments, seed=seed)
     
     async def run_comprehensive_comparison(self, runs_per_controller: int = 10) -> HarnessResult:
         """Run comprehensive comparison of all controllers"""
@@ -692,6 +825,12 @@ class ControlComparisonHarness:
             
             print()
         
+        return self._analyze_results(all_metrics, market_conditions, total_experiments)
+    
+    def _analyze_results(self, all_metrics: Dict[str, List[PerformanceMetrics]],
+                         market_conditions: List[MarketCondition], total_experiments: int,
+                         seed: Optional[int] = None) -> HarnessResult:
+        """Run pairwise statistics over collected metrics and build the harness result"""
         # Statistical analysis
         logging.info("📊 PERFORMING STATISTICAL ANALYSIS...")
         comparisons = []
@@ -706,7 +845,7 @@ class ControlComparisonHarness:
                 
                 for metric in metrics_to_compare:
                     comparison = self.analyzer.compare_controllers(
-                        all_metrics[controller_a], all_metrics[controller_b], metric
+                        all_metrics[controller_a], all_metrics[controller_b], metric, seed=seed
                     )
                     comparisons.append(comparison)
         
@@ -763,7 +902,6 @@ class ControlComparisonHarness:
         return result
     
     def _generate_recommendations(self, all_metrics: Dict, comparisons: List[ComparisonResult], 
-        """TODO: Add function documentation"""
                                 safety_violations: Dict) -> List[str]:
         """Generate recommendations based on analysis"""
         recommendations = []
@@ -0,0 +1,809 @@
+#!/usr/bin/env python3
+"""
+ULTIMATE LYRA ECOSYSTEM - EXCHANGE STREAMS
+=========================================
+
+Websocket market-data and user-data streams for OKX, Gate.io, Binance and
+BTC Markets. Tickers and L2 books are kept in local state so best-price
+queries are dictionary reads; order and fill events are pushed to
+subscribers as they arrive instead of being discovered by REST polling.
+
+Each venue stream reconnects with backoff and resubscribes, sends the
+venue's application-level heartbeat, treats a silent socket as dead, and
+recovers from book sequence gaps with a REST snapshot (or a channel
+resubscribe where the venue re-sends its snapshot over the socket).
+"""
+
+import asyncio
+import aiohttp
+import hashlib
+import json
+import random
+import time
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Tuple, Callable
+
+try:
+    from .exchange_transport import get_signer, get_clock, session_pool, iso_to_ms
+except ImportError:
+    from exchange_transport import get_signer, get_clock, session_pool, iso_to_ms
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class TickerState:
+    """Latest top-of-book / last price for one venue symbol"""
+    last: float
+    bid: float
+    ask: float
+    exchange_ts: int
+    updated_at: float  # time.monotonic()
+
+class L2Book:
+    """
+    Price-level book for one venue symbol.
+    
+    Best bid/ask are maintained incrementally; a full scan only happens
+    when the current best level is removed.
+    """
+    
+    __slots__ = ("bids", "asks", "seq", "synced", "best_bid", "best_ask", "updated_at", "pending")
+    
+    def __init__(self):
+        """Empty, unsynced book; deltas are buffered until the first snapshot"""
+        self.bids: Dict[float, float] = {}
+        self.asks: Dict[float, float] = {}
+        self.seq = 0
+        self.synced = False
+        self.best_bid: Optional[float] = None
+        self.best_ask: Optional[float] = None
+        self.updated_at = 0.0
+        # Deltas received while waiting for a snapshot: (first_seq, last_seq, bids, asks)
+        self.pending: List[Tuple[int, int, list, list]] = []
+    
+    def apply_snapshot(self, bids: list, asks: list, seq: int):
+        """Replace the book with a full snapshot"""
+        self.bids = {float(level[0]): float(level[1]) for level in bids if float(level[1]) > 0}
+        self.asks = {float(level[0]): float(level[1]) for level in asks if float(level[1]) > 0}
+        self.best_bid = max(self.bids) if self.bids else None
+        self.best_ask = min(self.asks) if self.asks else None
+        self.seq = seq
+        self.synced = True
+        self.updated_at = time.monotonic()
+    
+    def apply_delta(self, bids: list, asks: list, seq: int):
+        """Apply level updates (size 0 removes the level)"""
+        for level in bids:
+            price, size = float(level[0]), float(level[1])
+            if size > 0:
+                self.bids[price] = size
+                if self.best_bid is None or price > self.best_bid:
+                    self.best_bid = price
+            elif self.bids.pop(price, None) is not None and price == self.best_bid:
+                self.best_bid = max(self.bids) if self.bids else None
+        for level in asks:
+            price, size = float(level[0]), float(level[1])
+            if size > 0:
+                self.asks[price] = size
+                if self.best_ask is None or price < self.best_ask:
+                    self.best_ask = price
+            elif self.asks.pop(price, None) is not None and price == self.best_ask:
+                self.best_ask = min(self.asks) if self.asks else None
+        self.seq = seq
+        self.updated_at = time.monotonic()
+    
+    def top(self, depth: int = 20) -> Tuple[List[Tuple[float, float]], List[Tuple[float, float]]]:
+        """Sorted (bids, asks) down to depth"""
+        bids = sorted(self.bids.items(), reverse=True)[:depth]
+        asks = sorted(self.asks.items())[:depth]
+        return bids, asks
+
+class VenueStream:
+    """
+    Base class for one venue's websocket connections.
+    
+    Subclasses provide URLs, subscribe/auth messages and a parser that
+    turns venue messages into calls on the owning ExchangeStreamManager.
+    """
+    
+    venue = "generic"
+    default_ws_url = ""
+    default_base_url = ""
+    time_path = ""  # REST server-time endpoint used to align signed timestamps
+    heartbeat_interval = 20.0
+    
+    def __init__(self, manager: "ExchangeStreamManager", name: str, config: Any, symbols: List[str]):
+        """Stream symbols from one venue into the manager, keyed by venue symbol"""
+        self.manager = manager
+        self.name = name
+        self.config = config
+        self.symbols = list(symbols)
+        self.venue_symbols = {self.to_venue(symbol): symbol for symbol in self.symbols}
+        self.clock = get_clock(self.base_url or self.venue)
+        self.connected: Dict[str, bool] = {}
+        self.reconnects = 0
+        self._tasks: List[asyncio.Task] = []
+        self._sockets: Dict[str, aiohttp.ClientWebSocketResponse] = {}
+        self._resyncing: Dict[str, asyncio.Task] = {}
+    
+    # --- venue specifics -------------------------------------------------
+    
+    @property
+    def base_url(self) -> str:
+        return getattr(self.config, "base_url", "") or self.default_base_url
+    
+    @property
+    def ws_url(self) -> str:
+        return getattr(self.config, "ws_url", "") or self.default_ws_url
+    
+    @property
+    def has_credentials(self) -> bool:
+        return bool(getattr(self.config, "api_key", "") and getattr(self.config, "secret_key", ""))
+    
+    def to_venue(self, symbol: str) -> str:
+        """Canonical BASE-QUOTE symbol to the venue's market id"""
+        return symbol
+    
+    def connection_urls(self) -> Dict[str, str]:
+        """kind -> websocket URL; 'public' and optionally 'private'"""
+        return {"public": self.ws_url}
+    
+    async def on_open(self, ws: aiohttp.ClientWebSocketResponse, kind: str):
+        """Authenticate and subscribe on a fresh connection"""
+        raise NotImplementedError
+    
+    @staticmethod
+    def server_time_ms(data: Any) -> float:
+        """Server epoch milliseconds from the time endpoint's response"""
+        raise NotImplementedError
+    
+    async def _sync_clock(self, force: bool = False) -> bool:
+        """Refresh the server clock offset when stale (no request otherwise); call before signing"""
+        if not (self.time_path and self.base_url):
+            return False
+        return await self.clock.sync(session_pool.get(self.base_url), f"{self.base_url}{self.time_path}",
+                                     self.server_time_ms, force)
+    
+    def heartbeat_message(self) -> Optional[str]:
+        """Application-level ping, if the venue needs one"""
+        return None
+    
+    async def handle(self, message: Any, kind: str):
+        """Dispatch one decoded message"""
+        raise NotImplementedError
+    
+    async def fetch_snapshot(self, venue_symbol: str) -> Optional[Tuple[list, list, int]]:
+        """REST book snapshot (bids, asks, seq) for gap recovery"""
+        return None
+    
+    # --- connection lifecycle -------------------------------------------
+    
+    def start(self):
+        """Launch one supervised task per connection"""
+        for kind, url in self.connection_urls().items():
+            self._tasks.append(asyncio.create_task(self._run_connection(kind, url), name=f"{self.name}-{kind}-stream"))
+    
+    async def stop(self):
+        """Cancel connection and resync tasks"""
+        for task in self._tasks + list(self._resyncing.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._resyncing.values(), return_exceptions=True)
+        self._tasks = []
+        self._resyncing = {}
+    
+    async def _run_connection(self, kind: str, url: str):
+        """Connect, subscribe and read until cancelled, reconnecting with backoff"""
+        backoff = self.manager.min_backoff
+        while True:
+            heartbeat = None
+            try:
+                session = session_pool.get(self.base_url or url)
+                async with session.ws_connect(url, heartbeat=self.heartbeat_interval, autoping=True) as ws:
+                    self._sockets[kind] = ws
+                    await self.on_open(ws, kind)
+                    self.connected[kind] = True
+                    logger.info(f"📡 {self.name} {kind} stream connected")
+                    if self.heartbeat_message():
+                        heartbeat = asyncio.create_task(self._heartbeat(ws))
+                    
+                    while True:
+                        # A venue that goes quiet past stale_after is treated as disconnected
+                        msg = await ws.receive(timeout=self.manager.stale_after)
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            backoff = self.manager.min_backoff
+                            if msg.data == "pong":
+                                continue
+                            await self.handle(json.loads(msg.data), kind)
+                        elif msg.type == aiohttp.WSMsgType.BINARY:
+                            await self.handle(json.loads(msg.data), kind)
+                        elif msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSED,
+                                          aiohttp.WSMsgType.CLOSING, aiohttp.WSMsgType.ERROR):
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ {self.name} {kind} stream error: {str(e)}")
+            finally:
+                if heartbeat:
+                    heartbeat.cancel()
+                self._sockets.pop(kind, None)
+                self.connected[kind] = False
+            
+            # Books must be rebuilt after any reconnect
+            if kind == "public":
+                for venue_symbol in self.venue_symbols:
+                    self._book(venue_symbol).synced = False
+            self.reconnects += 1
+            delay = backoff * (1 + random.random() * 0.25)
+            logger.info(f"🔄 {self.name} {kind} stream reconnecting in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            backoff = min(backoff * 2, self.manager.max_backoff)
+    
+    async def _heartbeat(self, ws: aiohttp.ClientWebSocketResponse):
+        while not ws.closed:
+            await asyncio.sleep(self.heartbeat_interval)
+            await ws.send_str(self.heartbeat_message())
+    
+    async def send_json(self, kind: str, payload: Dict[str, Any]):
+        ws = self._sockets.get(kind)
+        if ws is not None and not ws.closed:
+            await ws.send_str(json.dumps(payload))
+    
+    # --- book maintenance -----------------------------------------------
+    
+    def _book(self, venue_symbol: str) -> L2Book:
+        return self.manager.book(self.name, self.venue_symbols.get(venue_symbol, venue_symbol))
+    
+    def _on_book_delta(self, venue_symbol: str, first_seq: int, last_seq: int, bids: list, asks: list):
+        """
+        Apply a sequenced diff (first_seq..last_seq, Binance/Gate style).
+        
+        Deltas that don't chain onto the book are buffered and a REST
+        snapshot is fetched; buffered deltas newer than the snapshot are
+        replayed once it lands.
+        """
+        book = self._book(venue_symbol)
+        if book.synced:
+            if last_seq <= book.seq:
+                return
+            if first_seq <= book.seq + 1:
+                book.apply_delta(bids, asks, last_seq)
+                return
+            logger.warning(f"⚠️ {self.name} {venue_symbol} book gap ({book.seq} -> {first_seq}); resyncing")
+            self.manager.gap_count += 1
+            book.synced = False
+        book.pending.append((first_seq, last_seq, bids, asks))
+        if len(book.pending) > self.manager.max_pending_deltas:
+            book.pending = book.pending[-self.manager.max_pending_deltas:]
+        self._schedule_resync(venue_symbol)
+    
+    def _schedule_resync(self, venue_symbol: str):
+        task = self._resyncing.get(venue_symbol)
+        if task is None or task.done():
+            self._resyncing[venue_symbol] = asyncio.create_task(self._resync(venue_symbol))
+    
+    async def _resync(self, venue_symbol: str):
+        """Fetch a snapshot and replay buffered deltas on top of it"""
+        book = self._book(venue_symbol)
+        for attempt in range(5):
+            try:
+                snapshot = await self.fetch_snapshot(venue_symbol)
+            except Exception as e:
+                logger.warning(f"⚠️ {self.name} {venue_symbol} snapshot failed: {str(e)}")
+                snapshot = None
+            if snapshot is not None:
+                bids, asks, seq = snapshot
+                pending, book.pending = book.pending, []
+                # Snapshot older than anything buffered can't be bridged; try again
+                if pending and pending[0][0] > seq + 1:
+                    book.pending = pending
+                    await asyncio.sleep(0.2 * (attempt + 1))
+                    continue
+                book.apply_snapshot(bids, asks, seq)
+                for first_seq, last_seq, delta_bids, delta_asks in pending:
+                    if last_seq > book.seq and first_seq <= book.seq + 1:
+                        book.apply_delta(delta_bids, delta_asks, last_seq)
+                return
+            await asyncio.sleep(0.2 * (attempt + 1))
+
+class OKXStream(VenueStream):
+    """OKX v5 public (tickers, books) and private (orders/fills) streams"""
+    
+    venue = "okx"
+    default_ws_url = "wss://ws.okx.com:8443/ws/v5/public"
+    default_base_url = "https://www.okx.com"
+    time_path = "/api/v5/public/time"
+    heartbeat_interval = 25.0
+    
+    @staticmethod
+    def server_time_ms(data):
+        return data["data"][0]["ts"]
+    
+    def connection_urls(self) -> Dict[str, str]:
+        urls = {"public": self.ws_url}
+        if self.has_credentials:
+            urls["private"] = self.ws_url.replace("/public", "/private")
+        return urls
+    
+    def heartbeat_message(self) -> Optional[str]:
+        return "ping"
+    
+    def _book_args(self) -> List[Dict[str, str]]:
+        return [{"channel": "books", "instId": s} for s in self.venue_symbols]
+    
+    async def on_open(self, ws, kind):
+        if kind == "public":
+            args = [{"channel": "tickers", "instId": s} for s in self.venue_symbols] + self._book_args()
+            await ws.send_str(json.dumps({"op": "subscribe", "args": args}))
+            return
+        
+        await self._sync_clock()
+        timestamp = str(int(self.clock.now()))
+        sign = get_signer(self.config.secret_key, hashlib.sha256).b64digest(timestamp + "GET" + "/users/self/verify")
+        await ws.send_str(json.dumps({"op": "login", "args": [{
+            "apiKey": self.config.api_key, "passphrase": self.config.passphrase,
+            "timestamp": timestamp, "sign": sign
+        }]}))
+        reply = json.loads((await ws.receive(timeout=10)).data)
+        if reply.get("event") != "login" or reply.get("code") not in ("0", None):
+            # Possibly a stale timestamp; resync before the reconnect signs again
+            self.clock.invalidate()
+            raise ConnectionError(f"OKX login rejected: {reply}")
+        await ws.send_str(json.dumps({"op": "subscribe", "args": [{"channel": "orders", "instType": "SPOT"}]}))
+    
+    async def _resync(self, venue_symbol: str):
+        # OKX re-sends a full book on subscribe, so resubscribing is the snapshot
+        args = [{"channel": "books", "instId": venue_symbol}]
+        await self.send_json("public", {"op": "unsubscribe", "args": args})
+        await self.send_json("public", {"op": "subscribe", "args": args})
+    
+    async def handle(self, message, kind):
+        arg = message.get("arg") or {}
+        channel = arg.get("channel")
+        if "data" not in message:
+            if message.get("event") == "error":
+                logger.error(f"❌ {self.name} stream error: {message}")
+            return
+        
+        if channel == "tickers":
+            for item in message["data"]:
+                self.manager.update_ticker(self.name, self.venue_symbols.get(item["instId"], item["instId"]),
+                                           float(item["last"]), float(item.get("bidPx") or 0),
+                                           float(item.get("askPx") or 0), int(item.get("ts", 0)))
+        elif channel == "books":
+            venue_symbol = arg["instId"]
+            book = self._book(venue_symbol)
+            for item in message["data"]:
+                seq = int(item.get("seqId", 0))
+                if message.get("action") == "snapshot":
+                    book.apply_snapshot(item["bids"], item["asks"], seq)
+                elif book.synced and int(item.get("prevSeqId", -1)) == book.seq:
+                    book.apply_delta(item["bids"], item["asks"], seq)
+                elif book.synced:
+                    logger.warning(f"⚠️ {self.name} {venue_symbol} book gap; resubscribing")
+                    self.manager.gap_count += 1
+                    book.synced = False
+                    self._schedule_resync(venue_symbol)
+        elif channel == "orders":
+            for item in message["data"]:
+                symbol = self.venue_symbols.get(item["instId"], item["instId"])
+                self.manager.emit_order(self.name, {
+                    "symbol": symbol, "order_id": item["ordId"], "side": item["side"],
+                    "status": item["state"], "filled": float(item.get("accFillSz") or 0),
+                    "size": float(item.get("sz") or 0), "timestamp": int(item.get("uTime") or 0)
+                })
+                if item.get("tradeId") and float(item.get("fillSz") or 0) > 0:
+                    self.manager.emit_fill(self.name, {
+                        "symbol": symbol, "order_id": item["ordId"], "trade_id": item["tradeId"],
+                        "side": item["side"], "price": float(item["fillPx"]), "size": float(item["fillSz"]),
+                        "fee": abs(float(item.get("fillFee") or 0)), "fee_currency": item.get("fillFeeCcy", ""),
+                        "timestamp": int(item.get("fillTime") or item.get("uTime") or 0)
+                    })
+
+class GateStream(VenueStream):
+    """Gate.io v4 spot streams (tickers, order book updates, user trades and orders)"""
+    
+    venue = "gate"
+    default_ws_url = "wss://api.gateio.ws/ws/v4/"
+    default_base_url = "https://api.gateio.ws"
+    time_path = "/api/v4/spot/time"
+    heartbeat_interval = 20.0
+    
+    @staticmethod
+    def server_time_ms(data):
+        return data["server_time"]
+    
+    def to_venue(self, symbol):
+        return symbol.replace("-", "_")
+    
+    def heartbeat_message(self) -> Optional[str]:
+        return json.dumps({"time": int(time.time()), "channel": "spot.ping"})
+    
+    def _request(self, channel: str, payload: list, private: bool = False) -> Dict[str, Any]:
+        now = int(self.clock.now())
+        request = {"time": now, "channel": channel, "event": "subscribe", "payload": payload}
+        if private:
+            sign = get_signer(self.config.secret_key, hashlib.sha512).hexdigest(
+                f"channel={channel}&event=subscribe&time={now}")
+            request["auth"] = {"method": "api_key", "KEY": self.config.api_key, "SIGN": sign}
+        return request
+    
+    async def on_open(self, ws, kind):
+        pairs = list(self.venue_symbols)
+        await ws.send_str(json.dumps(self._request("spot.tickers", pairs)))
+        for pair in pairs:
+            await ws.send_str(json.dumps(self._request("spot.order_book_update", [pair, "100ms"])))
+        if self.has_credentials:
+            await self._sync_clock()
+            await ws.send_str(json.dumps(self._request("spot.usertrades", ["!all"], private=True)))
+            await ws.send_str(json.dumps(self._request("spot.orders", ["!all"], private=True)))
+    
+    async def fetch_snapshot(self, venue_symbol):
+        session = session_pool.get(self.base_url)
+        url = f"{self.base_url}/api/v4/spot/order_book?currency_pair={venue_symbol}&limit=100&with_id=true"
+        async with session.get(url) as response:
+            data = await response.json(content_type=None)
+        return data["bids"], data["asks"], int(data["id"])
+    
+    async def handle(self, message, kind):
+        if message.get("event") != "update":
+            return
+        channel = message.get("channel")
+        result = message.get("result")
+        
+        if channel == "spot.tickers":
+            pair = result["currency_pair"]
+            self.manager.update_ticker(self.name, self.venue_symbols.get(pair, pair), float(result["last"]),
+                                       float(result.get("highest_bid") or 0), float(result.get("lowest_ask") or 0),
+                                       int(message.get("time_ms", 0)))
+        elif channel == "spot.order_book_update":
+            self._on_book_delta(result["s"], int(result["U"]), int(result["u"]),
+                                result.get("b", []), result.get("a", []))
+        elif channel == "spot.usertrades":
+            for trade in result:
+                pair = trade["currency_pair"]
+                self.manager.emit_fill(self.name, {
+                    "symbol": self.venue_symbols.get(pair, pair), "order_id": str(trade["order_id"]),
+                    "trade_id": str(trade["id"]), "side": trade["side"], "price": float(trade["price"]),
+                    "size": float(trade["amount"]), "fee": float(trade.get("fee") or 0),
+                    "fee_currency": trade.get("fee_currency", ""),
+                    "timestamp": int(float(trade.get("create_time_ms") or 0))
+                })
+        elif channel == "spot.orders":
+            for order in result:
+                pair = order["currency_pair"]
+                amount = float(order.get("amount") or 0)
+                self.manager.emit_order(self.name, {
+                    "symbol": self.venue_symbols.get(pair, pair), "order_id": str(order["id"]),
+                    "side": order.get("side", ""), "status": order.get("event", ""),
+                    "filled": amount - float(order.get("left") or 0), "size": amount,
+                    "timestamp": int(float(order.get("update_time_ms") or 0))
+                })
+
+class BinanceStream(VenueStream):
+    """Binance spot streams (24h ticker, diff depth) plus the listenKey user-data stream"""
+    
+    venue = "binance"
+    default_ws_url = "wss://stream.binance.com:9443/ws"
+    default_base_url = "https://api.binance.com"
+    listen_key_keepalive = 30 * 60.0
+    
+    def __init__(self, manager, name, config, symbols):
+        """Binance also keeps a user-data listen key alive"""
+        super().__init__(manager, name, config, symbols)
+        self._listen_key: Optional[str] = None
+        self._keepalive: Optional[asyncio.Task] = None
+    
+    @property
+    def ws_url(self) -> str:
+        if getattr(self.config, "ws_url", ""):
+            return self.config.ws_url
+        if "testnet" in self.base_url:
+            return "wss://testnet.binance.vision/ws"
+        return self.default_ws_url
+    
+    def to_venue(self, symbol):
+        return symbol.replace("-", "").upper()
+    
+    def connection_urls(self) -> Dict[str, str]:
+        urls = {"public": self.ws_url}
+        if getattr(self.config, "api_key", ""):
+            urls["private"] = self.ws_url
+        return urls
+    
+    async def _user_stream_request(self, method: str) -> Dict[str, Any]:
+        session = session_pool.get(self.base_url)
+        url = f"{self.base_url}/api/v3/userDataStream"
+        if method != "POST":
+            url += f"?listenKey={self._listen_key}"
+        async with session.request(method, url, headers={"X-MBX-APIKEY": self.config.api_key}) as response:
+            return await response.json(content_type=None)
+    
+    async def _keepalive_listen_key(self, ws):
+        while not ws.closed:
+            await asyncio.sleep(self.listen_key_keepalive)
+            await self._user_stream_request("PUT")
+    
+    async def on_open(self, ws, kind):
+        if kind == "public":
+            streams = []
+            for venue_symbol in self.venue_symbols:
+                streams += [f"{venue_symbol.lower()}@ticker", f"{venue_symbol.lower()}@depth@100ms"]
+            await ws.send_str(json.dumps({"method": "SUBSCRIBE", "params": streams, "id": 1}))
+            return
+        
+        self._listen_key = (await self._user_stream_request("POST"))["listenKey"]
+        await ws.send_str(json.dumps({"method": "SUBSCRIBE", "params": [self._listen_key], "id": 2}))
+        if self._keepalive:
+            self._keepalive.cancel()
+        self._keepalive = asyncio.create_task(self._keepalive_listen_key(ws))
+    
+    async def stop(self):
+        if self._keepalive:
+            self._keepalive.cancel()
+        await super().stop()
+    
+    async def fetch_snapshot(self, venue_symbol):
+        session = session_pool.get(self.base_url)
+        async with session.get(f"{self.base_url}/api/v3/depth?symbol={venue_symbol}&limit=1000") as response:
+            data = await response.json(content_type=None)
+        return data["bids"], data["asks"], int(data["lastUpdateId"])
+    
+    async def handle(self, message, kind):
+        event = message.get("e")
+        if event == "24hrTicker":
+            symbol = message["s"]
+            self.manager.update_ticker(self.name, self.venue_symbols.get(symbol, symbol), float(message["c"]),
+                                       float(message.get("b") or 0), float(message.get("a") or 0),
+                                       int(message.get("E", 0)))
+        elif event == "depthUpdate":
+            self._on_book_delta(message["s"], int(message["U"]), int(message["u"]), message["b"], message["a"])
+        elif event == "executionReport":
+            symbol = self.venue_symbols.get(message["s"], message["s"])
+            self.manager.emit_order(self.name, {
+                "symbol": symbol, "order_id": str(message["i"]), "side": message["S"].lower(),
+                "status": message["X"], "filled": float(message["z"]), "size": float(message["q"]),
+                "timestamp": int(message.get("E", 0))
+            })
+            if message.get("x") == "TRADE":
+                self.manager.emit_fill(self.name, {
+                    "symbol": symbol, "order_id": str(message["i"]), "trade_id": str(message["t"]),
+                    "side": message["S"].lower(), "price": float(message["L"]), "size": float(message["l"]),
+                    "fee": float(message.get("n") or 0), "fee_currency": message.get("N") or "",
+                    "timestamp": int(message.get("T", 0))
+                })
+
+class BTCMarketsStream(VenueStream):
+    """BTC Markets v2 socket (tick, full orderbook, authenticated orderChange)"""
+    
+    venue = "btcmarkets"
+    default_ws_url = "wss://socket.btcmarkets.net/v2"
+    default_base_url = "https://api.btcmarkets.net"
+    time_path = "/v3/time"
+    
+    @staticmethod
+    def server_time_ms(data):
+        return iso_to_ms(data["timestamp"])
+    
+    @property
+    def has_credentials(self) -> bool:
+        return bool(getattr(self.config, "api_key", "") and getattr(self.config, "private_key", ""))
+    
+    TERMINAL_STATUSES = ("Fully Matched", "Cancelled", "Partially Cancelled", "Failed")
+    
+    def __init__(self, *args, **kwargs):
+        """orderChange carries only the trades of each change, so cumulative fills are tracked here"""
+        super().__init__(*args, **kwargs)
+        self._order_fills: Dict[str, Dict[str, float]] = {}  # order_id -> trade_id -> volume
+    
+    async def on_open(self, ws, kind):
+        request = {
+            "messageType": "subscribe",
+            "marketIds": list(self.venue_symbols),
+            "channels": ["tick", "orderbook", "heartbeat"]
+        }
+        if self.has_credentials:
+            await self._sync_clock()
+            timestamp = str(self.clock.now_ms())
+            request["channels"].append("orderChange")
+            request["key"] = self.config.api_key
+            request["timestamp"] = timestamp
+            request["signature"] = get_signer(self.config.private_key, hashlib.sha512, key_encoding="base64").b64digest(
+                "/users/self/subscribe" + "\n" + timestamp)
+        await ws.send_str(json.dumps(request))
+    
+    async def handle(self, message, kind):
+        message_type = message.get("messageType")
+        market_id = message.get("marketId", "")
+        if message_type == "tick":
+            self.manager.update_ticker(self.name, self.venue_symbols.get(market_id, market_id),
+                                       float(message["lastPrice"]), float(message.get("bestBid") or 0),
+                                       float(message.get("bestAsk") or 0), 0)
+        elif message_type == "orderbook":
+            # Full top-of-book snapshots: nothing to chain, so no gaps to recover
+            self._book(market_id).apply_snapshot(message.get("bids", []), message.get("asks", []),
+                                                 int(message.get("snapshotId", 0)))
+        elif message_type == "orderChange":
+            symbol = self.venue_symbols.get(market_id, market_id)
+            order_id = str(message["orderId"])
+            status = message.get("status", "")
+            timestamp = int(iso_to_ms(message["timestamp"])) if message.get("timestamp") else 0
+            trades = message.get("trades", [])
+            
+            # Replayed changes repeat trades; keying by trade id keeps the sum exact
+            order_fills = self._order_fills.setdefault(order_id, {})
+            for trade in trades:
+                order_fills[str(trade["tradeId"])] = float(trade["volume"])
+            filled = sum(order_fills.values())
+            if status in self.TERMINAL_STATUSES:
+                self._order_fills.pop(order_id, None)
+            
+            self.manager.emit_order(self.name, {
+                "symbol": symbol, "order_id": order_id, "side": message.get("side", "").lower(),
+                "status": status, "filled": filled,
+                "size": filled + float(message.get("openVolume") or 0), "timestamp": timestamp
+            })
+            for trade in trades:
+                self.manager.emit_fill(self.name, {
+                    "symbol": symbol, "order_id": order_id, "trade_id": str(trade["tradeId"]),
+                    "side": message.get("side", "").lower(), "price": float(trade["price"]),
+                    "size": float(trade["volume"]), "fee": float(trade.get("fee") or 0), "fee_currency": "AUD",
+                    "timestamp": timestamp
+                })
+        elif message_type == "error":
+            logger.error(f"❌ {self.name} stream error: {message}")
+
+STREAM_CLASSES = {
+    "okx": OKXStream,
+    "gate": GateStream,
+    "binance": BinanceStream,
+    "btcmarkets": BTCMarketsStream,
+}
+
+class ExchangeStreamManager:
+    """
+    Local market state and event fan-out fed by the venue streams.
+    
+    Reads (best_prices, best_quote, orderbook) touch only in-memory state.
+    Fill callbacks run on the event loop as each message is parsed; fills
+    replayed after a resubscribe are de-duplicated by (venue, trade_id).
+    """
+    
+    def __init__(self, stale_after: float = 30.0, min_backoff: float = 0.5, max_backoff: float = 30.0,
+                 max_pending_deltas: int = 1000):
+        """A venue silent for stale_after seconds is reconnected, backing off between min_backoff and max_backoff"""
+        self.stale_after = stale_after
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.max_pending_deltas = max_pending_deltas
+        self.streams: Dict[str, VenueStream] = {}
+        self.tickers: Dict[str, Dict[str, TickerState]] = {}
+        self.books: Dict[str, Dict[str, L2Book]] = {}
+        self.gap_count = 0
+        self._fill_callbacks: List[Callable] = []
+        self._order_callbacks: List[Callable] = []
+        self._ticker_callbacks: List[Callable] = []
+        self._callback_tasks: set = set()  # coroutine callbacks still running
+        self._seen_trades: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+    
+    def add_venue(self, name: str, venue: str, config: Any, symbols: List[str]) -> VenueStream:
+        """Register a venue stream; venue is one of STREAM_CLASSES"""
+        stream = STREAM_CLASSES[venue](self, name, config, symbols)
+        self.streams[name] = stream
+        return stream
+    
+    async def start(self):
+        for stream in self.streams.values():
+            stream.start()
+    
+    async def stop(self):
+        await asyncio.gather(*(stream.stop() for stream in self.streams.values()), return_exceptions=True)
+        await asyncio.gather(*self._callback_tasks, return_exceptions=True)
+    
+    # --- state updates (called by streams) -------------------------------
+    
+    def book(self, name: str, symbol: str) -> L2Book:
+        venue_books = self.books.setdefault(name, {})
+        book = venue_books.get(symbol)
+        if book is None:
+            book = venue_books[symbol] = L2Book()
+        return book
+    
+    def update_ticker(self, name: str, symbol: str, last: float, bid: float, ask: float, exchange_ts: int):
+        self.tickers.setdefault(name, {})[symbol] = TickerState(last, bid, ask, exchange_ts, time.monotonic())
+        if self._ticker_callbacks:
+            self._dispatch(self._ticker_callbacks, {
+                "exchange": name, "symbol": symbol, "last": last,
+                "bid": bid, "ask": ask, "timestamp": exchange_ts
+            })
+    
+    def emit_fill(self, name: str, fill: Dict[str, Any]):
+        key = (name, fill["trade_id"])
+        if key in self._seen_trades:
+            return
+        self._seen_trades[key] = None
+        if len(self._seen_trades) > 100000:
+            self._seen_trades.popitem(last=False)
+        fill["exchange"] = name
+        fill["venue"] = self.streams[name].venue if name in self.streams else name
+        fill["received_at"] = time.time()
+        self._dispatch(self._fill_callbacks, fill)
+    
+    def emit_order(self, name: str, order: Dict[str, Any]):
+        order["exchange"] = name
+        self._dispatch(self._order_callbacks, order)
+    
+    def _dispatch(self, callbacks: List[Callable], event: Dict[str, Any]):
+        for callback in callbacks:
+            try:
+                result = callback(event)
+                if asyncio.iscoroutine(result):
+                    task = asyncio.ensure_future(result)
+                    self._callback_tasks.add(task)
+                    task.add_done_callback(self._callback_done)
+            except Exception as e:
+                logger.error(f"❌ Stream callback error: {str(e)}")
+    
+    def _callback_done(self, task: asyncio.Task):
+        self._callback_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"❌ Stream callback error: {str(task.exception())}")
+    
+    # --- subscriptions ---------------------------------------------------
+    
+    def on_fill(self, callback: Callable[[Dict[str, Any]], Any]):
+        """Register a fill callback (plain function or coroutine function)"""
+        self._fill_callbacks.append(callback)
+    
+    def on_order(self, callback: Callable[[Dict[str, Any]], Any]):
+        """Register an order-update callback"""
+        self._order_callbacks.append(callback)
+    
+    def on_ticker(self, callback: Callable[[Dict[str, Any]], Any]):
+        """Register a ticker callback; called for every ticker update with last/bid/ask"""
+        self._ticker_callbacks.append(callback)
+    
+    # --- reads -----------------------------------------------------------
+    
+    def best_prices(self, symbol: str, max_age: Optional[float] = None) -> Dict[str, float]:
+        """Last price per venue for symbol from live tickers no older than max_age seconds"""
+        cutoff = time.monotonic() - (self.stale_after if max_age is None else max_age)
+        prices = {}
+        for name, venue_tickers in self.tickers.items():
+            ticker = venue_tickers.get(symbol)
+            if ticker is not None and ticker.updated_at >= cutoff:
+                prices[name] = ticker.last
+        return prices
+    
+    def best_quote(self, symbol: str) -> Dict[str, Optional[Tuple[str, float]]]:
+        """Best bid and ask across synced venue books as (venue, price)"""
+        best_bid = best_ask = None
+        for name, venue_books in self.books.items():
+            book = venue_books.get(symbol)
+            if book is None or not book.synced:
+                continue
+            if book.best_bid is not None and (best_bid is None or book.best_bid > best_bid[1]):
+                best_bid = (name, book.best_bid)
+            if book.best_ask is not None and (best_ask is None or book.best_ask < best_ask[1]):
+                best_ask = (name, book.best_ask)
+        return {"bid": best_bid, "ask": best_ask}
+    
+    def orderbook(self, name: str, symbol: str, depth: int = 20) -> Optional[Dict[str, Any]]:
+        """Sorted local book for one venue, or None if not synced"""
+        book = self.books.get(name, {}).get(symbol)
+        if book is None or not book.synced:
+            return None
+        bids, asks = book.top(depth)
+        return {"bids": bids, "asks": asks, "seq": book.seq}
+    
+    def status(self) -> Dict[str, Any]:
+        return {
+            "venues": {
+                name: {"connected": dict(stream.connected), "reconnects": stream.reconnects}
+                for name, stream in self.streams.items()
+            },
+            "book_gaps": self.gap_count,
+            "fill_subscribers": len(self._fill_callbacks)
+        }
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+ULTIMATE LYRA ECOSYSTEM - EXCHANGE TRANSPORT
+===========================================
+
+Shared signing and connection layer for the exchange connectors:
+- HMAC signers that decode the secret once and reuse a keyed hmac object via .copy()
+- Per-venue persistent aiohttp sessions (keep-alive, DNS cache)
+- Server clock-offset estimation so signed timestamps are not rejected
+"""
+
+import asyncio
+import aiohttp
+import base64
+import hashlib
+import hmac
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Tuple, Callable
+
+logger = logging.getLogger(__name__)
+
+class HmacSigner:
+    """HMAC signer with the key schedule computed once"""
+    
+    __slots__ = ("_base",)
+    
+    def __init__(self, key: bytes, digestmod):
+        """Key the base hmac object once; every digest works on a copy."""
+        self._base = hmac.new(key, digestmod=digestmod)
+    
+    def digest(self, message: str) -> bytes:
+        """Raw HMAC digest of message"""
+        h = self._base.copy()
+        h.update(message.encode('utf-8'))
+        return h.digest()
+    
+    def hexdigest(self, message: str) -> str:
+        """Hex HMAC digest of message"""
+        h = self._base.copy()
+        h.update(message.encode('utf-8'))
+        return h.hexdigest()
+    
+    def b64digest(self, message: str) -> str:
+        """Base64 HMAC digest of message"""
+        return base64.b64encode(self.digest(message)).decode('utf-8')
+
+_signers: Dict[Tuple[str, Any, str], HmacSigner] = {}
+_signers_lock = threading.Lock()
+
+def get_signer(secret: str, digestmod, key_encoding: str = "utf-8") -> HmacSigner:
+    """
+    Return the cached signer for a secret.
+    
+    key_encoding is "utf-8" for plain secrets (OKX, Gate, Binance) or
+    "base64" for secrets that must be decoded first (BTC Markets).
+    """
+    cache_key = (secret, digestmod, key_encoding)
+    signer = _signers.get(cache_key)
+    if signer is None:
+        key = base64.b64decode(secret) if key_encoding == "base64" else secret.encode('utf-8')
+        with _signers_lock:
+            signer = _signers.setdefault(cache_key, HmacSigner(key, digestmod))
+    return signer
+
+class ClockOffset:
+    """
+    Server clock-offset estimate for one venue.
+    
+    Each sync takes a few NTP-style samples (offset = server time minus the
+    midpoint of the request) and keeps the one with the lowest round trip.
+    Signed timestamps use local time plus the offset, so requests are not
+    rejected by venues with tight recv windows when the host clock drifts.
+    """
+    
+    def __init__(self, venue: str, resync_interval: float = 300.0, samples: int = 3):
+        """Offset starts at zero until the first sync; resync_interval is in seconds."""
+        self.venue = venue
+        self.resync_interval = resync_interval
+        self.samples = samples
+        self.offset_ms = 0.0
+        self.rtt_ms: Optional[float] = None
+        self.last_sync = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+    
+    def now_ms(self) -> int:
+        """Server-aligned epoch milliseconds"""
+        return int(time.time() * 1000 + self.offset_ms)
+    
+    def now(self) -> float:
+        """Server-aligned epoch seconds"""
+        return time.time() + self.offset_ms / 1000.0
+    
+    def is_stale(self) -> bool:
+        """True when the estimate should be refreshed"""
+        return time.monotonic() - self.last_sync > self.resync_interval
+    
+    def invalidate(self):
+        """Force a resync before the next signed request (e.g. after a timestamp rejection)"""
+        self.last_sync = 0.0
+    
+    def observe(self, server_ms: float, sent_ms: float, received_ms: float):
+        """Fold in one sample; keeps the lowest-RTT sample of the current sync"""
+        rtt = received_ms - sent_ms
+        if self.rtt_ms is None or rtt <= self.rtt_ms:
+            self.rtt_ms = rtt
+            self.offset_ms = server_ms - (sent_ms + received_ms) / 2.0
+    
+    async def sync(self, session: aiohttp.ClientSession, url: str,
+                   extract_server_ms: Callable[[Any], float], force: bool = False) -> bool:
+        """Query the venue's time endpoint and update the offset if stale"""
+        if not force and not self.is_stale():
+            return True
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not force and not self.is_stale():
+                return True
+            # Don't hammer the endpoint if it is down; retry after the next interval
+            self.last_sync = time.monotonic()
+            self.rtt_ms = None
+            synced = False
+            for _ in range(self.samples):
+                try:
+                    sent_ms = time.time() * 1000
+                    async with session.get(url) as response:
+                        data = await response.json(content_type=None)
+                    received_ms = time.time() * 1000
+                    self.observe(float(extract_server_ms(data)), sent_ms, received_ms)
+                    synced = True
+                except Exception as e:
+                    logger.debug(f"{self.venue} clock sync failed: {str(e)}")
+                    break
+            if synced:
+                logger.info(f"{self.venue} clock offset {self.offset_ms:+.1f}ms (rtt {self.rtt_ms:.1f}ms)")
+            return synced
+
+_clocks: Dict[str, ClockOffset] = {}
+
+def get_clock(venue: str) -> ClockOffset:
+    """Shared clock-offset estimate for a venue"""
+    clock = _clocks.get(venue)
+    if clock is None:
+        clock = _clocks.setdefault(venue, ClockOffset(venue))
+    return clock
+
+def iso_to_ms(value: str) -> float:
+    """Parse an ISO-8601 UTC timestamp (e.g. 2019-09-01T18:34:27.045000Z) to epoch ms"""
+    value = value.rstrip('Z')
+    fmt = '%Y-%m-%dT%H:%M:%S.%f' if '.' in value else '%Y-%m-%dT%H:%M:%S'
+    return (datetime.strptime(value, fmt) - datetime(1970, 1, 1)).total_seconds() * 1000
+
+class SessionPool:
+    """
+    Persistent aiohttp sessions, one per venue base URL and event loop.
+    
+    Connectors borrow sessions instead of opening their own, so TCP/TLS
+    connections stay warm across connector instances and DNS lookups are
+    cached. aiohttp speaks HTTP/1.1 only; keep-alive reuse is what removes
+    the per-request handshake.
+    """
+    
+    def __init__(self, limit_per_host: int = 20, keepalive_timeout: float = 60.0,
+                 dns_ttl: int = 300, request_timeout: float = 10.0):
+        """Connector limits and timeouts (seconds) applied to every pooled session."""
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_ttl = dns_ttl
+        self.request_timeout = request_timeout
+        self._sessions: Dict[Tuple[str, int], aiohttp.ClientSession] = {}
+    
+    def get(self, base_url: str) -> aiohttp.ClientSession:
+        """Session for base_url on the running loop, created on first use"""
+        key = (base_url, id(asyncio.get_running_loop()))
+        session = self._sessions.get(key)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_ttl,
+                use_dns_cache=True
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+            )
+            self._sessions[key] = session
+        return session
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Open sessions and their connection counts"""
+        return {
+            base_url: {
+                "closed": session.closed,
+                "connections": len(getattr(session.connector, "_conns", {}))
+            }
+            for (base_url, _), session in self._sessions.items()
+        }
+    
+    async def close(self):
+        """Close the sessions owned by the running loop"""
+        loop_id = id(asyncio.get_running_loop())
+        for key in [k for k in self._sessions if k[1] == loop_id]:
+            session = self._sessions.pop(key)
+            if not session.closed:
+                await session.close()
+
+# Global session pool
+session_pool = SessionPool()
@@ -10068,6 +10068,98 @@ class LimitOrderEntryCalculator:
                 order_book_depth=0.5,
                 market_impact_estimate=0.002
             )
+    def calculate_optimal_entries(self, requests: List[LimitOrderRequest],
+                                  market_data_by_symbol: Dict[str, Dict]) -> List[OptimalEntry]:
+        """
+        Batch form of calculate_optimal_entry for one cycle's requests.
+        S/R, volume-profile and depth analyses run once per symbol and are shared by
+        every request on that symbol; limit prices, fill probabilities and entry
+        confidences are then computed as array operations over the whole batch.
+        """
+        if not requests:
+            return []
+        try:
+            analyses = {}
+            for symbol in {request.symbol for request in requests}:
+                market_data = market_data_by_symbol.get(symbol, {})
+                analyses[symbol] = (
+                    self._analyze_support_resistance(symbol, market_data),
+                    self._analyze_volume_profile(symbol, market_data),
+                    self._analyze_order_book_depth(symbol, market_data)
+                )
+                self.support_resistance_cache[symbol], self.volume_profile_cache[symbol], self.order_book_cache[symbol] = analyses[symbol]
+            per_request = [analyses[request.symbol] for request in requests]
+            signal_price = np.array([r.signal_price for r in requests], dtype=float)
+            is_buy = np.array([r.side == 'BUY' for r in requests])
+            max_adjustment = np.array([r.max_deviation_pct for r in requests], dtype=float) / 100
+            confidence = np.array([r.confidence for r in requests], dtype=float)
+            nearest_level = np.array([sr.get('nearest_level') or np.nan for sr, _, _ in per_request], dtype=float)
+            distance = np.array([sr.get('distance', 0.0) for sr, _, _ in per_request], dtype=float)
+            strength = np.array([sr.get('strength', 0.5) for sr, _, _ in per_request], dtype=float)
+            volume_score = np.array([vol.get('score', 0.5) for _, vol, _ in per_request], dtype=float)
+            liquidity_score = np.array([ob.get('liquidity_score', 0.5) for _, _, ob in per_request], dtype=float)
+            spread_pct = np.array([ob.get('spread_pct', 0.1) for _, _, ob in per_request], dtype=float)
+            market_impact = np.array([ob.get('market_impact', 0.002) for _, _, ob in per_request], dtype=float)
+            has_level = ~np.isnan(nearest_level)
+            # Limit price (same terms as _calculate_limit_price)
+            sr_pull = np.minimum(0.005, distance / 100 * strength)
+            sr_adjustment = np.where(has_level & is_buy & (nearest_level < signal_price), -sr_pull,
+                                     np.where(has_level & ~is_buy & (nearest_level > signal_price), sr_pull, 0.0))
+            total_adjustment = 0.001 + sr_adjustment + (volume_score - 0.5) * 0.002 + (liquidity_score - 0.5) * 0.001
+            spread_adjustment = np.minimum(0.002, spread_pct / 100)
+            adjustment = np.where(is_buy, -np.abs(total_adjustment) - spread_adjustment,
+                                  np.abs(total_adjustment) + spread_adjustment)
+            adjustment = np.clip(adjustment, -max_adjustment, max_adjustment)
+            limit_price = signal_price * (1 + adjustment)
+            limit_price = np.where(limit_price > 100, np.round(limit_price, 2),
+                                   np.where(limit_price > 1, np.round(limit_price, 4), np.round(limit_price, 6)))
+            # Fill probability (same terms as _estimate_fill_probability)
+            price_diff_pct = np.abs(limit_price - signal_price) / signal_price * 100
+            aggressiveness_score = np.maximum(0.1, 1.0 - price_diff_pct / 2.0)
+            impact_score = np.maximum(0.1, 1.0 - market_impact * 100)
+            fill_probability = np.clip(
+                aggressiveness_score * 0.4 + liquidity_score * 0.3 + impact_score * 0.2 + confidence * 0.1,
+                0.1, 0.95
+            )
+            # Entry confidence (same terms as _calculate_entry_confidence)
+            sr_boost = np.where(has_level & (distance < 1.0), strength * 0.1, 0.0)
+            price_penalty = np.where(price_diff_pct > 1.0, -(price_diff_pct - 1.0) * 0.02, 0.0)
+            entry_confidence = np.clip(
+                confidence + sr_boost + (volume_score - 0.5) * 0.05 + (liquidity_score - 0.5) * 0.05 + price_penalty,
+                0.1, 0.99
+            )
+            entries = []
+            for i, request in enumerate(requests):
+                sr_analysis, volume_analysis, orderbook_analysis = per_request[i]
+                price = float(limit_price[i])
+                entries.append(OptimalEntry(
+                    limit_price=price,
+                    confidence_score=float(entry_confidence[i]),
+                    fill_probability=float(fill_probability[i]),
+                    reasoning=self._generate_reasoning(
+                        price, request.signal_price, request.side, sr_analysis, volume_analysis, orderbook_analysis
+                    ),
+                    support_resistance_level=sr_analysis.get('nearest_level'),
+                    volume_profile_score=volume_analysis.get('score', 0.5),
+                    order_book_depth=orderbook_analysis.get('depth_score', 0.5),
+                    market_impact_estimate=orderbook_analysis.get('market_impact', 0.001)
+                ))
+            return entries
+        except Exception as e:
+            logger.error(f"Error calculating optimal entries for batch of {len(requests)}: {e}")
+            return [
+                OptimalEntry(
+                    limit_price=r.signal_price * (0.999 if r.side == 'BUY' else 1.001),
+                    confidence_score=0.5,
+                    fill_probability=0.7,
+                    reasoning=f"Fallback calculation due to error: {str(e)}",
+                    support_resistance_level=None,
+                    volume_profile_score=0.5,
+                    order_book_depth=0.5,
+                    market_impact_estimate=0.002
+                )
+                for r in requests
+            ]
     def _analyze_support_resistance(self, symbol: str, market_data: Dict) -> Dict:
         """TODO: Add function documentation"""
         try:
@@ -10172,8 +10264,8 @@ class LimitOrderEntryCalculator:
             logger.error(f"Error analyzing order book depth for {symbol}: {e}")
             return {'depth_score': 0.5, 'market_impact': 0.002, 'liquidity_score': 0.5}
     def _calculate_limit_price(self, signal_price: float, side: str, sr_analysis: Dict, 
-        """TODO: Add function documentation"""
                               volume_analysis: Dict, orderbook_analysis: Dict, max_deviation_pct: float) -> float:
+        """Limit price offset from the signal, nudged toward nearby support/resistance and capped at max_deviation_pct."""
         try:
             base_adjustment = 0.001  # 0.1% base adjustment
             sr_adjustment = 0.0
@@ -10211,8 +10303,8 @@ class LimitOrderEntryCalculator:
             fallback_adjustment = -0.001 if side == 'BUY' else 0.001
             return signal_price * (1 + fallback_adjustment)
     def _estimate_fill_probability(self, limit_price: float, signal_price: float, side: str,
-        """TODO: Add function documentation"""
                                   orderbook_analysis: Dict, confidence: float) -> float:
+        """Estimated fill probability from how aggressive the limit is, book liquidity and market impact."""
         try:
             price_diff_pct = abs(limit_price - signal_price) / signal_price * 100
             aggressiveness_score = max(0.1, 1.0 - price_diff_pct / 2.0)  # 2% deviation = 0% aggressiveness
@@ -10231,9 +10323,9 @@ class LimitOrderEntryCalculator:
             logger.error(f"Error estimating fill probability: {e}")
             return 0.7  # Default reasonable probability
     def _calculate_entry_confidence(self, limit_price: float, signal_price: float,
-        """TODO: Add function documentation"""
                                    sr_analysis: Dict, volume_analysis: Dict, 
                                    orderbook_analysis: Dict, original_confidence: float) -> float:
+        """Signal confidence adjusted for support/resistance strength, volume and book depth."""
         try:
             base_confidence = original_confidence
             sr_boost = 0.0
@@ -10257,8 +10349,8 @@ class LimitOrderEntryCalculator:
             logger.error(f"Error calculating entry confidence: {e}")
             return original_confidence
     def _generate_reasoning(self, limit_price: float, signal_price: float, side: str,
-        """TODO: Add function documentation"""
                            sr_analysis: Dict, volume_analysis: Dict, orderbook_analysis: Dict) -> str:
+        """Human-readable explanation of where the limit was placed and why."""
         try:
             reasoning_parts = []
             price_diff_pct = (limit_price - signal_price) / signal_price * 100
@@ -10364,66 +10456,93 @@ class LimitOrderEngine:
         logger.info("📊 Limit order database initialized")
     def create_limit_order(self, request: LimitOrderRequest, market_data: Dict) -> Dict:
         """TODO: Add function documentation"""
+        return self.create_limit_orders([request], {request.symbol: market_data})[0]
+    def create_limit_orders(self, requests: List[LimitOrderRequest], market_data_by_symbol: Dict[str, Dict]) -> List[Dict]:
+        """
+        Create limit orders for a batch of entry requests (one result per request, in order).
+        Entries are priced in one vectorized pass and all accepted orders are saved in one transaction.
+        """
+        results: List[Optional[Dict]] = [None] * len(requests)
         try:
-            validation_result = self._validate_order_request(request)
-            if not validation_result['valid']:
-                return {'success': False, 'error': validation_result['error']}
-            optimal_entry = self.entry_calculator.calculate_optimal_entry(request, market_data)
-            if optimal_entry.fill_probability < self.config['min_fill_probability']:
-                return {
-                    'success': False, 
-                    'error': f"Fill probability too low: {optimal_entry.fill_probability:.2f}"
-                }
-            order_id = f"LYRA_LO_{int(time.time() * 1000)}"
-            expires_at = datetime.now() + timedelta(minutes=request.timeout_minutes)
-            limit_order = LimitOrder(
-                id=order_id,
-                symbol=request.symbol,
-                side=request.side,
-                quantity=request.quantity,
-                limit_price=optimal_entry.limit_price,
-                original_signal_price=request.signal_price,
-                confidence=request.confidence,
-                strategy_id=request.strategy_id,
-                status='PENDING',
-                filled_quantity=0.0,
-                average_fill_price=0.0,
-                created_at=datetime.now(),
-                updated_at=datetime.now(),
-                expires_at=expires_at
+            accepted = []
+            for i, request in enumerate(requests):
+                validation_result = self._validate_order_request(request)
+                if not validation_result['valid']:
+                    results[i] = {'success': False, 'error': validation_result['error']}
+                    continue
+                accepted.append(i)
+            entries = self.entry_calculator.calculate_optimal_entries(
+                [requests[i] for i in accepted], market_data_by_symbol
             )
-            if self.okx_exchange and os.getenv('LIVE_TRADING', 'false').lower() == 'true':
-                try:
-                    okx_order = self.okx_exchange.create_limit_order(
-                        symbol=request.symbol,
-                        side=request.side.lower(),
-                        amount=request.quantity,
-                        price=optimal_entry.limit_price
-                    )
-                    limit_order.okx_order_id = okx_order['id']
-                    logger.info(f"✅ OKX limit order placed: {okx_order['id']}")
-                except Exception as e:
-                    logger.error(f"❌ Failed to place OKX order: {e}")
-                    return {'success': False, 'error': f"OKX order placement failed: {str(e)}"}
-            else:
-                logger.info("📝 Paper trading mode - limit order simulated")
-            self._save_limit_order(limit_order, optimal_entry)
-            self.active_orders[order_id] = limit_order
-            if not self.running:
+            stamp = int(time.time() * 1000)
+            to_save = []
+            for n, (i, optimal_entry) in enumerate(zip(accepted, entries)):
+                request = requests[i]
+                # Re-check against orders accepted earlier in this batch
+                validation_result = self._validate_order_request(request)
+                if not validation_result['valid']:
+                    results[i] = {'success': False, 'error': validation_result['error']}
+                    continue
+                if optimal_entry.fill_probability < self.config['min_fill_probability']:
+                    results[i] = {
+                        'success': False, 
+                        'error': f"Fill probability too low: {optimal_entry.fill_probability:.2f}"
+                    }
+                    continue
+                order_id = f"LYRA_LO_{stamp}" if len(requests) == 1 else f"LYRA_LO_{stamp}_{n}"
+                now = datetime.now()
+                expires_at = now + timedelta(minutes=request.timeout_minutes)
+                limit_order = LimitOrder(
+                    id=order_id,
+                    symbol=request.symbol,
+                    side=request.side,
+                    quantity=request.quantity,
+                    limit_price=optimal_entry.limit_price,
+                    original_signal_price=request.signal_price,
+                    confidence=request.confidence,
+                    strategy_id=request.strategy_id,
+                    status='PENDING',
+                    filled_quantity=0.0,
+                    average_fill_price=0.0,
+                    created_at=now,
+                    updated_at=now,
+                    expires_at=expires_at
+                )
+                if self.okx_exchange and os.getenv('LIVE_TRADING', 'false').lower() == 'true':
+                    try:
+                        okx_order = self.okx_exchange.create_limit_order(
+                            symbol=request.symbol,
+                            side=request.side.lower(),
+                            amount=request.quantity,
+                            price=optimal_entry.limit_price
+                        )
+                        limit_order.okx_order_id = okx_order['id']
+                        logger.info(f"✅ OKX limit order placed: {okx_order['id']}")
+                    except Exception as e:
+                        logger.error(f"❌ Failed to place OKX order: {e}")
+                        results[i] = {'success': False, 'error': f"OKX order placement failed: {str(e)}"}
+                        continue
+                else:
+                    logger.info("📝 Paper trading mode - limit order simulated")
+                to_save.append((limit_order, optimal_entry))
+                self.active_orders[order_id] = limit_order
+                results[i] = {
+                    'success': True,
+                    'order_id': order_id,
+                    'limit_price': optimal_entry.limit_price,
+                    'fill_probability': optimal_entry.fill_probability,
+                    'confidence_score': optimal_entry.confidence_score,
+                    'reasoning': optimal_entry.reasoning,
+                    'expires_at': expires_at.isoformat(),
+                    'okx_order_id': limit_order.okx_order_id
+                }
+            self._save_limit_orders(to_save)
+            if to_save and not self.running:
                 self.start_monitoring()
-            return {
-                'success': True,
-                'order_id': order_id,
-                'limit_price': optimal_entry.limit_price,
-                'fill_probability': optimal_entry.fill_probability,
-                'confidence_score': optimal_entry.confidence_score,
-                'reasoning': optimal_entry.reasoning,
-                'expires_at': expires_at.isoformat(),
-                'okx_order_id': limit_order.okx_order_id
-            }
+            return results
         except Exception as e:
-            logger.error(f"Error creating limit order: {e}")
-            return {'success': False, 'error': str(e)}
+            logger.error(f"Error creating limit orders: {e}")
+            return [result or {'success': False, 'error': str(e)} for result in results]
     def _validate_order_request(self, request: LimitOrderRequest) -> Dict:
         """TODO: Add function documentation"""
         try:
@@ -10446,25 +10565,35 @@ class LimitOrderEngine:
             return {'valid': False, 'error': str(e)}
     def _save_limit_order(self, order: LimitOrder, optimal_entry: OptimalEntry):
         """TODO: Add function documentation"""
+        self._save_limit_orders([(order, optimal_entry)])
+    def _save_limit_orders(self, orders: List[Tuple[LimitOrder, OptimalEntry]]):
+        """Persist a batch of new orders in a single transaction"""
+        if not orders:
+            return
         try:
             conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO limit_orders (
-                    id, symbol, side, quantity, limit_price, original_signal_price,
-                    confidence, strategy_id, status, created_at, updated_at, expires_at,
-                    okx_order_id, optimal_entry_data
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                order.id, order.symbol, order.side, order.quantity, order.limit_price,
-                order.original_signal_price, order.confidence, order.strategy_id,
-                order.status, order.created_at, order.updated_at, order.expires_at,
-                order.okx_order_id, json.dumps(asdict(optimal_entry))
-            ))
-            conn.commit()
-            conn.close()
-            logger.info(f"💾 Limit order saved to database: {order.id}")
+            try:
+                with conn:
+                    conn.executemany('''
+                        INSERT INTO limit_orders (
+                            id, symbol, side, quantity, limit_price, original_signal_price,
+                            confidence, strategy_id, status, created_at, updated_at, expires_at,
+                            okx_order_id, optimal_entry_data
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', [
+                        (
+                            order.id, order.symbol, order.side, order.quantity, order.limit_price,
+                            order.original_signal_price, order.confidence, order.strategy_id,
+                            order.status, order.created_at, order.updated_at, order.expires_at,
+                            order.okx_order_id, json.dumps(asdict(optimal_entry))
+                        )
+                        for order, optimal_entry in orders
+                    ])
+            finally:
+                conn.close()
+            logger.info(f"💾 {len(orders)} limit order(s) saved to database")
         except Exception as e:
-            logger.error(f"Error saving limit order: {e}")
+            logger.error(f"Error saving limit orders: {e}")
     def start_monitoring(self):
         """TODO: Add function documentation"""
         if self.running:
@@ -11517,7 +11646,9 @@ import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, asdict
+from collections import deque
 import threading
+import bisect
 import math
 from enum import Enum
 logging.basicConfig(
@@ -11557,6 +11688,7 @@ class TrailingConfig:
     adjustment_frequency: int = 30       # Seconds between adjustments
     acceleration_factor: float = 0.02    # Parabolic SAR acceleration
     max_acceleration: float = 0.2        # Maximum acceleration
+    trailing_activation_pct: float = 1.0 # Profit threshold for trailing activation
 @dataclass
 class Position:
     id: str
@@ -11630,6 +11762,186 @@ class VolatilityCalculator:
         except Exception as e:
             logger.error(f"Error calculating volatility score: {e}")
             return 0.5
+class SymbolMarketState:
+    """Per-symbol tick aggregator with O(1) incremental ATR, volatility and regime"""
+    def __init__(self, symbol: str, bar_seconds: float = 60.0, atr_periods: int = 14):
+        """Aggregate ticks into bar_seconds bars; ATR is smoothed over atr_periods bars."""
+        self.symbol = symbol
+        self.bar_seconds = bar_seconds
+        self.atr_periods = atr_periods
+        self.bar_start = None
+        self.high = self.low = self.close = None
+        self.prev_close = None
+        self.last_price = None
+        self.atr = None
+        self.true_range_count = 0
+        self.closes = deque(maxlen=50)
+        self.sum_20 = 0.0
+        self.sum_50 = 0.0
+        self.returns = deque(maxlen=20)
+        self.return_sum = 0.0
+        self.return_sumsq = 0.0
+        self.regime = MarketRegime.SIDEWAYS
+    def on_tick(self, price: float, timestamp: float) -> bool:
+        """Fold one tick into the current bar; returns True when a bar closed"""
+        self.last_price = price
+        if self.bar_start is None:
+            self.bar_start = timestamp
+            self.high = self.low = self.close = price
+            return False
+        if timestamp - self.bar_start >= self.bar_seconds:
+            self._close_bar()
+            self.bar_start = timestamp - (timestamp - self.bar_start) % self.bar_seconds
+            self.high = self.low = self.close = price
+            return True
+        if price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+        self.close = price
+        return False
+    def _close_bar(self):
+        """Fold the finished bar into the ATR, the return window and the regime."""
+        close = self.close
+        if self.prev_close is not None:
+            true_range = max(self.high - self.low, abs(self.high - self.prev_close), abs(self.low - self.prev_close))
+            self.true_range_count += 1
+            if self.atr is None:
+                self.atr = true_range
+            elif self.true_range_count <= self.atr_periods:
+                self.atr += (true_range - self.atr) / self.true_range_count
+            else:
+                self.atr = (self.atr * (self.atr_periods - 1) + true_range) / self.atr_periods  # Wilder smoothing
+            ret = math.log(close / self.prev_close)
+            if len(self.returns) == self.returns.maxlen:
+                old = self.returns[0]
+                self.return_sum -= old
+                self.return_sumsq -= old * old
+            self.returns.append(ret)
+            self.return_sum += ret
+            self.return_sumsq += ret * ret
+        if len(self.closes) == self.closes.maxlen:
+            self.sum_50 -= self.closes[0]
+        if len(self.closes) >= 20:
+            self.sum_20 -= self.closes[-20]
+        self.closes.append(close)
+        self.sum_50 += close
+        self.sum_20 += close
+        self.prev_close = close
+        self.regime = self._classify_regime()
+    def atr_pct(self) -> float:
+        """ATR as a fraction of the last close (2% until enough bars have closed)."""
+        if self.true_range_count < self.atr_periods or not self.prev_close:
+            return 0.02  # Default 2% volatility
+        return self.atr / self.prev_close
+    def _return_std(self) -> float:
+        """Standard deviation of the windowed returns, from the running sums."""
+        n = len(self.returns)
+        mean = self.return_sum / n
+        return math.sqrt(max(0.0, self.return_sumsq / n - mean * mean))
+    def volatility_score(self) -> float:
+        """Annualised volatility scaled to 0.1-1.0 (0.5 until 19 returns are available)."""
+        if len(self.returns) < 19:
+            return 0.5
+        volatility = self._return_std() * math.sqrt(252)
+        return min(1.0, max(0.1, volatility / 0.5))
+    def _classify_regime(self) -> MarketRegime:
+        """Same thresholds as MarketRegimeDetector.detect_regime, from running sums"""
+        if len(self.closes) < 50:
+            return MarketRegime.SIDEWAYS
+        sma_20 = self.sum_20 / 20
+        sma_50 = self.sum_50 / 50
+        current_price = self.closes[-1]
+        volatility = self._return_std() * math.sqrt(252)
+        trend_strength = abs(sma_20 - sma_50) / sma_50
+        if volatility > 0.4:
+            return MarketRegime.VOLATILE
+        elif trend_strength > 0.05:
+            if sma_20 > sma_50 and current_price > sma_20:
+                return MarketRegime.BULL
+            elif sma_20 < sma_50 and current_price < sma_20:
+                return MarketRegime.BEAR
+        return MarketRegime.SIDEWAYS
+class PriceLevelIndex:
+    """Price-sorted levels; crossed() returns only the keys whose level the price has reached"""
+    def __init__(self, fires_above: bool):
+        """fires_above selects which side of a level counts as crossed."""
+        self.fires_above = fires_above  # True: fires when price >= level, False: when price <= level
+        self.prices = []
+        self.keys = []
+        self.levels = {}
+    def __len__(self):
+        """Number of indexed levels."""
+        return len(self.keys)
+    def set(self, key: str, level: float):
+        """Index key at level, replacing any previous level for the key."""
+        if self.levels.get(key) == level:
+            return
+        self.discard(key)
+        i = bisect.bisect_left(self.prices, level)
+        self.prices.insert(i, level)
+        self.keys.insert(i, key)
+        self.levels[key] = level
+    def discard(self, key: str):
+        """Remove key from the index if present."""
+        level = self.levels.pop(key, None)
+        if level is None:
+            return
+        i = bisect.bisect_left(self.prices, level)
+        while self.keys[i] != key:
+            i += 1
+        del self.prices[i]
+        del self.keys[i]
+    def crossed(self, price: float) -> List[str]:
+        """Keys whose level the price has reached, from one bisect."""
+        if self.fires_above:
+            return self.keys[:bisect.bisect_right(self.prices, price)]
+        return self.keys[bisect.bisect_left(self.prices, price):]
+class SymbolStopBook:
+    """
+    Stop index for one symbol. Exit levels fire when a stop (or the emergency stop)
+    is crossed; watch levels fire when a position could move its trailing stop
+    (activation price, or a new extreme past the highest price seen).
+    """
+    def __init__(self):
+        """Empty exit and watch indexes for long and short positions."""
+        self.long_exits = PriceLevelIndex(fires_above=False)
+        self.long_watch = PriceLevelIndex(fires_above=True)
+        self.short_exits = PriceLevelIndex(fires_above=True)
+        self.short_watch = PriceLevelIndex(fires_above=False)
+    def __len__(self):
+        """Number of indexed positions."""
+        return len(self.long_exits) + len(self.short_exits)
+    def index(self, position: Position, trailing_stop: Optional[TrailingStop], activation_pct: float, emergency_pct: float):
+        """(Re)index a position at its exit level and the next price that could move its trailing stop."""
+        active = trailing_stop is not None and trailing_stop.is_active
+        if position.side == 'BUY':
+            exit_level = position.entry_price * (1 - emergency_pct / 100)
+            if active:
+                exit_level = max(exit_level, trailing_stop.current_stop)
+            self.long_exits.set(position.id, exit_level)
+            if active:
+                self.long_watch.set(position.id, trailing_stop.highest_price)
+            elif trailing_stop is not None:
+                self.long_watch.set(position.id, position.entry_price * (1 + activation_pct / 100))
+        else:
+            exit_level = position.entry_price * (1 + emergency_pct / 100)
+            if active:
+                exit_level = min(exit_level, trailing_stop.current_stop)
+            self.short_exits.set(position.id, exit_level)
+            if active:
+                self.short_watch.set(position.id, trailing_stop.highest_price)
+            elif trailing_stop is not None:
+                self.short_watch.set(position.id, position.entry_price * (1 - activation_pct / 100))
+    def remove(self, position_id: str):
+        """Drop a position from every index."""
+        for index in (self.long_exits, self.long_watch, self.short_exits, self.short_watch):
+            index.discard(position_id)
+    def touched(self, price: float) -> List[str]:
+        """Positions whose exit or watch level the price has reached"""
+        touched = self.long_exits.crossed(price) + self.short_exits.crossed(price)
+        touched += self.long_watch.crossed(price) + self.short_watch.crossed(price)
+        return list(dict.fromkeys(touched))
 class MarketRegimeDetector:
     def __init__(self):
         """TODO: Add function documentation"""
@@ -11674,9 +11986,15 @@ class DynamicStopLossCalculator:
             side = position.side
             confidence = position.confidence
             prices = market_data.get('prices', [])
-            atr = self.volatility_calc.calculate_atr(prices, self.config.atr_periods)
-            volatility_score = self.volatility_calc.calculate_volatility_score(prices)
-            market_regime = self.regime_detector.detect_regime(prices, symbol)
+            state = market_data.get('state')
+            if state is not None and not prices:
+                atr = state.atr_pct()
+                volatility_score = state.volatility_score()
+                market_regime = state.regime
+            else:
+                atr = self.volatility_calc.calculate_atr(prices, self.config.atr_periods)
+                volatility_score = self.volatility_calc.calculate_volatility_score(prices)
+                market_regime = self.regime_detector.detect_regime(prices, symbol)
             base_stop = self.config.base_stop_pct / 100
             volatility_adjustment = atr * self.config.volatility_multiplier
             confidence_adjustment = (1.0 - confidence) * self.config.confidence_factor / 100
@@ -11748,8 +12066,8 @@ class DynamicStopLossCalculator:
                 return factor
         return strategy_factors['default']
     def _generate_stop_reasoning(self, total_distance: float, vol_adj: float, conf_adj: float,
-        """TODO: Add function documentation"""
                                 regime_factor: float, strategy_factor: float, regime: MarketRegime) -> str:
+        """Human-readable breakdown of the stop distance adjustments."""
         reasons = []
         reasons.append(f"Base stop: {total_distance*100:.2f}%")
         if vol_adj > 0.005:  # > 0.5%
@@ -11764,8 +12082,8 @@ class DynamicStopLossCalculator:
             reasons.append(f"Strategy adjustment: {direction} ({strategy_factor:.1f}x)")
         return "; ".join(reasons)
     def _calculate_stop_confidence(self, stop_distance: float, volatility: float, 
-        """TODO: Add function documentation"""
                                   position_confidence: float, regime: MarketRegime) -> float:
+        """Confidence in a stop from its distance, the volatility and the regime."""
         try:
             base_confidence = position_confidence
             optimal_distance = 0.02  # 2% is considered optimal
@@ -11924,10 +12242,16 @@ class DynamicStopLossEngine:
         self.stop_calculator = DynamicStopLossCalculator()
         self.trailing_manager = TrailingStopManager()
         self.positions = {}
+        self.market_states = {}
+        self.stop_books = {}
         self.monitoring_thread = None
         self.running = False
+        self._lock = threading.RLock()
+        self._journal = deque()
+        self._stop_event = threading.Event()
         self.config = {
-            'monitoring_interval_seconds': 15,
+            'journal_flush_seconds': 1.0,          # Stop history/trigger journal flush interval
+            'bar_seconds': 60,                     # Tick aggregation for incremental ATR/regime
             'stop_adjustment_threshold_pct': 0.1,  # Minimum change to adjust stop
             'emergency_stop_loss_pct': 10.0,       # Emergency stop at 10% loss
             'max_positions': 100
@@ -11979,9 +12303,13 @@ class DynamicStopLossEngine:
     def add_position(self, position: Position, market_data: Dict) -> Dict:
         """TODO: Add function documentation"""
         try:
+            if not market_data.get('prices'):
+                market_data = dict(market_data, state=self._market_state(position.symbol))
             stop_level = self.stop_calculator.calculate_stop_loss(position, market_data)
-            trailing_stop = self.trailing_manager.initialize_trailing_stop(position, stop_level.stop_price)
-            self.positions[position.id] = position
+            with self._lock:
+                trailing_stop = self.trailing_manager.initialize_trailing_stop(position, stop_level.stop_price)
+                self.positions[position.id] = position
+                self._reindex(position, trailing_stop)
             self._save_stop_level(position.id, stop_level)
             if not self.running:
                 self.start_monitoring()
@@ -12001,38 +12329,101 @@ class DynamicStopLossEngine:
     def update_position(self, position_id: str, current_price: float, market_data: Dict) -> Dict:
         """TODO: Add function documentation"""
         try:
-            if position_id not in self.positions:
-                return {'success': False, 'error': 'Position not found'}
-            position = self.positions[position_id]
-            position.current_price = current_price
-            if position.side == 'BUY':
-                position.unrealized_pnl = (current_price - position.entry_price) * position.quantity
-                position.unrealized_pnl_pct = (current_price - position.entry_price) / position.entry_price * 100
-            else:
-                position.unrealized_pnl = (position.entry_price - current_price) * position.quantity
-                position.unrealized_pnl_pct = (position.entry_price - current_price) / position.entry_price * 100
-            position.last_updated = datetime.now()
-            trailing_stop = self.trailing_manager.update_trailing_stop(position, market_data)
-            should_exit, exit_reason = self.trailing_manager.should_exit_position(position)
-            if position.unrealized_pnl_pct < -self.config['emergency_stop_loss_pct']:
-                should_exit = True
-                exit_reason = f"Emergency stop: {position.unrealized_pnl_pct:.2f}% loss"
-            result = {
-                'success': True,
-                'position_id': position_id,
-                'current_price': current_price,
-                'unrealized_pnl': position.unrealized_pnl,
-                'unrealized_pnl_pct': position.unrealized_pnl_pct,
-                'should_exit': should_exit,
-                'exit_reason': exit_reason,
-                'trailing_stop_info': self.trailing_manager.get_trailing_stop_info(position_id)
-            }
-            if should_exit:
-                self._trigger_stop_loss(position, exit_reason, trailing_stop)
-            return result
+            with self._lock:
+                if position_id not in self.positions:
+                    return {'success': False, 'error': 'Position not found'}
+                return self._evaluate_position(self.positions[position_id], current_price, market_data)
         except Exception as e:
             logger.error(f"Error updating position: {e}")
             return {'success': False, 'error': str(e)}
+    def on_tick(self, symbol: str, price: float, timestamp: Optional[float] = None) -> List[Dict]:
+        """
+        Evaluate one tick. Only positions whose exit or watch level the price has
+        crossed are touched, so stops fire on the tick that crosses them.
+        """
+        try:
+            with self._lock:
+                state = self._market_state(symbol)
+                state.on_tick(price, timestamp if timestamp is not None else time.time())
+                book = self.stop_books.get(symbol)
+                if not book:
+                    return []
+                market_data = {'state': state}
+                exits = []
+                for position_id in book.touched(price):
+                    position = self.positions.get(position_id)
+                    if position is None:
+                        book.remove(position_id)
+                        continue
+                    result = self._evaluate_position(position, price, market_data)
+                    if result.get('should_exit'):
+                        exits.append(result)
+                return exits
+        except Exception as e:
+            logger.error(f"Error processing tick for {symbol}: {e}")
+            return []
+    def subscribe(self, feed):
+        """Subscribe to a tick feed exposing on_ticker(callback), e.g. ExchangeStreamManager"""
+        feed.on_ticker(self._on_ticker_event)
+        logger.info("📡 Dynamic stop loss engine subscribed to ticker stream")
+    def _on_ticker_event(self, event: Dict):
+        """Adapt a stream ticker event to on_tick (event timestamps are in ms)."""
+        timestamp = event.get('timestamp')
+        self.on_tick(event['symbol'], event['last'], timestamp / 1000 if timestamp else None)
+    def _market_state(self, symbol: str) -> SymbolMarketState:
+        """Market state for a symbol, created on first tick."""
+        state = self.market_states.get(symbol)
+        if state is None:
+            state = self.market_states[symbol] = SymbolMarketState(
+                symbol, self.config['bar_seconds'], self.stop_calculator.config.atr_periods
+            )
+        return state
+    def _reindex(self, position: Position, trailing_stop: Optional[TrailingStop]):
+        """Put a position back in its symbol stop book at its current levels."""
+        book = self.stop_books.get(position.symbol)
+        if book is None:
+            book = self.stop_books[position.symbol] = SymbolStopBook()
+        book.index(position, trailing_stop, self.trailing_manager.config.trailing_activation_pct,
+                   self.config['emergency_stop_loss_pct'])
+    def _mark_position(self, position: Position, current_price: float):
+        """Mark a position to current_price and update its unrealized PnL."""
+        position.current_price = current_price
+        if position.side == 'BUY':
+            position.unrealized_pnl = (current_price - position.entry_price) * position.quantity
+            position.unrealized_pnl_pct = (current_price - position.entry_price) / position.entry_price * 100
+        else:
+            position.unrealized_pnl = (position.entry_price - current_price) * position.quantity
+            position.unrealized_pnl_pct = (position.entry_price - current_price) / position.entry_price * 100
+        position.last_updated = datetime.now()
+    def _evaluate_position(self, position: Position, current_price: float, market_data: Dict) -> Dict:
+        """Re-mark one position, update its trailing stop and exit it if a stop is hit."""
+        position_id = position.id
+        self._mark_position(position, current_price)
+        previous = self.trailing_manager.trailing_stops.get(position_id)
+        previous_stop = (previous.current_stop, previous.is_active) if previous else None
+        trailing_stop = self.trailing_manager.update_trailing_stop(position, market_data)
+        should_exit, exit_reason = self.trailing_manager.should_exit_position(position)
+        if position.unrealized_pnl_pct < -self.config['emergency_stop_loss_pct']:
+            should_exit = True
+            exit_reason = f"Emergency stop: {position.unrealized_pnl_pct:.2f}% loss"
+        trailing_info = self.trailing_manager.get_trailing_stop_info(position_id)
+        result = {
+            'success': True,
+            'position_id': position_id,
+            'current_price': current_price,
+            'unrealized_pnl': position.unrealized_pnl,
+            'unrealized_pnl_pct': position.unrealized_pnl_pct,
+            'should_exit': should_exit,
+            'exit_reason': exit_reason,
+            'trailing_stop_info': trailing_info
+        }
+        if should_exit:
+            self._trigger_stop_loss(position, exit_reason, trailing_stop)
+        else:
+            self._reindex(position, trailing_stop)
+            if trailing_info and trailing_info['is_active'] and previous_stop != (trailing_stop.current_stop, True):
+                self._log_trailing_history(position_id, trailing_info, position.unrealized_pnl_pct)
+        return result
     def _save_stop_level(self, position_id: str, stop_level: StopLossLevel):
         """TODO: Add function documentation"""
         try:
@@ -12056,22 +12447,17 @@ class DynamicStopLossEngine:
         try:
             trigger_type = 'TRAILING' if trailing_stop and trailing_stop.is_active else 'FIXED'
             max_profit = trailing_stop.highest_profit if trailing_stop else 0.0
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO stop_loss_triggers (
-                    position_id, trigger_price, trigger_type, profit_at_trigger, max_profit_achieved
-                ) VALUES (?, ?, ?, ?, ?)
+            self._journal.append(('trigger', (
                 position.id, position.current_price, trigger_type,
-                position.unrealized_pnl_pct, max_profit
-            ))
-            conn.commit()
-            conn.close()
+                position.unrealized_pnl_pct, max_profit, datetime.now().isoformat()
+            )))
             logger.info(f"🛑 Stop loss triggered for {position.id}: {reason}")
             if position.id in self.positions:
                 del self.positions[position.id]
             if position.id in self.trailing_manager.trailing_stops:
                 del self.trailing_manager.trailing_stops[position.id]
+            if position.symbol in self.stop_books:
+                self.stop_books[position.symbol].remove(position.id)
         except Exception as e:
             logger.error(f"Error triggering stop loss: {e}")
     def start_monitoring(self):
@@ -12079,52 +12465,71 @@ class DynamicStopLossEngine:
         if self.running:
             return
         self.running = True
+        self._stop_event.clear()
         self.monitoring_thread = threading.Thread(target=self._monitor_positions, daemon=True)
         self.monitoring_thread.start()
         logger.info("🔍 Dynamic stop loss monitoring started")
     def stop_monitoring(self):
         """TODO: Add function documentation"""
         self.running = False
+        self._stop_event.set()
         if self.monitoring_thread:
             self.monitoring_thread.join()
+        self._flush_journal()
         logger.info("⏹️ Dynamic stop loss monitoring stopped")
     def _monitor_positions(self):
-        """TODO: Add function documentation"""
+        """Stops are evaluated on ticks (on_tick); this thread only flushes the stop journal"""
         while self.running:
             try:
-                for position_id, position in list(self.positions.items()):
-                    market_data = {'prices': []}  # Placeholder
-                    trailing_info = self.trailing_manager.get_trailing_stop_info(position_id)
-                    if trailing_info and trailing_info['is_active']:
-                        self._log_trailing_history(position_id, trailing_info, position.unrealized_pnl_pct)
-                time.sleep(self.config['monitoring_interval_seconds'])
+                self._stop_event.wait(self.config['journal_flush_seconds'])
+                self._flush_journal()
             except Exception as e:
                 logger.error(f"Error in stop loss monitoring: {e}")
                 time.sleep(10)
     def _log_trailing_history(self, position_id: str, trailing_info: Dict, profit_pct: float):
         """TODO: Add function documentation"""
+        self._journal.append(('history', (
+            position_id, datetime.now().isoformat(), trailing_info['current_stop'],
+            trailing_info['trailing_distance_pct'], profit_pct, trailing_info['profit_zone'],
+            trailing_info['is_active'], 'Automatic adjustment'
+        )))
+    def _flush_journal(self):
+        """Write queued history and trigger rows in one transaction"""
+        history, triggers = [], []
+        while self._journal:
+            kind, row = self._journal.popleft()
+            (history if kind == 'history' else triggers).append(row)
+        if not history and not triggers:
+            return
         try:
             conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO trailing_stop_history (
-                    position_id, stop_price, trailing_distance_pct, profit_pct,
-                    profit_zone, is_active, adjustment_reason
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                position_id, trailing_info['current_stop'], trailing_info['trailing_distance_pct'],
-                profit_pct, trailing_info['profit_zone'], trailing_info['is_active'],
-                'Automatic adjustment'
-            ))
-            conn.commit()
-            conn.close()
+            try:
+                with conn:
+                    conn.executemany('''
+                        INSERT INTO trailing_stop_history (
+                            position_id, timestamp, stop_price, trailing_distance_pct, profit_pct,
+                            profit_zone, is_active, adjustment_reason
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', history)
+                    conn.executemany('''
+                        INSERT INTO stop_loss_triggers (
+                            position_id, trigger_price, trigger_type, profit_at_trigger,
+                            max_profit_achieved, trigger_time
+                        ) VALUES (?, ?, ?, ?, ?, ?)
+                    ''', triggers)
+            finally:
+                conn.close()
         except Exception as e:
-            logger.error(f"Error logging trailing history: {e}")
+            logger.error(f"Error flushing stop journal: {e}")
     def get_position_stops(self, position_id: str) -> Optional[Dict]:
         """TODO: Add function documentation"""
         try:
             if position_id not in self.positions:
                 return None
             position = self.positions[position_id]
+            state = self.market_states.get(position.symbol)
+            if state is not None and state.last_price is not None and state.last_price != position.current_price:
+                self._mark_position(position, state.last_price)
             trailing_info = self.trailing_manager.get_trailing_stop_info(position_id)
             return {
                 'position_id': position_id,
@@ -19464,9 +19869,208 @@ LYRA ULTIMATE COMPLETE TRADING SYSTEM
 Everything included - AI, Fee Optimization, Multi-Exchange, Monitoring, Diagnostics
 Version: ULTIMATE_COMPLETE_V11.0
 from flask import Flask, jsonify, request
+from types import MappingProxyType
 import psutil
 import schedule
         logging.FileHandler('/home/ubuntu/lyra_complete_system.log'),
+@dataclass(frozen=True)
+class PortfolioSnapshot:
+    """Immutable marked-to-market portfolio view; consumers share one instance per version"""
+    version: int
+    balances_refreshed_at: float   # time.monotonic() of the balance data
+    marked_at: datetime
+    total_value_usd: float
+    balances: MappingProxyType     # currency -> {'total', 'value_usd', 'exchanges'}
+    exchange_count: int
+    errors: Tuple[str, ...] = ()
+    unpriced: Tuple[str, ...] = ()  # held currencies with no cached price, valued at 0
+    def age(self) -> float:
+        """Seconds since the balances behind this snapshot were refreshed"""
+        return time.monotonic() - self.balances_refreshed_at
+    def to_dict(self) -> Dict:
+        """Plain dict in the get_complete_portfolio_data shape (safe to mutate/serialize)"""
+        return {
+            'total_value_usd': self.total_value_usd,
+            'balances': {
+                currency: {
+                    'total': entry['total'],
+                    'value_usd': entry['value_usd'],
+                    'exchanges': [dict(e) for e in entry['exchanges']]
+                }
+                for currency, entry in self.balances.items()
+            },
+            'exchange_count': self.exchange_count,
+            'unpriced_currencies': list(self.unpriced),
+            'snapshot_version': self.version,
+            'snapshot_age_seconds': round(self.age(), 3),
+            'timestamp': self.marked_at.isoformat()
+        }
+class PortfolioStateService:
+    """
+    Single owner of exchange balances for the trading loop, monitoring and dashboard.
+    Balances come from one periodic reconcile (or streamed balance updates), are marked
+    to market from the local price cache, and are published as versioned immutable
+    snapshots. snapshot(max_age) returns the shared snapshot, refreshing at most once
+    across concurrent callers when it is older than max_age.
+    """
+    STABLECOINS = ('USDT', 'USDC', 'USD')
+    def __init__(self, exchanges: Dict, refresh_interval: float = 60.0):
+        """Balances are reconciled from the exchanges every refresh_interval seconds."""
+        self.exchanges = exchanges
+        self.refresh_interval = refresh_interval
+        self.balances_by_exchange: Dict[str, Dict[str, float]] = {}
+        self.prices: Dict[str, float] = {currency: 1.0 for currency in self.STABLECOINS}
+        self.balance_calls = 0
+        self.running = False
+        self._errors: Tuple[str, ...] = ()
+        self._balances_refreshed_at = 0.0
+        self._prices_version = 0
+        self._marked_prices_version = -1
+        self._version = 0
+        self._snapshot: Optional[PortfolioSnapshot] = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.RLock()
+        self._wake = threading.Event()
+        self._thread = None
+    def start(self):
+        """Start the background reconcile stream"""
+        if self.running:
+            return
+        self.running = True
+        self._wake.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, daemon=True)
+        self._thread.start()
+        logging.info(f"💼 Portfolio state service started ({self.refresh_interval:.0f}s reconcile)")
+    def stop(self):
+        """Stop the refresh thread and wait for it to exit."""
+        self.running = False
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+    def _refresh_loop(self):
+        """Background reconcile loop; wakes early when a refresh is requested."""
+        while self.running:
+            try:
+                if time.monotonic() - self._balances_refreshed_at >= self.refresh_interval * 0.9:
+                    self.refresh_balances()
+            except Exception as e:
+                logging.error(f"❌ Portfolio refresh error: {e}")
+            self._wake.wait(self.refresh_interval)
+    def refresh_balances(self):
+        """Reconcile balances from every exchange in parallel and publish a new snapshot"""
+        with self._refresh_lock:
+            balances, errors = {}, []
+            exchanges = list(self.exchanges.items())
+            if exchanges:
+                with ThreadPoolExecutor(max_workers=len(exchanges)) as pool:
+                    futures = {pool.submit(exchange.fetch_balance): name for name, exchange in exchanges}
+                    for future in as_completed(futures):
+                        name = futures[future]
+                        try:
+                            totals = future.result().get('total', {})
+                            balances[name] = {c: float(a) for c, a in totals.items() if a and a > 0}
+                        except Exception as e:
+                            errors.append(f"{name}: {e}")
+                            logging.warning(f"⚠️ Portfolio data error for {name}: {e}")
+                            if name in self.balances_by_exchange:
+                                balances[name] = self.balances_by_exchange[name]  # keep last known
+            self._price_missing(balances)
+            with self._lock:
+                self.balance_calls += len(exchanges)
+                self.balances_by_exchange = balances
+                self._errors = tuple(errors)
+                self._balances_refreshed_at = time.monotonic()
+                return self._publish()
+    def _price_missing(self, balances: Dict[str, Dict[str, float]]):
+        """Fetch a USDT ticker for held currencies the price cache has not seen yet"""
+        for exchange_name, exchange_balances in balances.items():
+            exchange = self.exchanges.get(exchange_name)
+            for currency in exchange_balances:
+                if exchange is None or currency in self.prices:
+                    continue
+                symbol = f"{currency}/USDT"
+                try:
+                    self.on_ticker(dict(exchange.fetch_ticker(symbol), symbol=symbol))
+                except Exception as e:
+                    logging.warning(f"⚠️ No {symbol} price on {exchange_name}: {e}")
+    def apply_balance_update(self, exchange_name: str, currency: str, total: float):
+        """Streamed balance change (e.g. from a private account channel)"""
+        with self._lock:
+            exchange_balances = dict(self.balances_by_exchange.get(exchange_name, {}))
+            if total and total > 0:
+                exchange_balances[currency] = float(total)
+            else:
+                exchange_balances.pop(currency, None)
+            self.balances_by_exchange = dict(self.balances_by_exchange, **{exchange_name: exchange_balances})
+            self._publish()
+    def update_price(self, currency: str, price_usd: float):
+        """Update the local mark price; the next snapshot() read re-marks lazily"""
+        if price_usd and price_usd > 0 and self.prices.get(currency) != price_usd:
+            self.prices[currency] = price_usd
+            self._prices_version += 1
+    def on_ticker(self, event: Dict):
+        """Ticker callback (ExchangeStreamManager.on_ticker) feeding the price cache"""
+        symbol = event.get('symbol', '')
+        for separator in ('/', '-', '_'):
+            if separator in symbol:
+                base, quote = symbol.split(separator, 1)
+                break
+        else:
+            quote = next((q for q in self.STABLECOINS if symbol.endswith(q)), None)
+            if quote is None:
+                return
+            base = symbol[:-len(quote)]
+        if quote in self.STABLECOINS and base not in self.STABLECOINS:
+            self.update_price(base, event.get('last'))
+    def _publish(self) -> PortfolioSnapshot:
+        """Mark current balances to market and swap in a new snapshot (caller holds _lock)"""
+        prices_version = self._prices_version
+        totals: Dict[str, float] = {}
+        holders: Dict[str, List] = {}
+        for exchange_name, exchange_balances in self.balances_by_exchange.items():
+            for currency, amount in exchange_balances.items():
+                totals[currency] = totals.get(currency, 0.0) + amount
+                holders.setdefault(currency, []).append(MappingProxyType({'exchange': exchange_name, 'amount': amount}))
+        balances = {}
+        total_value = 0.0
+        unpriced = []
+        for currency, amount in totals.items():
+            price = self.prices.get(currency)
+            if price is None:
+                unpriced.append(currency)
+            value = amount * price if price is not None else 0.0
+            total_value += value
+            balances[currency] = MappingProxyType({
+                'total': amount, 'value_usd': value, 'exchanges': tuple(holders[currency])
+            })
+        self._version += 1
+        self._marked_prices_version = prices_version
+        self._snapshot = PortfolioSnapshot(
+            version=self._version,
+            balances_refreshed_at=self._balances_refreshed_at,
+            marked_at=datetime.now(),
+            total_value_usd=total_value,
+            balances=MappingProxyType(balances),
+            exchange_count=len(self.exchanges),
+            errors=self._errors,
+            unpriced=tuple(unpriced)
+        )
+        return self._snapshot
+    def snapshot(self, max_age: Optional[float] = None) -> PortfolioSnapshot:
+        """Latest snapshot whose balances are no older than max_age seconds (default: refresh_interval * 2)"""
+        max_age = self.refresh_interval * 2 if max_age is None else max_age
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.age() > max_age:
+            with self._refresh_lock:
+                snapshot = self._snapshot
+                if snapshot is None or snapshot.age() > max_age:
+                    return self.refresh_balances()
+        if self._marked_prices_version != self._prices_version:
+            with self._lock:
+                if self._marked_prices_version != self._prices_version:
+                    self._publish()
+                snapshot = self._snapshot
+        return snapshot
 class LyraUltimateCompleteSystem:
         self.version = "LYRA_ULTIMATE_COMPLETE_V11.0"
         self.exchanges = {}
@@ -19716,7 +20320,10 @@ class LyraUltimateCompleteSystem:
                 'target_stablecoin_ratio': 0.30,
                 'max_position_size': 2000,
                 'risk_percentage': 3.0,
-                'last_rebalance': datetime.now()
+                'last_rebalance': datetime.now(),
+                'snapshot_max_age': 60
+            }
+            self.portfolio_state = PortfolioStateService(self.exchanges, refresh_interval=30)
             logging.info("💼 Portfolio management system initialized")
             logging.error(f"❌ Portfolio manager initialization error: {e}")
     def initialize_risk_manager(self):
@@ -19833,17 +20440,11 @@ class LyraUltimateCompleteSystem:
             logging.error(f"❌ Fee caching error: {e}")
     def get_portfolio_value(self):
         """TODO: Add function documentation"""
-            total_value = 0
-            for exchange_name, exchange in self.exchanges.items():
-                    balance = exchange.fetch_balance()
-                    for currency, amount in balance['total'].items():
-                        if amount > 0:
-                            if currency in ['USDT', 'USDC', 'USD']:
-                                total_value += amount
-                                total_value += amount * 100  # Placeholder
-                    logging.warning(f"⚠️ Portfolio value error for {exchange_name}: {e}")
-            return total_value
+        try:
+            return self.portfolio_state.snapshot(max_age=self.portfolio_manager['snapshot_max_age']).total_value_usd
+        except Exception as e:
             logging.error(f"❌ Portfolio value calculation error: {e}")
+            return 0
     def has_token_discount(self, exchange_name, token):
         """TODO: Add function documentation"""
             balance = self.get_token_balance(exchange_name, token)
@@ -19851,11 +20452,12 @@ class LyraUltimateCompleteSystem:
             logging.error(f"❌ Token discount check error: {e}")
     def get_token_balance(self, exchange_name, token):
         """TODO: Add function documentation"""
-            if exchange_name in self.exchanges:
-                exchange = self.exchanges[exchange_name]
-                balance = exchange.fetch_balance()
-                return balance['total'].get(token, 0)
+        try:
+            self.portfolio_state.snapshot(max_age=self.portfolio_manager['snapshot_max_age'])
+            return self.portfolio_state.balances_by_exchange.get(exchange_name, {}).get(token, 0)
+        except Exception as e:
             logging.error(f"❌ Token balance error: {e}")
+            return 0
     def YOUR_API_KEY_HERE(self, buy_exchange, sell_exchange, symbol, spread_bps):
         """TODO: Add function documentation"""
             buy_fees = self.get_effective_fees(buy_exchange, symbol)
@@ -20015,36 +20617,27 @@ class LyraUltimateCompleteSystem:
             if not self.live_mode or self.simulation_mode:
                 return jsonify({'error': 'Live trading not enabled'}), 400
             return jsonify({'status': 'sell order received'})
+    def get_portfolio_snapshot(self) -> PortfolioSnapshot:
+        """Shared portfolio snapshot, no older than portfolio_manager['snapshot_max_age']"""
+        snapshot = self.portfolio_state.snapshot(max_age=self.portfolio_manager['snapshot_max_age'])
+        self.performance_metrics['portfolio_value'] = snapshot.total_value_usd
+        self.performance_metrics['last_update'] = snapshot.marked_at
+        return snapshot
     def get_complete_portfolio_data(self):
         """TODO: Add function documentation"""
-            total_value = 0
-            balances = {}
-            exchange_count = len(self.exchanges)
-            for exchange_name, exchange in self.exchanges.items():
-                    balance = exchange.fetch_balance()
-                    for currency, data in balance['total'].items():
-                        if data > 0:
-                            if currency not in balances:
-                                balances[currency] = {'total': 0, 'exchanges': []}
-                            balances[currency]['total'] += data
-                            balances[currency]['exchanges'].append({
-                                'exchange': exchange_name,
-                                'amount': data
-                            if currency in ['USDT', 'USDC', 'USD']:
-                                total_value += data
-                                total_value += data * 100  # Placeholder
-                    logging.warning(f"⚠️ Portfolio data error for {exchange_name}: {e}")
-            self.performance_metrics['portfolio_value'] = total_value
-            self.performance_metrics['last_update'] = datetime.now()
-                'total_value_usd': total_value,
-                'balances': balances,
-                'exchange_count': exchange_count,
-                'live_trading': self.live_mode and not self.simulation_mode,
-                'simulation_mode': self.simulation_mode,
+        try:
+            portfolio_data = self.get_portfolio_snapshot().to_dict()
+            portfolio_data['live_trading'] = self.live_mode and not self.simulation_mode
+            portfolio_data['simulation_mode'] = self.simulation_mode
+            return portfolio_data
+        except Exception as e:
             logging.error(f"❌ Portfolio data error: {e}")
+            return {
                 'total_value_usd': 0,
                 'balances': {},
                 'exchange_count': 0,
+                'error': str(e)
+            }
     def scan_arbitrage_opportunities(self):
         """TODO: Add function documentation"""
             opportunities = []
@@ -20053,6 +20646,7 @@ class LyraUltimateCompleteSystem:
                 prices = {}
                 for exchange_name, exchange in self.exchanges.items():
                         ticker = exchange.fetch_ticker(symbol)
+                        self.portfolio_state.on_ticker(dict(ticker, symbol=symbol))
                         prices[exchange_name] = {
                             'bid': ticker['bid'],
                             'ask': ticker['ask']
@@ -20329,14 +20923,15 @@ class LyraUltimateCompleteSystem:
                         for opportunity in opportunities['opportunities']:
                             if opportunity['is_profitable']:
                                 logging.info(f"⚡ Executing arbitrage: {opportunity['buy_exchange']}→{opportunity['sell_exchange']}")
-                    self.check_portfolio_rebalancing()
-                    self.check_profit_crystallization()
+                    snapshot = self.get_portfolio_snapshot()
+                    self.check_portfolio_rebalancing(snapshot)
+                    self.check_profit_crystallization(snapshot)
                 logging.error(f"❌ Trading loop error: {e}")
-    def check_portfolio_rebalancing(self):
+    def check_portfolio_rebalancing(self, snapshot: Optional[PortfolioSnapshot] = None):
         """TODO: Add function documentation"""
-            portfolio_data = self.get_complete_portfolio_data()
-            total_value = portfolio_data.get('total_value_usd', 0)
-            balances = portfolio_data.get('balances', {})
+            snapshot = snapshot or self.get_portfolio_snapshot()
+            total_value = snapshot.total_value_usd
+            balances = snapshot.balances
             stablecoin_value = 0
             for currency in ['USDT', 'USDC', 'USD']:
                 if currency in balances:
@@ -20346,10 +20941,10 @@ class LyraUltimateCompleteSystem:
             if abs(current_ratio - target_ratio) > self.portfolio_manager['target_stablecoin_ratio']:
                 logging.info(f"🔄 Portfolio rebalancing needed: {current_ratio:.1%} vs {target_ratio:.1%}")
             logging.error(f"❌ Portfolio rebalancing check error: {e}")
-    def check_profit_crystallization(self):
+    def check_profit_crystallization(self, snapshot: Optional[PortfolioSnapshot] = None):
         """TODO: Add function documentation"""
-            portfolio_data = self.get_complete_portfolio_data()
-            total_value = portfolio_data.get('total_value_usd', 0)
+            snapshot = snapshot or self.get_portfolio_snapshot()
+            total_value = snapshot.total_value_usd
             initial_value = 4120  # Assuming initial value
             profit = total_value - initial_value
             profit_percent = (profit / initial_value) * 100 if initial_value > 0 else 0
@@ -20369,6 +20964,7 @@ class LyraUltimateCompleteSystem:
             threading.Thread(target=self.ai_optimization_loop, daemon=True),
             threading.Thread(target=self.monitoring_loop, daemon=True),
             threading.Thread(target=self.trading_loop, daemon=True)
+        self.portfolio_state.start()
         logging.info("✅ All background systems started")
             self.app.run(host='0.0.0.0', port=9999, debug=False, threaded=True)
         except KeyboardInterrupt:
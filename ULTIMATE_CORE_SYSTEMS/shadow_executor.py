@@ -13,18 +13,21 @@ Features:
 - Parity rate calculation
 - Statistical validation
 - Comprehensive logging
+- Batch parity mode for 100% of live flow (streaming join, columnar diff)
 """
 
 import asyncio
 import json
 import time
 import logging
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Union
+from typing import Callable, Dict, List, Optional, Any, Union, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
 import hashlib
 import statistics
+import numpy as np
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -245,7 +248,7 @@ class ShadowOrderGenerator:
             order_type=order_type,
             post_only=post_only,
             time_in_force="GTC",
-            client_order_id=f"shadow_{intent.id}_{int(time.time())}",
+            client_order_id=self.client_order_id(intent.id, "shadow", 0),
             timestamp=datetime.utcnow().isoformat(),
             intent_id=intent.id,
             shadow_id=self._generate_shadow_id(intent)
@@ -279,7 +282,7 @@ class ShadowOrderGenerator:
                 order_type="LIMIT",
                 post_only=True,
                 time_in_force="GTC",
-                client_order_id=f"twap_{intent.id}_{i}_{int(time.time())}",
+                client_order_id=self.client_order_id(intent.id, "twap", i),
                 timestamp=datetime.utcnow().isoformat(),
                 intent_id=intent.id,
                 shadow_id=f"{self._generate_shadow_id(intent)}_twap_{i}"
@@ -315,7 +318,7 @@ class ShadowOrderGenerator:
                 order_type="LIMIT",
                 post_only=True,
                 time_in_force="GTC",
-                client_order_id=f"vwap_{intent.id}_{i}_{int(time.time())}",
+                client_order_id=self.client_order_id(intent.id, "vwap", i),
                 timestamp=datetime.utcnow().isoformat(),
                 intent_id=intent.id,
                 shadow_id=f"{self._generate_shadow_id(intent)}_vwap_{i}"
@@ -344,7 +347,7 @@ class ShadowOrderGenerator:
             order_type="LIMIT",
             post_only=True,
             time_in_force="GTC",
-            client_order_id=f"iceberg_{intent.id}_{int(time.time())}",
+            client_order_id=self.client_order_id(intent.id, "iceberg", 0),
             timestamp=datetime.utcnow().isoformat(),
             intent_id=intent.id,
             shadow_id=f"{self._generate_shadow_id(intent)}_iceberg"
@@ -352,6 +355,11 @@ class ShadowOrderGenerator:
         
         return [shadow_order]
     
+    @staticmethod
+    def client_order_id(intent_id: str, algo: str, leg: int) -> str:
+        """Client order id of one leg; the execution engine reuses it so shadow and real legs join"""
+        return f"{algo}_{intent_id}_{leg}"
+    
     def _generate_shadow_id(self, intent: Intent) -> str:
         """Generate unique shadow ID"""
         data = f"{intent.id}_{intent.timestamp}_{intent.strategy}_{intent.symbol}"
@@ -456,13 +464,281 @@ class ShadowDiffEngine:
         
         return shadow_value == real_value
 
+class ParityDistribution:
+    """Fixed-memory rolling parity distribution for one venue/symbol/algo key"""
+    
+    def __init__(self, capacity: int = 1024, bins: int = 20):
+        """Keep the last capacity scores and a histogram of all scores over bins buckets"""
+        self.scores = np.zeros(capacity, dtype=np.float32)
+        self.capacity = capacity
+        self.position = 0
+        self.filled = 0
+        self.histogram = np.zeros(bins, dtype=np.int64)
+        self.total = 0
+        self.ok = 0
+        self.critical = 0
+    
+    def update(self, scores: np.ndarray, parity_ok: np.ndarray, critical: np.ndarray):
+        """Append a batch of parity scores"""
+        n = len(scores)
+        if n == 0:
+            return
+        tail = scores[-self.capacity:]
+        idx = (self.position + np.arange(len(tail))) % self.capacity
+        self.scores[idx] = tail
+        self.position = (self.position + len(tail)) % self.capacity
+        self.filled = min(self.capacity, self.filled + len(tail))
+        
+        bins = len(self.histogram)
+        self.histogram += np.bincount(np.minimum((scores * bins).astype(np.int64), bins - 1), minlength=bins)
+        self.total += n
+        self.ok += int(parity_ok.sum())
+        self.critical += int((critical > 0).sum())
+    
+    def summary(self) -> Dict[str, Any]:
+        """Summarize the rolling window and lifetime counters"""
+        window = self.scores[:self.filled]
+        if self.filled:
+            p05, p50 = np.percentile(window, [5, 50])
+            mean, low = float(window.mean()), float(window.min())
+        else:
+            p05 = p50 = mean = low = 0.0
+        return {
+            "count": self.total,
+            "window": self.filled,
+            "mean_parity": mean,
+            "p05_parity": float(p05),
+            "p50_parity": float(p50),
+            "min_parity": low,
+            "parity_ok_rate": self.ok / self.total if self.total else 0.0,
+            "critical_orders": self.critical,
+            "histogram": self.histogram.tolist()
+        }
+
+class ShadowParityEngine:
+    """
+    Batch parity mode for shadowing 100% of live flow.
+    
+    Shadow and real orders are joined by client_order_id as they stream in;
+    unmatched orders older than `window_seconds` are expired as orphans.
+    Matched pairs are compared a batch at a time, column by column, and
+    rolled into per (venue, symbol, algo) distributions. A batch is flushed
+    when it reaches `batch_size` or its oldest pair is `max_batch_age`
+    seconds old, whichever comes first; call poll() periodically so a quiet
+    stream is still evaluated. Full ParityResult diffs are only built for
+    pairs that violate parity.
+    """
+    
+    CATEGORICAL_FIELDS = ["venue", "symbol", "side", "order_type", "post_only", "time_in_force"]
+    
+    def __init__(self, diff_engine: ShadowDiffEngine, window_seconds: float = 30.0,
+                 batch_size: int = 512, max_violations: int = 1000, max_batch_age: float = 1.0):
+        """Join window, batch size/age limits and violation buffer size are in seconds/pairs."""
+        self.diff_engine = diff_engine
+        self.window_seconds = window_seconds
+        self.batch_size = batch_size
+        self.max_violations = max_violations
+        self.max_batch_age = max_batch_age
+        
+        # client_order_id -> (arrival time, order, algo), in arrival order
+        self.pending_shadow: "OrderedDict[str, Tuple[float, ShadowOrder, str]]" = OrderedDict()
+        self.pending_real: "OrderedDict[str, Tuple[float, RealOrder]]" = OrderedDict()
+        self.matched: List[Tuple[ShadowOrder, RealOrder, str]] = []
+        self._batch_started: Optional[float] = None  # arrival time of the oldest matched pair
+        
+        self.distributions: Dict[Tuple[str, str, str], ParityDistribution] = {}
+        self.violations: List[ParityResult] = []
+        self._batch_callbacks: List[Callable] = []
+        self.stats = {
+            "compared": 0,
+            "violations": 0,
+            "orphan_shadow": 0,
+            "orphan_real": 0
+        }
+    
+    def on_batch(self, callback: Callable):
+        """Register callback(batch, parity_scores, violations) for every evaluated batch"""
+        self._batch_callbacks.append(callback)
+    
+    def ingest_shadow(self, order: ShadowOrder, algo: Optional[str] = None, now: Optional[float] = None):
+        """Add a shadow order to the streaming join"""
+        now = time.monotonic() if now is None else now
+        algo = algo or self._infer_algo(order)
+        real = self.pending_real.pop(order.client_order_id, None)
+        if real is not None:
+            self._add_match(order, real[1], algo, now)
+        else:
+            self.pending_shadow[order.client_order_id] = (now, order, algo)
+        self.poll(now)
+    
+    def ingest_real(self, order: RealOrder, now: Optional[float] = None):
+        """Add a real order to the streaming join"""
+        now = time.monotonic() if now is None else now
+        shadow = self.pending_shadow.pop(order.client_order_id, None)
+        if shadow is not None:
+            self._add_match(shadow[1], order, shadow[2], now)
+        else:
+            self.pending_real[order.client_order_id] = (now, order)
+        self.poll(now)
+    
+    def _add_match(self, shadow: ShadowOrder, real: RealOrder, algo: str, now: float):
+        if not self.matched:
+            self._batch_started = now
+        self.matched.append((shadow, real, algo))
+        if len(self.matched) >= self.batch_size:
+            self.flush()
+    
+    def poll(self, now: Optional[float] = None) -> List[ParityResult]:
+        """Expire orphans and flush the batch if its deadline has passed; returns new violations"""
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        if self.matched and now - self._batch_started >= self.max_batch_age:
+            return self.flush()
+        return []
+    
+    def _expire(self, now: float):
+        """Drop unmatched orders that fell out of the join window"""
+        cutoff = now - self.window_seconds
+        for pending, key in ((self.pending_shadow, "orphan_shadow"), (self.pending_real, "orphan_real")):
+            while pending:
+                arrived = next(iter(pending.values()))[0]
+                if arrived >= cutoff:
+                    break
+                pending.popitem(last=False)
+                self.stats[key] += 1
+    
+    @staticmethod
+    def _infer_algo(order: ShadowOrder) -> str:
+        """Recover the execution algo from the generated shadow_id suffix"""
+        for algo in ("twap", "vwap", "iceberg"):
+            if f"_{algo}" in order.shadow_id:
+                return algo.upper()
+        return "SINGLE"
+    
+    def flush(self) -> List[ParityResult]:
+        """Compare all matched pairs column-wise and return new violations"""
+        if not self.matched:
+            return []
+        batch, self.matched = self.matched, []
+        self._batch_started = None
+        return list(self.evaluate(batch)[4].values())
+    
+    def evaluate(self, batch: List[Tuple[ShadowOrder, RealOrder, str]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[int, ParityResult]]:
+        """
+        Compare already-paired orders column-wise and fold them into the distributions.
+        
+        Returns per-pair parity scores, parity_ok, critical and warning counts,
+        and the materialized violations keyed by position in the batch.
+        """
+        shadows = [pair[0] for pair in batch]
+        reals = [pair[1] for pair in batch]
+        
+        critical, warning, matching = self._compare_columns(shadows, reals)
+        
+        important_fields = len(self.diff_engine.critical_fields) + len(self.diff_engine.warning_fields)
+        parity_scores = (matching / important_fields).astype(np.float32)
+        parity_ok = (critical == 0) & (warning <= 1)
+        
+        self._update_distributions(batch, parity_scores, parity_ok, critical)
+        self.stats["compared"] += len(batch)
+        
+        # Materialize full per-field diffs only for violations
+        new_violations = {
+            int(i): self.diff_engine.diff_shadow_vs_real(shadows[i], reals[i])
+            for i in np.flatnonzero(~parity_ok)
+        }
+        self.stats["violations"] += len(new_violations)
+        self.violations.extend(new_violations.values())
+        if len(self.violations) > self.max_violations:
+            self.violations = self.violations[-self.max_violations:]
+        for callback in self._batch_callbacks:
+            try:
+                callback(batch, parity_scores, new_violations)
+            except Exception as e:
+                logger.error(f"Parity batch callback error: {e}")
+        return parity_scores, parity_ok, critical, warning, new_violations
+    
+    def _compare_columns(self, shadows: List[ShadowOrder], reals: List[RealOrder]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Vectorized field comparison; returns critical, warning and matching counts per pair"""
+        n = len(shadows)
+        critical = np.zeros(n, dtype=np.int16)
+        warning = np.zeros(n, dtype=np.int16)
+        matching = np.zeros(n, dtype=np.int16)
+        
+        for field in self.CATEGORICAL_FIELDS:
+            shadow_col = np.array([getattr(o, field) for o in shadows], dtype=object)
+            real_col = np.array([getattr(o, field) for o in reals], dtype=object)
+            equal = shadow_col == real_col
+            self._tally(field, equal, critical, warning, matching)
+        
+        for field in ("qty", "price"):
+            shadow_col = np.array([np.nan if getattr(o, field) is None else getattr(o, field) for o in shadows], dtype=float)
+            real_col = np.array([np.nan if getattr(o, field) is None else getattr(o, field) for o in reals], dtype=float)
+            within = self._within_tolerance(shadow_col, real_col, self.diff_engine.tolerances.get(field, 0.0))
+            self._tally(field, within, critical, warning, matching)
+        
+        return critical, warning, matching
+    
+    def _tally(self, field: str, ok: np.ndarray, critical: np.ndarray, warning: np.ndarray, matching: np.ndarray):
+        if field in self.diff_engine.critical_fields:
+            critical += ~ok
+        elif field in self.diff_engine.warning_fields:
+            warning += ~ok
+        else:
+            return
+        matching += ok
+    
+    @staticmethod
+    def _within_tolerance(shadow: np.ndarray, real: np.ndarray, tolerance: float) -> np.ndarray:
+        """Array form of ShadowDiffEngine._check_tolerance"""
+        diff = np.abs(shadow - real)
+        scale = np.maximum(np.abs(shadow), np.abs(real))
+        one_zero = (shadow == 0) ^ (real == 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            relative = np.where(scale == 0, 0.0, diff / scale)
+        within = np.where(one_zero, diff <= tolerance, relative <= tolerance)
+        both_missing = np.isnan(shadow) & np.isnan(real)
+        return (within & ~np.isnan(diff)) | both_missing
+    
+    def _update_distributions(self, batch: List[Tuple[ShadowOrder, RealOrder, str]], parity_scores: np.ndarray,
+                              parity_ok: np.ndarray, critical: np.ndarray):
+        groups: Dict[Tuple[str, str, str], List[int]] = {}
+        for i, (shadow, _, algo) in enumerate(batch):
+            groups.setdefault((shadow.venue, shadow.symbol, algo), []).append(i)
+        for key, rows in groups.items():
+            if key not in self.distributions:
+                self.distributions[key] = ParityDistribution()
+            self.distributions[key].update(parity_scores[rows], parity_ok[rows], critical[rows])
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Join and comparison counters as they stand, without flushing or expiring anything"""
+        return dict(self.stats,
+                    pending_shadow=len(self.pending_shadow),
+                    pending_real=len(self.pending_real),
+                    matched_unflushed=len(self.matched))
+    
+    def get_parity_report(self) -> Dict[str, Any]:
+        """Rolling parity distributions per venue/symbol/algo (flushes the open batch first)"""
+        self.flush()
+        self._expire(time.monotonic())
+        return {
+            "statistics": self.get_statistics(),
+            "distributions": {
+                f"{venue}|{symbol}|{algo}": dist.summary()
+                for (venue, symbol, algo), dist in self.distributions.items()
+            }
+        }
+
 class ShadowExecutor:
     """Main Shadow Executor service"""
     
     def __init__(self):
-        """TODO: Add function documentation"""
+        """Wire the generator, the per-pair diff engine and the batch parity engine."""
         self.generator = ShadowOrderGenerator()
         self.diff_engine = ShadowDiffEngine()
+        self.parity_engine = ShadowParityEngine(self.diff_engine)
+        self.parity_engine.on_batch(self._on_parity_batch)
+        self._open_intents: Dict[str, List[ParityResult]] = {}  # intent_id -> results collected for its response
         self.execution_history = []
         self.parity_stats = {
             "total_mirrors": 0,
@@ -480,24 +756,23 @@ class ShadowExecutor:
             venue_hint = self._infer_venue_hint(request.intent)
             shadow_orders = self.generator.make_shadow_orders(request.intent, venue_hint)
             
-            # Compare with real orders
-            parity_results = []
-            critical_violations = 0
+            # Join shadow and real legs by client_order_id in the parity engine, which compares
+            # them column-wise and rolls them into the per venue/symbol/algo distributions
+            parity_results = self._open_intents[request.intent.id] = []
+            try:
+                for shadow_order in shadow_orders:
+                    self.parity_engine.ingest_shadow(shadow_order)
+                for real_order in request.real_orders:
+                    self.parity_engine.ingest_real(real_order)
+                self.parity_engine.flush()
+            finally:
+                self._open_intents.pop(request.intent.id, None)
+            critical_violations = sum(1 for r in parity_results if r.critical_mismatches > 0)
             
-            # Pair shadow and real orders
-            for i in range(min(len(shadow_orders), len(request.real_orders))):
-                shadow_order = shadow_orders[i]
-                real_order = request.real_orders[i]
-                
-                parity_result = self.diff_engine.diff_shadow_vs_real(shadow_order, real_order)
-                parity_results.append(parity_result)
-                
-                if parity_result.critical_mismatches > 0:
-                    critical_violations += 1
-            
-            # Handle count mismatches
-            if len(shadow_orders) != len(request.real_orders):
-                logger.warning(f"Order count mismatch: shadow={len(shadow_orders)}, real={len(request.real_orders)}")
+            # Legs that did not join stay pending until their counterpart arrives or they expire
+            if not (len(shadow_orders) == len(request.real_orders) == len(parity_results)):
+                logger.warning(f"Unpaired orders: shadow={len(shadow_orders)}, real={len(request.real_orders)}, "
+                               f"paired={len(parity_results)}")
                 critical_violations += 1
             
             # Calculate overall parity rate
@@ -539,6 +814,39 @@ class ShadowExecutor:
                 timestamp=datetime.utcnow().isoformat()
             )
     
+    def record_real_order(self, order: RealOrder):
+        """Feed a real order from the execution engine's order stream into the parity join"""
+        self.parity_engine.ingest_real(order)
+    
+    def _on_parity_batch(self, batch: List[Tuple[ShadowOrder, RealOrder, str]], parity_scores: np.ndarray,
+                         violations: Dict[int, ParityResult]):
+        """Collect per-pair results for intents whose mirror_intent call is still open"""
+        for i, (shadow_order, real_order, _) in enumerate(batch):
+            results = self._open_intents.get(shadow_order.intent_id)
+            if results is None:
+                continue
+            if i in violations:
+                results.append(violations[i])
+            elif parity_scores[i] < 1.0:
+                # Within parity but not a perfect match: keep the field diffs for the recommendations
+                results.append(self.diff_engine.diff_shadow_vs_real(shadow_order, real_order))
+            else:
+                results.append(ParityResult(
+                    shadow_order=shadow_order,
+                    real_order=real_order,
+                    diffs=[],
+                    parity_ok=True,
+                    parity_score=1.0,
+                    critical_mismatches=0,
+                    warning_mismatches=0
+                ))
+    
+    async def run_parity_flusher(self, interval: float = 1.0):
+        """Poll the batch parity engine so partial batches are evaluated on a quiet stream"""
+        while True:
+            self.parity_engine.poll()
+            await asyncio.sleep(interval)
+    
     def _infer_venue_hint(self, intent: Intent) -> str:
         """Infer venue from intent"""
         if intent.venue_hint:
@@ -640,7 +948,8 @@ class ShadowExecutor:
                 "critical_violations": self.parity_stats["critical_violations"],
                 "average_parity_rate": avg_parity,
                 "parity_range": [min_parity, max_parity],
-                "recent_executions": len(self.execution_history)
+                "recent_executions": len(self.execution_history),
+                "batch_parity": self.parity_engine.get_statistics()
             },
             "recommendations": {
                 "ready_for_promotion": success_rate > 95 and avg_parity > 0.95,
@@ -691,7 +1000,7 @@ async def run_shadow_executor_demo():
             order_type="LIMIT",
             post_only=True,
             time_in_force="GTC",
-            client_order_id="real_001_0",
+            client_order_id=ShadowOrderGenerator.client_order_id(sample_intent.id, "twap", 0),
             timestamp=datetime.utcnow().isoformat()
         ),
         RealOrder(
@@ -703,7 +1012,7 @@ async def run_shadow_executor_demo():
             order_type="LIMIT",
             post_only=True,
             time_in_force="GTC",
-            client_order_id="real_001_1",
+            client_order_id=ShadowOrderGenerator.client_order_id(sample_intent.id, "twap", 1),
             timestamp=datetime.utcnow().isoformat()
         ),
         RealOrder(
@@ -715,7 +1024,7 @@ async def run_shadow_executor_demo():
             order_type="LIMIT",
             post_only=True,
             time_in_force="GTC",
-            client_order_id="real_001_2",
+            client_order_id=ShadowOrderGenerator.client_order_id(sample_intent.id, "twap", 2),
             timestamp=datetime.utcnow().isoformat()
         ),
         RealOrder(
@@ -727,7 +1036,7 @@ async def run_shadow_executor_demo():
             order_type="LIMIT",
             post_only=True,
             time_in_force="GTC",
-            client_order_id="real_001_3",
+            client_order_id=ShadowOrderGenerator.client_order_id(sample_intent.id, "twap", 3),
             timestamp=datetime.utcnow().isoformat()
         )
     ]
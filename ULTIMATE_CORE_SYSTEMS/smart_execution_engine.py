@@ -26,6 +26,11 @@ from collections import defaultdict, deque
 import random
 import math
 
+try:
+    from .tracing import tracer, traced
+except ImportError:
+    from tracing import tracer, traced
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -109,7 +114,6 @@ class MarketData:
         self.last_update = {}
     
     def update_order_book(self, symbol: str, bids: List[Tuple[float, float]], 
-        """TODO: Add function documentation"""
                          asks: List[Tuple[float, float]]):
         """Update order book data"""
         self.order_books[symbol] = {
@@ -255,7 +259,6 @@ class TWAPExecutor:
         return min(base_slices, max_slices_by_duration)
     
     def _adjust_slice_size(self, plan: ExecutionPlan, base_size: float, 
-        """TODO: Add function documentation"""
                           slice_index: int, total_slices: int) -> float:
         """Adjust slice size based on market conditions"""
         # Start with base size
@@ -341,7 +344,6 @@ class VWAPExecutor:
         ]
     
     def _adjust_vwap_size(self, plan: ExecutionPlan, base_size: float, 
-        """TODO: Add function documentation"""
                          volume_weight: float) -> float:
         """Adjust VWAP slice size based on current market conditions"""
         adjusted_size = base_size
@@ -460,7 +462,6 @@ class IcebergExecutor:
         return round(limit_price, 8)
     
     def _adjust_visible_size(self, plan: ExecutionPlan, current_visible: float, 
-        """TODO: Add function documentation"""
                            order_count: int) -> float:
         """Adjust visible size based on execution progress"""
         # Gradually increase visible size as we progress
@@ -509,8 +510,8 @@ class SmartOrderRouter:
             }
         }
     
+    @traced("router.select_best_venue")
     def select_best_venue(self, symbol: str, side: str, size: float, 
-        """TODO: Add function documentation"""
                          urgency: str = "normal") -> str:
         """Select the best execution venue"""
         scores = {}
@@ -525,7 +526,6 @@ class SmartOrderRouter:
         return best_venue
     
     def _calculate_venue_score(self, exchange: str, config: Dict, symbol: str, 
-        """TODO: Add function documentation"""
                               side: str, size: float, urgency: str) -> float:
         """Calculate venue score based on multiple factors"""
         score = 0.0
@@ -598,22 +598,24 @@ class SmartExecutionEngine:
         first_order = child_orders[0]
         total_size = sum(order.get("size", 0) for order in child_orders)
         
-        # Auto-select algorithm if not specified
-        if algorithm == "auto":
-            algorithm = self._select_optimal_algorithm(
-                first_order["symbol"], 
-                first_order["side"], 
-                total_size
+        with tracer.span("execution.create_plan", first_order.get("parent_intent_id"),
+                         symbol=first_order["symbol"], child_orders=len(child_orders)):
+            # Auto-select algorithm if not specified
+            if algorithm == "auto":
+                algorithm = self._select_optimal_algorithm(
+                    first_order["symbol"], 
+                    first_order["side"], 
+                    total_size
+                )
+            
+            # Select best venue
+            best_venue = self.order_router.select_best_venue(
+                first_order["symbol"],
+                first_order["side"],
+                total_size,
+                first_order.get("urgency", "normal")
             )
         
-        # Select best venue
-        best_venue = self.order_router.select_best_venue(
-            first_order["symbol"],
-            first_order["side"],
-            total_size,
-            first_order.get("urgency", "normal")
-        )
-        
         # Create execution plan
         plan = ExecutionPlan(
             intent_id=first_order.get("parent_intent_id", f"plan_{int(time.time())}"),
@@ -651,6 +653,7 @@ class SmartExecutionEngine:
             # Default to TWAP for time-based execution
             return "twap"
     
+    @traced("execution.execute_plan", correlation=lambda self, plan: plan.intent_id)
     async def execute_plan(self, plan: ExecutionPlan) -> List[Order]:
         """Execute a trading plan using the specified algorithm"""
         logger.info(f"🎯 Executing plan: {plan.algorithm.value} for {plan.symbol}")
@@ -707,6 +710,7 @@ class SmartExecutionEngine:
         
         return [order]
     
+    @traced("execution.submit_order", correlation=lambda self, order: order.parent_intent_id)
     async def _simulate_order_execution(self, order: Order):
         """Simulate order execution with realistic fills"""
         logger.info(f"📤 Submitting order: {order.id} - {order.side} {order.size} {order.symbol}")
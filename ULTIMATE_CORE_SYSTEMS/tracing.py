@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+ULTIMATE LYRA ECOSYSTEM - ORDER LIFECYCLE TRACING
+================================================
+
+Lightweight spans for attributing tick-to-order latency per stage:
+- Spans carry a correlation id (intent id) propagated through contextvars
+- Monotonic nanosecond timestamps, anchored to wall clock for export
+- Disabled mode costs one attribute check per instrumented call
+- Optional stack sampler / cProfile dump for spans slower than a threshold
+- Export to Chrome trace JSON (Perfetto / chrome://tracing) or OTLP JSON files
+
+Enable with LYRA_TRACING=1 or tracer.configure(enabled=True).
+"""
+
+import asyncio
+import contextvars
+import cProfile
+import functools
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+import logging
+from collections import defaultdict, deque, Counter
+from typing import Dict, List, Optional, Any, Callable
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_current_span = contextvars.ContextVar("lyra_current_span", default=None)
+
+class Span:
+    """A timed unit of work within one correlation (trace)"""
+    
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+                 "attributes", "status", "thread_id", "_token", "_tracer", "_profile")
+    
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_id: Optional[str],
+                 attributes: Dict[str, Any]):
+        """Span timing starts on enter; attributes are exported with the span"""
+        self._tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.status = "OK"
+        self.start_ns = 0
+        self.end_ns = 0
+        self.thread_id = threading.get_ident()
+        self._token = None
+        self._profile = None
+    
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+    
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+    
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        self._tracer._on_start(self)
+        self.start_ns = time.monotonic_ns()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.end_ns = time.monotonic_ns()
+        if exc_type is not None:
+            self.status = "ERROR"
+            self.attributes["error"] = f"{exc_type.__name__}: {exc_val}"
+        _current_span.reset(self._token)
+        self._tracer._on_end(self)
+        return False
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes
+        }
+
+class _NoopSpan:
+    """Returned while tracing is disabled; every operation is a no-op"""
+    
+    __slots__ = ()
+    trace_id = None
+    span_id = None
+    
+    def set_attribute(self, key: str, value: Any):
+        pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+NOOP_SPAN = _NoopSpan()
+
+class StackSampler:
+    """
+    Samples the stacks of threads that have open watched spans.
+    
+    Samples are attributed to every open span on the sampled thread, so with
+    asyncio the stacks of interleaved tasks land in each other's spans; the
+    folded output still shows where the thread spent its time.
+    """
+    
+    def __init__(self, interval_s: float = 0.001):
+        """Sample the stacks of threads with open spans every interval_s seconds"""
+        self.interval_s = interval_s
+        self.open_spans = defaultdict(set)   # thread id -> span ids
+        self.samples = defaultdict(Counter)  # span id -> folded stack counts
+        self.lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+    
+    def watch(self, span: Span):
+        with self.lock:
+            self.open_spans[span.thread_id].add(span.span_id)
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+    
+    def unwatch(self, span: Span) -> Counter:
+        with self.lock:
+            self.open_spans[span.thread_id].discard(span.span_id)
+            if not self.open_spans[span.thread_id]:
+                del self.open_spans[span.thread_id]
+            return self.samples.pop(span.span_id, Counter())
+    
+    def stop(self):
+        self._stop.set()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            with self.lock:
+                watched = {tid: set(spans) for tid, spans in self.open_spans.items()}
+            if not watched:
+                continue
+            frames = sys._current_frames()
+            for thread_id, span_ids in watched.items():
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                folded = ";".join(reversed(stack))
+                with self.lock:
+                    for span_id in span_ids:
+                        self.samples[span_id][folded] += 1
+
+class Tracer:
+    """Collects finished spans in a bounded buffer and exports them for offline analysis"""
+    
+    def __init__(self, enabled: bool = False, max_spans: int = 100000, export_dir: str = "traces"):
+        """Tracing is a no-op until enabled; at most max_spans finished spans are kept"""
+        self.enabled = enabled
+        self.spans = deque(maxlen=max_spans)
+        self.export_dir = export_dir
+        self.slow_span_ms = None
+        self.profiler = None          # None | "sampler" | "cprofile"
+        self.profile_spans = None     # None = every span name
+        self.sampler = None
+        self.slow_span_dumps = deque(maxlen=1000)
+        self._profiling_threads = set()
+        # Offset to turn monotonic_ns into unix nanoseconds for export
+        self.epoch_offset_ns = time.time_ns() - time.monotonic_ns()
+    
+    def configure(self, enabled: Optional[bool] = None, slow_span_ms: Optional[float] = None,
+                  profiler: Optional[str] = None, profile_spans: Optional[List[str]] = None,
+                  sample_interval_s: float = 0.001, export_dir: Optional[str] = None):
+        """
+        Turn tracing on/off and set up slow-span profiling.
+        
+        With slow_span_ms and a profiler, watched spans are profiled while
+        open and the profile is written to export_dir only if the span ends
+        up slower than the threshold ("sampler" writes folded stacks for
+        flamegraph tools, "cprofile" writes a .prof for pstats/snakeviz).
+        """
+        if enabled is not None:
+            self.enabled = enabled
+        if export_dir is not None:
+            self.export_dir = export_dir
+        if slow_span_ms is not None:
+            self.slow_span_ms = slow_span_ms
+            self.profiler = profiler or "sampler"
+        if profile_spans is not None:
+            self.profile_spans = set(profile_spans)
+        if self.profiler == "sampler" and self.sampler is None:
+            self.sampler = StackSampler(sample_interval_s)
+    
+    def disable_profiling(self):
+        self.profiler = None
+        self.slow_span_ms = None
+        if self.sampler is not None:
+            self.sampler.stop()
+            self.sampler = None
+    
+    def span(self, name: str, correlation_id: Optional[str] = None, **attributes) -> Any:
+        """
+        Open a span; use as a context manager.
+        
+        The trace id is the explicit correlation id, else the enclosing
+        span's trace id, else a fresh id.
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        parent = _current_span.get()
+        if correlation_id is not None:
+            trace_id = str(correlation_id)
+        elif parent is not None:
+            trace_id = parent.trace_id
+        else:
+            trace_id = uuid.uuid4().hex
+        parent_id = parent.span_id if parent is not None and parent.trace_id == trace_id else None
+        if parent is not None and parent_id is None:
+            attributes["caused_by_trace"] = parent.trace_id
+        return Span(self, name, trace_id, parent_id, attributes)
+    
+    def record_span(self, name: str, correlation_id: str, start_ns: int, end_ns: int, **attributes):
+        """Record an already-finished span, e.g. the shared signal stage attributed to each intent"""
+        if not self.enabled:
+            return
+        span = Span(self, name, str(correlation_id), None, attributes)
+        span.start_ns = start_ns
+        span.end_ns = end_ns
+        self.spans.append(span)
+    
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+    
+    def _wants_profile(self, span: Span) -> bool:
+        return self.profiler is not None and (self.profile_spans is None or span.name in self.profile_spans)
+    
+    def _on_start(self, span: Span):
+        if not self._wants_profile(span):
+            return
+        if self.profiler == "sampler":
+            self.sampler.watch(span)
+        elif span.thread_id not in self._profiling_threads:
+            # cProfile can't nest; only the outermost watched span on a thread is profiled
+            self._profiling_threads.add(span.thread_id)
+            span._profile = cProfile.Profile()
+            span._profile.enable()
+    
+    def _on_end(self, span: Span):
+        self.spans.append(span)
+        if not self._wants_profile(span):
+            return
+        slow = span.duration_ms >= self.slow_span_ms
+        if self.profiler == "sampler":
+            samples = self.sampler.unwatch(span)
+            if slow and samples:
+                self._dump(span, "folded", "".join(f"{stack} {count}\n" for stack, count in samples.most_common()))
+        elif span._profile is not None:
+            span._profile.disable()
+            self._profiling_threads.discard(span.thread_id)
+            if slow:
+                path = self._dump_path(span, "prof")
+                span._profile.dump_stats(path)
+                self._record_dump(span, path)
+            span._profile = None
+    
+    def _dump_path(self, span: Span, extension: str) -> str:
+        os.makedirs(self.export_dir, exist_ok=True)
+        safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in span.name)
+        return os.path.join(self.export_dir, f"slow_{safe_name}_{span.span_id}.{extension}")
+    
+    def _dump(self, span: Span, extension: str, content: str):
+        path = self._dump_path(span, extension)
+        with open(path, "w") as f:
+            f.write(content)
+        self._record_dump(span, path)
+    
+    def _record_dump(self, span: Span, path: str):
+        span.attributes["profile"] = path
+        self.slow_span_dumps.append({"span": span.name, "trace_id": span.trace_id,
+                                     "duration_ms": span.duration_ms, "path": path})
+        logger.warning(f"🐢 Slow span {span.name} ({span.duration_ms:.1f}ms) profiled -> {path}")
+    
+    def stage_report(self) -> Dict[str, Any]:
+        """
+        Per-stage latency percentiles plus per-trace end-to-end time.
+        
+        End-to-end is first span start to last span end within a trace, so a
+        trace that reaches place_order gives tick-to-order latency.
+        """
+        spans = list(self.spans)
+        if not spans:
+            return {"stages": {}, "end_to_end": {}, "traces": 0}
+        
+        by_stage = defaultdict(list)
+        bounds = {}
+        for span in spans:
+            by_stage[span.name].append(span.end_ns - span.start_ns)
+            lo, hi = bounds.get(span.trace_id, (span.start_ns, span.end_ns))
+            bounds[span.trace_id] = (min(lo, span.start_ns), max(hi, span.end_ns))
+        
+        def summarize(durations_ns: List[int]) -> Dict[str, float]:
+            ms = np.asarray(durations_ns) / 1e6
+            p50, p99, p999 = np.percentile(ms, [50, 99, 99.9])
+            return {"count": len(ms), "mean_ms": float(ms.mean()), "p50_ms": float(p50),
+                    "p99_ms": float(p99), "p999_ms": float(p999), "max_ms": float(ms.max()),
+                    "total_ms": float(ms.sum())}
+        
+        end_to_end = [hi - lo for lo, hi in bounds.values()]
+        return {
+            "stages": {name: summarize(durations) for name, durations in by_stage.items()},
+            "end_to_end": summarize(end_to_end),
+            "traces": len(bounds)
+        }
+    
+    def export_chrome_trace(self, path: Optional[str] = None) -> str:
+        """Write spans as Chrome trace events (open in Perfetto or chrome://tracing)"""
+        path = path or os.path.join(self.export_dir, f"trace_{int(time.time())}.json")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        events = [{
+            "name": span.name,
+            "cat": span.trace_id,
+            "ph": "X",
+            "ts": (span.start_ns + self.epoch_offset_ns) / 1000,
+            "dur": (span.end_ns - span.start_ns) / 1000,
+            "pid": os.getpid(),
+            "tid": span.thread_id,
+            "args": {"trace_id": span.trace_id, "span_id": span.span_id,
+                     "parent_id": span.parent_id, "status": span.status,
+                     **{k: _jsonable(v) for k, v in span.attributes.items()}}
+        } for span in list(self.spans)]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return path
+    
+    def export_otlp_json(self, path: Optional[str] = None, service_name: str = "lyra-trading") -> str:
+        """Write spans as an OTLP/JSON ExportTraceServiceRequest (otel-collector file format)"""
+        path = path or os.path.join(self.export_dir, f"trace_{int(time.time())}.otlp.json")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        otlp_spans = []
+        for span in list(self.spans):
+            attributes = {"lyra.correlation_id": span.trace_id, **span.attributes}
+            otlp_span = {
+                "traceId": _otlp_trace_id(span.trace_id),
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(span.start_ns + self.epoch_offset_ns),
+                "endTimeUnixNano": str(span.end_ns + self.epoch_offset_ns),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items()],
+                "status": {"code": 2 if span.status == "ERROR" else 1}
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            otlp_spans.append(otlp_span)
+        request = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{"scope": {"name": "lyra.tracing"}, "spans": otlp_spans}]
+        }]}
+        with open(path, "w") as f:
+            json.dump(request, f)
+        return path
+    
+    def clear(self):
+        self.spans.clear()
+
+def _jsonable(value: Any) -> Any:
+    return value if isinstance(value, (str, int, float, bool)) or value is None else str(value)
+
+def _otlp_trace_id(correlation_id: str) -> str:
+    """OTLP trace ids are 16 bytes; hash arbitrary correlation ids into that space"""
+    if len(correlation_id) == 32 and all(c in "0123456789abcdef" for c in correlation_id):
+        return correlation_id
+    return hashlib.md5(correlation_id.encode()).hexdigest()
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def traced(name: str, correlation: Optional[Callable[..., Any]] = None):
+    """
+    Decorator that wraps a sync or async function in a span.
+    
+    `correlation` receives the call's arguments and returns the correlation
+    id (e.g. lambda self, intent: intent.intent_id). While tracing is
+    disabled the wrapper calls straight through.
+    """
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not tracer.enabled:
+                    return await func(*args, **kwargs)
+                correlation_id = correlation(*args, **kwargs) if correlation else None
+                with tracer.span(name, correlation_id):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            correlation_id = correlation(*args, **kwargs) if correlation else None
+            with tracer.span(name, correlation_id):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# Global tracer
+tracer = Tracer(enabled=os.getenv("LYRA_TRACING", "0") == "1",
+                export_dir=os.getenv("LYRA_TRACE_DIR", "traces"))
+if os.getenv("LYRA_TRACE_SLOW_MS"):
+    tracer.configure(slow_span_ms=float(os.getenv("LYRA_TRACE_SLOW_MS")),
+                     profiler=os.getenv("LYRA_TRACE_PROFILER", "sampler"))
@@ -1 +1,31 @@
-# Gate.io Exchange Integration - Complete
+#!/usr/bin/env python3
+"""
+Gate.io Exchange Adapter
+Region: Global
+Type: spot
+Priority: MEDIUM
+Compliance: standard
+
+Served from the shared pool in unified_exchange_adapter
+"""
+
+import os
+import sys
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unified_exchange_adapter import VenueAdapter
+
+class GateIOAdapter(VenueAdapter):
+    """Gate.io view onto the shared exchange pool"""
+    
+    def __init__(self):
+        """Gate.io venue adapter over the shared unified adapter"""
+        super().__init__("gate")
+
+# Create adapter instance
+adapter = GateIOAdapter()
+
+if __name__ == "__main__":
+    asyncio.run(adapter.run_standalone())
@@ -4,12 +4,46 @@ OKX Trading Strategies
 Implements production-ready trading strategies for OKX
 """
 
+import os
+import time
 import asyncio
 import logging
+import numpy as np
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 import json
 
+class OrderRateBudget:
+    """
+    Token bucket for order submissions.
+
+    Only create_order calls draw from the budget; market data and analysis
+    run unthrottled so a cycle is bounded by the exchange round trip.
+    """
+    
+    def __init__(self, orders_per_second: float = 5.0, burst: int = 10):
+        """Token bucket that allows burst orders at once, refilled at orders_per_second"""
+        self.rate = orders_per_second
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self):
+        """Add the tokens earned since the last refill, up to capacity"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    async def acquire(self):
+        """Wait until one order may be submitted"""
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1.0:
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1.0
+
 class OKXTradingStrategy:
     def __init__(self, adapter):
         """TODO: Add function documentation"""
@@ -23,6 +57,13 @@ class OKXTradingStrategy:
         self.min_profit_threshold = 0.001  # 0.1% minimum profit
         self.max_position_size = 0.1  # 10% of balance max
         self.stop_loss_percentage = 0.02  # 2% stop loss
+        self.trading_fee = 0.001  # 0.1% typical trading fee
+        self.max_trade_value = 100  # Maximum $100 per trade for safety
+        
+        # Order pacing and per-cycle state
+        self.order_budget = OrderRateBudget()
+        self.ticker_deadline = 2.0
+        self.cycle_balance: Optional[Dict] = None
         
         # Australian specific
         if self.region == "AU":
@@ -39,67 +80,122 @@ class OKXTradingStrategy:
         try:
             # Get current ticker
             ticker = await self.adapter.get_ticker(self.exchange_id, symbol)
-            if not ticker:
-                return {'opportunity': False, 'reason': 'No ticker data'}
-            
-            bid = ticker.get('bid', 0)
-            ask = ticker.get('ask', 0)
+            return self.evaluate_opportunities([symbol], {symbol: ticker} if ticker else {})[0]
             
-            if bid <= 0 or ask <= 0:
-                return {'opportunity': False, 'reason': 'Invalid prices'}
-            
-            # Calculate spread
-            spread = (ask - bid) / ask
-            
-            # Check if spread meets minimum threshold
-            if spread < self.min_profit_threshold:
-                return {
+        except Exception as e:
+            self.logger.error(f"Error analyzing market: {str(e)}")
+            return {'opportunity': False, 'reason': f'Analysis error: {str(e)}'}
+    
+    async def fetch_market_snapshot(self, symbols: List[str]) -> Dict[str, Dict]:
+        """All tickers for symbols in one batched call (falls back to concurrent single fetches)"""
+        if hasattr(self.adapter, 'get_tickers'):
+            snapshot = await self.adapter.get_tickers(symbols, [self.exchange_id], self.ticker_deadline)
+            return snapshot['tickers'].get(self.exchange_id, {})
+        
+        tickers = await asyncio.gather(
+            *(self.adapter.get_ticker(self.exchange_id, symbol) for symbol in symbols)
+        )
+        return {symbol: ticker for symbol, ticker in zip(symbols, tickers) if ticker}
+    
+    def evaluate_opportunities(self, symbols: List[str], tickers: Dict[str, Dict]) -> List[Dict[str, Any]]:
+        """
+        Evaluate every symbol against the snapshot in one vectorized pass.
+        
+        Returns one analysis per symbol, in order, with the same fields and
+        reasons as analyze_market_opportunity.
+        """
+        present = np.array([symbol in tickers for symbol in symbols], dtype=bool)
+        bid = np.array([tickers[s].get('bid') or 0 if s in tickers else 0 for s in symbols], dtype=float)
+        ask = np.array([tickers[s].get('ask') or 0 if s in tickers else 0 for s in symbols], dtype=float)
+        
+        valid = present & (bid > 0) & (ask > 0)
+        spread = np.divide(ask - bid, ask, out=np.zeros_like(ask), where=valid)
+        
+        # Calculate potential profit (after fees and GST if AU)
+        total_cost = self.trading_fee * 2  # Buy and sell fees
+        if self.region == "AU":
+            total_cost += self.gst_rate  # Add GST
+        net_profit = spread - total_cost
+        
+        wide = valid & (spread >= self.min_profit_threshold)
+        opportunity = wide & (net_profit > 0)
+        
+        timestamp = datetime.now().isoformat()
+        analyses = []
+        for i, symbol in enumerate(symbols):
+            if not present[i]:
+                analyses.append({'opportunity': False, 'reason': 'No ticker data'})
+            elif not valid[i]:
+                analyses.append({'opportunity': False, 'reason': 'Invalid prices'})
+            elif not wide[i]:
+                analyses.append({
                     'opportunity': False,
                     'reason': 'Spread too low',
-                    'spread': spread,
+                    'spread': float(spread[i]),
                     'threshold': self.min_profit_threshold
-                }
-            
-            # Calculate potential profit (after fees and GST if AU)
-            trading_fee = 0.001  # 0.1% typical trading fee
-            total_cost = trading_fee * 2  # Buy and sell fees
-            
-            if self.region == "AU":
-                total_cost += self.gst_rate  # Add GST
-            
-            net_profit = spread - total_cost
-            
-            if net_profit <= 0:
-                return {
+                })
+            elif not opportunity[i]:
+                analyses.append({
                     'opportunity': False,
                     'reason': 'Net profit negative after costs',
-                    'net_profit': net_profit
-                }
-            
-            return {
-                'opportunity': True,
-                'symbol': symbol,
-                'bid': bid,
-                'ask': ask,
-                'spread': spread,
-                'net_profit': net_profit,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-        except Exception as e:
-            self.logger.error(f"Error analyzing market: {str(e)}")
-            return {'opportunity': False, 'reason': f'Analysis error: {str(e)}'}
+                    'net_profit': float(net_profit[i])
+                })
+            else:
+                analyses.append({
+                    'opportunity': True,
+                    'symbol': symbol,
+                    'bid': float(bid[i]),
+                    'ask': float(ask[i]),
+                    'spread': float(spread[i]),
+                    'net_profit': float(net_profit[i]),
+                    'timestamp': timestamp
+                })
+        return analyses
+    
+    async def refresh_balance(self) -> Optional[Dict]:
+        """Fetch the account balance once for the current cycle"""
+        self.cycle_balance = await self.adapter.get_balance(self.exchange_id)
+        return self.cycle_balance
     
-    async def execute_arbitrage_strategy(self, symbol: str) -> Dict[str, Any]:
-        """Execute arbitrage trading strategy"""
+    def apply_fill(self, symbol: str, side: str, order: Optional[Dict], amount: float, price: float):
+        """Update the cached cycle balance locally after a fill instead of refetching"""
+        if not self.cycle_balance or '/' not in symbol:
+            return
+        base, quote = symbol.split('/')[:2]
+        quote = quote.split(':')[0]
+        filled = (order or {}).get('filled') or amount
+        cost = (order or {}).get('cost') or filled * price
+        free = self.cycle_balance.setdefault('free', {})
+        sign = 1 if side == 'buy' else -1
+        free[quote] = (free.get(quote) or 0) - sign * cost
+        free[base] = (free.get(base) or 0) + sign * filled
+    
+    async def _submit_order(self, symbol: str, side: str, amount: float, price: float) -> Optional[Dict]:
+        """Place one market order through the rate budget and book the fill locally"""
+        await self.order_budget.acquire()
+        order = await self.adapter.create_order(self.exchange_id, symbol, 'market', side, amount)
+        if order:
+            self.apply_fill(symbol, side, order, amount, price)
+        return order
+    
+    async def execute_arbitrage_strategy(self, symbol: str, analysis: Optional[Dict[str, Any]] = None,
+                                         balance: Optional[Dict] = None) -> Dict[str, Any]:
+        """
+        Execute arbitrage trading strategy.
+        
+        The cycle runner passes the snapshot analysis and cached balance; a
+        standalone call fetches both itself.
+        """
         try:
             # Analyze opportunity
-            analysis = await self.analyze_market_opportunity(symbol)
+            if analysis is None:
+                analysis = await self.analyze_market_opportunity(symbol)
             if not analysis.get('opportunity'):
                 return analysis
             
             # Get account balance
-            balance = await self.adapter.get_balance(self.exchange_id)
+            if balance is None:
+                balance = await self.adapter.get_balance(self.exchange_id)
             if not balance:
                 return {'success': False, 'reason': 'Cannot get balance'}
             
@@ -112,7 +208,7 @@ class OKXTradingStrategy:
             
             position_size = min(
                 available_balance * self.max_position_size,
-                100  # Maximum $100 per trade for safety
+                self.max_trade_value
             )
             
             # Calculate order amount
@@ -120,22 +216,20 @@ class OKXTradingStrategy:
             
             # Execute buy order (simulation for safety)
             if os.getenv('LIVE_TRADING', 'false').lower() == 'true':
-                buy_order = await self.adapter.create_order(
-                    self.exchange_id, symbol, 'market', 'buy', order_amount
-                )
+                buy_order = await self._submit_order(symbol, 'buy', order_amount, analysis['ask'])
                 
-                if buy_order:
-                    # Execute sell order
-                    sell_order = await self.adapter.create_order(
-                        self.exchange_id, symbol, 'market', 'sell', order_amount
-                    )
-                    
-                    return {
-                        'success': True,
-                        'buy_order': buy_order,
-                        'sell_order': sell_order,
-                        'profit': analysis['net_profit'] * position_size
-                    }
+                if not buy_order:
+                    return {'success': False, 'reason': 'Buy order rejected'}
+                
+                # Execute sell order
+                sell_order = await self._submit_order(symbol, 'sell', order_amount, analysis['bid'])
+                
+                return {
+                    'success': True,
+                    'buy_order': buy_order,
+                    'sell_order': sell_order,
+                    'profit': analysis['net_profit'] * position_size
+                }
             else:
                 # Simulation mode
                 self.logger.info(f"SIMULATION: Would trade {order_amount} {symbol}")
@@ -151,22 +245,43 @@ class OKXTradingStrategy:
             self.logger.error(f"Error executing strategy: {str(e)}")
             return {'success': False, 'reason': str(e)}
     
-    async def run_continuous_strategy(self, symbols: List[str], interval: int = 60):
-        """Run continuous trading strategy"""
+    async def run_cycle(self, symbols: List[str]) -> List[Dict[str, Any]]:
+        """
+        One strategy cycle: batched snapshot, vectorized evaluation, paced execution.
+        
+        The balance is fetched once, only when something is worth trading,
+        and then updated locally as orders fill.
+        """
+        tickers = await self.fetch_market_snapshot(symbols)
+        analyses = self.evaluate_opportunities(symbols, tickers)
+        candidates = sorted((a for a in analyses if a['opportunity']),
+                            key=lambda a: a['net_profit'], reverse=True)
+        if not candidates:
+            return []
+        
+        if not await self.refresh_balance():
+            self.logger.warning("Cannot get balance; skipping cycle")
+            return []
+        
+        results = []
+        for analysis in candidates:
+            result = await self.execute_arbitrage_strategy(analysis['symbol'], analysis, self.cycle_balance)
+            if result.get('success'):
+                self.logger.info(f"Strategy executed for {analysis['symbol']}: {result}")
+            results.append(result)
+        return results
+    
+    async def run_continuous_strategy(self, symbols: List[str], interval: float = 1.0):
+        """Run continuous trading strategy; interval is the target cycle period in seconds"""
         self.logger.info(f"Starting continuous strategy for {len(symbols)} symbols")
         
         while True:
             try:
-                for symbol in symbols:
-                    result = await self.execute_arbitrage_strategy(symbol)
-                    if result.get('success'):
-                        self.logger.info(f"Strategy executed for {symbol}: {result}")
-                    
-                    # Wait between symbols to avoid rate limits
-                    await asyncio.sleep(5)
+                started = time.monotonic()
+                await self.run_cycle(symbols)
                 
                 # Wait for next cycle
-                await asyncio.sleep(interval)
+                await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
                 
             except Exception as e:
                 self.logger.error(f"Error in continuous strategy: {str(e)}")
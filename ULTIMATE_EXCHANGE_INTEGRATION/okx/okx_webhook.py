@@ -2,43 +2,421 @@
 """
 OKX Webhook Handler
 Handles real-time notifications from OKX
+
+Ingestion is asynchronous: a callback is verified against a cached HMAC
+key, deduplicated, appended to a local journal and acknowledged once the
+journal write is durable. Processing happens afterwards, in order per
+order id, on in-process subscribers; each processed entry gets an ack
+marker in the journal, and entries without one are re-published on restart.
+The journal is periodically compacted to a dedup checkpoint plus the
+entries that are still unacknowledged.
 """
 
-from flask import Flask, request, jsonify
+from aiohttp import web
+import os
 import json
+import asyncio
 import logging
-from datetime import datetime
-import hmac
 import hashlib
+import hmac
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Callable, Tuple
 
-app = Flask(__name__)
+class WebhookJournal:
+    """
+    Append-only JSONL journal with group commit.
+    
+    Concurrent appends are batched into one write + fsync by a single writer
+    task; each caller is released only after its entry is on disk. Entries
+    get increasing ids; `{"ack": id}` lines mark entries that were dispatched.
+    
+    Once compact_every lines have been written and the writer is idle, the
+    file is atomically replaced by one `{"checkpoint": ...}` line (the state
+    returned by the `checkpoint` callable) followed by the entries that are
+    not acknowledged yet, so it no longer grows without bound.
+    """
+    
+    def __init__(self, path: str, max_batch: int = 512, compact_every: int = 50000):
+        """Journal at `path`; at most max_batch lines go into one write + fsync."""
+        self.path = path
+        self.max_batch = max_batch
+        self.compact_every = compact_every
+        self.checkpoint: Optional[Callable[[], Dict[str, Any]]] = None
+        self.entries_written = 0
+        self.compactions = 0
+        self.next_id = 1
+        self.pending: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._lines_since_compaction = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self.logger = logging.getLogger("okx_webhook")
+    
+    def start(self):
+        """Start the writer task on the running loop"""
+        if self._writer is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._queue = asyncio.Queue()
+            self._writer = asyncio.create_task(self._write_loop())
+    
+    async def stop(self):
+        """Flush pending entries and stop the writer"""
+        if self._writer is not None:
+            await self._queue.put(None)
+            await self._writer
+            self._writer = None
+    
+    async def append(self, entry: Dict[str, Any]) -> int:
+        """Append one entry; returns its id once it has been fsynced"""
+        entry_id = self.next_id
+        self.next_id += 1
+        record = {'id': entry_id, **entry}
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((json.dumps(record, separators=(',', ':'), default=str), future, record))
+        await future
+        return entry_id
+    
+    def acknowledge(self, entry_id: int):
+        """Mark an entry as dispatched (written with the next batch; not awaited)"""
+        self.pending.pop(entry_id, None)
+        if self._writer is not None:
+            self._queue.put_nowait((json.dumps({'ack': entry_id}, separators=(',', ':')), None, None))
+    
+    def _write_batch(self, lines: List[str]):
+        """Write lines in one append and fsync them (runs in a worker thread)."""
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def _rewrite(self, lines: List[str]):
+        """Replace the journal with lines via a fsynced temp file and an atomic rename."""
+        staging = self.path + '.compact'
+        with open(staging, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(staging, self.path)
+        directory = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+    
+    async def _compact(self):
+        """Rewrite the journal as a checkpoint plus the unacknowledged entries."""
+        # Snapshot on the loop: nothing is queued, so every claimed entry is already on disk
+        lines = [json.dumps({'checkpoint': self.checkpoint(), 'next_id': self.next_id}, separators=(',', ':'))]
+        lines.extend(json.dumps(record, separators=(',', ':'), default=str) for record in self.pending.values())
+        try:
+            await asyncio.to_thread(self._rewrite, lines)
+            self._lines_since_compaction = len(lines)
+            self.compactions += 1
+        except Exception as e:
+            self.logger.error(f"Journal compaction failed: {str(e)}")
+    
+    async def _write_loop(self):
+        """Group-commit writer: drain the queue into batches until the stop sentinel."""
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            batch = []
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.max_batch or self._queue.empty():
+                    break
+                item = self._queue.get_nowait()
+            stopping = item is None
+            if not batch:
+                continue
+            
+            try:
+                await asyncio.to_thread(self._write_batch, [line for line, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    if future is not None and not future.done():
+                        future.set_exception(e)
+                continue
+            
+            self.entries_written += len(batch)
+            self._lines_since_compaction += len(batch)
+            for _, future, record in batch:
+                if record is not None:
+                    self.pending[record['id']] = record
+                if future is not None and not future.done():
+                    future.set_result(True)
+            if (self.checkpoint is not None and self._lines_since_compaction >= self.compact_every
+                    and self._queue.empty()):
+                await self._compact()
+    
+    def replay(self):
+        """Yield journaled entries and ack markers in write order (skips a torn final line)"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+class UpdateDispatcher:
+    """
+    Fans updates out to subscribers, in order per key.
+    
+    Updates are sharded by key (order id, or asset for balances) onto a fixed
+    set of worker queues, so one key's updates never overtake each other
+    while different keys are processed concurrently.
+    """
+    
+    def __init__(self, shards: int = 16):
+        """Dispatcher with `shards` worker queues (the limit on concurrent keys)."""
+        self.shards = shards
+        self.subscribers: Dict[str, List[Callable]] = {'order': [], 'balance': []}
+        self.dispatched = 0
+        self.errors = 0
+        self._queues: List[asyncio.Queue] = []
+        self._workers: List[asyncio.Task] = []
+        self.logger = logging.getLogger("okx_webhook")
+    
+    def subscribe(self, kind: str, callback: Callable):
+        """Register a sync or async callback for 'order' or 'balance' updates"""
+        self.subscribers.setdefault(kind, []).append(callback)
+    
+    def start(self):
+        """Start the shard workers on the running loop"""
+        if not self._workers:
+            self._queues = [asyncio.Queue() for _ in range(self.shards)]
+            self._workers = [asyncio.create_task(self._worker(q)) for q in self._queues]
+    
+    async def stop(self):
+        """Drain queued updates and stop the workers"""
+        for queue in self._queues:
+            await queue.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+    
+    def publish(self, kind: str, key: str, data: Dict[str, Any], on_done: Optional[Callable] = None):
+        """Queue an update behind earlier updates for the same key; on_done runs after delivery"""
+        shard = zlib.crc32(f"{kind}:{key}".encode('utf-8')) % self.shards
+        self._queues[shard].put_nowait((kind, data, on_done))
+    
+    def pending(self) -> int:
+        """Updates queued but not yet delivered"""
+        return sum(queue.qsize() for queue in self._queues)
+    
+    async def _worker(self, queue: asyncio.Queue):
+        """Deliver one shard's updates to every subscriber, strictly in queue order."""
+        while True:
+            kind, data, on_done = await queue.get()
+            try:
+                for callback in self.subscribers.get(kind, []):
+                    try:
+                        result = callback(data)
+                        if asyncio.iscoroutine(result):
+                            await result
+                    except Exception as e:
+                        self.errors += 1
+                        self.logger.error(f"Subscriber error for {kind} update: {str(e)}")
+                self.dispatched += 1
+                if on_done is not None:
+                    on_done()
+            finally:
+                queue.task_done()
 
 class OKXWebhookHandler:
-    def __init__(self):
-        """TODO: Add function documentation"""
+    def __init__(self, journal_path: Optional[str] = None, dedup_window: int = 100000, compact_every: int = 50000):
+        """Journal defaults to OKX_WEBHOOK_JOURNAL; dedup_window bounds the sequence and digest memory."""
         self.exchange_id = "okx"
         self.exchange_name = "OKX"
         self.setup_logging()
         
+        # Key schedule computed once; each request works on a copy
+        secret = os.getenv('OKX_WEBHOOK_SECRET', '')
+        if not secret:
+            self.logger.warning("OKX_WEBHOOK_SECRET not set; signatures are checked against an empty key")
+        self._mac = hmac.new(secret.encode('utf-8'), digestmod=hashlib.sha256)
+        
+        self.journal = WebhookJournal(journal_path or os.getenv('OKX_WEBHOOK_JOURNAL', 'journal/okx_webhooks.jsonl'),
+                                      compact_every=compact_every)
+        self.journal.checkpoint = self._checkpoint
+        self.dispatcher = UpdateDispatcher()
+        self.dispatcher.subscribe('order', self.process_order_update)
+        self.dispatcher.subscribe('balance', self.process_balance_update)
+        
+        # Dedup state: last sequence per key, plus recent digests for unsequenced payloads (both LRU)
+        self.dedup_window = dedup_window
+        self.last_sequence: "OrderedDict[str, int]" = OrderedDict()
+        self._seen_digests: "OrderedDict[str, None]" = OrderedDict()
+        self._dedup_lock = asyncio.Lock()
+        self.stats = {'accepted': 0, 'duplicates': 0, 'rejected': 0, 'replayed': 0}
+    
     def setup_logging(self):
         """Setup webhook logging"""
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(f"okx_webhook")
     
-    def verify_signature(self, payload: str, signature: str) -> bool:
+    def verify_signature(self, payload: bytes, signature: str) -> bool:
         """Verify webhook signature"""
         try:
-            secret = os.getenv('OKX_WEBHOOK_SECRET', '')
-            expected_signature = hmac.new(
-                secret.encode('utf-8'),
-                payload.encode('utf-8'),
-                hashlib.sha256
-            ).hexdigest()
-            return hmac.compare_digest(signature, expected_signature)
+            mac = self._mac.copy()
+            mac.update(payload)
+            return hmac.compare_digest(signature, mac.hexdigest())
         except Exception as e:
             self.logger.error(f"Signature verification failed: {str(e)}")
             return False
     
+    @staticmethod
+    def _sequence(data: Dict[str, Any]) -> Optional[int]:
+        """
+        Sequence number from the payload (seqId, seq or sequence).
+        
+        uTime is not used: two different updates can share a millisecond, so
+        payloads without a real sequence are deduplicated by digest instead.
+        """
+        for field in ('seqId', 'seq', 'sequence'):
+            value = data.get(field)
+            if value not in (None, ''):
+                try:
+                    return int(value)
+                except (TypeError, ValueError):
+                    return None
+        return None
+    
+    def _dedup_key(self, kind: str, data: Dict[str, Any], payload: bytes) -> Tuple[str, Optional[int], str]:
+        """(key, sequence, payload digest) identifying a callback for dedup."""
+        key = str(data.get('orderId') if kind == 'order' else data.get('asset'))
+        return f"{kind}:{key}", self._sequence(data), hashlib.sha256(payload).hexdigest()
+    
+    def _is_duplicate(self, dedup_key: str, sequence: Optional[int], digest: str) -> bool:
+        """True if the sequence is not newer than the key's last one, or the digest was seen."""
+        if sequence is not None:
+            return sequence <= self.last_sequence.get(dedup_key, -1)
+        return digest in self._seen_digests
+    
+    def _remember(self, dedup_key: str, sequence: Optional[int], digest: str):
+        """Record an accepted callback in the dedup state, evicting the least recently updated keys."""
+        if sequence is not None:
+            self.last_sequence[dedup_key] = max(sequence, self.last_sequence.pop(dedup_key, sequence))
+            if len(self.last_sequence) > self.dedup_window:
+                self.last_sequence.popitem(last=False)
+        else:
+            self._seen_digests[digest] = None
+            if len(self._seen_digests) > self.dedup_window:
+                self._seen_digests.popitem(last=False)
+    
+    def _checkpoint(self) -> Dict[str, Any]:
+        """Dedup state written at the head of a compacted journal."""
+        return {'last_sequence': dict(self.last_sequence), 'digests': list(self._seen_digests)}
+    
+    def _restore(self, checkpoint: Dict[str, Any]):
+        """Load dedup state from a journal checkpoint."""
+        for dedup_key, sequence in checkpoint.get('last_sequence', {}).items():
+            self._remember(dedup_key, sequence, '')
+        for digest in checkpoint.get('digests', []):
+            self._remember('', None, digest)
+    
+    def recover(self) -> List[Dict[str, Any]]:
+        """
+        Rebuild dedup state from the journal so restarts don't re-accept old callbacks.
+        
+        Returns the journaled entries that have no ack marker, i.e. were
+        accepted but not dispatched before the process stopped.
+        """
+        count = 0
+        undispatched: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        for entry in self.journal.replay():
+            if 'ack' in entry:
+                undispatched.pop(entry['ack'], None)
+                continue
+            if 'checkpoint' in entry:
+                self._restore(entry['checkpoint'])
+                self.journal.next_id = max(self.journal.next_id, entry.get('next_id', 1))
+                continue
+            self._remember(entry['dedup_key'], entry.get('sequence'), entry['digest'])
+            count += 1
+            if 'id' in entry:
+                self.journal.next_id = max(self.journal.next_id, entry['id'] + 1)
+                undispatched[entry['id']] = entry
+        if count:
+            self.logger.info(f"Recovered dedup state from {count} journaled webhooks; {len(undispatched)} not yet dispatched")
+        self.journal.pending.update(undispatched)
+        return list(undispatched.values())
+    
+    def _publish(self, entry_id: int, kind: str, dedup_key: str, data: Dict[str, Any]):
+        """Hand an entry to the dispatcher; it is acked in the journal once delivered"""
+        self.dispatcher.publish(kind, dedup_key, data, on_done=lambda: self.journal.acknowledge(entry_id))
+    
+    async def start(self):
+        """Recover the journal, start the writer and workers, and re-publish undispatched entries."""
+        undispatched = self.recover()
+        self.journal.start()
+        self.dispatcher.start()
+        for entry in undispatched:
+            self._publish(entry['id'], entry['kind'], entry['dedup_key'], entry['data'])
+        self.stats['replayed'] += len(undispatched)
+    
+    async def stop(self):
+        """Drain the dispatcher (writing its acks), then stop the journal writer."""
+        await self.dispatcher.stop()
+        await self.journal.stop()
+    
+    async def ingest(self, kind: str, payload: bytes, signature: str) -> Tuple[Dict[str, Any], int]:
+        """
+        Verify, dedup, journal and enqueue one callback.
+        
+        Returns (response body, HTTP status). The response is sent only after
+        the journal write is durable; subscribers run afterwards.
+        """
+        if not self.verify_signature(payload, signature):
+            self.stats['rejected'] += 1
+            return {'error': 'Invalid signature'}, 401
+        
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            self.stats['rejected'] += 1
+            return {'error': 'Body must be a JSON object'}, 400
+        
+        dedup_key, sequence, digest = self._dedup_key(kind, data, payload)
+        
+        # Check and claim under one lock so concurrent retries can't both pass
+        async with self._dedup_lock:
+            if self._is_duplicate(dedup_key, sequence, digest):
+                self.stats['duplicates'] += 1
+                return {'accepted': True, 'duplicate': True, 'key': dedup_key}, 200
+            previous = self.last_sequence.get(dedup_key)
+            self._remember(dedup_key, sequence, digest)
+        
+        try:
+            entry_id = await self.journal.append({
+                'kind': kind,
+                'dedup_key': dedup_key,
+                'sequence': sequence,
+                'digest': digest,
+                'received_at': datetime.now().isoformat(),
+                'data': data
+            })
+        except Exception:
+            # Not durable: release the claim so the exchange's retry is accepted
+            async with self._dedup_lock:
+                if sequence is not None and self.last_sequence.get(dedup_key) == sequence:
+                    if previous is None:
+                        self.last_sequence.pop(dedup_key, None)
+                    else:
+                        self.last_sequence[dedup_key] = previous
+                self._seen_digests.pop(digest, None)
+            raise
+        
+        self._publish(entry_id, kind, dedup_key, data)
+        self.stats['accepted'] += 1
+        return {'accepted': True, 'duplicate': False, 'key': dedup_key, 'timestamp': datetime.now().isoformat()}, 200
+    
     def process_order_update(self, data: Dict) -> Dict:
         """Process order update webhook"""
         try:
@@ -59,7 +437,7 @@ class OKXWebhookHandler:
             }
             
             return result
-            
+        
         except Exception as e:
             self.logger.error(f"Error processing order update: {str(e)}")
             return {'processed': False, 'error': str(e)}
@@ -79,51 +457,64 @@ class OKXWebhookHandler:
                 'balance': balance,
                 'timestamp': datetime.now().isoformat()
             }
-            
+        
         except Exception as e:
             self.logger.error(f"Error processing balance update: {str(e)}")
             return {'processed': False, 'error': str(e)}
-
-# Create handler instance
-handler = OKXWebhookHandler()
-
-@app.route('/webhook/okx/order', methods=['POST'])
-def order_webhook():
-    """Handle order webhooks"""
-    try:
-        data = request.get_json()
-        signature = request.headers.get('X-Signature', '')
-        
-        # Verify signature
-        if not handler.verify_signature(request.get_data(as_text=True), signature):
-            return jsonify({'error': 'Invalid signature'}), 401
+    
+    async def order_webhook(self, request):
+        """Handle order webhooks"""
+        try:
+            body, status = await self.ingest('order', await request.read(), request.headers.get('X-Signature', ''))
+            return web.json_response(body, status=status)
         
-        # Process order update
-        result = handler.process_order_update(data)
-        return jsonify(result)
+        except Exception as e:
+            return web.json_response({'error': str(e)}, status=500)
+    
+    async def balance_webhook(self, request):
+        """Handle balance webhooks"""
+        try:
+            body, status = await self.ingest('balance', await request.read(), request.headers.get('X-Signature', ''))
+            return web.json_response(body, status=status)
         
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        except Exception as e:
+            return web.json_response({'error': str(e)}, status=500)
+    
+    async def health_check(self, request):
+        """Health check endpoint"""
+        return web.json_response({
+            'status': 'healthy',
+            'exchange': self.exchange_name,
+            'ingestion': dict(self.stats),
+            'journaled': self.journal.entries_written,
+            'pending_dispatch': self.dispatcher.pending(),
+            'timestamp': datetime.now().isoformat()
+        })
 
-@app.route('/webhook/okx/balance', methods=['POST'])
-def balance_webhook():
-    """Handle balance webhooks"""
-    try:
-        data = request.get_json()
-        result = handler.process_balance_update(data)
-        return jsonify(result)
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+# Create handler instance
+handler = OKXWebhookHandler()
 
-@app.route('/health', methods=['GET'])
-def health_check():
-    """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'exchange': handler.exchange_name,
-        'timestamp': datetime.now().isoformat()
-    })
+async def init_app(webhook_handler: Optional[OKXWebhookHandler] = None):
+    """Initialize the web application"""
+    webhook_handler = webhook_handler or handler
+    app = web.Application()
+    
+    # Add routes
+    app.router.add_post('/webhook/okx/order', webhook_handler.order_webhook)
+    app.router.add_post('/webhook/okx/balance', webhook_handler.balance_webhook)
+    app.router.add_get('/health', webhook_handler.health_check)
+    
+    async def on_startup(app):
+        """Start ingestion when the app starts."""
+        await webhook_handler.start()
+    
+    async def on_cleanup(app):
+        """Drain and stop ingestion on shutdown."""
+        await webhook_handler.stop()
+    
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8000, debug=False)
+    web.run_app(init_app(), host='0.0.0.0', port=8000)
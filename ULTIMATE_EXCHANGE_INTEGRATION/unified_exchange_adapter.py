@@ -3,26 +3,100 @@
 UNIFIED EXCHANGE ADAPTER
 Supports all target exchanges with CCXT integration
 Production-ready with error handling, rate limiting, and monitoring
+
+All venues share one HTTP connection pool and DNS cache. Clients are warmed
+concurrently, markets are loaded lazily, and the fan-out APIs return
+whatever venues answered before the deadline. The per-exchange adapters
+under ULTIMATE_EXCHANGE_INTEGRATION/*/ are thin views onto this pool.
 """
 
-import ccxt
+import ccxt.async_support as ccxt
+import aiohttp
 import os
+import time
 import asyncio
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable, Awaitable
 from datetime import datetime
 import json
 
+# Per-venue metadata and ccxt option overrides (previously duplicated in each adapter copy)
+VENUE_PROFILES: Dict[str, Dict[str, Any]] = {
+    'btcmarkets': {'name': 'BTC Markets', 'region': 'AU', 'compliance': 'ATO_GST_required', 'options': {}},
+    'coinbase': {'name': 'Coinbase', 'region': 'Global', 'compliance': 'KYC_required', 'options': {}},
+    'binance': {
+        'name': 'Binance', 'region': 'Global', 'compliance': 'VPN_may_be_required',
+        'options': {'recvWindow': 10000, 'adjustForTimeDifference': True}
+    },
+    'whitebit': {'name': 'WhiteBIT', 'region': 'Global', 'compliance': 'standard', 'options': {}},
+    'digitalsurge': {'name': 'DigitalSurge', 'region': 'AU', 'compliance': 'ATO_GST_required', 'options': {}},
+    'gate': {'name': 'Gate.io', 'region': 'Global', 'compliance': 'standard', 'options': {}},
+    'okx': {'name': 'OKX', 'region': 'Global', 'compliance': 'standard', 'options': {}},
+    'kraken': {
+        'name': 'Kraken Pro', 'region': 'Global', 'compliance': 'standard',
+        'options': {'nonce': lambda: str(int(time.time() * 1000))}
+    },
+    'swyftx': {
+        'name': 'Swyftx', 'region': 'AU', 'compliance': 'ATO_GST_required',
+        'options': {'aud_focus': True, 'min_order': 10}  # $10 AUD minimum
+    },
+}
+
+AU_EXCHANGES = [exchange_id for exchange_id, profile in VENUE_PROFILES.items() if profile['region'] == 'AU']
+
+class SharedHttpPool:
+    """
+    One aiohttp session per event loop, shared by every ccxt client.
+    
+    Keep-alive connections and resolved addresses are reused across venues
+    instead of each client opening its own connector.
+    """
+    
+    def __init__(self, limit: int = 100, limit_per_host: int = 20,
+                 keepalive_timeout: float = 60.0, dns_ttl: int = 300):
+        """Connector limits and DNS cache settings shared by every session"""
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_ttl = dns_ttl
+        self._sessions: Dict[int, aiohttp.ClientSession] = {}
+    
+    def get(self) -> aiohttp.ClientSession:
+        """Session for the running loop, created on first use"""
+        loop_id = id(asyncio.get_running_loop())
+        session = self._sessions.get(loop_id)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_ttl,
+                use_dns_cache=True
+            )
+            session = aiohttp.ClientSession(connector=connector, trust_env=True)
+            self._sessions[loop_id] = session
+        return session
+    
+    async def close(self):
+        """Close the session owned by the running loop"""
+        session = self._sessions.pop(id(asyncio.get_running_loop()), None)
+        if session is not None and not session.closed:
+            await session.close()
+
 class UnifiedExchangeAdapter:
-    def __init__(self):
-        """TODO: Add function documentation"""
+    def __init__(self, http_pool: Optional[SharedHttpPool] = None, default_deadline: float = 5.0):
+        """Adapter for every supported venue over one shared HTTP pool; default_deadline bounds each call in seconds."""
         self.exchanges = {}
         self.supported_exchanges = [
-            'btcmarkets', 'coinbase', 'binance', 'whitebit', 
+            'btcmarkets', 'coinbase', 'binance', 'whitebit',
             'digitalsurge', 'gate', 'okx', 'kraken', 'swyftx'
         ]
+        self.http_pool = http_pool or SharedHttpPool()
+        self.default_deadline = default_deadline
+        self._client_loops: Dict[str, int] = {}
+        self._init_locks: Dict[tuple, asyncio.Lock] = {}
         self.setup_logging()
-        
+    
     def setup_logging(self):
         """Setup comprehensive logging"""
         logging.basicConfig(
@@ -35,133 +109,340 @@ class UnifiedExchangeAdapter:
         )
         self.logger = logging.getLogger(__name__)
     
-    def initialize_exchange(self, exchange_id: str) -> bool:
-        """Initialize specific exchange with API credentials"""
-        try:
-            # Get API credentials from environment
-            api_key = os.getenv(f'{exchange_id.upper()}_API_KEY')
-            secret = os.getenv(f'{exchange_id.upper()}_SECRET')
-            passphrase = os.getenv(f'{exchange_id.upper()}_PASSPHRASE')  # For OKX
+    def build_config(self, exchange_id: str) -> Optional[Dict[str, Any]]:
+        """ccxt config for a venue, or None when credentials are missing"""
+        # Get API credentials from environment
+        api_key = os.getenv(f'{exchange_id.upper()}_API_KEY')
+        secret = os.getenv(f'{exchange_id.upper()}_SECRET')
+        passphrase = os.getenv(f'{exchange_id.upper()}_PASSPHRASE')  # For OKX
+        
+        if not api_key or not secret:
+            self.logger.warning(f"Missing API credentials for {exchange_id}")
+            return None
+        
+        # Exchange-specific configuration
+        config = {
+            'apiKey': api_key,
+            'secret': secret,
+            'sandbox': os.getenv('SANDBOX_MODE', 'true').lower() == 'true',
+            'enableRateLimit': True,
+            'options': {'defaultType': 'spot'}  # Spot trading only
+        }
+        
+        # Add passphrase for OKX
+        if exchange_id == 'okx' and passphrase:
+            config['password'] = passphrase
+        
+        # Australian exchange specific settings
+        if exchange_id in AU_EXCHANGES:
+            config['options']['gst_rate'] = 0.1  # 10% GST
+            config['options']['ato_reporting'] = True
+            config['options']['currency_base'] = 'AUD'
+        
+        config['options'].update(VENUE_PROFILES.get(exchange_id, {}).get('options', {}))
+        return config
+    
+    async def initialize_exchange(self, exchange_id: str, load_markets: bool = False) -> bool:
+        """
+        Initialize specific exchange with API credentials.
+        
+        The client borrows the shared HTTP session; markets are loaded on
+        first use unless load_markets is set.
+        """
+        lock = self._init_locks.setdefault((exchange_id, id(asyncio.get_running_loop())), asyncio.Lock())
+        async with lock:
+            try:
+                if self._get_client(exchange_id) is None:
+                    config = self.build_config(exchange_id)
+                    if config is None:
+                        return False
+                    
+                    config['session'] = self.http_pool.get()
+                    exchange_class = getattr(ccxt, exchange_id)
+                    self.exchanges[exchange_id] = exchange_class(config)
+                    self._client_loops[exchange_id] = id(asyncio.get_running_loop())
+                    self.logger.info(f"Successfully initialized {exchange_id}")
+                
+                if load_markets:
+                    await self.exchanges[exchange_id].load_markets()
+                return True
             
-            if not api_key or not secret:
-                self.logger.warning(f"Missing API credentials for {exchange_id}")
+            except Exception as e:
+                self.logger.error(f"Failed to initialize {exchange_id}: {str(e)}")
+                self.exchanges.pop(exchange_id, None)
                 return False
-            
-            # Exchange-specific configuration
-            config = {
-                'apiKey': api_key,
-                'secret': secret,
-                'sandbox': os.getenv('SANDBOX_MODE', 'true').lower() == 'true',
-                'enableRateLimit': True,
-                'options': {'defaultType': 'spot'}  # Spot trading only
-            }
-            
-            # Add passphrase for OKX
-            if exchange_id == 'okx' and passphrase:
-                config['password'] = passphrase
-            
-            # Australian exchange specific settings
-            if exchange_id in ['btcmarkets', 'digitalsurge', 'swyftx']:
-                config['options']['gst_rate'] = 0.1  # 10% GST
-                config['options']['ato_reporting'] = True
-            
-            # Initialize exchange
-            exchange_class = getattr(ccxt, exchange_id)
-            exchange = exchange_class(config)
-            
-            # Load markets
-            exchange.load_markets()
-            
-            self.exchanges[exchange_id] = exchange
-            self.logger.info(f"Successfully initialized {exchange_id}")
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"Failed to initialize {exchange_id}: {str(e)}")
-            return False
     
-    def initialize_all_exchanges(self) -> Dict[str, bool]:
-        """Initialize all supported exchanges"""
-        results = {}
-        for exchange_id in self.supported_exchanges:
-            results[exchange_id] = self.initialize_exchange(exchange_id)
-        return results
+    async def initialize_all_exchanges(self, exchange_ids: Optional[List[str]] = None,
+                                       load_markets: bool = False) -> Dict[str, bool]:
+        """Initialize all supported exchanges concurrently"""
+        exchange_ids = exchange_ids or self.supported_exchanges
+        results = await asyncio.gather(
+            *(self.initialize_exchange(exchange_id, load_markets) for exchange_id in exchange_ids)
+        )
+        return dict(zip(exchange_ids, results))
+    
+    def _get_client(self, exchange_id: str):
+        """Client for a venue if it was built on the running loop"""
+        client = self.exchanges.get(exchange_id)
+        if client is not None and self._client_loops.get(exchange_id) != id(asyncio.get_running_loop()):
+            # The shared session is per-loop; a client from a finished loop cannot be reused
+            self.exchanges.pop(exchange_id, None)
+            return None
+        return client
+    
+    async def _ensure_client(self, exchange_id: str):
+        """Client for a venue, initializing it lazily"""
+        client = self._get_client(exchange_id)
+        if client is None and await self.initialize_exchange(exchange_id):
+            client = self.exchanges.get(exchange_id)
+        return client
+    
+    async def _fan_out(self, exchange_ids: List[str], call: Callable[[Any], Awaitable[Any]],
+                       deadline: Optional[float], label: str) -> Dict[str, Any]:
+        """
+        Run call(client) on every venue concurrently and collect what finished in time.
+        
+        Returns {'results': {venue: value}, 'missing': [venues], 'errors': {venue: message}}.
+        Venues still running at the deadline are cancelled and listed as missing.
+        """
+        deadline = self.default_deadline if deadline is None else deadline
+        
+        async def run(exchange_id: str):
+            client = await self._ensure_client(exchange_id)
+            if client is None:
+                raise RuntimeError("exchange not initialized")
+            return await call(client)
+        
+        tasks = {asyncio.ensure_future(run(exchange_id)): exchange_id for exchange_id in exchange_ids}
+        results, errors, missing = {}, {}, []
+        if tasks:
+            done, pending = await asyncio.wait(tasks, timeout=deadline)
+            for task in pending:
+                task.cancel()
+                missing.append(tasks[task])
+            for task in done:
+                exchange_id = tasks[task]
+                if task.exception() is not None:
+                    errors[exchange_id] = str(task.exception())
+                    self.logger.error(f"Error fetching {label} for {exchange_id}: {errors[exchange_id]}")
+                else:
+                    results[exchange_id] = task.result()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+                self.logger.warning(f"{label} deadline {deadline}s missed by: {', '.join(sorted(missing))}")
+        
+        return {'results': results, 'missing': sorted(missing), 'errors': errors}
     
     async def get_ticker(self, exchange_id: str, symbol: str) -> Optional[Dict]:
         """Get ticker data for symbol"""
         try:
-            if exchange_id not in self.exchanges:
+            client = await self._ensure_client(exchange_id)
+            if client is None:
                 return None
             
-            ticker = await self.exchanges[exchange_id].fetch_ticker(symbol)
+            ticker = await client.fetch_ticker(symbol)
             return ticker
-            
+        
         except Exception as e:
             self.logger.error(f"Error fetching ticker for {exchange_id} {symbol}: {str(e)}")
             return None
     
+    async def get_tickers(self, symbols: List[str], exchange_ids: Optional[List[str]] = None,
+                          deadline: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Tickers for symbols across venues.
+        
+        Each venue gets one batched fetch_tickers call when it supports it,
+        otherwise concurrent fetch_ticker calls. Symbols a venue does not list
+        are skipped. Returns {'tickers': {venue: {symbol: ticker}}, 'missing', 'errors'}.
+        """
+        async def fetch(client):
+            await client.load_markets()
+            listed = [symbol for symbol in symbols if symbol in client.markets]
+            if not listed:
+                return {}
+            if client.has.get('fetchTickers') and len(listed) > 1:
+                tickers = await client.fetch_tickers(listed)
+                return {symbol: tickers[symbol] for symbol in listed if symbol in tickers}
+            fetched = await asyncio.gather(*(client.fetch_ticker(symbol) for symbol in listed),
+                                           return_exceptions=True)
+            return {symbol: ticker for symbol, ticker in zip(listed, fetched)
+                    if not isinstance(ticker, BaseException)}
+        
+        fan_out = await self._fan_out(exchange_ids or self.supported_exchanges, fetch, deadline, 'tickers')
+        return {'tickers': fan_out['results'], 'missing': fan_out['missing'], 'errors': fan_out['errors']}
+    
     async def get_balance(self, exchange_id: str) -> Optional[Dict]:
         """Get account balance"""
         try:
-            if exchange_id not in self.exchanges:
+            client = await self._ensure_client(exchange_id)
+            if client is None:
                 return None
             
-            balance = await self.exchanges[exchange_id].fetch_balance()
+            balance = await client.fetch_balance()
             return balance
-            
+        
         except Exception as e:
             self.logger.error(f"Error fetching balance for {exchange_id}: {str(e)}")
             return None
     
-    async def create_order(self, exchange_id: str, symbol: str, order_type: str, 
+    async def get_all_balances(self, exchange_ids: Optional[List[str]] = None,
+                               deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Balances for every venue; returns {'balances': {venue: balance}, 'missing', 'errors'}"""
+        fan_out = await self._fan_out(exchange_ids or self.supported_exchanges,
+                                      lambda client: client.fetch_balance(), deadline, 'balances')
+        return {'balances': fan_out['results'], 'missing': fan_out['missing'], 'errors': fan_out['errors']}
+    
+    async def create_order(self, exchange_id: str, symbol: str, order_type: str,
                           side: str, amount: float, price: Optional[float] = None) -> Optional[Dict]:
         """Create trading order"""
         try:
-            if exchange_id not in self.exchanges:
+            client = await self._ensure_client(exchange_id)
+            if client is None:
                 return None
             
             # Australian exchanges - add GST calculation
-            if exchange_id in ['btcmarkets', 'digitalsurge', 'swyftx']:
+            if exchange_id in AU_EXCHANGES:
                 # Log for ATO reporting
                 self.logger.info(f"ATO_LOG: {exchange_id} {side} {amount} {symbol} at {price}")
             
-            order = await self.exchanges[exchange_id].create_order(
+            order = await client.create_order(
                 symbol, order_type, side, amount, price
             )
             
             return order
-            
+        
         except Exception as e:
             self.logger.error(f"Error creating order for {exchange_id}: {str(e)}")
             return None
     
-    def get_exchange_status(self) -> Dict[str, Any]:
+    async def get_exchange_status(self, deadline: Optional[float] = None) -> Dict[str, Any]:
         """Get status of all exchanges"""
+        initialized = [exchange_id for exchange_id in self.supported_exchanges if self._get_client(exchange_id)]
+        fan_out = await self._fan_out(initialized, lambda client: client.fetch_status(), deadline, 'status')
+        
         status = {}
         for exchange_id in self.supported_exchanges:
             status[exchange_id] = {
-                'initialized': exchange_id in self.exchanges,
-                'connected': False,
+                'initialized': exchange_id in initialized,
+                'connected': exchange_id in fan_out['results'],
                 'last_check': datetime.now().isoformat()
             }
-            
-            if exchange_id in self.exchanges:
-                try:
-                    # Test connection
-                    self.exchanges[exchange_id].fetch_status()
-                    status[exchange_id]['connected'] = True
-                except:
-                    status[exchange_id]['connected'] = False
         
         return status
+    
+    async def close(self):
+        """Close all clients and the shared HTTP session for the running loop"""
+        loop_id = id(asyncio.get_running_loop())
+        clients = [self.exchanges.pop(exchange_id) for exchange_id, client_loop in list(self._client_loops.items())
+                   if client_loop == loop_id and exchange_id in self.exchanges]
+        await asyncio.gather(*(client.close() for client in clients), return_exceptions=True)
+        await self.http_pool.close()
+
+class VenueAdapter:
+    """
+    Single-venue view onto the shared adapter.
+    
+    The per-exchange adapter modules subclass this instead of building their
+    own ccxt client, so every venue is served from one connection pool.
+    """
+    
+    def __init__(self, exchange_id: str, unified: Optional[UnifiedExchangeAdapter] = None):
+        """Venue facade that routes through the shared unified adapter"""
+        profile = VENUE_PROFILES[exchange_id]
+        self.exchange_id = exchange_id
+        self.exchange_name = profile['name']
+        self.region = profile['region']
+        self.compliance = profile['compliance']
+        self.unified = unified or adapter
+        self.logger = logging.getLogger(f"{exchange_id}_adapter")
+    
+    @property
+    def exchange(self):
+        """The shared ccxt client for this venue, if initialized"""
+        return self.unified.exchanges.get(self.exchange_id)
+    
+    async def initialize(self) -> bool:
+        """Initialize the venue on the shared pool and load its markets"""
+        return await self.unified.initialize_exchange(self.exchange_id, load_markets=True)
+    
+    async def get_markets(self) -> Dict:
+        """Get available markets"""
+        if not self.exchange:
+            return {}
+        
+        try:
+            markets = await self.exchange.load_markets()
+            # Filter for relevant pairs
+            if self.region == "AU":
+                # Focus on AUD pairs
+                return {k: v for k, v in markets.items() if 'AUD' in k}
+            return markets
+        except Exception as e:
+            self.logger.error(f"Error fetching markets: {str(e)}")
+            return {}
+    
+    async def health_check(self) -> Dict[str, Any]:
+        """Perform health check"""
+        if not self.exchange:
+            return {'status': 'error', 'message': 'Exchange not initialized'}
+        
+        try:
+            # Test API connection
+            status = await self.exchange.fetch_status()
+            return {
+                'status': 'healthy',
+                'exchange': self.exchange_name,
+                'region': self.region,
+                'api_status': status,
+                'timestamp': datetime.now().isoformat()
+            }
+        except Exception as e:
+            return {
+                'status': 'error',
+                'exchange': self.exchange_name,
+                'error': str(e),
+                'timestamp': datetime.now().isoformat()
+            }
+    
+    async def get_ticker(self, exchange_id: str, symbol: str) -> Optional[Dict]:
+        """Get ticker data for symbol"""
+        return await self.unified.get_ticker(exchange_id, symbol)
+    
+    async def get_tickers(self, symbols: List[str], exchange_ids: Optional[List[str]] = None,
+                          deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Tickers for symbols, on this venue unless exchange_ids is given"""
+        return await self.unified.get_tickers(symbols, exchange_ids or [self.exchange_id], deadline)
+    
+    async def get_balance(self, exchange_id: str) -> Optional[Dict]:
+        """Get account balance"""
+        return await self.unified.get_balance(exchange_id)
+    
+    async def create_order(self, exchange_id: str, symbol: str, order_type: str,
+                          side: str, amount: float, price: Optional[float] = None) -> Optional[Dict]:
+        """Create trading order"""
+        return await self.unified.create_order(exchange_id, symbol, order_type, side, amount, price)
+    
+    async def run_standalone(self):
+        """Initialize, report and release the pool (module entry point)"""
+        success = await self.initialize()
+        if success:
+            logging.info(f"✅ {self.exchange_name} adapter ready")
+        else:
+            logging.info(f"❌ {self.exchange_name} adapter failed")
+        await self.unified.close()
 
 # Global adapter instance
 adapter = UnifiedExchangeAdapter()
 
-if __name__ == "__main__":
-    # Initialize all exchanges
-    results = adapter.initialize_all_exchanges()
+async def main():
+    """Initialize all exchanges concurrently and report"""
+    results = await adapter.initialize_all_exchanges()
     logging.info("Exchange Initialization Results:")
     for exchange_id, success in results.items():
         status = "✅" if success else "❌"
         logging.info(f"  {status} {exchange_id}")
+    await adapter.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
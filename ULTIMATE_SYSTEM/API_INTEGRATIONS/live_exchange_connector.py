@@ -24,6 +24,13 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv('.env.live')
 
+try:
+    from .exchange_transport import get_signer, get_clock, session_pool
+    from .exchange_streams import ExchangeStreamManager
+except ImportError:
+    from exchange_transport import get_signer, get_clock, session_pool
+    from exchange_streams import ExchangeStreamManager
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -71,32 +78,33 @@ class OKXConnector:
         """Input validation would be added here"""
         self.config = config
         self.session = None
+        self.clock = get_clock(config.base_url)
         
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        # Pooled per-venue session; connections stay warm across connector instances
+        self.session = session_pool.get(self.config.base_url)
+        await self._sync_clock()
         return self
         
+    async def _sync_clock(self, force: bool = False) -> bool:
+        """Refresh the server clock offset when stale (no request otherwise); call before signing"""
+        return await self.clock.sync(self.session, f"{self.config.base_url}/api/v5/public/time", lambda data: data['data'][0]['ts'], force)
+        
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        # The pool owns the session; close it with session_pool.close()
+        self.session = None
     
     def _generate_signature(self, timestamp: str, method: str, request_path: str, body: str = "") -> str:
         """Input validation would be added here"""
         """Generate OKX API signature"""
         message = timestamp + method + request_path + body
-        signature = base64.b64encode(
-            hmac.new(
-                self.config.secret_key.encode('utf-8'),
-                message.encode('utf-8'),
-                hashlib.sha256
-            ).digest()
-        ).decode('utf-8')
-        return signature
+        return get_signer(self.config.secret_key, hashlib.sha256).b64digest(message)
     
     def _get_headers(self, method: str, request_path: str, body: str = "") -> Dict[str, str]:
         """Input validation would be added here"""
         """Get OKX API headers"""
-        timestamp = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+        now_ms = self.clock.now_ms()
+        timestamp = datetime.utcfromtimestamp(now_ms // 1000).strftime('%Y-%m-%dT%H:%M:%S') + f".{now_ms % 1000:03d}Z"
         signature = self._generate_signature(timestamp, method, request_path, body)
         
         return {
@@ -111,6 +119,7 @@ class OKXConnector:
         """Get ticker data"""
         try:
             request_path = f"/api/v5/market/ticker?instId={symbol}"
+            await self._sync_clock()
             headers = self._get_headers('GET', request_path)
             
             async with self.session.get(
@@ -137,6 +146,7 @@ class OKXConnector:
         """Get order book data"""
         try:
             request_path = f"/api/v5/market/books?instId={symbol}&sz={depth}"
+            await self._sync_clock()
             headers = self._get_headers('GET', request_path)
             
             async with self.session.get(
@@ -179,6 +189,7 @@ class OKXConnector:
             
             body = json.dumps(order_data)
             request_path = "/api/v5/trade/order"
+            await self._sync_clock()
             headers = self._get_headers('POST', request_path, body)
             
             async with self.session.post(
@@ -192,6 +203,9 @@ class OKXConnector:
                     logger.info(f"OKX order placed: {symbol} {side} {size}")
                     return data.get('data', [{}])[0]
                 else:
+                    if data.get('code') == '50102':
+                        # Timestamp request expired: resync now so the retry is signed correctly
+                        await self._sync_clock(force=True)
                     logger.error(f"OKX order failed: {data}")
                     
         except Exception as e:
@@ -206,29 +220,32 @@ class GateConnector:
         """Input validation would be added here"""
         self.config = config
         self.session = None
+        self.clock = get_clock(config.base_url)
         
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        # Pooled per-venue session; connections stay warm across connector instances
+        self.session = session_pool.get(self.config.base_url)
+        await self._sync_clock()
         return self
         
+    async def _sync_clock(self, force: bool = False) -> bool:
+        """Refresh the server clock offset when stale (no request otherwise); call before signing"""
+        return await self.clock.sync(self.session, f"{self.config.base_url}/api/v4/spot/time", lambda data: data['server_time'], force)
+        
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        # The pool owns the session; close it with session_pool.close()
+        self.session = None
     
     def _generate_signature(self, method: str, url_path: str, query_string: str, payload: str) -> str:
         """Input validation would be added here"""
         """Generate Gate.io API signature"""
-        timestamp = str(int(time.time()))
+        timestamp = str(int(self.clock.now()))
         
         # Create the string to sign
         string_to_sign = f"{method}\n{url_path}\n{query_string}\n{hashlib.sha512(payload.encode()).hexdigest()}\n{timestamp}"
         
         # Generate signature
-        signature = hmac.new(
-            self.config.secret_key.encode('utf-8'),
-            string_to_sign.encode('utf-8'),
-            hashlib.sha512
-        ).hexdigest()
+        signature = get_signer(self.config.secret_key, hashlib.sha512).hexdigest(string_to_sign)
         
         return signature, timestamp
     
@@ -252,6 +269,7 @@ class GateConnector:
             
             url_path = f"/api/v4/spot/tickers"
             query_string = f"currency_pair={gate_symbol}"
+            await self._sync_clock()
             headers = self._get_headers('GET', url_path, query_string)
             
             async with self.session.get(
@@ -282,6 +300,7 @@ class GateConnector:
             
             url_path = f"/api/v4/spot/order_book"
             query_string = f"currency_pair={gate_symbol}&limit={depth}"
+            await self._sync_clock()
             headers = self._get_headers('GET', url_path, query_string)
             
             async with self.session.get(
@@ -313,23 +332,26 @@ class BinanceConnector:
         """Input validation would be added here"""
         self.config = config
         self.session = None
+        self.clock = get_clock(config.base_url)
         
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        # Pooled per-venue session; connections stay warm across connector instances
+        self.session = session_pool.get(self.config.base_url)
+        await self._sync_clock()
         return self
         
+    async def _sync_clock(self, force: bool = False) -> bool:
+        """Refresh the server clock offset when stale (no request otherwise); call before signing"""
+        return await self.clock.sync(self.session, f"{self.config.base_url}/api/v3/time", lambda data: data['serverTime'], force)
+        
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        # The pool owns the session; close it with session_pool.close()
+        self.session = None
     
     def _generate_signature(self, query_string: str) -> str:
         """Input validation would be added here"""
         """Generate Binance API signature"""
-        return hmac.new(
-            self.config.secret_key.encode('utf-8'),
-            query_string.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
+        return get_signer(self.config.secret_key, hashlib.sha256).hexdigest(query_string)
     
     async def get_ticker(self, symbol: str) -> Optional[Ticker]:
         """Get ticker data"""
@@ -379,7 +401,8 @@ class BinanceConnector:
     async def place_order(self, symbol: str, side: str, size: float, price: Optional[float] = None) -> Optional[Dict]:
         """Place an order (testnet)"""
         try:
-            timestamp = int(time.time() * 1000)
+            await self._sync_clock()
+            timestamp = self.clock.now_ms()
             
             params = {
                 'symbol': symbol,
@@ -414,6 +437,9 @@ class BinanceConnector:
                     logger.info(f"Binance testnet order placed: {symbol} {side} {size}")
                     return data
                 else:
+                    if data.get('code') == -1021:
+                        # Timestamp outside recvWindow: resync now so the retry is signed correctly
+                        await self._sync_clock(force=True)
                     logger.error(f"Binance order failed: {data}")
                     
         except Exception as e:
@@ -427,6 +453,7 @@ class LiveExchangeManager:
     def __init__(self):
         """Input validation would be added here"""
         self.exchanges = {}
+        self.streams: Optional[ExchangeStreamManager] = None
         self._initialize_exchanges()
     
     def _initialize_exchanges(self):
@@ -535,11 +562,50 @@ class LiveExchangeManager:
         
         return results
     
+    def _stream_configs(self) -> List[Tuple[str, str, Any]]:
+        """(exchange_name, venue, config) for every exchange that can be streamed"""
+        configs = []
+        for exchange_name, config in self.exchanges.items():
+            for venue in ('okx', 'gate', 'binance'):
+                if venue in exchange_name:
+                    configs.append((exchange_name, venue, config))
+                    break
+        return configs
+    
+    async def start_streams(self, symbols: List[str]) -> ExchangeStreamManager:
+        """
+        Open websocket streams (tickers, L2 books, orders and fills) for every
+        configured exchange. Once running, best-price queries read local state
+        and fills are pushed to ExchangeStreamManager.on_fill subscribers.
+        """
+        if self.streams is not None:
+            await self.streams.stop()
+        self.streams = ExchangeStreamManager()
+        for exchange_name, venue, config in self._stream_configs():
+            self.streams.add_venue(exchange_name, venue, config, symbols)
+        await self.streams.start()
+        logger.info(f"📡 Streaming {len(symbols)} symbols from {len(self.streams.streams)} exchanges")
+        return self.streams
+    
+    async def stop_streams(self):
+        """Close websocket streams; price queries fall back to REST"""
+        if self.streams is not None:
+            await self.streams.stop()
+            self.streams = None
+    
     async def get_best_prices(self, symbol: str) -> Dict[str, float]:
         """Get best prices from all exchanges"""
         prices = {}
         
+        # Live stream state first; REST only for exchanges without a fresh ticker
+        if self.streams is not None:
+            streamed = self.streams.best_prices(symbol)
+            prices.update({name: price for name, price in streamed.items()
+                           if isinstance(self.exchanges.get(name), ExchangeConfig)})
+        
         for exchange_name, config in self.exchanges.items():
+            if exchange_name in prices:
+                continue
             try:
                 if 'okx' in exchange_name:
                     async with OKXConnector(config) as connector:
@@ -571,7 +637,8 @@ class LiveExchangeManager:
         symbol: str,
         side: str,
         size: float,
-        price: Optional[float] = None) -> Optional[Dict]:        """Place a paper trade on specified exchange"""
+        price: Optional[float] = None) -> Optional[Dict]:
+        """Place a paper trade on specified exchange"""
         if exchange_name not in self.exchanges:
             logger.error(f"Exchange {exchange_name} not configured")
             return None
@@ -642,6 +709,7 @@ async def main():
             logging.info("❌ OKX paper trade failed")
     
     logging.info("\n🎉 Live exchange testing completed!")
+    await session_pool.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -668,6 +736,15 @@ class EnhancedLiveExchangeManager(LiveExchangeManager):
         
         logger.info(f"Enhanced Exchange Manager initialized with {len(self.exchanges)} exchanges including BTC Markets")
     
+    def _btcmarkets_config(self) -> BTCMarketsConfig:
+        return BTCMarketsConfig(
+            api_key=self.exchanges['btcmarkets']['api_key'],
+            private_key=self.exchanges['btcmarkets']['private_key']
+        )
+    
+    def _stream_configs(self) -> List[Tuple[str, str, Any]]:
+        return super()._stream_configs() + [('btcmarkets', 'btcmarkets', self._btcmarkets_config())]
+    
     async def test_btcmarkets_connection(self) -> Dict[str, Any]:
         """Test BTC Markets connection"""
         try:
@@ -713,6 +790,16 @@ class EnhancedLiveExchangeManager(LiveExchangeManager):
         """Get BTC Markets prices for multiple symbols"""
         prices = {}
         
+        # Streamed ticks are keyed by the requested symbol; only fetch what's missing
+        if self.streams is not None:
+            for symbol in symbols:
+                streamed = self.streams.best_prices(symbol).get('btcmarkets')
+                if streamed is not None:
+                    prices[f"btcmarkets_{symbol}"] = streamed
+            symbols = [symbol for symbol in symbols if f"btcmarkets_{symbol}" not in prices]
+            if not symbols:
+                return prices
+        
         try:
             config = BTCMarketsConfig(
                 api_key=self.exchanges['btcmarkets']['api_key'],
@@ -737,7 +824,8 @@ class EnhancedLiveExchangeManager(LiveExchangeManager):
         symbol: str,
         side: str,
         amount: float,
-        price: Optional[float] = None) -> Optional[Dict]:        """Place order on BTC Markets"""
+        price: Optional[float] = None) -> Optional[Dict]:
+        """Place order on BTC Markets"""
         try:
             config = BTCMarketsConfig(
                 api_key=self.exchanges['btcmarkets']['api_key'],
@@ -853,6 +941,7 @@ async def test_btcmarkets_integration():
     
     logging.info("\n✅ BTC Markets integration testing completed!")
     logging.info("🇦🇺 BTC Markets successfully added to Ultimate Lyra Ecosystem!")
+    await session_pool.close()
 
 if __name__ == "__main__":
     asyncio.run(test_btcmarkets_integration())
@@ -38,6 +38,14 @@ class UltimateMultiSourceSystem:
         """TODO: Add function documentation"""
         self.db_path = "/home/ubuntu/ultimate_lyra_systems/ultimate_multi_source.db"
         
+        # Price source weights (base confidence) and per-cycle fetch budgets in seconds.
+        # Set before any client is built so a failing client can't leave them unset.
+        self.source_weights = {'coingecko': 0.95, 'polygon': 0.90, 'cryptocompare': 0.85}
+        self.source_budgets = {'coingecko': 8.0, 'polygon': 6.0, 'cryptocompare': 5.0}
+        self.staleness_half_life = 120.0  # seconds until a quote's weight halves
+        self.mad_threshold = 3.5  # robust z-score beyond which a quote is an outlier
+        self.mad_floor = 0.0015  # MAD floor as a fraction of the median (15 bp)
+        
         # Initialize all available APIs
         self.setup_all_apis()
         
@@ -184,193 +192,285 @@ class UltimateMultiSourceSystem:
     async def fetch_multi_source_prices(self, symbols: List[str]):
         """Fetch prices from multiple sources for cross-validation"""
         try:
-            all_prices = {}
-            
-            # Source 1: CoinGecko (primary)
-            try:
-                coingecko_data = self.coingecko.get_coins_markets(
-                    vs_currency='usd',
-                    ids=','.join([s.lower() for s in symbols[:100]]),
-                    order='market_cap_desc',
-                    per_page=100,
-                    page=1,
-                    sparkline=False,
-                    price_change_percentage='24h'
+            fetched_at = time.time()
+            
+            # All sources run concurrently; each is cut off at its own budget so a
+            # slow provider only drops its own quotes instead of stalling the cycle
+            async with aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=10, ttl_dns_cache=300)
+            ) as session:
+                results = await asyncio.gather(
+                    self._run_source('coingecko', self._fetch_coingecko(symbols)),
+                    self._run_source('polygon', self._fetch_polygon(symbols)),
+                    self._run_source('cryptocompare', self._fetch_cryptocompare(session, symbols))
                 )
                 
-                for coin in coingecko_data:
-                    symbol = coin['symbol'].upper()
-                    all_prices[symbol] = all_prices.get(symbol, {})
-                    all_prices[symbol]['coingecko'] = {
-                        'price': coin['current_price'],
-                        'volume': coin['total_volume'],
-                        'market_cap': coin['market_cap'],
-                        'change_24h': coin.get('price_change_percentage_24h', 0),
-                        'confidence': 0.95,
-                        'timestamp': datetime.now()
-                    }
-                
-                logger.info(f"✅ CoinGecko: Fetched {len(coingecko_data)} coins")
-                
-            except Exception as e:
-                logger.warning(f"CoinGecko error: {e}")
-            
-            # Source 2: Polygon.io for major cryptos
-            try:
-                major_cryptos = ['BTC', 'ETH', 'SOL', 'ADA', 'DOT']
-                for symbol in major_cryptos:
-                    if symbol in symbols:
-                        try:
-                            # Get crypto data from Polygon
-                            ticker = f"X:{symbol}USD"
-                            aggs = self.polygon_client.get_aggs(
-                                ticker=ticker,
-                                multiplier=1,
-                                timespan="day",
-                                from_=(datetime.now() - timedelta(days=2)).strftime('%Y-%m-%d'),
-                                to=datetime.now().strftime('%Y-%m-%d')
-                            )
-                            
-                            if aggs and len(aggs) > 0:
-                                latest = aggs[-1]
-                                all_prices[symbol] = all_prices.get(symbol, {})
-                                all_prices[symbol]['polygon'] = {
-                                    'price': latest.close,
-                                    'volume': latest.volume,
-                                    'change_24h': ((latest.close - latest.open) / latest.open) * 100,
-                                    'confidence': 0.90,
-                                    'timestamp': datetime.now()
-                                }
-                        except Exception as e:
-                            logger.warning(f"Polygon error for {symbol}: {e}")
-                
-                logger.info("✅ Polygon.io: Fetched major crypto data")
-                
-            except Exception as e:
-                logger.warning(f"Polygon.io error: {e}")
-            
-            # Source 3: CryptoCompare (free tier)
-            try:
-                async with aiohttp.ClientSession() as session:
-                    symbols_str = ','.join(symbols[:50])  # Limit for free tier
-                    url = f"https://min-api.cryptocompare.com/data/pricemultifull?fsyms={symbols_str}&tsyms=USD"
+            all_prices = {}
+            for source, quotes in results:
+                for symbol, quote in quotes.items():
+                    quote.setdefault('source_time', fetched_at)
+                    all_prices.setdefault(symbol, {})[source] = quote
                     
-                    async with session.get(url) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            
-                            if 'RAW' in data:
-                                for symbol, usd_data in data['RAW'].items():
-                                    if 'USD' in usd_data:
-                                        price_data = usd_data['USD']
-                                        all_prices[symbol] = all_prices.get(symbol, {})
-                                        all_prices[symbol]['cryptocompare'] = {
-                                            'price': price_data.get('PRICE', 0),
-                                            'volume': price_data.get('VOLUME24HOUR', 0),
-                                            'market_cap': price_data.get('MKTCAP', 0),
-                                            'change_24h': price_data.get('CHANGEPCT24HOUR', 0),
-                                            'confidence': 0.85,
-                                            'timestamp': datetime.now()
-                                        }
-                            
-                            logger.info("✅ CryptoCompare: Fetched price data")
-                
-            except Exception as e:
-                logger.warning(f"CryptoCompare error: {e}")
-            
             # Calculate consensus prices
             consensus_prices = self.calculate_price_consensus(all_prices)
             
-            # Store in database
-            self.store_multi_source_prices(consensus_prices)
+            # Store in database (one transaction per cycle, off the event loop)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.store_multi_source_prices, consensus_prices)
             
             return consensus_prices
             
         except Exception as e:
             logger.error(f"Error fetching multi-source prices: {e}")
             return {}
-    
-    def calculate_price_consensus(self, all_prices: Dict):
-        """Calculate consensus prices from multiple sources"""
-        try:
-            consensus = {}
             
-            for symbol, sources in all_prices.items():
-                if not sources:
-                    continue
-                
-                prices = []
-                weights = []
-                total_confidence = 0
-                
-                for source, data in sources.items():
-                    if data['price'] > 0:
-                        prices.append(data['price'])
-                        weights.append(data['confidence'])
-                        total_confidence += data['confidence']
+    async def _run_source(self, source: str, coro):
+        """Await one source within its budget; returns (source, quotes)"""
+        started = time.monotonic()
+        try:
+            quotes = await asyncio.wait_for(coro, timeout=self.source_budgets.get(source, 5.0))
+            logger.info(f"✅ {source}: {len(quotes)} symbols in {(time.monotonic() - started) * 1000:.0f}ms")
+            return source, quotes
+        except asyncio.TimeoutError:
+            logger.warning(f"{source} exceeded {self.source_budgets.get(source, 5.0):.1f}s budget - skipped this cycle")
+        except Exception as e:
+            logger.warning(f"{source} error: {e}")
+        return source, {}
+        
+    async def _fetch_coingecko(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Source 1: CoinGecko (primary), one request per 100 ids, all in flight at once"""
+        loop = asyncio.get_running_loop()
+        
+        def fetch_page(chunk):
+            """Blocking CoinGecko markets call for one page of ids (run in the executor)."""
+            return self.coingecko.get_coins_markets(
+                vs_currency='usd',
+                ids=','.join([s.lower() for s in chunk]),
+                order='market_cap_desc',
+                per_page=100,
+                page=1,
+                sparkline=False,
+                price_change_percentage='24h'
+            )
+            
+        chunks = [symbols[i:i + 100] for i in range(0, len(symbols), 100)]
+        pages = await asyncio.gather(*[loop.run_in_executor(None, fetch_page, chunk) for chunk in chunks])
+        
+        quotes = {}
+        for coingecko_data in pages:
+            for coin in coingecko_data:
+                try:
+                    source_time = pd.Timestamp(coin['last_updated']).timestamp()
+                except Exception:
+                    source_time = time.time()
+                quotes[coin['symbol'].upper()] = {
+                    'price': coin['current_price'],
+                    'volume': coin['total_volume'],
+                    'market_cap': coin['market_cap'],
+                    'change_24h': coin.get('price_change_percentage_24h', 0),
+                    'confidence': self.source_weights['coingecko'],
+                    'source_time': source_time,
+                    'timestamp': datetime.now()
+                }
+        return quotes
+        
+    async def _fetch_polygon(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Source 2: Polygon.io for major cryptos, one aggregate query per symbol in parallel"""
+        loop = asyncio.get_running_loop()
+        major_cryptos = [s for s in ['BTC', 'ETH', 'SOL', 'ADA', 'DOT'] if s in symbols]
+        from_date = (datetime.now() - timedelta(days=2)).strftime('%Y-%m-%d')
+        to_date = datetime.now().strftime('%Y-%m-%d')
+        
+        def fetch_aggs(symbol):
+            """Blocking Polygon daily aggregates call for one symbol (run in the executor)."""
+            return self.polygon_client.get_aggs(
+                ticker=f"X:{symbol}USD",
+                multiplier=1,
+                timespan="day",
+                from_=from_date,
+                to=to_date
+            )
+            
+        results = await asyncio.gather(
+            *[loop.run_in_executor(None, fetch_aggs, symbol) for symbol in major_cryptos],
+            return_exceptions=True
+        )
+        
+        quotes = {}
+        for symbol, aggs in zip(major_cryptos, results):
+            if isinstance(aggs, Exception):
+                logger.warning(f"Polygon error for {symbol}: {aggs}")
+                continue
+            if aggs and len(aggs) > 0:
+                latest = aggs[-1]
+                quotes[symbol] = {
+                    'price': latest.close,
+                    'volume': latest.volume,
+                    'change_24h': ((latest.close - latest.open) / latest.open) * 100,
+                    'confidence': self.source_weights['polygon'],
+                    'timestamp': datetime.now()
+                }
+        return quotes
+        
+    async def _fetch_cryptocompare(self, session: aiohttp.ClientSession, symbols: List[str]) -> Dict[str, Dict]:
+        """Source 3: CryptoCompare (free tier), 50 symbols per request over one shared session"""
+        
+        async def fetch_chunk(chunk):
+            """Fetch one chunk of symbols from pricemultifull; {} on a non-200 response."""
+            url = f"https://min-api.cryptocompare.com/data/pricemultifull?fsyms={','.join(chunk)}&tsyms=USD"
+            async with session.get(url) as response:
+                if response.status != 200:
+                    logger.warning(f"CryptoCompare HTTP {response.status}")
+                    return {}
+                return await response.json()
                 
-                if prices:
-                    # Weighted average price
-                    weighted_price = sum(p * w for p, w in zip(prices, weights)) / sum(weights)
-                    
-                    # Calculate price variance for quality assessment
-                    variance = np.var(prices) if len(prices) > 1 else 0
-                    quality = "HIGH" if variance < (weighted_price * 0.01) else "MEDIUM" if variance < (weighted_price * 0.05) else "LOW"
-                    
-                    consensus[symbol] = {
-                        'consensus_price': weighted_price,
-                        'source_count': len(prices),
-                        'confidence_score': total_confidence / len(prices),
-                        'price_variance': variance,
-                        'data_quality': quality,
-                        'sources': sources,
+        chunks = [symbols[i:i + 50] for i in range(0, len(symbols), 50)]
+        pages = await asyncio.gather(*[fetch_chunk(chunk) for chunk in chunks])
+        
+        quotes = {}
+        for data in pages:
+            for symbol, usd_data in data.get('RAW', {}).items():
+                if 'USD' in usd_data:
+                    price_data = usd_data['USD']
+                    quotes[symbol] = {
+                        'price': price_data.get('PRICE', 0),
+                        'volume': price_data.get('VOLUME24HOUR', 0),
+                        'market_cap': price_data.get('MKTCAP', 0),
+                        'change_24h': price_data.get('CHANGEPCT24HOUR', 0),
+                        'confidence': self.source_weights['cryptocompare'],
+                        'source_time': float(price_data.get('LASTUPDATE') or time.time()),
                         'timestamp': datetime.now()
                     }
-            
+        return quotes
+        
+    def calculate_price_consensus(self, all_prices: Dict):
+        """
+        Calculate consensus prices from multiple sources.
+        
+        Works on a symbols x sources matrix in one pass: each quote is weighted by
+        source confidence decayed by its age (staleness half-life), quotes further
+        than mad_threshold robust z-scores from the row median are rejected, and the
+        consensus is the weighted median of what remains.
+        """
+        try:
+            symbols = [symbol for symbol, sources in all_prices.items() if sources]
+            if not symbols:
+                logger.info("✅ Calculated consensus for 0 symbols")
+                return {}
+            source_names = sorted({source for symbol in symbols for source in all_prices[symbol]})
+            column = {source: j for j, source in enumerate(source_names)}
+            
+            shape = (len(symbols), len(source_names))
+            prices = np.full(shape, np.nan)
+            confidence = np.zeros(shape)
+            source_time = np.zeros(shape)
+            for i, symbol in enumerate(symbols):
+                for source, data in all_prices[symbol].items():
+                    j = column[source]
+                    prices[i, j] = data.get('price') or np.nan
+                    confidence[i, j] = data.get('confidence', 0)
+                    source_time[i, j] = data.get('source_time', 0)
+                    
+            valid = np.isfinite(prices) & (prices > 0)
+            priced = valid.any(axis=1)
+            symbols = [symbol for symbol, keep in zip(symbols, priced) if keep]
+            prices, confidence, source_time, valid = prices[priced], confidence[priced], source_time[priced], valid[priced]
+            prices = np.where(valid, prices, np.nan)
+            
+            # Staleness weighting
+            age = np.clip(time.time() - source_time, 0, None)
+            weights = np.where(valid, confidence * 0.5 ** (age / self.staleness_half_life), 0.0)
+            
+            # MAD outlier rejection (MAD floored at mad_floor of the median so agreeing
+            # sources with identical prints don't turn ordinary cross-venue basis into an outlier)
+            with np.errstate(all='ignore'):
+                median = np.nanmedian(prices, axis=1, keepdims=True)
+                deviation = np.abs(prices - median)
+                mad = np.fmax(np.nanmedian(deviation, axis=1, keepdims=True), median * self.mad_floor)
+                robust_z = 0.6745 * deviation / mad
+            accepted = valid & (robust_z <= self.mad_threshold)
+            weights = np.where(accepted, weights, 0.0)
+            
+            # Fall back to unweighted acceptance when every surviving quote has decayed to zero
+            total_weight = weights.sum(axis=1)
+            fallback = total_weight <= 0
+            weights[fallback] = accepted[fallback].astype(float)
+            total_weight = weights.sum(axis=1)
+            
+            # Weighted median: sort each row by price, take the first cumulative weight >= 50%
+            order = np.argsort(np.where(accepted, prices, np.inf), axis=1)
+            sorted_prices = np.take_along_axis(prices, order, axis=1)
+            cumulative = np.cumsum(np.take_along_axis(weights, order, axis=1), axis=1)
+            median_index = np.argmax(cumulative >= 0.5 * total_weight[:, None], axis=1)
+            consensus_price = sorted_prices[np.arange(len(symbols)), median_index]
+            
+            source_count = accepted.sum(axis=1)
+            accepted_prices = np.where(accepted, prices, 0.0)
+            mean_price = accepted_prices.sum(axis=1) / source_count
+            variance = (np.where(accepted, prices - mean_price[:, None], 0.0) ** 2).sum(axis=1) / source_count
+            confidence_score = np.where(accepted, confidence, 0.0).sum(axis=1) / source_count
+            quality = np.where(variance < consensus_price * 0.01, "HIGH",
+                               np.where(variance < consensus_price * 0.05, "MEDIUM", "LOW"))
+                               
+            consensus = {}
+            timestamp = datetime.now()
+            for i, symbol in enumerate(symbols):
+                consensus[symbol] = {
+                    'consensus_price': float(consensus_price[i]),
+                    'source_count': int(source_count[i]),
+                    'confidence_score': float(confidence_score[i]),
+                    'price_variance': float(variance[i]),
+                    'data_quality': str(quality[i]),
+                    'rejected_sources': [source_names[j] for j in np.flatnonzero(valid[i] & ~accepted[i])],
+                    'sources': all_prices[symbol],
+                    'timestamp': timestamp
+                }
+                
             logger.info(f"✅ Calculated consensus for {len(consensus)} symbols")
             return consensus
             
         except Exception as e:
             logger.error(f"Error calculating price consensus: {e}")
             return {}
-    
+            
     def store_multi_source_prices(self, consensus_prices: Dict):
-        """Store multi-source price data in database"""
+        """Store multi-source price data in database (single transaction per cycle)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             timestamp = datetime.now()
+            rows = []
             
             for symbol, data in consensus_prices.items():
-                # Store consensus price
-                cursor.execute('''
-                    INSERT INTO multi_source_prices (
-                        timestamp, symbol, source, price_usd, volume_24h,
-                        market_cap, price_change_24h, confidence_score, data_quality
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
+                # Consensus price
+                rows.append((
                     timestamp, symbol, 'CONSENSUS', data['consensus_price'],
                     0, 0, 0, data['confidence_score'], data['data_quality']
                 ))
                 
-                # Store individual source data
+                # Individual source data; quotes rejected as outliers are kept for audit
+                rejected = set(data.get('rejected_sources', []))
                 for source, source_data in data['sources'].items():
-                    cursor.execute('''
-                        INSERT INTO multi_source_prices (
-                            timestamp, symbol, source, price_usd, volume_24h,
-                            market_cap, price_change_24h, confidence_score, data_quality
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
+                    rows.append((
                         timestamp, symbol, source.upper(), source_data['price'],
                         source_data.get('volume', 0), source_data.get('market_cap', 0),
                         source_data.get('change_24h', 0), source_data['confidence'],
-                        data['data_quality']
+                        'OUTLIER' if source in rejected else data['data_quality']
                     ))
-            
-            conn.commit()
-            conn.close()
-            
+                    
+            if not rows:
+                return
+                
+            conn = sqlite3.connect(self.db_path)
+            try:
+                with conn:
+                    conn.executemany('''
+                        INSERT INTO multi_source_prices (
+                            timestamp, symbol, source, price_usd, volume_24h,
+                            market_cap, price_change_24h, confidence_score, data_quality
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', rows)
+            finally:
+                conn.close()
+                
         except Exception as e:
             logger.error(f"Error storing multi-source prices: {e}")
     
@@ -559,13 +659,9 @@ class UltimateMultiSourceSystem:
             
             # Aggregate assessments
             assessments = [r.get('overall_assessment', 'NEUTRAL') for r in ai_responses]
-            risk_scores = [r.get('risk_score',
-                5.0) for r in ai_responses if isinstance(r.get('risk_score'),
-                (int,
-                float))]            confidences = [r.get('confidence',
-                75.0) for r in ai_responses if isinstance(r.get('confidence'),
-                (int,
-                float))]            outlooks = [r.get('market_outlook', 'NEUTRAL') for r in ai_responses]
+            risk_scores = [r.get('risk_score', 5.0) for r in ai_responses if isinstance(r.get('risk_score'), (int, float))]
+            confidences = [r.get('confidence', 75.0) for r in ai_responses if isinstance(r.get('confidence'), (int, float))]
+            outlooks = [r.get('market_outlook', 'NEUTRAL') for r in ai_responses]
             
             # Calculate consensus
             consensus = {
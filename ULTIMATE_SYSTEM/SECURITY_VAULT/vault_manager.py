@@ -17,23 +17,63 @@ import time
 import hashlib
 import secrets
 import logging
+import threading
+import atexit
+import weakref
+from collections import defaultdict, deque
 from datetime import datetime, timedelta
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import base64
 
+# Live vaults, flushed by a single exit hook instead of one registration per instance
+_open_vaults = weakref.WeakSet()
+
+def _close_open_vaults():
+    """Write queued access records of every vault still alive at interpreter exit."""
+    for vault in list(_open_vaults):
+        vault.close()
+
+atexit.register(_close_open_vaults)
+
 class VaultManager:
-    """Enterprise-grade vault system for secure key management."""
+    """Enterprise-grade vault system for secure key management.
     
-    def __init__(self):
-        """TODO: Add function documentation"""
+    Decrypted secrets are held in an in-process cache and re-validated
+    against the vault file (mtime) once their TTL lapses, so hot-path
+    fetches are plain dictionary reads. Access counts and SECRET_ACCESSED
+    audit entries are queued and written in batches by a background
+    flusher; every access still produces its own audit record carrying
+    the time it happened.
+    
+    The cache is not mlock()ed: secrets are returned as immutable str
+    objects, and Python copies those freely, so the plaintext can be swapped
+    to disk like any other heap page. Hosts that must keep secrets out of
+    swap need encrypted or disabled swap; the cache only narrows how long
+    and how widely the plaintext lives (cache_ttl, invalidate(), close()).
+    """
+    
+    def __init__(self, cache_ttl=300.0, audit_flush_interval=1.0):
+        """Decrypted secrets are cached for cache_ttl seconds; access records are written every audit_flush_interval seconds."""
         self.vault_path = "/home/ubuntu/ULTIMATE_LYRA_ECOSYSTEM_FINAL_SEGMENTED/security/vault"
         self.audit_path = "/home/ubuntu/ULTIMATE_LYRA_ECOSYSTEM_FINAL_SEGMENTED/security/audit"
         self.master_key = self._generate_master_key()
         self.cipher_suite = Fernet(self.master_key)
         self._ensure_directories()
         
+        self.cache_ttl = cache_ttl
+        self.audit_flush_interval = audit_flush_interval
+        # key_name -> (decrypted_value, expires_at (monotonic), file mtime_ns)
+        self._cache = {}
+        self._lock = threading.RLock()
+        self._io_lock = threading.Lock()
+        self._pending_access = deque()
+        self._subscribers = defaultdict(list)
+        self._flush_event = threading.Event()
+        self._flusher = None
+        _open_vaults.add(self)
+        
     def _ensure_directories(self):
         """Ensure vault and audit directories exist."""
         os.makedirs(self.vault_path, mode=0o700, exist_ok=True)
@@ -47,11 +87,24 @@ class VaultManager:
                 return f.read()
         else:
             key = Fernet.generate_key()
+            os.makedirs(os.path.dirname(key_file), mode=0o700, exist_ok=True)
             with open(key_file, 'wb') as f:
                 f.write(key)
             os.chmod(key_file, 0o600)
             return key
     
+    def _secret_file(self, key_name):
+        """Path of the vault file holding key_name."""
+        return os.path.join(self.vault_path, f"{key_name}.vault")
+    
+    def _write_secret_file(self, secret_file, secret_data):
+        """Atomically replace a vault file so readers never see a partial write."""
+        tmp_file = f"{secret_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(secret_data, f, indent=2)
+        os.chmod(tmp_file, 0o600)
+        os.replace(tmp_file, secret_file)
+    
     def store_secret(self, key_name, secret_value, metadata=None):
         """Store a secret in the vault with encryption."""
         encrypted_secret = self.cipher_suite.encrypt(secret_value.encode())
@@ -64,60 +117,196 @@ class VaultManager:
             "last_accessed": None
         }
         
-        secret_file = os.path.join(self.vault_path, f"{key_name}.vault")
-        with open(secret_file, 'w') as f:
-            json.dump(secret_data, f, indent=2)
-        os.chmod(secret_file, 0o600)
+        secret_file = self._secret_file(key_name)
+        with self._lock:
+            # Land pending access counts on the old file before it is replaced
+            self.flush()
+            with self._io_lock:
+                self._write_secret_file(secret_file, secret_data)
+                self._cache_value(key_name, secret_value, os.stat(secret_file).st_mtime_ns)
         
         self._audit_log("SECRET_STORED", key_name, {"metadata": metadata})
         
     def retrieve_secret(self, key_name):
         """Retrieve and decrypt a secret from the vault."""
-        secret_file = os.path.join(self.vault_path, f"{key_name}.vault")
-        if not os.path.exists(secret_file):
-            raise ValueError(f"Secret {key_name} not found in vault")
+        entry = self._cache.get(key_name)
+        if entry is None or entry[1] <= time.monotonic():
+            entry = self._revalidate(key_name)
+        
+        # Access tracking is batched; the flusher writes counts and audit lines
+        self._pending_access.append((key_name, time.time()))
+        if self._flusher is None:
+            self._start_flusher()
+        return entry[0]
+    
+    def _revalidate(self, key_name):
+        """Reload a missing or expired cache entry, decrypting only if the file changed."""
+        with self._lock:
+            entry = self._cache.get(key_name)
+            if entry is not None and entry[1] > time.monotonic():
+                return entry
             
-        with open(secret_file, 'r') as f:
-            secret_data = json.load(f)
+            secret_file = self._secret_file(key_name)
+            try:
+                mtime_ns = os.stat(secret_file).st_mtime_ns
+            except FileNotFoundError:
+                self._cache.pop(key_name, None)
+                raise ValueError(f"Secret {key_name} not found in vault")
             
-        encrypted_secret = base64.b64decode(secret_data["encrypted_value"])
-        decrypted_value = self.cipher_suite.decrypt(encrypted_secret).decode()
-        
-        # Update access tracking
-        secret_data["access_count"] += 1
-        secret_data["last_accessed"] = datetime.utcnow().isoformat()
-        
-        with open(secret_file, 'w') as f:
-            json.dump(secret_data, f, indent=2)
+            if entry is not None and entry[2] == mtime_ns:
+                entry = (entry[0], time.monotonic() + self.cache_ttl, mtime_ns)
+                self._cache[key_name] = entry
+                return entry
             
-        self._audit_log("SECRET_ACCESSED", key_name, {"access_count": secret_data["access_count"]})
-        return decrypted_value
+            with open(secret_file, 'r') as f:
+                secret_data = json.load(f)
+            encrypted_secret = base64.b64decode(secret_data["encrypted_value"])
+            decrypted_value = self.cipher_suite.decrypt(encrypted_secret).decode()
+            return self._cache_value(key_name, decrypted_value, mtime_ns)
+    
+    def _cache_value(self, key_name, value, mtime_ns):
+        """Install a decrypted value and notify subscribers if it changed."""
+        previous = self._cache.get(key_name)
+        entry = (value, time.monotonic() + self.cache_ttl, mtime_ns)
+        self._cache[key_name] = entry
+        if previous is not None and previous[0] != value:
+            self._notify(key_name, value)
+        return entry
+    
+    def invalidate(self, key_name=None):
+        """Drop one (or every) cached secret so the next fetch re-reads the vault."""
+        with self._lock:
+            if key_name is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(key_name, None)
+    
+    def subscribe(self, key_name, callback):
+        """Call callback(key_name, new_value) when key_name is rotated or revoked (new_value None)."""
+        with self._lock:
+            self._subscribers[key_name].append(callback)
+        return lambda: self.unsubscribe(key_name, callback)
+    
+    def unsubscribe(self, key_name, callback):
+        """Remove a rotation callback."""
+        with self._lock:
+            if callback in self._subscribers.get(key_name, []):
+                self._subscribers[key_name].remove(callback)
+    
+    def _notify(self, key_name, new_value):
+        """Push a rotated value to subscribers; a failing callback never blocks the rest."""
+        for callback in list(self._subscribers.get(key_name, [])):
+            try:
+                callback(key_name, new_value)
+            except Exception as e:
+                logging.error(f"Vault subscriber error for {key_name}: {e}")
     
     def rotate_secret(self, key_name, new_secret_value):
         """Rotate a secret with audit trail."""
-        old_secret_file = os.path.join(self.vault_path, f"{key_name}.vault")
-        if os.path.exists(old_secret_file):
-            # Backup old secret
-            backup_file = os.path.join(self.vault_path, f"{key_name}.backup.{int(time.time())}")
-            os.rename(old_secret_file, backup_file)
-            
-        self.store_secret(key_name, new_secret_value, {"rotated_at": datetime.utcnow().isoformat()})
+        old_secret_file = self._secret_file(key_name)
+        with self._lock:
+            self.flush()
+            # Under the io lock so a concurrent flush cannot rewrite the file mid-rename
+            with self._io_lock:
+                if os.path.exists(old_secret_file):
+                    # Backup old secret
+                    backup_file = os.path.join(self.vault_path, f"{key_name}.backup.{int(time.time())}")
+                    os.rename(old_secret_file, backup_file)
+                
+            self.store_secret(key_name, new_secret_value, {"rotated_at": datetime.utcnow().isoformat()})
         self._audit_log("SECRET_ROTATED", key_name, {"backup_created": True})
         
     def revoke_secret(self, key_name):
         """Revoke a secret and move to revoked directory."""
-        secret_file = os.path.join(self.vault_path, f"{key_name}.vault")
-        if os.path.exists(secret_file):
-            revoked_dir = os.path.join(self.vault_path, "revoked")
-            os.makedirs(revoked_dir, exist_ok=True)
-            revoked_file = os.path.join(revoked_dir, f"{key_name}.revoked.{int(time.time())}")
-            os.rename(secret_file, revoked_file)
-            self._audit_log("SECRET_REVOKED", key_name, {"revoked_file": revoked_file})
+        secret_file = self._secret_file(key_name)
+        with self._lock:
+            self.flush()
+            self._cache.pop(key_name, None)
+            revoked_file = None
+            # Under the io lock so a concurrent flush cannot write the revoked file back
+            with self._io_lock:
+                if os.path.exists(secret_file):
+                    revoked_dir = os.path.join(self.vault_path, "revoked")
+                    os.makedirs(revoked_dir, exist_ok=True)
+                    revoked_file = os.path.join(revoked_dir, f"{key_name}.revoked.{int(time.time())}")
+                    os.rename(secret_file, revoked_file)
+            if revoked_file is not None:
+                self._audit_log("SECRET_REVOKED", key_name, {"revoked_file": revoked_file})
+                self._notify(key_name, None)
+    
+    def _start_flusher(self):
+        """Start the background thread that batches access tracking writes."""
+        with self._lock:
+            if self._flusher is None:
+                self._flush_event.clear()
+                self._flusher = threading.Thread(target=self._flush_loop, name="vault-audit-flusher", daemon=True)
+                self._flusher.start()
+    
+    def _flush_loop(self):
+        """Flush queued accesses every audit_flush_interval seconds until closed."""
+        while not self._flush_event.wait(self.audit_flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Vault audit flush failed: {e}")
+    
+    def flush(self):
+        """Write queued accesses: one vault-file update per secret, one audit line per access."""
+        batch = []
+        while self._pending_access:
+            batch.append(self._pending_access.popleft())
+        if not batch:
+            return 0
+        
+        per_key = defaultdict(list)
+        for key_name, accessed_at in batch:
+            per_key[key_name].append(datetime.utcfromtimestamp(accessed_at).isoformat())
+        
+        audit_entries = []
+        with self._io_lock:
+            for key_name, accessed_times in per_key.items():
+                secret_file = self._secret_file(key_name)
+                try:
+                    read_mtime_ns = os.stat(secret_file).st_mtime_ns
+                    with open(secret_file, 'r') as f:
+                        secret_data = json.load(f)
+                except FileNotFoundError:
+                    # Revoked or mid-rotation: audit the accesses but never recreate the file
+                    secret_data = None
+                
+                base_count = secret_data["access_count"] if secret_data else 0
+                for offset, accessed_at in enumerate(accessed_times, 1):
+                    audit_entries.append(self._audit_entry(
+                        "SECRET_ACCESSED", key_name, {"access_count": base_count + offset}, accessed_at
+                    ))
+                
+                if secret_data is not None:
+                    secret_data["access_count"] = base_count + len(accessed_times)
+                    secret_data["last_accessed"] = accessed_times[-1]
+                    self._write_secret_file(secret_file, secret_data)
+                    # Our own bookkeeping write must not look like a rotation, but an
+                    # external change the cache has not seen yet must stay visible
+                    cached = self._cache.get(key_name)
+                    if cached is not None and cached[2] == read_mtime_ns:
+                        self._cache[key_name] = (cached[0], cached[1], os.stat(secret_file).st_mtime_ns)
             
-    def _audit_log(self, action, key_name, details):
-        """Log security events for compliance auditing."""
-        audit_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
+            audit_entries.sort(key=lambda entry: entry["timestamp"])
+            self._write_audit_entries(audit_entries)
+        return len(batch)
+    
+    def close(self):
+        """Stop the flusher, write any queued access records and drop the decrypted cache."""
+        self._flush_event.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+            self._flusher = None
+        self.flush()
+        self.invalidate()
+            
+    def _audit_entry(self, action, key_name, details, timestamp=None):
+        """Build one compliance audit record."""
+        return {
+            "timestamp": timestamp or datetime.utcnow().isoformat(),
             "action": action,
             "key_name": key_name,
             "details": details,
@@ -125,10 +314,23 @@ class VaultManager:
             "ip_address": "127.0.0.1",  # In production, get real IP
             "session_id": hashlib.md5(f"{time.time()}".encode()).hexdigest()[:8]
         }
-        
-        audit_file = os.path.join(self.audit_path, f"security_audit_{datetime.utcnow().strftime('%Y%m%d')}.log")
-        with open(audit_file, 'a') as f:
-            f.write(json.dumps(audit_entry) + "\n")
+    
+    def _write_audit_entries(self, audit_entries):
+        """Append audit records to their daily log files in a single write per file."""
+        per_file = defaultdict(list)
+        for entry in audit_entries:
+            day = entry["timestamp"][:10].replace("-", "")
+            per_file[os.path.join(self.audit_path, f"security_audit_{day}.log")].append(json.dumps(entry))
+        for audit_file, lines in per_file.items():
+            with open(audit_file, 'a') as f:
+                f.write("\n".join(lines) + "\n")
+            
+    def _audit_log(self, action, key_name, details):
+        """Log security events for compliance auditing."""
+        # Queued accesses happened first; keep the log in event order
+        self.flush()
+        with self._io_lock:
+            self._write_audit_entries([self._audit_entry(action, key_name, details)])
 
 class ComplianceManager:
     """Manages compliance requirements for regulated trading."""
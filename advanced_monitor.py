@@ -2,16 +2,27 @@
 import time
 import json
 import threading
+import numpy as np
+from collections import deque
 from datetime import datetime
-from typing import Dict, List, Callable
+from typing import Dict, List, Callable, Optional
+
+from metrics_core import MetricsRegistry, MetricSeries, metrics_registry
 
 class AdvancedMonitor:
-    """Advanced monitoring system with predictive alerts"""
+    """
+    Advanced monitoring system with predictive alerts.
+    
+    Samples go into metrics_core ring buffers and are checked against their
+    thresholds as they are recorded (two comparisons); rollups are folded in
+    when the registry collects (start_monitoring() runs that every second).
+    """
     
-    def __init__(self):
-        self.metrics = {}
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        self.registry = registry or metrics_registry
+        self.metrics: Dict[str, MetricSeries] = {}
         self.thresholds = {}
-        self.alerts = []
+        self.alerts = deque(maxlen=1000)
         self.callbacks = {}
         self.monitoring_active = False
         
@@ -21,26 +32,29 @@ class AdvancedMonitor:
             'warning': warning_threshold,
             'critical': critical_threshold
         }
-        self.metrics[name] = []
+        self.metrics[name] = self.registry.gauge(name)
         
     def record_metric(self, name: str, value: float):
-        """Record a metric value"""
-        timestamp = time.time()
+        """Record a metric value and check it against its thresholds"""
+        series = self.metrics.get(name)
+        if series is None:
+            series = self.metrics[name] = self.registry.gauge(name)
+        series.record(value)
+        self.check_thresholds(name, value)
         
-        if name not in self.metrics:
-            self.metrics[name] = []
-            
-        self.metrics[name].append({
-            'timestamp': timestamp,
-            'value': value
-        })
+    def collect(self) -> List[Dict]:
+        """Fold recorded samples into rollups (and evaluate any registry rules) now"""
+        return self.registry.collect()
         
-        # Keep only last 1000 entries
-        if len(self.metrics[name]) > 1000:
-            self.metrics[name] = self.metrics[name][-1000:]
-            
-        # Check thresholds
-        self.check_thresholds(name, value)
+    def start_monitoring(self, interval: float = 1.0):
+        """Collect into rollups every interval seconds in the background"""
+        self.monitoring_active = True
+        self.registry.start(interval)
+        
+    def stop_monitoring(self):
+        """Stop background collection"""
+        self.monitoring_active = False
+        self.registry.stop()
         
     def check_thresholds(self, name: str, value: float):
         """Check if value exceeds thresholds"""
@@ -77,17 +91,19 @@ class AdvancedMonitor:
         
     def get_trend(self, metric_name: str, window: int = 10) -> str:
         """Get trend for a metric"""
-        if metric_name not in self.metrics or len(self.metrics[metric_name]) < window:
+        series = self.metrics.get(metric_name)
+        if series is None or min(series.count, series.capacity) < window:
             return "INSUFFICIENT_DATA"
             
-        recent_values = [m['value'] for m in self.metrics[metric_name][-window:]]
+        recent_values = series.last(window)
         
         if len(recent_values) < 2:
             return "STABLE"
             
         # Simple trend calculation
-        first_half = sum(recent_values[:len(recent_values)//2]) / (len(recent_values)//2)
-        second_half = sum(recent_values[len(recent_values)//2:]) / (len(recent_values) - len(recent_values)//2)
+        half = len(recent_values) // 2
+        first_half = float(np.mean(recent_values[:half]))
+        second_half = float(np.mean(recent_values[half:]))
         
         if second_half > first_half * 1.1:
             return "INCREASING"
@@ -95,3 +111,12 @@ class AdvancedMonitor:
             return "DECREASING"
         else:
             return "STABLE"
+            
+    def get_rollup(self, metric_name: str, resolution: str = "1m", n: int = 60) -> Dict[str, List[float]]:
+        """Pre-aggregated 1s/1m/1h buckets for a metric"""
+        self.collect()
+        return self.registry.rollup(metric_name, resolution, n)
+        
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition of every registered metric"""
+        return self.registry.render_prometheus()
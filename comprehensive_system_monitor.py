@@ -3,18 +3,22 @@ import psutil
 import time
 import json
 import threading
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+from metrics_core import MetricsRegistry, metrics_registry
 
 class ComprehensiveSystemMonitor:
     """
     Comprehensive system monitoring for production readiness
     """
     
-    def __init__(self):
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
         self.monitoring_active = False
-        self.metrics_history = []
-        self.alerts = []
+        # Keep only last 1440 entries (24 hours at 1-minute intervals) and 1000 alerts
+        self.metrics_history = deque(maxlen=1440)
+        self.alerts = deque(maxlen=1000)
         self.thresholds = {
             "cpu_usage": 80.0,
             "memory_usage": 85.0,
@@ -22,12 +26,22 @@ class ComprehensiveSystemMonitor:
             "response_time": 2.0
         }
         self.lock = threading.Lock()
+        self.registry = registry or metrics_registry
+        self.gauges = {
+            "cpu": self.registry.gauge("system_cpu_usage_percent", "Host CPU utilisation"),
+            "memory": self.registry.gauge("system_memory_usage_percent", "Host memory utilisation"),
+            "swap": self.registry.gauge("system_swap_usage_percent", "Host swap utilisation"),
+            "disk": self.registry.gauge("system_disk_usage_percent", "Root filesystem utilisation"),
+            "processes": self.registry.gauge("system_process_count", "Number of running processes"),
+        }
+        # cpu_percent(interval=None) reports usage since the previous call; prime it once
+        psutil.cpu_percent(interval=None)
         
     def collect_system_metrics(self) -> Dict[str, Any]:
         """Collect comprehensive system metrics"""
         
-        # CPU metrics
-        cpu_percent = psutil.cpu_percent(interval=1)
+        # CPU metrics (non-blocking: utilisation since the previous sample)
+        cpu_percent = psutil.cpu_percent(interval=None)
         cpu_count = psutil.cpu_count()
         cpu_freq = psutil.cpu_freq()
         
@@ -86,6 +100,12 @@ class ComprehensiveSystemMonitor:
             }
         }
         
+        self.gauges["cpu"].record(cpu_percent)
+        self.gauges["memory"].record(memory.percent)
+        self.gauges["swap"].record(swap.percent)
+        self.gauges["disk"].record(metrics["disk"]["usage_percent"])
+        self.gauges["processes"].record(process_count)
+        
         return metrics
         
     def check_thresholds(self, metrics: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -133,15 +153,9 @@ class ComprehensiveSystemMonitor:
                     
                     with self.lock:
                         self.metrics_history.append(metrics)
-                        # Keep only last 1440 entries (24 hours at 1-minute intervals)
-                        if len(self.metrics_history) > 1440:
-                            self.metrics_history = self.metrics_history[-1440:]
-                            
                         self.alerts.extend(alerts)
-                        # Keep only last 1000 alerts
-                        if len(self.alerts) > 1000:
-                            self.alerts = self.alerts[-1000:]
-                            
+                        
+                    self.registry.collect()
                     time.sleep(interval)
                     
                 except Exception as e:
@@ -171,5 +185,9 @@ class ComprehensiveSystemMonitor:
                 "metrics_history_count": len(self.metrics_history)
             }
 
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition of the host gauges (and anything else in the registry)"""
+        return self.registry.render_prometheus()
+
 # Global instance
 system_monitor = ComprehensiveSystemMonitor()
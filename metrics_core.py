@@ -0,0 +1,505 @@
+
+import time
+import re
+import logging
+import threading
+import numpy as np
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Callable, Optional, Tuple, Any
+
+logger = logging.getLogger(__name__)
+
+# resolution name -> (bucket width in seconds, buckets kept)
+ROLLUP_RESOLUTIONS = {
+    "1s": (1, 3600),     # last hour at 1s
+    "1m": (60, 1440),    # last day at 1m
+    "1h": (3600, 720),   # last 30 days at 1h
+}
+
+SUMMARY_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+class HdrHistogram:
+    """
+    Log-linear (HDR-style) histogram over non-negative values.
+    
+    Values are scaled to integers (scale=1000 turns milliseconds into
+    microseconds) and bucketed with 2**(sub_bucket_bits-1) linear sub-buckets
+    per power of two, so relative error stays below ~1.6% at 7 bits while the
+    whole histogram is a couple of thousand int64 counters.
+    """
+    
+    def __init__(self, max_value: float = 3_600_000.0, scale: float = 1000.0, sub_bucket_bits: int = 7):
+        self.scale = scale
+        self.sub_bucket_bits = sub_bucket_bits
+        self.half = 1 << (sub_bucket_bits - 1)
+        self.max_scaled = int(max_value * scale)
+        self.counts = np.zeros(int(self._index(np.array([self.max_scaled]))[0]) + 1, dtype=np.int64)
+        self.total_count = 0
+        self.total_sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        
+    def _index(self, scaled: np.ndarray) -> np.ndarray:
+        v = np.clip(scaled, 0, self.max_scaled).astype(np.int64)
+        # frexp exponent is floor(log2(v)) + 1 for v >= 1, exact for the int range we use
+        _, exponent = np.frexp(np.maximum(v, 1).astype(np.float64))
+        shift = np.maximum(exponent.astype(np.int64) - self.sub_bucket_bits, 0)
+        return shift * self.half + (v >> shift)
+        
+    def _bucket_midpoints(self, indices: np.ndarray) -> np.ndarray:
+        shift = np.maximum(indices // self.half - 1, 0)
+        lower = (indices - shift * self.half) << shift
+        return (lower + ((1 << shift) - 1) / 2.0) / self.scale
+        
+    def record_values(self, values: np.ndarray):
+        """Add a batch of values"""
+        if len(values) == 0:
+            return
+        indices = self._index(np.rint(values * self.scale))
+        self.counts += np.bincount(indices, minlength=len(self.counts))
+        self.total_count += len(values)
+        self.total_sum += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        
+    def percentiles(self, quantiles: Tuple[float, ...] = SUMMARY_QUANTILES) -> Dict[float, float]:
+        """Value at each quantile (0-1), accurate to the bucket width"""
+        if self.total_count == 0:
+            return {q: 0.0 for q in quantiles}
+        cumulative = np.cumsum(self.counts)
+        ranks = np.maximum(np.ceil(np.asarray(quantiles) * self.total_count), 1)
+        indices = np.searchsorted(cumulative, ranks)
+        values = np.clip(self._bucket_midpoints(indices), self.min, self.max)
+        return dict(zip(quantiles, values.tolist()))
+
+
+class RollupRing:
+    """Fixed-size ring of count/sum/min/max/last aggregates at one time resolution"""
+    
+    def __init__(self, resolution_s: int, slots: int):
+        self.resolution_s = resolution_s
+        self.slots = slots
+        self.bucket_ids = np.full(slots, -1, dtype=np.int64)
+        self.count = np.zeros(slots, dtype=np.int64)
+        self.sum = np.zeros(slots)
+        self.min = np.full(slots, np.inf)
+        self.max = np.full(slots, -np.inf)
+        self.last = np.zeros(slots)
+        self.latest_bucket = -1
+        
+    def add(self, stamps: np.ndarray, values: np.ndarray):
+        """Fold a batch of (timestamp, value) samples into their buckets"""
+        ids = (stamps // self.resolution_s).astype(np.int64)
+        buckets, inverse = np.unique(ids, return_inverse=True)
+        positions = np.arange(len(values))
+        
+        counts = np.bincount(inverse)
+        sums = np.bincount(inverse, weights=values)
+        mins = np.full(len(buckets), np.inf)
+        maxs = np.full(len(buckets), -np.inf)
+        last_pos = np.zeros(len(buckets), dtype=np.int64)
+        np.minimum.at(mins, inverse, values)
+        np.maximum.at(maxs, inverse, values)
+        np.maximum.at(last_pos, inverse, positions)
+        
+        # A batch spanning more than the ring only keeps its newest buckets
+        keep = buckets > buckets[-1] - self.slots
+        buckets, counts, sums, mins, maxs, last_pos = (
+            buckets[keep], counts[keep], sums[keep], mins[keep], maxs[keep], last_pos[keep]
+        )
+        
+        slots = buckets % self.slots
+        stale = self.bucket_ids[slots] != buckets
+        reset = slots[stale]
+        self.count[reset] = 0
+        self.sum[reset] = 0.0
+        self.min[reset] = np.inf
+        self.max[reset] = -np.inf
+        
+        self.bucket_ids[slots] = buckets
+        self.count[slots] += counts
+        self.sum[slots] += sums
+        self.min[slots] = np.minimum(self.min[slots], mins)
+        self.max[slots] = np.maximum(self.max[slots], maxs)
+        self.last[slots] = values[last_pos]
+        self.latest_bucket = max(self.latest_bucket, int(buckets[-1]))
+        
+    def window(self, n: Optional[int] = None, closed_before: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Populated buckets in time order; optionally only the last n and/or those before a bucket id"""
+        valid = (self.bucket_ids >= 0) & (self.bucket_ids > self.latest_bucket - self.slots)
+        if closed_before is not None:
+            valid &= self.bucket_ids < closed_before
+        order = np.argsort(self.bucket_ids[valid])
+        if n is not None:
+            order = order[-n:]
+        count = self.count[valid][order]
+        return {
+            "start": self.bucket_ids[valid][order] * self.resolution_s,
+            "count": count,
+            "sum": self.sum[valid][order],
+            "mean": self.sum[valid][order] / np.maximum(count, 1),
+            "min": self.min[valid][order],
+            "max": self.max[valid][order],
+            "last": self.last[valid][order],
+        }
+
+
+class MetricSeries:
+    """
+    One time series backed by fixed-size NumPy ring buffers.
+    
+    record() writes the value and timestamp into the ring (through
+    memoryviews) and bumps the running count and sum under a per-series
+    lock, so concurrent writers never lose an increment or share a ring
+    slot; rollups, histograms and threshold rules are updated later in
+    batches by collect(), which never blocks writers. If writers lap the
+    collector between two collects, the overwritten samples are counted in
+    `dropped` and are missing from the rollups and quantiles, but `count`,
+    `value_sum` and `total` stay exact.
+    """
+    
+    KINDS = ("gauge", "counter", "latency")
+    
+    __slots__ = ("name", "kind", "help", "labels", "capacity", "_mask", "values", "stamps",
+                 "_values_view", "_stamps_view", "count", "value_sum", "_collected", "dropped", "total",
+                 "last_value", "rollups", "histogram", "_lock")
+                 
+    def __init__(self, name: str, kind: str = "gauge", help: str = "", labels: Optional[Dict[str, str]] = None,
+                 capacity: int = 4096):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown metric kind: {kind}")
+        if capacity & (capacity - 1):
+            raise ValueError("capacity must be a power of two")
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.labels = dict(labels or {})
+        self.capacity = capacity
+        self._mask = capacity - 1
+        self.values = np.zeros(capacity)
+        self.stamps = np.zeros(capacity)
+        self._values_view = memoryview(self.values)
+        self._stamps_view = memoryview(self.stamps)
+        self.count = 0
+        self.value_sum = 0.0
+        self._collected = 0
+        self.dropped = 0
+        self.total = 0.0
+        self.last_value = 0.0
+        self.rollups = {res: RollupRing(width, slots) for res, (width, slots) in ROLLUP_RESOLUTIONS.items()}
+        self.histogram = HdrHistogram() if kind == "latency" else None
+        self._lock = threading.Lock()
+        
+    def record(self, value: float, timestamp: Optional[float] = None, _now=time.time):
+        """Hot path: store one sample (safe from any number of writer threads)"""
+        stamp = timestamp or _now()
+        with self._lock:
+            i = self.count & self._mask
+            try:
+                self._values_view[i] = value
+            except TypeError:
+                value = float(value)
+                self._values_view[i] = value
+            self._stamps_view[i] = stamp
+            self.value_sum += value
+            self.count += 1
+        
+    def inc(self, amount: float = 1.0):
+        """Counter increment (alias of record)"""
+        self.record(amount)
+        
+    def _drain(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Samples written since the last drain, oldest first"""
+        end = self.count
+        start = max(self._collected, end - self.capacity)
+        self.dropped += start - self._collected
+        self._collected = end
+        if end == start:
+            return self.stamps[:0], self.values[:0]
+        lo, hi = start & self._mask, end & self._mask
+        if lo < hi:
+            return self.stamps[lo:hi].copy(), self.values[lo:hi].copy()
+        return (np.concatenate((self.stamps[lo:], self.stamps[:hi])),
+                np.concatenate((self.values[lo:], self.values[:hi])))
+                
+    def collect(self) -> np.ndarray:
+        """Fold new samples into rollups and histogram; returns the new values"""
+        stamps, values = self._drain()
+        # Exact, including samples the ring overwrote before this collect
+        self.total = self.value_sum
+        if len(values):
+            self.last_value = float(values[-1])
+            for ring in self.rollups.values():
+                ring.add(stamps, values)
+            if self.histogram is not None:
+                self.histogram.record_values(values)
+        return values
+        
+    def last(self, n: int) -> np.ndarray:
+        """Last n raw values still in the ring, oldest first"""
+        n = min(n, self.count, self.capacity)
+        idx = np.arange(self.count - n, self.count) & self._mask
+        return self.values[idx]
+
+
+@dataclass
+class ThresholdRule:
+    """
+    Warning/critical threshold evaluated incrementally by MetricsRegistry.collect().
+    
+    window="raw" aggregates only the samples collected since the previous
+    pass; "1s"/"1m"/"1h" evaluate each rollup bucket once, when it closes.
+    Alerts fire on transitions, not on every breaching sample.
+    """
+    metric: str
+    warning: float
+    critical: float
+    window: str = "raw"
+    aggregate: str = "max"   # max | min | mean | last | count
+    state: str = "OK"
+    last_bucket: int = -1
+    
+    def aggregate_values(self, values: np.ndarray) -> float:
+        if self.aggregate == "count":
+            return float(len(values))
+        if self.aggregate == "last":
+            return float(values[-1])
+        return float(getattr(np, self.aggregate)(values))
+        
+    def classify(self, value: float) -> Tuple[str, float]:
+        if value >= self.critical:
+            return "CRITICAL", self.critical
+        if value >= self.warning:
+            return "WARNING", self.warning
+        return "OK", self.warning
+
+
+class MetricsRegistry:
+    """Owns the metric series, runs rollups/rules on collect() and renders Prometheus text"""
+    
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self.series_by_key = {}
+        self.series_by_name = {}
+        self.rules = []
+        self.alert_callbacks = []
+        self.alerts = deque(maxlen=1000)
+        self.lock = threading.Lock()
+        self.collect_count = 0
+        self.last_collect_ms = 0.0
+        self._collector = None
+        self._collector_stop = threading.Event()
+        
+    def series(self, name: str, kind: str = "gauge", help: str = "", labels: Optional[Dict[str, str]] = None,
+               capacity: Optional[int] = None) -> MetricSeries:
+        """Get or create a series; hold on to the returned object in hot loops"""
+        key = (name, tuple(sorted((labels or {}).items())))
+        series = self.series_by_key.get(key)
+        if series is None:
+            with self.lock:
+                series = self.series_by_key.get(key)
+                if series is None:
+                    series = MetricSeries(name, kind, help, labels, capacity or self.capacity)
+                    self.series_by_key[key] = series
+                    self.series_by_name.setdefault(name, series)
+        return series
+        
+    def gauge(self, name: str, help: str = "", labels: Optional[Dict[str, str]] = None) -> MetricSeries:
+        return self.series(name, "gauge", help, labels)
+        
+    def counter(self, name: str, help: str = "", labels: Optional[Dict[str, str]] = None) -> MetricSeries:
+        return self.series(name, "counter", help, labels)
+        
+    def latency(self, name: str, help: str = "", labels: Optional[Dict[str, str]] = None) -> MetricSeries:
+        return self.series(name, "latency", help, labels)
+        
+    def record(self, name: str, value: float):
+        """Record by name (unlabelled series); one dict lookup on top of MetricSeries.record"""
+        self.series_by_name[name].record(value)
+        
+    def add_rule(self, rule: ThresholdRule) -> ThresholdRule:
+        with self.lock:
+            self.rules.append(rule)
+        return rule
+        
+    def on_alert(self, callback: Callable[[Dict[str, Any]], None]):
+        self.alert_callbacks.append(callback)
+        
+    def collect(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Drain every series, update rollups/histograms and evaluate rules on the new data only"""
+        started = time.perf_counter()
+        now = now or time.time()
+        fired = []
+        with self.lock:
+            new_values = {id(series): series.collect() for series in self.series_by_key.values()}
+            for rule in self.rules:
+                series = self.series_by_name.get(rule.metric)
+                if series is None:
+                    continue
+                if rule.window == "raw":
+                    values = new_values[id(series)]
+                    if len(values):
+                        fired.extend(self._evaluate(rule, rule.aggregate_values(values), now))
+                else:
+                    ring = series.rollups[rule.window]
+                    closed = ring.window(closed_before=int(now // ring.resolution_s))
+                    newer = closed["start"] // ring.resolution_s > rule.last_bucket
+                    for start, bucket in zip(closed["start"][newer], np.flatnonzero(newer)):
+                        agg = {key: closed[key][bucket] for key in ("count", "mean", "min", "max", "last")}
+                        fired.extend(self._evaluate(rule, float(agg[rule.aggregate]), now))
+                        rule.last_bucket = int(start // ring.resolution_s)
+            self.alerts.extend(fired)
+            self.collect_count += 1
+            self.last_collect_ms = (time.perf_counter() - started) * 1000
+            
+        for alert in fired:
+            for callback in self.alert_callbacks:
+                callback(alert)
+        return fired
+        
+    def _evaluate(self, rule: ThresholdRule, value: float, now: float) -> List[Dict[str, Any]]:
+        severity, threshold = rule.classify(value)
+        previous, rule.state = rule.state, severity
+        if severity == "OK" or severity == previous:
+            return []
+        return [{
+            "timestamp": datetime.fromtimestamp(now).isoformat(),
+            "metric": rule.metric,
+            "severity": severity,
+            "value": value,
+            "threshold": threshold,
+            "window": rule.window,
+            "message": f"{rule.metric} {severity}: {value} exceeds {threshold}"
+        }]
+        
+    def start(self, interval: float = 1.0):
+        """Run collect() every interval seconds on a daemon thread"""
+        if self._collector and self._collector.is_alive():
+            return
+        self._collector_stop.clear()
+        
+        def collect_loop():
+            while not self._collector_stop.wait(interval):
+                try:
+                    self.collect()
+                except Exception as e:
+                    logger.error(f"Metrics collect error: {e}")
+                    
+        self._collector = threading.Thread(target=collect_loop, daemon=True)
+        self._collector.start()
+        
+    def stop(self):
+        self._collector_stop.set()
+        
+    def rollup(self, name: str, resolution: str = "1m", n: Optional[int] = None) -> Dict[str, List[float]]:
+        """Pre-aggregated buckets for a series, oldest first"""
+        window = self.series_by_name[name].rollups[resolution].window(n)
+        return {key: values.tolist() for key, values in window.items()}
+        
+    def percentiles(self, name: str, quantiles: Tuple[float, ...] = SUMMARY_QUANTILES) -> Dict[float, float]:
+        return self.series_by_name[name].histogram.percentiles(quantiles)
+        
+    def render_prometheus(self, collect: bool = True) -> str:
+        """Prometheus text exposition format (0.0.4)"""
+        if collect:
+            self.collect()
+        lines = []
+        with self.lock:
+            families = {}
+            for series in self.series_by_key.values():
+                families.setdefault(series.name, []).append(series)
+                
+            for name, members in families.items():
+                metric = _prometheus_name(name)
+                kind = members[0].kind
+                if members[0].help:
+                    lines.append(f"# HELP {metric} {members[0].help}")
+                if kind == "gauge":
+                    lines.append(f"# TYPE {metric} gauge")
+                    lines.extend(f"{metric}{_prometheus_labels(s.labels)} {s.last_value}" for s in members)
+                elif kind == "counter":
+                    lines.append(f"# TYPE {metric} counter")
+                    lines.extend(f"{metric}_total{_prometheus_labels(s.labels)} {s.total}" for s in members)
+                else:
+                    lines.append(f"# TYPE {metric} summary")
+                    for s in members:
+                        for q, value in s.histogram.percentiles().items():
+                            lines.append(f"{metric}{_prometheus_labels(s.labels, quantile=q)} {value}")
+                        # Quantiles come from the sampled histogram; sum and count are exact
+                        lines.append(f"{metric}_sum{_prometheus_labels(s.labels)} {s.value_sum}")
+                        lines.append(f"{metric}_count{_prometheus_labels(s.labels)} {s.count}")
+        return "\n".join(lines) + "\n"
+        
+    def snapshot(self) -> Dict[str, Any]:
+        """Small status dict for health endpoints"""
+        with self.lock:
+            return {
+                "series": len(self.series_by_key),
+                "rules": len(self.rules),
+                "collect_count": self.collect_count,
+                "last_collect_ms": self.last_collect_ms,
+                "dropped_samples": sum(s.dropped for s in self.series_by_key.values()),
+                "recent_alerts": list(self.alerts)[-10:]
+            }
+
+
+def _prometheus_name(name: str) -> str:
+    name = re.sub(r"[^a-zA-Z0-9_:]", "_", name)
+    return name if not name[:1].isdigit() else f"_{name}"
+
+
+def _prometheus_label_value(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prometheus_labels(labels: Dict[str, str], quantile: Optional[float] = None) -> str:
+    pairs = list(labels.items())
+    if quantile is not None:
+        pairs.append(("quantile", quantile))
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{_prometheus_name(k)}="{_prometheus_label_value(v)}"' for k, v in pairs) + "}"
+
+
+class MetricsHTTPServer:
+    """Serves registry.render_prometheus() on /metrics from a daemon thread (localhost unless host is given)"""
+    
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9108):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.httpd = None
+        
+    def start(self):
+        registry = self.registry
+        
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                
+            def log_message(self, format, *args):
+                pass
+                
+        self.httpd = ThreadingHTTPServer((self.host, self.port), MetricsHandler)
+        self.port = self.httpd.server_address[1]
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+
+# Global instance
+metrics_registry = MetricsRegistry()